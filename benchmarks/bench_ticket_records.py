@@ -0,0 +1,103 @@
+"""Memory footprint of 100k mirrored tickets: API dicts vs trimmed dicts vs records.
+
+Run with ``python benchmarks/bench_ticket_records.py [count]``. Numbers are
+traced Python allocations (tracemalloc), so they exclude interpreter overhead.
+"""
+
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from freshdesk_mcp.records import STATS_FIELDS, TICKET_FIELDS, TicketRecord
+
+TYPES = ("Question", "Incident", "Problem", "Feature Request", None)
+TAGS = ("billing", "vip", "bug", "outage", "refund", "onboarding", "api", "mobile")
+
+
+def _timestamp(rng: random.Random) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1_700_000_000 + rng.randrange(30_000_000)))
+
+
+def make_ticket(ticket_id: int, rng: random.Random) -> dict:
+    """A list-endpoint ticket with ``include=stats``, shaped like the API's."""
+
+    return {
+        "id": ticket_id,
+        "subject": f"Cannot log in to account {rng.randrange(10**6)}",
+        "type": rng.choice(TYPES),
+        "status": rng.choice((2, 3, 4, 5)),
+        "priority": rng.choice((1, 2, 3, 4)),
+        "source": rng.choice((1, 2, 3, 7, 9)),
+        "requester_id": rng.randrange(10**9, 10**10),
+        "responder_id": rng.choice((None, rng.randrange(10**9, 10**10))),
+        "group_id": rng.randrange(10**9, 10**9 + 20),
+        "company_id": rng.choice((None, rng.randrange(10**9, 10**9 + 5000))),
+        "tags": rng.sample(TAGS, rng.randrange(4)),
+        "created_at": _timestamp(rng),
+        "updated_at": _timestamp(rng),
+        "due_by": _timestamp(rng),
+        "fr_due_by": _timestamp(rng),
+        "email_config_id": None,
+        "product_id": None,
+        "is_escalated": False,
+        "fr_escalated": False,
+        "spam": False,
+        "cc_emails": [],
+        "fwd_emails": [],
+        "reply_cc_emails": [],
+        "to_emails": None,
+        "custom_fields": {"cf_plan": rng.choice(("free", "pro", "enterprise")), "cf_region": "eu"},
+        "stats": {
+            "first_responded_at": _timestamp(rng),
+            "resolved_at": rng.choice((None, _timestamp(rng))),
+            "closed_at": None,
+            "agent_responded_at": _timestamp(rng),
+            "requester_responded_at": None,
+            "status_updated_at": _timestamp(rng),
+            "pending_since": None,
+            "reopened_at": None,
+        },
+    }
+
+
+def trimmed(ticket: dict) -> dict:
+    result = {field: ticket.get(field) for field in TICKET_FIELDS}
+    for field in STATS_FIELDS:
+        result[field] = ticket["stats"].get(field)
+    return result
+
+
+def measure(label: str, build, json_text: str, count: int) -> int:
+    """Decode ``json_text`` with ``build`` and report what stays allocated."""
+
+    started = time.perf_counter()
+    build(json_text)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    held = build(json_text)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<14} {current / 2**20:8.1f} MiB {current / count:8.0f} B/ticket {elapsed:6.2f}s")
+    del held
+    return current
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(42)
+    # Every representation is decoded from the same JSON text, like a real
+    # sync, so no strings are shared with a payload built outside the trace.
+    json_text = json.dumps([make_ticket(n, rng) for n in range(1, count + 1)])
+    print(f"{count} tickets\n{'representation':<14} {'traced':>12} {'per ticket':>13} {'time':>7}")
+
+    api = measure("api dicts", json.loads, json_text, count)
+    dicts = measure("trimmed dicts", lambda text: [trimmed(t) for t in json.loads(text)], json_text, count)
+    records = measure("records", lambda text: [TicketRecord.from_api(t) for t in json.loads(text)], json_text, count)
+    print(f"records use {records / dicts:.0%} of trimmed dicts and {records / api:.0%} of API dicts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Live SLA and backlog view over the local ticket store.
+
+:class:`BacklogMonitor` listens to the :class:`~.store.TicketStore` and keeps,
+for unresolved tickets, three priority queues: by resolution due time
+(``due_by``), by first-response due time (``fr_due_by``, until the first
+response) and by creation time while unassigned. Each ticket change costs a
+heap push; entries left behind by earlier versions of a ticket are skipped
+when read and dropped when they outnumber the live ones. Reading the tickets
+due before a cutoff walks a heap in order without popping it, so SLA risk
+and backlog counts take time proportional to the answer, not the backlog.
+
+With FRESHDESK_BACKLOG_POLL_INTERVAL set (seconds, default 0 = off) a
+background task keeps the store current by pulling tickets updated since the
+last poll.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .config import env_float
+from .deadlines import detach
+from .lanes import Lane, use_lane
+from .records import TicketRecord, format_timestamp
+from .store import TicketStore
+
+RESOLVED_STATUSES = frozenset({4, 5})
+# Freshdesk stops the SLA clock while a ticket is Pending.
+SLA_PAUSED_STATUSES = frozenset({3})
+
+RESOLUTION = "resolution"
+FIRST_RESPONSE = "first_response"
+UNASSIGNED = "unassigned"
+QUEUES = (RESOLUTION, FIRST_RESPONSE, UNASSIGNED)
+
+# Pause after a failed poll before trying again.
+POLL_ERROR_BACKOFF = 60.0
+
+
+class _Open:
+    """What the monitor remembers about one unresolved ticket."""
+
+    __slots__ = ("subject", "status", "priority", "group_id", "responder_id")
+
+    def __init__(self, record: TicketRecord) -> None:
+        self.subject = record.subject
+        self.status = record.status
+        self.priority = record.priority
+        self.group_id = record.group_id
+        self.responder_id = record.responder_id
+
+
+def _queue_keys(record: TicketRecord) -> Dict[str, Optional[int]]:
+    return {
+        RESOLUTION: record.due_by,
+        FIRST_RESPONSE: record.fr_due_by if record.first_responded_at is None else None,
+        UNASSIGNED: record.created_at if record.responder_id is None else None,
+    }
+
+
+class BacklogMonitor:
+    """Priority queues of unresolved tickets, kept current from ticket store changes.
+
+    Args:
+        store: The ticket store to follow
+    """
+
+    def __init__(self, store: TicketStore) -> None:
+        self._store = store
+        self._task: Optional[asyncio.Task] = None
+        # The report of the latest background poll.
+        self.last_poll: Optional[Dict[str, Any]] = None
+        self.reset()
+        store.subscribe(self.apply)
+
+    def reset(self) -> None:
+        self._open: Dict[int, _Open] = {}
+        self._keys: Dict[str, Dict[int, int]] = {queue: {} for queue in QUEUES}
+        self._heaps: Dict[str, List[Tuple[int, int]]] = {queue: [] for queue in QUEUES}
+        self._counts: Dict[str, Counter] = {"status": Counter(), "priority": Counter(), "group": Counter()}
+        # Store generation the queues were built from; None until the first build.
+        self._generation: Optional[int] = None
+
+    # -- maintenance ---------------------------------------------------
+
+    def current(self) -> bool:
+        return self._generation == self._store.generation
+
+    def ensure_current(self) -> None:
+        """Rebuild the queues from the store after a reset or restore."""
+
+        if self.current():
+            return
+        generation = self._store.generation
+        self.reset()
+        for record in self._store:
+            self._set(record.id, record, push=False)
+        for queue, heap in self._heaps.items():
+            heap.extend((key, ticket_id) for ticket_id, key in self._keys[queue].items())
+            heapq.heapify(heap)
+        self._generation = generation
+
+    def apply(self, ticket_id: int, record: Optional[TicketRecord]) -> None:
+        """Store listener: account for one changed or removed ticket."""
+
+        if self.current():
+            self._set(ticket_id, record, push=True)
+
+    def _set(self, ticket_id: int, record: Optional[TicketRecord], push: bool) -> None:
+        previous = self._open.pop(ticket_id, None)
+        if previous is not None:
+            self._count(previous, -1)
+        is_open = record is not None and record.status not in RESOLVED_STATUSES
+        if is_open:
+            entry = self._open[ticket_id] = _Open(record)
+            self._count(entry, 1)
+        keys = _queue_keys(record) if is_open else {}
+        for queue in QUEUES:
+            key = keys.get(queue)
+            current = self._keys[queue]
+            if key is None:
+                current.pop(ticket_id, None)
+                continue
+            if current.get(ticket_id) == key:
+                continue
+            current[ticket_id] = key
+            if push:
+                heap = self._heaps[queue]
+                heapq.heappush(heap, (key, ticket_id))
+                if len(heap) > 2 * len(current) + 64:
+                    # Mostly stale entries: rebuild from the live keys.
+                    self._heaps[queue] = [(k, i) for i, k in current.items()]
+                    heapq.heapify(self._heaps[queue])
+
+    def _count(self, entry: _Open, delta: int) -> None:
+        for name, value in (("status", entry.status), ("priority", entry.priority), ("group", entry.group_id)):
+            counter = self._counts[name]
+            counter[value] += delta
+            if counter[value] <= 0:
+                del counter[value]
+
+    # -- reading -------------------------------------------------------
+
+    def walk(self, queue: str) -> Iterator[Tuple[int, int]]:
+        """Yield live ``(key, ticket_id)`` entries of a queue in key order, without popping."""
+
+        heap = self._heaps[queue]
+        current = self._keys[queue]
+        frontier = [(heap[0], 0)] if heap else []
+        seen = set()
+        while frontier:
+            (key, ticket_id), index = heapq.heappop(frontier)
+            # A ticket whose key changed and changed back has two live-looking entries.
+            if current.get(ticket_id) == key and ticket_id not in seen:
+                seen.add(ticket_id)
+                yield key, ticket_id
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+
+    def open_ticket(self, ticket_id: int) -> Optional[_Open]:
+        return self._open.get(ticket_id)
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def sla_risk(
+        self,
+        within: float,
+        limit: int,
+        now: Optional[float] = None,
+        group_id: Optional[int] = None,
+        agent_id: Optional[int] = None,
+        include_paused: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Tickets whose resolution or first response is overdue or due within ``within`` seconds.
+
+        Args:
+            within: Seconds ahead of now to look
+            limit: Maximum number of entries to return
+            now: Current epoch seconds (default: the clock)
+            group_id: Only tickets of this group
+            agent_id: Only tickets assigned to this agent
+            include_paused: Also report Pending tickets, whose SLA clock is stopped
+        """
+
+        now = time.time() if now is None else now
+        cutoff = now + within
+        found: List[Dict[str, Any]] = []
+        for queue in (FIRST_RESPONSE, RESOLUTION):
+            matched = 0
+            for due, ticket_id in self.walk(queue):
+                if due > cutoff or matched >= limit:
+                    break
+                ticket = self._open[ticket_id]
+                if group_id is not None and ticket.group_id != group_id:
+                    continue
+                if agent_id is not None and ticket.responder_id != agent_id:
+                    continue
+                if not include_paused and ticket.status in SLA_PAUSED_STATUSES:
+                    continue
+                matched += 1
+                found.append({
+                    "id": ticket_id,
+                    "breach": queue,
+                    "due_at": format_timestamp(due),
+                    "overdue": due <= now,
+                    "minutes_left": round((due - now) / 60),
+                    "subject": ticket.subject,
+                    "status": ticket.status,
+                    "priority": ticket.priority,
+                    "group_id": ticket.group_id,
+                    "responder_id": ticket.responder_id,
+                })
+        found.sort(key=lambda item: (item["minutes_left"], -(item["priority"] or 0)))
+        return found[:limit]
+
+    def _due_before(self, queue: str, cutoff: float) -> int:
+        count = 0
+        for due, ticket_id in self.walk(queue):
+            if due > cutoff:
+                break
+            if self._open[ticket_id].status not in SLA_PAUSED_STATUSES:
+                count += 1
+        return count
+
+    def summary(self, now: Optional[float] = None, oldest: int = 5) -> Dict[str, Any]:
+        """Counts of unresolved tickets, SLA breaches and the oldest unassigned tickets."""
+
+        now = time.time() if now is None else now
+        unassigned = []
+        for created, ticket_id in self.walk(UNASSIGNED):
+            if len(unassigned) >= oldest:
+                break
+            unassigned.append({
+                "id": ticket_id,
+                "subject": self._open[ticket_id].subject,
+                "age_hours": round((now - created) / 3600, 1),
+            })
+        return {
+            "open": len(self._open),
+            "by_status": dict(self._counts["status"]),
+            "by_priority": dict(self._counts["priority"]),
+            "by_group": dict(self._counts["group"].most_common()),
+            "unassigned": {"count": len(self._keys[UNASSIGNED]), "oldest": unassigned},
+            "overdue": {
+                RESOLUTION: self._due_before(RESOLUTION, now),
+                FIRST_RESPONSE: self._due_before(FIRST_RESPONSE, now),
+            },
+            "due_within": {
+                f"{hours}h": self._due_before(RESOLUTION, now + hours * 3600) - self._due_before(RESOLUTION, now)
+                for hours in (1, 4, 24)
+            },
+        }
+
+    # -- background polling --------------------------------------------
+
+    def interval(self) -> float:
+        return env_float("FRESHDESK_BACKLOG_POLL_INTERVAL", 0.0)
+
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, poll: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        """Poll in the background when FRESHDESK_BACKLOG_POLL_INTERVAL is set.
+
+        Args:
+            poll: Coroutine syncing the ticket store; returns its sync report
+        """
+
+        if self.interval() > 0 and not self.running():
+            self._task = asyncio.get_running_loop().create_task(self._run(poll))
+
+    def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            try:
+                task.cancel()
+            except RuntimeError:
+                # The loop that ran the task is already closed.
+                pass
+
+    async def _run(self, poll: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        detach()
+        with use_lane(Lane.BACKGROUND):
+            while True:
+                try:
+                    self.last_poll = await poll()
+                    self.ensure_current()
+                    # A first sync takes many polls; keep going until it is complete.
+                    wait = self.interval() if self.last_poll.get("complete") else 0.0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logging.warning(f"Backlog poll failed: {e}")
+                    wait = max(self.interval(), POLL_ERROR_BACKOFF)
+                await asyncio.sleep(wait)
@@ -0,0 +1,390 @@
+"""Record and replay Freshdesk HTTP traffic.
+
+Set ``FRESHDESK_CASSETTE`` to a file and ``FRESHDESK_CASSETTE_MODE`` to
+``record`` to append every request the server sends, with its response and
+latency, to the cassette. In ``replay`` mode responses are served from the
+cassette without touching the network, after the recorded latency multiplied
+by ``FRESHDESK_CASSETTE_LATENCY_SCALE`` (``0`` answers at once). A cassette can
+also be served over HTTP by :func:`create_app`, as a stand-in other processes
+reach through ``FRESHDESK_BASE_URL``.
+
+Cassettes are newline-delimited JSON, gzip-compressed when the path ends in
+``.gz``. Secrets never reach the file: credentials and cookies are dropped,
+the account host is not stored, request bodies are not stored, and the API
+key and signed-URL tokens are masked in URLs and response bodies.
+
+Recording does not buffer responses: bodies stream through to the caller and
+are copied on the way. Only JSON and text bodies up to
+``FRESHDESK_CASSETTE_MAX_BODY`` bytes (default 10 MB) are stored; others, such
+as attachment downloads, are recorded by size and replayed as that many zero
+bytes.
+"""
+
+import asyncio
+import atexit
+import base64
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, IO, Iterator, List, Optional, Tuple
+
+import httpx
+
+from .config import env_float, env_int, env_str
+
+RECORD = "record"
+REPLAY = "replay"
+MODES = (RECORD, REPLAY)
+
+# Response headers worth keeping; everything else is dropped when recording.
+KEPT_HEADERS = ("content-type", "link", "retry-after", "x-ratelimit-total", "x-ratelimit-remaining")
+
+DEFAULT_MAX_BODY = 10_000_000
+# Chunk size of replayed bodies that were recorded by size only.
+ZERO_CHUNK_SIZE = 64 * 1024
+
+SCRUBBED = "<scrubbed>"
+_TOKEN_PARAMS = re.compile(
+    r"((?:X-Amz-(?:Signature|Credential|Security-Token))|token|signature|api_key|apikey)=([^&\"'\s<>]+)",
+    re.IGNORECASE,
+)
+
+_NUMERIC_SEGMENT = re.compile(r"/\d+")
+
+Key = Tuple[str, str]
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def scrub(text: str, secrets: Tuple[str, ...] = ()) -> str:
+    """Mask signed-URL tokens and the given secret values in ``text``."""
+
+    text = _TOKEN_PARAMS.sub(lambda match: f"{match.group(1)}={SCRUBBED}", text)
+    for secret in secrets:
+        if secret:
+            text = text.replace(secret, SCRUBBED)
+    return text
+
+
+def request_key(method: str, url: httpx.URL, secrets: Tuple[str, ...] = ()) -> Key:
+    """Match key: method plus scrubbed path and sorted query, without the host."""
+
+    query = "&".join(f"{k}={v}" for k, v in sorted(url.params.multi_items()))
+    target = url.path + (f"?{query}" if query else "")
+    return method.upper(), scrub(target, secrets)
+
+
+def _secrets() -> Tuple[str, ...]:
+    return tuple(value for value in (env_str("FRESHDESK_API_KEY"),) if value)
+
+
+class Cassette:
+    """A cassette file: appends recorded exchanges and serves them back in order.
+
+    Args:
+        path: Cassette file; ``.gz`` selects gzip compression
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._writer: Optional[IO[str]] = None
+        self._started: Optional[float] = None
+        self._queues: Optional[Dict[Key, Deque[Dict[str, Any]]]] = None
+        self._last: Dict[Key, Dict[str, Any]] = {}
+        self.misses = 0
+
+    # -- recording -----------------------------------------------------
+
+    def record(self, request: httpx.Request, status: int, headers: httpx.Headers,
+               content: Optional[bytes], elapsed: float, size: int = 0) -> None:
+        """Append one exchange; a ``content`` of None stores only the body's ``size``."""
+
+        secrets = _secrets()
+        method, target = request_key(request.method, request.url, secrets)
+        entry: Dict[str, Any] = {
+            "method": method,
+            "url": target,
+            "status": status,
+            "headers": {name: headers[name] for name in KEPT_HEADERS if name in headers},
+            "elapsed": round(elapsed, 4),
+        }
+        if content is None:
+            entry["body_size"] = size
+        else:
+            try:
+                entry["body"] = scrub(content.decode("utf-8"), secrets)
+            except UnicodeDecodeError:
+                entry["body_b64"] = base64.b64encode(content).decode("ascii")
+        with self._lock:
+            now = time.monotonic()
+            if self._started is None:
+                self._started = now
+            entry["t"] = round(now - self._started, 4)
+            if self._writer is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._writer = _open(self.path, "a")
+            self._writer.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._writer.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    # -- replay --------------------------------------------------------
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        with _open(self.path, "r") as fh:
+            try:
+                for line in fh:
+                    if line.strip():
+                        yield json.loads(line)
+            except EOFError:
+                # A gzip cassette still being recorded has no trailer yet.
+                return
+
+    def _load(self) -> Dict[Key, Deque[Dict[str, Any]]]:
+        if self._queues is None:
+            queues: Dict[Key, Deque[Dict[str, Any]]] = defaultdict(deque)
+            for entry in self.entries():
+                queues[(entry["method"], entry["url"])].append(entry)
+            self._queues = queues
+        return self._queues
+
+    def next_response(self, method: str, url: httpx.URL) -> Optional[Dict[str, Any]]:
+        """The next recorded exchange for this request; the last one repeats once used up."""
+
+        key = request_key(method, url, _secrets())
+        with self._lock:
+            queue = self._load().get(key)
+            if queue:
+                self._last[key] = queue.popleft()
+            entry = self._last.get(key)
+            if entry is None:
+                self.misses += 1
+            return entry
+
+    def rewind(self) -> None:
+        with self._lock:
+            self._queues = None
+            self._last.clear()
+            self.misses = 0
+
+
+def _body(entry: Dict[str, Any]) -> bytes:
+    if "body_b64" in entry:
+        return base64.b64decode(entry["body_b64"])
+    return entry.get("body", "").encode("utf-8")
+
+
+async def _zeros(size: int) -> AsyncIterator[bytes]:
+    while size > 0:
+        chunk = min(size, ZERO_CHUNK_SIZE)
+        size -= chunk
+        yield bytes(chunk)
+
+
+class _ZeroStream(httpx.AsyncByteStream):
+    """Body of ``size`` zero bytes, for exchanges recorded by size only."""
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in _zeros(self._size):
+            yield chunk
+
+
+def _is_text(headers: httpx.Headers) -> bool:
+    content_type = headers.get("content-type", "").lower()
+    return content_type.startswith("text/") or "json" in content_type or "xml" in content_type
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Passes a response body through chunk by chunk, keeping a copy up to ``limit`` bytes.
+
+    ``on_close`` receives the kept chunks (None once the body was not worth
+    keeping or went over ``limit``) and the body's size.
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream, keep: bool, limit: int,
+                 on_close: Callable[[Optional[List[bytes]], int], None]) -> None:
+        self._stream = stream
+        self._chunks: Optional[List[bytes]] = [] if keep else None
+        self._limit = limit
+        self._size = 0
+        self._on_close: Optional[Callable[[Optional[List[bytes]], int], None]] = on_close
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._size += len(chunk)
+            if self._chunks is not None:
+                if self._size > self._limit:
+                    self._chunks = None
+                else:
+                    self._chunks.append(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close(self._chunks, self._size)
+
+
+def _miss_body(method: str, url: httpx.URL) -> Dict[str, Any]:
+    return {"code": "cassette_miss", "message": f"No recorded response for {method} {url.path}"}
+
+
+def latency_scale() -> float:
+    return max(0.0, env_float("FRESHDESK_CASSETTE_LATENCY_SCALE", 1.0))
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """Transport recording through ``transport`` or replaying from a cassette.
+
+    Args:
+        cassette: Cassette to write to or read from
+        mode: ``record`` or ``replay``
+        transport: Transport that sends requests while recording
+    """
+
+    def __init__(self, cassette: Cassette, mode: str, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Cassette mode must be one of {', '.join(MODES)}, not {mode!r}")
+        self._cassette = cassette
+        self._mode = mode
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._mode == REPLAY:
+            return await self._replay(request)
+
+        started = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        status, headers = response.status_code, response.headers
+
+        def on_close(chunks: Optional[List[bytes]], size: int) -> None:
+            content = None
+            if chunks is not None:
+                try:
+                    # Reading through a Response decodes any content-encoding.
+                    content = httpx.Response(status, headers=headers, content=b"".join(chunks)).content
+                except httpx.DecodingError:
+                    content = None
+            self._cassette.record(request, status, headers, content, time.perf_counter() - started, size)
+
+        limit = env_int("FRESHDESK_CASSETTE_MAX_BODY", DEFAULT_MAX_BODY)
+        stream = _RecordingStream(response.stream, _is_text(headers), limit, on_close)
+        return httpx.Response(status, headers=headers, stream=stream, extensions=response.extensions)
+
+    async def _replay(self, request: httpx.Request) -> httpx.Response:
+        entry = self._cassette.next_response(request.method, request.url)
+        if entry is None:
+            logging.warning(f"Cassette miss: {request.method} {request.url.path}")
+            return httpx.Response(404, json=_miss_body(request.method, request.url))
+        delay = entry.get("elapsed", 0.0) * latency_scale()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if "body_size" in entry:
+            return httpx.Response(
+                entry["status"], headers=entry.get("headers") or {}, stream=_ZeroStream(entry["body_size"])
+            )
+        return httpx.Response(entry["status"], headers=entry.get("headers") or {}, content=_body(entry))
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+_cassettes: Dict[str, Cassette] = {}
+
+
+def cassette_for(path: str) -> Cassette:
+    """The process-wide cassette for ``path``, so every client shares its replay position."""
+
+    path = os.path.expanduser(path)
+    cassette = _cassettes.get(path)
+    if cassette is None:
+        cassette = _cassettes[path] = Cassette(path)
+    return cassette
+
+
+def transport_from_env() -> Optional[CassetteTransport]:
+    """A cassette transport when FRESHDESK_CASSETTE is set, else None."""
+
+    path = env_str("FRESHDESK_CASSETTE")
+    if path is None:
+        return None
+    mode = (env_str("FRESHDESK_CASSETTE_MODE") or REPLAY).lower()
+    return CassetteTransport(cassette_for(path), mode)
+
+
+def reset() -> None:
+    for cassette in _cassettes.values():
+        cassette.close()
+    _cassettes.clear()
+
+
+atexit.register(reset)
+
+
+def summarize(cassette: Cassette) -> Dict[str, Any]:
+    """Exchange counts, statuses and latency per endpoint path, e.g. for ``fd cassette info``."""
+
+    endpoints: Dict[str, Dict[str, Any]] = {}
+    count = 0
+    duration = 0.0
+    for entry in cassette.entries():
+        count += 1
+        duration = max(duration, entry.get("t", 0.0))
+        path = _NUMERIC_SEGMENT.sub("/{id}", entry["url"].split("?")[0])
+        name = f"{entry['method']} {path}"
+        stats = endpoints.setdefault(name, {"requests": 0, "statuses": {}, "seconds": 0.0})
+        stats["requests"] += 1
+        stats["seconds"] += entry.get("elapsed", 0.0)
+        status = str(entry["status"])
+        stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+    for stats in endpoints.values():
+        stats["mean_seconds"] = round(stats.pop("seconds") / stats["requests"], 4)
+    return {"exchanges": count, "duration_seconds": duration, "endpoints": endpoints}
+
+
+def create_app(cassette: Cassette):
+    """Starlette app answering every request from ``cassette``, as a local Freshdesk stand-in."""
+
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, Response, StreamingResponse
+    from starlette.routing import Route
+
+    async def handle(request: Request) -> Response:
+        url = httpx.URL(str(request.url))
+        entry = cassette.next_response(request.method, url)
+        if entry is None:
+            return JSONResponse(_miss_body(request.method, url), status_code=404)
+        delay = entry.get("elapsed", 0.0) * latency_scale()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if "body_size" in entry:
+            return StreamingResponse(
+                _zeros(entry["body_size"]), status_code=entry["status"], headers=entry.get("headers") or {}
+            )
+        return Response(_body(entry), status_code=entry["status"], headers=entry.get("headers") or {})
+
+    methods = ["GET", "POST", "PUT", "DELETE", "PATCH"]
+    return Starlette(routes=[Route("/{path:path}", handle, methods=methods)])
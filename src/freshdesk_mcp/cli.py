@@ -1,18 +1,45 @@
 import asyncio
 import json
-from typing import Optional
+import os
+from typing import List, Optional
 
 import typer
 
-from . import server
+from . import cassettes, loadtest, server
 
 app = typer.Typer(add_completion=False, help="Freshdesk CLI (wraps freshdesk-mcp functions)")
 
 tickets_app = typer.Typer(help="Ticket operations")
 companies_app = typer.Typer(help="Company operations")
+contacts_app = typer.Typer(help="Contact operations")
+cassette_app = typer.Typer(help="Recorded HTTP traffic")
 
 app.add_typer(tickets_app, name="tickets")
 app.add_typer(companies_app, name="companies")
+app.add_typer(contacts_app, name="contacts")
+app.add_typer(cassette_app, name="cassette")
+
+
+@app.callback()
+def options(
+    cassette: Optional[str] = typer.Option(
+        None, "--cassette", help="Record HTTP traffic to, or replay it from, this file (.gz to compress)"
+    ),
+    cassette_mode: str = typer.Option("replay", "--cassette-mode", help="record or replay"),
+    latency_scale: Optional[float] = typer.Option(
+        None, "--latency-scale", help="Multiply replayed latencies by this factor (0 = no delay)"
+    ),
+) -> None:
+    """Freshdesk CLI (wraps freshdesk-mcp functions)."""
+
+    # The server reads its settings from the environment at call time.
+    if cassette:
+        if cassette_mode not in cassettes.MODES:
+            raise typer.BadParameter("must be record or replay", param_hint="--cassette-mode")
+        os.environ["FRESHDESK_CASSETTE"] = cassette
+        os.environ["FRESHDESK_CASSETTE_MODE"] = cassette_mode
+    if latency_scale is not None:
+        os.environ["FRESHDESK_CASSETTE_LATENCY_SCALE"] = str(latency_scale)
 
 
 def _print(data, as_json: bool) -> None:
@@ -72,14 +99,30 @@ def ticket_delete(ticket_id: int, json_out: bool = typer.Option(True, "--json/--
 def ticket_reply(
     ticket_id: int,
     body: str = typer.Option(..., "--body", help="Reply body"),
+    attach: Optional[List[str]] = typer.Option(None, "--attach", help="File to attach (repeatable)"),
     json_out: bool = typer.Option(True, "--json/--text"),
 ) -> None:
     """Create a reply on a ticket."""
 
-    data = _run(server.create_ticket_reply(ticket_id, body))
+    data = _run(server.create_ticket_reply(ticket_id, body, attachment_paths=attach or None))
     _print(data, json_out)
 
 
+@tickets_app.command("attachments")
+def ticket_attachments(
+    ticket_id: int,
+    dest: str = typer.Option(".", "--dest", help="Directory to download into"),
+    conversations: bool = typer.Option(True, "--conversations/--no-conversations"),
+    json_out: bool = typer.Option(True, "--json/--text"),
+) -> None:
+    """Download a ticket's attachments."""
+
+    data = _run(server.download_ticket_attachments(ticket_id, dest, include_conversations=conversations))
+    _print(data, json_out)
+    if isinstance(data, dict) and (data.get("error") or data.get("errors")):
+        raise typer.Exit(code=1)
+
+
 @companies_app.command("list")
 def company_list(json_out: bool = typer.Option(True, "--json/--text")) -> None:
     """List companies."""
@@ -115,5 +158,125 @@ def company_fields(json_out: bool = typer.Option(True, "--json/--text")) -> None
     _print(data, json_out)
 
 
+async def _import_all(path: str, rows_per_call: Optional[int], dry_run: bool, restart: bool, progress: Optional[str]) -> dict:
+    while True:
+        data = await server.run_contact_import(
+            path, max_rows=rows_per_call, dry_run=dry_run, restart=restart, progress_path=progress
+        )
+        if data.get("error") or data.get("complete") or dry_run:
+            return data
+        typer.echo(
+            f"row {data['next_row']}: {data['created']} created, {data['updated']} updated, {data['failed']} failed",
+            err=True,
+        )
+        # Later calls carry on from the saved progress.
+        restart = False
+
+
+@contacts_app.command("import")
+def contact_import(
+    path: str,
+    dry_run: bool = typer.Option(False, "--dry-run", help="Count creates and updates without sending them"),
+    restart: bool = typer.Option(False, "--restart", help="Ignore saved progress and start from the first row"),
+    progress: Optional[str] = typer.Option(None, "--progress", help="Progress file (default PATH.progress.json)"),
+    concurrency: Optional[int] = typer.Option(None, "--concurrency", help="Contacts upserted at a time"),
+    rows_per_call: int = typer.Option(1000, "--rows-per-call", help="Rows between progress reports"),
+    json_out: bool = typer.Option(True, "--json/--text"),
+) -> None:
+    """Create or update contacts from a CSV or NDJSON file, resuming an interrupted import."""
+
+    if concurrency is not None:
+        os.environ["FRESHDESK_IMPORT_CONCURRENCY"] = str(concurrency)
+    data = _run(_import_all(path, max(1, rows_per_call), dry_run, restart, progress))
+    _print(data, json_out)
+    if data.get("error"):
+        raise typer.Exit(code=1)
+
+
+@cassette_app.command("info")
+def cassette_info(path: str, json_out: bool = typer.Option(True, "--json/--text")) -> None:
+    """Summarize a cassette: exchanges, duration and per-endpoint statuses and latency."""
+
+    _print(cassettes.summarize(cassettes.Cassette(path)), json_out)
+
+
+@cassette_app.command("serve")
+def cassette_serve(
+    path: str,
+    host: str = typer.Option("127.0.0.1", "--host"),
+    port: int = typer.Option(8900, "--port"),
+) -> None:
+    """Serve a cassette over HTTP as a local Freshdesk stand-in.
+
+    Point clients at it with FRESHDESK_BASE_URL=http://HOST:PORT/api/v2.
+    """
+
+    import uvicorn
+
+    uvicorn.run(cassettes.create_app(cassettes.Cassette(path)), host=host, port=port, log_level="warning")
+
+
+def _loadtest_text(report: dict) -> str:
+    latency = report["latency"]
+    lines = [
+        f"{report['calls']} calls, {report['errors']} errors in {report['duration_seconds']}s"
+        f" ({report['throughput_per_second']}/s); connected in {report['connect_seconds']}s",
+        f"latency ms: p50 {latency['p50_ms']}  p95 {latency['p95_ms']}  p99 {latency['p99_ms']}  max {latency['max_ms']}",
+        f"server: max loop lag {report['server']['max_loop_lag_ms']} ms, max RSS {report['server']['max_rss_bytes']} bytes",
+        "",
+        f"{'tool':<28}{'calls':>7}{'errors':>8}{'p50':>9}{'p95':>9}{'p99':>9}",
+    ]
+    for name, stats in report["tools"].items():
+        lines.append(
+            f"{name:<28}{stats['calls']:>7}{stats['errors']:>8}"
+            f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+        )
+    lines += ["", f"{'t':>7}{'calls':>7}{'errors':>8}{'p99':>9}{'lag':>9}{'rss MB':>9}"]
+    for point in report["timeline"]:
+        rss = round(point["rss_bytes"] / 2**20, 1) if point["rss_bytes"] else None
+        lines.append(
+            f"{point['t']:>7}{point['calls']:>7}{point['errors']:>8}"
+            f"{str(point['p99_ms']):>9}{str(point['loop_lag_max_ms']):>9}{str(rss):>9}"
+        )
+    return "\n".join(lines)
+
+
+@app.command("loadtest")
+def loadtest_command(
+    clients: int = typer.Option(10, "--clients", "-c", help="Concurrent MCP clients"),
+    duration: float = typer.Option(30.0, "--duration", "-d", help="Seconds to run"),
+    requests: Optional[int] = typer.Option(None, "--requests", help="Stop each client after this many calls"),
+    mix: str = typer.Option("mixed", "--mix", help=f"Tool mix: {', '.join(loadtest.MIXES)}"),
+    transport: str = typer.Option("stdio", "--transport", help=f"MCP transport: {', '.join(loadtest.TRANSPORTS)}"),
+    think_time: float = typer.Option(0.0, "--think-time", help="Mean pause between a client's calls, in seconds"),
+    sample_interval: float = typer.Option(1.0, "--sample-interval", help="Seconds between timeline samples"),
+    tickets: int = typer.Option(500, "--tickets", help="Tickets in the synthetic stand-in"),
+    latency: float = typer.Option(0.05, "--latency", help="Mean stand-in response latency in seconds"),
+    cassette: Optional[str] = typer.Option(None, "--replay", help="Serve this cassette instead of synthetic data"),
+    url: Optional[str] = typer.Option(None, "--url", help="Drive a running streamable-HTTP MCP server instead"),
+    seed: int = typer.Option(0, "--seed"),
+    out: Optional[str] = typer.Option(None, "--out", help="Also write the full JSON report here"),
+    json_out: bool = typer.Option(False, "--json/--text"),
+) -> None:
+    """Load-test the MCP server with concurrent clients against a local Freshdesk stand-in."""
+
+    config = loadtest.LoadTestConfig(
+        clients=clients, duration=duration, requests=requests, mix=mix, transport=transport,
+        think_time=think_time, sample_interval=sample_interval, tickets=tickets, latency=latency,
+        cassette=cassette, seed=seed,
+    )
+    try:
+        report = _run(loadtest.run(config, url=url))
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    if out:
+        with open(out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    if json_out:
+        _print(report, True)
+    else:
+        typer.echo(_loadtest_text(report))
+
+
 def main() -> None:
     app()
@@ -0,0 +1,240 @@
+"""Compact ticket, conversation and article bodies for model consumption.
+
+Freshdesk returns every body twice (HTML and plain text) and email replies
+carry the whole quoted history of the thread. Compaction renders the HTML to
+plain text, drops quoted reply chains and signatures, removes paragraphs
+already seen earlier in the same thread and can truncate to a budget.
+Solution articles are not email: they are only rendered and truncated, since
+their blockquotes and rules are content.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Set
+
+# Tags rendered as line breaks around their content.
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "div", "dl", "dt", "dd", "fieldset",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr",
+    "li", "main", "nav", "ol", "p", "pre", "section", "table", "tr", "ul",
+}
+# Tags whose content is never shown.
+SKIP_TAGS = {"head", "script", "style", "title", "template"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+# Containers mail clients use for quoted history.
+QUOTE_CLASSES = ("gmail_quote", "freshdesk_quote", "yahoo_quoted", "moz-cite-prefix", "quote")
+QUOTE_IDS = ("divrplyfwdmsg", "appendonsend", "mail-editor-reference-message-container")
+
+# Lines that introduce a quoted reply; everything from here on is history.
+REPLY_HEADER_PATTERNS = [
+    re.compile(r"^\s*On\b.{0,300}\bwrote:\s*$", re.IGNORECASE | re.DOTALL),
+    re.compile(r"^\s*-{2,}\s*(Original|Forwarded) Message\s*-{2,}", re.IGNORECASE),
+    re.compile(r"^\s*_{10,}\s*$"),
+    re.compile(r"^\s*From:\s.+\n\s*(Sent|Date):\s", re.IGNORECASE),
+]
+SIGNATURE_DELIMITER = re.compile(r"^-- ?$")
+MOBILE_SIGNATURE = re.compile(r"^\s*Sent from my \w+", re.IGNORECASE)
+
+# Paragraphs shorter than this ("Thanks,", "Hi Bob") are never deduplicated.
+MIN_DEDUPE_LENGTH = 40
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self, drop_quotes: bool = True) -> None:
+        super().__init__(convert_charrefs=True)
+        self.drop_quotes = drop_quotes
+        self.parts: List[str] = []
+        self._skip_depth = 0
+        self._quote_depth = 0
+        self._stack: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if self._skip_depth or self._quote_depth:
+            if tag not in VOID_TAGS:
+                self._stack.append(tag)
+                if self._skip_depth:
+                    self._skip_depth += 1
+                else:
+                    self._quote_depth += 1
+            return
+
+        attributes = dict(attrs)
+        classes = (attributes.get("class") or "").lower()
+        element_id = (attributes.get("id") or "").lower()
+        is_quote = self.drop_quotes and (
+            tag == "blockquote"
+            or any(name in classes.split() for name in QUOTE_CLASSES)
+            or element_id in QUOTE_IDS
+        )
+
+        if tag == "br":
+            self.parts.append("\n")
+        elif tag == "li":
+            self.parts.append("\n- ")
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+        if tag in VOID_TAGS:
+            return
+        self._stack.append(tag)
+        if tag in SKIP_TAGS:
+            self._skip_depth = 1
+        elif is_quote:
+            self._quote_depth = 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag not in self._stack:
+            return
+        # Close any unclosed children along with this tag.
+        while self._stack:
+            open_tag = self._stack.pop()
+            if self._skip_depth:
+                self._skip_depth -= 1
+            elif self._quote_depth:
+                self._quote_depth -= 1
+            if open_tag == tag:
+                break
+        if tag in BLOCK_TAGS and tag != "li" and not (self._skip_depth or self._quote_depth):
+            self.parts.append("\n")
+
+    def handle_data(self, data: str) -> None:
+        if not (self._skip_depth or self._quote_depth):
+            self.parts.append(data)
+
+
+def html_to_text(html: str, drop_quotes: bool = True) -> str:
+    """Render HTML to plain text, dropping quoted-history containers unless ``drop_quotes`` is False."""
+
+    extractor = _TextExtractor(drop_quotes)
+    extractor.feed(html or "")
+    extractor.close()
+    return normalize_whitespace("".join(extractor.parts))
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces and blank lines, keeping paragraph breaks."""
+
+    lines = [" ".join(line.replace("\xa0", " ").split()) for line in (text or "").splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def strip_quoted(text: str) -> str:
+    """Cut plain text at the first reply header and drop ``>``-quoted lines."""
+
+    lines = text.splitlines()
+    kept: List[str] = []
+    for index, line in enumerate(lines):
+        # Reply headers can wrap onto the next line.
+        window = "\n".join(lines[index:index + 2])
+        if any(pattern.match(line) or pattern.match(window) for pattern in REPLY_HEADER_PATTERNS):
+            break
+        if line.lstrip().startswith(">"):
+            continue
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def strip_signature(text: str) -> str:
+    """Drop a ``-- `` delimited signature and mobile "Sent from" footers."""
+
+    kept: List[str] = []
+    for line in text.splitlines():
+        if SIGNATURE_DELIMITER.match(line):
+            break
+        if MOBILE_SIGNATURE.match(line):
+            continue
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def truncate(text: str, max_chars: Optional[int]) -> str:
+    if not max_chars or len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars].rstrip()}\n[truncated {len(text) - max_chars} characters]"
+
+
+def compact_text(html: Optional[str], text: Optional[str] = None) -> str:
+    """Compact one body, preferring the HTML (it marks quoted blocks explicitly)."""
+
+    rendered = html_to_text(html) if html else normalize_whitespace(text or "")
+    return strip_signature(strip_quoted(rendered))
+
+
+def _dedupe(text: str, seen: Set[str]) -> str:
+    """Drop paragraphs already in ``seen`` and record the new ones."""
+
+    kept = []
+    for paragraph in text.split("\n\n"):
+        key = " ".join(paragraph.casefold().split())
+        if len(key) >= MIN_DEDUPE_LENGTH:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(paragraph)
+    return "\n\n".join(kept).strip()
+
+
+def compact_record(
+    record: Dict[str, Any],
+    html_field: str,
+    text_field: str,
+    max_chars: Optional[int] = None,
+    seen: Optional[Set[str]] = None,
+) -> Dict[str, Any]:
+    """Return a copy of ``record`` with one compact text body and no HTML body."""
+
+    if not isinstance(record, dict):
+        return record
+    compacted = dict(record)
+    text = compact_text(compacted.pop(html_field, None), compacted.get(text_field))
+    if seen is not None:
+        text = _dedupe(text, seen)
+    compacted[text_field] = truncate(text, max_chars)
+    return compacted
+
+
+def compact_article(article: Dict[str, Any], max_chars: Optional[int] = None) -> Dict[str, Any]:
+    """Return a copy of a solution article with a plain-text description and no HTML.
+
+    Unlike :func:`compact_record`, quotes, signatures and rules are kept.
+    """
+
+    if not isinstance(article, dict):
+        return article
+    compacted = dict(article)
+    html = compacted.pop("description", None)
+    if html:
+        text = html_to_text(html, drop_quotes=False)
+    else:
+        text = normalize_whitespace(compacted.get("description_text") or "")
+    compacted["description_text"] = truncate(text, max_chars)
+    return compacted
+
+
+def compact_thread(
+    conversations: List[Dict[str, Any]],
+    max_chars: Optional[int] = None,
+    seen: Optional[Set[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Compact a conversation list (oldest first), deduplicating across replies."""
+
+    seen = set() if seen is None else seen
+    return [
+        compact_record(conversation, "body", "body_text", max_chars, seen)
+        for conversation in conversations
+    ]
+
+
+def payload_size(records: Any, fields: tuple) -> int:
+    """Rough character count of the bodies compaction would process."""
+
+    if isinstance(records, dict):
+        records = [records]
+    if not isinstance(records, list):
+        return 0
+    return sum(
+        len(record.get(field) or "")
+        for record in records
+        if isinstance(record, dict)
+        for field in fields
+    )
@@ -0,0 +1,50 @@
+"""Environment-driven tuning knobs.
+
+Like the credentials in ``server.py`` every value is read at call time so tests
+and long-running servers pick up changes without a restart.
+"""
+
+import os
+from typing import Optional
+
+
+def env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Return a non-empty environment variable or ``default``."""
+
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip()
+
+
+def env_float(name: str, default: float) -> float:
+    """Return an environment variable parsed as a float, or ``default``."""
+
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def env_int(name: str, default: int) -> int:
+    """Return an environment variable parsed as an int, or ``default``."""
+
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Return an environment variable interpreted as a boolean switch."""
+
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
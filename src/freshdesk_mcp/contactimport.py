@@ -0,0 +1,290 @@
+"""Resumable bulk import of contacts from CSV or NDJSON files.
+
+Rows are read in batches of FRESHDESK_IMPORT_BATCH (default 200). Each batch
+is upserted concurrently, at most FRESHDESK_IMPORT_CONCURRENCY (default 8)
+contacts at a time; rows that share an email, external id or phone number run
+one after the other so a contact created by one row is updated by the next.
+After every batch the position is saved to a progress file, so an import that
+is interrupted, or split over several calls with ``max_rows``, carries on
+where it stopped. Rows that fail are appended to an errors file with the
+reason.
+
+CSV columns are contact fields (``name``, ``email``, ``phone``, ...).
+``other_emails`` and ``tags`` hold ``;``-separated lists, ``company_id`` an
+integer and ``view_all_tickets`` a boolean; ``cf_*`` columns, or columns
+written ``custom_fields.<name>``, become custom fields. Empty cells are left
+out. NDJSON lines are contact objects sent as they are.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .config import env_int
+from .deadlines import gather
+from .directory import contact_keys
+from .records import format_timestamp
+
+DEFAULT_BATCH = 200
+DEFAULT_CONCURRENCY = 8
+
+CREATED = "created"
+UPDATED = "updated"
+FAILED = "failed"
+
+LIST_COLUMNS = ("other_emails", "tags")
+INT_COLUMNS = ("company_id",)
+BOOL_COLUMNS = ("view_all_tickets",)
+
+# (outcome, error): CREATED or UPDATED with None, or FAILED with the reason.
+Upsert = Callable[[Dict[str, Any]], Awaitable[Tuple[str, Optional[str]]]]
+
+
+class RowError(ValueError):
+    """A row that cannot be turned into a contact."""
+
+
+def _open_text(path: str) -> io.TextIOBase:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _is_csv(path: str) -> bool:
+    return path[:-3].endswith(".csv") if path.endswith(".gz") else path.endswith(".csv")
+
+
+def _csv_value(column: str, value: str) -> Any:
+    if column in LIST_COLUMNS:
+        return [item.strip() for item in value.split(";") if item.strip()]
+    if column in INT_COLUMNS:
+        try:
+            return int(value)
+        except ValueError:
+            raise RowError(f"{column} must be an integer, got {value!r}") from None
+    if column in BOOL_COLUMNS:
+        return value.strip().lower() in ("1", "true", "yes")
+    return value
+
+
+def contact_from_csv(row: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """Contact payload for one CSV row."""
+
+    contact: Dict[str, Any] = {}
+    custom: Dict[str, Any] = {}
+    for column, value in row.items():
+        if column is None or value is None or not value.strip():
+            continue
+        column = column.strip()
+        value = value.strip()
+        if column.startswith("custom_fields."):
+            custom[column[len("custom_fields."):]] = value
+        elif column.startswith("cf_"):
+            custom[column] = value
+        else:
+            contact[column] = _csv_value(column, value)
+    if custom:
+        contact["custom_fields"] = custom
+    return contact
+
+
+def read_contacts(path: str) -> Iterator[Any]:
+    """Yield each row of a CSV or NDJSON file (optionally gzipped) as a contact.
+
+    Rows that cannot be parsed are yielded as :class:`RowError` so that row
+    numbers stay stable.
+    """
+
+    with _open_text(path) as fh:
+        if _is_csv(path):
+            for row in csv.DictReader(fh):
+                try:
+                    yield contact_from_csv(row)
+                except RowError as e:
+                    yield e
+            return
+        for line in fh:
+            if not line.strip():
+                continue
+            try:
+                contact = json.loads(line)
+            except ValueError as e:
+                yield RowError(f"Invalid JSON: {e}")
+                continue
+            yield contact if isinstance(contact, dict) else RowError("Each line must be a JSON object")
+
+
+def progress_paths(path: str, progress_path: Optional[str] = None) -> Tuple[str, str]:
+    """Progress file and errors file for an import of ``path``."""
+
+    progress_path = progress_path or f"{path}.progress.json"
+    root = progress_path[:-len(".json")] if progress_path.endswith(".json") else progress_path
+    return progress_path, f"{root}.errors.ndjson"
+
+
+def _load_progress(progress_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(progress_path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+def _save_progress(progress_path: str, state: Dict[str, Any]) -> None:
+    directory = os.path.dirname(progress_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{progress_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(tmp_path, progress_path)
+
+
+def _chains(rows: List[Tuple[int, Any]]) -> List[List[Tuple[int, Any]]]:
+    """Group rows so that rows sharing an identity key end up in one chain, in file order.
+
+    Rows are merged transitively: a row with the email of one chain and the
+    phone of another joins the two.
+    """
+
+    parent = list(range(len(rows)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    owner: Dict[str, int] = {}
+    for index, row in enumerate(rows):
+        for key in contact_keys(row[1]) if isinstance(row[1], dict) else []:
+            if key in owner:
+                # Keep the earliest row as the root, so chains come out in file order.
+                first, second = sorted((find(owner[key]), find(index)))
+                parent[second] = first
+            else:
+                owner[key] = index
+
+    chains: Dict[int, List[Tuple[int, Any]]] = {}
+    for index, row in enumerate(rows):
+        chains.setdefault(find(index), []).append(row)
+    return list(chains.values())
+
+
+def _identifiable(contact: Dict[str, Any]) -> bool:
+    return bool(contact_keys(contact) or contact.get("twitter_id"))
+
+
+async def import_contacts(
+    path: str,
+    upsert: Upsert,
+    *,
+    progress_path: Optional[str] = None,
+    max_rows: Optional[int] = None,
+    restart: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """Import contacts from ``path`` starting where the previous run stopped.
+
+    Args:
+        path: CSV or NDJSON file, optionally gzipped
+        upsert: Coroutine that creates or updates one contact
+        progress_path: Progress file (default ``<path>.progress.json``)
+        max_rows: Stop after this many rows; call again to continue
+        restart: Ignore saved progress and start from the first row
+        dry_run: Only report what would be created or updated; nothing is
+            sent or saved
+
+    Returns:
+        Totals so far, ``next_row`` and whether the file is ``complete``
+    """
+
+    progress_path, errors_path = progress_paths(path, progress_path)
+    source = os.path.abspath(path)
+    size = os.path.getsize(path)
+    state = None if restart or dry_run else _load_progress(progress_path)
+    if state is not None and (state.get("source") != source or state.get("size") != size):
+        return {
+            "error": "The file changed since the saved progress was written; import again with restart",
+            "progress_path": progress_path,
+        }
+    if state is None:
+        state = {"source": source, "size": size, "next_row": 0, "created": 0, "updated": 0, "failed": 0,
+                 "complete": False, "started_at": format_timestamp(int(time.time()))}
+        if not dry_run and os.path.exists(errors_path):
+            os.remove(errors_path)
+
+    batch_size = max(1, env_int("FRESHDESK_IMPORT_BATCH", DEFAULT_BATCH))
+    concurrency = max(1, env_int("FRESHDESK_IMPORT_CONCURRENCY", DEFAULT_CONCURRENCY))
+    start = state["next_row"]
+    processed = 0
+
+    async def run_chain(chain: List[Tuple[int, Any]]) -> List[Tuple[int, Any, str, Optional[str]]]:
+        outcomes = []
+        written = False
+        for number, contact in chain:
+            if isinstance(contact, RowError):
+                outcomes.append((number, None, FAILED, str(contact)))
+            elif not _identifiable(contact):
+                error = "Needs an email, phone, mobile, twitter_id or unique_external_id"
+                outcomes.append((number, contact, FAILED, error))
+            elif dry_run and written:
+                # Nothing was sent, so the contact an earlier row would create is not known yet.
+                outcomes.append((number, contact, UPDATED, None))
+            else:
+                try:
+                    outcome, error = await upsert(contact)
+                except Exception as e:
+                    outcome, error = FAILED, f"{type(e).__name__}: {e}"
+                written = written or outcome != FAILED
+                outcomes.append((number, contact, outcome, error))
+        return outcomes
+
+    async def flush(batch: List[Tuple[int, Any]]) -> None:
+        results = await gather(*(run_chain(chain) for chain in _chains(batch)), limit=concurrency)
+        failures = []
+        for number, contact, outcome, error in sorted(outcome for chain in results for outcome in chain):
+            state[outcome] += 1
+            if outcome == FAILED:
+                failures.append({"row": number, "error": error, "contact": contact})
+        state["next_row"] = batch[-1][0] + 1
+        if dry_run:
+            return
+        if failures:
+            with open(errors_path, "a", encoding="utf-8") as fh:
+                fh.writelines(json.dumps(failure) + "\n" for failure in failures)
+        state["updated_at"] = format_timestamp(int(time.time()))
+        _save_progress(progress_path, state)
+
+    batch: List[Tuple[int, Any]] = []
+    exhausted = True
+    for number, contact in enumerate(read_contacts(path)):
+        if number < start:
+            continue
+        if max_rows is not None and processed >= max_rows:
+            exhausted = False
+            break
+        batch.append((number, contact))
+        processed += 1
+        if len(batch) >= batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+    state["complete"] = exhausted
+    if not dry_run:
+        _save_progress(progress_path, state)
+
+    result = {key: state[key] for key in ("next_row", "created", "updated", "failed", "complete")}
+    result["processed"] = processed
+    if dry_run:
+        result["dry_run"] = True
+    else:
+        result["progress_path"] = progress_path
+        if state["failed"]:
+            result["errors_path"] = errors_path
+    return result
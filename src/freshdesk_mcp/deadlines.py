@@ -0,0 +1,167 @@
+"""Per-call deadlines and structured fan-out.
+
+Every tool call runs under a deadline (``FRESHDESK_TIMEOUT``, overridable per
+tool with ``FRESHDESK_TOOL_TIMEOUTS="sync_ticket_store=900,get_ticket=10"``).
+The deadline is kept in a context variable so HTTP clients created during the
+call size their timeouts from the time left, and fan-outs started with
+:func:`gather` are cancelled together with the call, whether it times out or
+the MCP client cancels it.
+"""
+
+import contextvars
+import inspect
+import math
+import time
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
+
+import anyio
+import httpx
+
+from . import tracing
+from .config import env_float, env_str
+
+T = TypeVar("T")
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_HTTP_TIMEOUT = 30.0
+
+# Absolute time.monotonic() deadline of the current tool call, if any.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("freshdesk_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised by :func:`deadline` when the call ran out of time."""
+
+    def __init__(self, name: str, seconds: float) -> None:
+        super().__init__(f"{name} timed out after {seconds:g}s")
+        self.name = name
+        self.seconds = seconds
+
+
+def _tool_overrides() -> Dict[str, float]:
+    overrides = {}
+    for item in (env_str("FRESHDESK_TOOL_TIMEOUTS") or "").split(","):
+        name, _, value = item.partition("=")
+        try:
+            overrides[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return overrides
+
+
+def timeout_for(name: str, default: Optional[float] = None) -> Optional[float]:
+    """Seconds allowed for tool ``name``; None or a value <= 0 means no deadline.
+
+    FRESHDESK_TOOL_TIMEOUTS wins over the tool's own default, which wins over
+    FRESHDESK_TIMEOUT.
+    """
+
+    seconds = _tool_overrides().get(name)
+    if seconds is None:
+        seconds = default if default is not None else env_float("FRESHDESK_TIMEOUT", DEFAULT_TIMEOUT)
+    return seconds if seconds > 0 else None
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current call's deadline, or None without one."""
+
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def detach() -> None:
+    """Drop the inherited deadline in a task that outlives the call that started it.
+
+    Its spans start a new trace too.
+    """
+
+    _deadline.set(None)
+    tracing.detach()
+
+
+class deadline:
+    """Async context manager running its body under a deadline of ``seconds``.
+
+    Nested deadlines never extend an outer one. Raises
+    :class:`DeadlineExceeded` when this deadline (not an outer one) fires.
+    """
+
+    def __init__(self, name: str, seconds: Optional[float]) -> None:
+        self.name = name
+        self.seconds = seconds
+
+    async def __aenter__(self) -> "deadline":
+        outer = remaining()
+        self._scope = None
+        self._token = None
+        if self.seconds is None or (outer is not None and outer <= self.seconds):
+            return self
+        self._scope = anyio.move_on_after(self.seconds)
+        self._scope.__enter__()
+        self._token = _deadline.set(time.monotonic() + self.seconds)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        if self._scope is None:
+            return False
+        _deadline.reset(self._token)
+        suppressed = self._scope.__exit__(exc_type, exc, tb)
+        if self._scope.cancelled_caught:
+            raise DeadlineExceeded(self.name, self.seconds)
+        return bool(suppressed)
+
+
+def http_timeout() -> httpx.Timeout:
+    """Per-request timeout: FRESHDESK_HTTP_TIMEOUT, capped by the time left."""
+
+    seconds = env_float("FRESHDESK_HTTP_TIMEOUT", DEFAULT_HTTP_TIMEOUT)
+    left = remaining()
+    if left is not None:
+        seconds = min(seconds, max(left, 0.001))
+    return httpx.Timeout(seconds if math.isfinite(seconds) and seconds > 0 else None)
+
+
+async def gather(*aws: Awaitable[T], limit: Optional[int] = None) -> List[T]:
+    """Run awaitables concurrently and return their results in order.
+
+    Unlike ``asyncio.gather`` the tasks live in a task group: if one fails, or
+    the caller is cancelled or times out, the others are cancelled instead of
+    running on unobserved. The first error is re-raised. ``limit`` caps how
+    many run at once.
+    """
+
+    results: List[Any] = [None] * len(aws)
+    errors: List[Exception] = []
+    limiter = anyio.CapacityLimiter(limit) if limit else None
+
+    attributes = {"freshdesk.fanout.size": len(aws), "freshdesk.fanout.limit": limit}
+    with tracing.tracer.span("fanout", attributes) as span:
+        try:
+            async with anyio.create_task_group() as tg:
+
+                async def run(index: int, aw: Awaitable[T]) -> None:
+                    try:
+                        if limiter is None:
+                            results[index] = await aw
+                        else:
+                            async with limiter:
+                                results[index] = await aw
+                    except Exception as e:
+                        errors.append(e)
+                        tg.cancel_scope.cancel()
+
+                for index, aw in enumerate(aws):
+                    tg.start_soon(run, index, aw)
+        finally:
+            # Close coroutines cancelled before they started.
+            for aw in aws:
+                if inspect.iscoroutine(aw) and inspect.getcoroutinestate(aw) == inspect.CORO_CREATED:
+                    aw.close()
+        if errors:
+            span.record_exception(errors[0])
+
+    if errors:
+        raise errors[0]
+    return results
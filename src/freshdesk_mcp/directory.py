@@ -0,0 +1,619 @@
+"""In-memory directories of slowly changing Freshdesk collections.
+
+A directory keeps a full copy of a collection, filled by paging through its
+list endpoint, and answers id and name lookups without touching the API.
+Once loaded, a stale directory keeps serving while a refresh runs in the
+background; only the very first load blocks the caller.
+"""
+
+import asyncio
+import bisect
+import difflib
+import json
+import logging
+import math
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .compaction import html_to_text
+from .config import env_float, env_str
+from .deadlines import detach
+from .lanes import Lane, use_lane
+from .tracing import tracer
+
+Record = Dict[str, Any]
+FullLoader = Callable[[], Awaitable[List[Record]]]
+IncrementalLoader = Callable[[datetime], Awaitable[Optional[List[Record]]]]
+
+# After a failed load, callers fall back to the API for this long before the
+# directory tries again.
+FAILURE_BACKOFF_SECONDS = 60.0
+
+
+def normalize_name(value: Any) -> str:
+    """Case-fold and collapse whitespace so lookups ignore formatting."""
+
+    return " ".join(str(value or "").casefold().split())
+
+
+class PrefixIndex:
+    """Character trie from normalised names to record ids.
+
+    Every word start of a name is indexed, so ``"smith"`` finds
+    ``"Herbert Smith Freehills"`` as well as ``"Smithers"``.
+    """
+
+    def __init__(self) -> None:
+        self._root: Dict[Any, Any] = {}
+
+    @staticmethod
+    def _keys(name: str) -> Set[str]:
+        words = normalize_name(name).split(" ")
+        return {" ".join(words[i:]) for i in range(len(words)) if words[i]}
+
+    def add(self, name: str, record_id: int) -> None:
+        for key in self._keys(name):
+            node = self._root
+            for char in key:
+                node = node.setdefault(char, {})
+            node.setdefault(None, set()).add(record_id)
+
+    def discard(self, name: str, record_id: int) -> None:
+        for key in self._keys(name):
+            self._discard(self._root, key, record_id)
+
+    @staticmethod
+    def _discard(root: Dict[Any, Any], key: str, record_id: int) -> None:
+        path = [root]
+        for char in key:
+            node = path[-1].get(char)
+            if node is None:
+                return
+            path.append(node)
+        ids = path[-1].get(None)
+        if ids is None:
+            return
+        ids.discard(record_id)
+        if not ids:
+            del path[-1][None]
+        # Prune branches that no longer lead to any id.
+        for depth in range(len(key), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][key[depth - 1]]
+
+    def search(self, prefix: str, limit: int) -> List[int]:
+        """Return up to ``limit`` ids whose indexed names start with ``prefix``.
+
+        Nodes are visited breadth first, so shorter completions come first.
+        """
+
+        node = self._root
+        for char in normalize_name(prefix):
+            node = node.get(char)
+            if node is None:
+                return []
+
+        found: List[int] = []
+        seen: Set[int] = set()
+        queue = [node]
+        while queue and len(found) < limit:
+            next_queue = []
+            for current in queue:
+                for record_id in sorted(current.get(None, ())):
+                    if record_id not in seen:
+                        seen.add(record_id)
+                        found.append(record_id)
+                next_queue.extend(child for char, child in current.items() if char is not None)
+            queue = next_queue
+        return found[:limit]
+
+    def clear(self) -> None:
+        self._root = {}
+
+
+_WORD = re.compile(r"\w+")
+
+
+def words(text: Any) -> List[str]:
+    return _WORD.findall(str(text or "").casefold())
+
+
+class WordIndex:
+    """Inverted index from words to weighted record ids, ranked by TF-IDF.
+
+    Documents are added as ``{word: weight}`` maps, so callers decide how much
+    a word in a title counts against one in the body.
+    """
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._documents: Dict[int, Dict[str, float]] = {}
+        self._vocabulary: Optional[List[str]] = None
+
+    def add(self, record_id: int, weights: Dict[str, float]) -> None:
+        self.discard(record_id)
+        self._documents[record_id] = weights
+        for word, weight in weights.items():
+            if word not in self._postings:
+                self._vocabulary = None
+            self._postings.setdefault(word, {})[record_id] = weight
+
+    def discard(self, record_id: int) -> None:
+        for word in self._documents.pop(record_id, {}):
+            postings = self._postings[word]
+            postings.pop(record_id, None)
+            if not postings:
+                del self._postings[word]
+                self._vocabulary = None
+
+    def _completions(self, prefix: str) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff")
+        return self._vocabulary[start:end]
+
+    def search(self, query: str, limit: int) -> List[Tuple[int, float]]:
+        """Up to ``limit`` ``(id, score)`` pairs, those matching the most query words first.
+
+        The last query word may be unfinished, so it also matches longer words.
+        """
+
+        terms = list(dict.fromkeys(words(query)))
+        total = len(self._documents)
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        for position, term in enumerate(terms):
+            candidates = self._completions(term) if position == len(terms) - 1 else [term]
+            hits: Dict[int, float] = {}
+            for word in candidates:
+                for record_id, weight in self._postings.get(word, {}).items():
+                    hits[record_id] = max(hits.get(record_id, 0.0), weight)
+            if not hits:
+                continue
+            idf = math.log(1 + total / len(hits))
+            for record_id, weight in hits.items():
+                scores[record_id] = scores.get(record_id, 0.0) + idf * (1 + math.log(weight))
+                matched[record_id] = matched.get(record_id, 0) + 1
+        ranked = sorted(scores, key=lambda record_id: (-matched[record_id], -scores[record_id], record_id))
+        return [(record_id, round(scores[record_id], 3)) for record_id in ranked[:limit]]
+
+
+class Directory:
+    """A TTL-refreshed copy of one Freshdesk collection, keyed by id.
+
+    Args:
+        kind: Short collection name used in logs and cache file names
+        load_all: Coroutine returning every record of the collection
+        domain: Callable returning the Freshdesk domain the data belongs to
+        ttl_env: Environment variable holding the freshness TTL in seconds;
+            a TTL of 0 disables the directory
+        default_ttl: TTL used when ``ttl_env`` is unset
+        load_since: Optional coroutine returning records updated since a
+            timestamp, or None when the change set is too large to page
+        full_ttl: Seconds between full reloads when refreshing incrementally,
+            so deletions are eventually noticed
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        load_all: FullLoader,
+        domain: Callable[[], str],
+        ttl_env: str,
+        default_ttl: float,
+        load_since: Optional[IncrementalLoader] = None,
+        full_ttl: float = 24 * 3600,
+    ) -> None:
+        self.kind = kind
+        self._load_all = load_all
+        self._load_since = load_since
+        self._domain = domain
+        self._ttl_env = ttl_env
+        self._default_ttl = default_ttl
+        self._full_ttl = full_ttl
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all records and sync state."""
+
+        self.records: Dict[int, Record] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        self._loaded_domain: Optional[str] = None
+        self._synced_at: Optional[float] = None
+        self._synced_wall: Optional[datetime] = None
+        self._full_wall: Optional[datetime] = None
+        self._failed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        if self._refresh_task is not None and not self._refresh_task.done():
+            try:
+                self._refresh_task.cancel()
+            except RuntimeError:
+                # The loop that owned the task is already closed.
+                pass
+        self._refresh_task = None
+
+    # -- indexing hooks -------------------------------------------------
+
+    def name_of(self, record: Record) -> str:
+        return str(record.get("name") or "")
+
+    def _index(self, record: Record) -> None:
+        key = normalize_name(self.name_of(record))
+        if key:
+            self._by_name.setdefault(key, set()).add(record["id"])
+
+    def _unindex(self, record: Record) -> None:
+        key = normalize_name(self.name_of(record))
+        ids = self._by_name.get(key)
+        if ids is not None:
+            ids.discard(record["id"])
+            if not ids:
+                del self._by_name[key]
+
+    # -- state ----------------------------------------------------------
+
+    def ttl(self) -> float:
+        return env_float(self._ttl_env, self._default_ttl)
+
+    def enabled(self) -> bool:
+        return self.ttl() > 0
+
+    def is_loaded(self) -> bool:
+        return self._synced_at is not None and self._loaded_domain == self._domain()
+
+    def is_fresh(self) -> bool:
+        return self.is_loaded() and time.monotonic() - self._synced_at < self.ttl()
+
+    def age(self) -> Optional[float]:
+        if self._synced_at is None:
+            return None
+        return time.monotonic() - self._synced_at
+
+    def upsert(self, record: Record) -> None:
+        """Insert or replace a single record, e.g. after a write."""
+
+        if not isinstance(record, dict) or record.get("id") is None:
+            return
+        previous = self.records.get(record["id"])
+        if previous is not None:
+            self._unindex(previous)
+        self.records[record["id"]] = record
+        self._index(record)
+
+    def remove(self, record_id: int) -> None:
+        previous = self.records.pop(record_id, None)
+        if previous is not None:
+            self._unindex(previous)
+
+    def get(self, record_id: int, fresh_only: bool = True) -> Optional[Record]:
+        """Return a record by id, or None when unknown or (optionally) stale."""
+
+        if fresh_only and not self.is_fresh():
+            return None
+        if not self.is_loaded():
+            return None
+        return self.records.get(record_id)
+
+    def ids_for_name(self, name: str) -> List[int]:
+        return sorted(self._by_name.get(normalize_name(name), ()))
+
+    def _replace_all(self, records: List[Record]) -> None:
+        self.records = {}
+        self._by_name = {}
+        for record in records:
+            self.upsert(record)
+
+    # -- loading --------------------------------------------------------
+
+    async def ensure_loaded(self) -> bool:
+        """Make the directory usable, returning False when callers should use the API.
+
+        The first load blocks; later calls on a stale directory return
+        immediately and trigger a single background refresh.
+        """
+
+        if not self.enabled():
+            return False
+        with tracer.span("cache lookup", {"freshdesk.cache.name": self.kind}) as span:
+            if not self.is_loaded():
+                if self._failed_at is not None and time.monotonic() - self._failed_at < FAILURE_BACKOFF_SECONDS:
+                    return False
+                self._restore()
+            span.set_attribute("freshdesk.cache.hit", self.is_loaded())
+            if not self.is_loaded():
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    logging.warning(f"Could not load {self.kind} directory: {e}")
+                    span.record_exception(e)
+                    return False
+                return True
+            if not self.is_fresh():
+                span.set_attribute("freshdesk.cache.stale", True)
+                self._schedule_refresh()
+            return True
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+
+        async def run() -> None:
+            detach()
+            try:
+                with use_lane(Lane.BACKGROUND):
+                    await self.refresh()
+            except Exception as e:
+                logging.warning(f"Background refresh of {self.kind} directory failed: {e}")
+
+        self._refresh_task = asyncio.get_running_loop().create_task(run())
+
+    async def refresh(self, full: bool = False) -> int:
+        """Reload the directory, incrementally when possible. Returns the record count."""
+
+        async with self._lock:
+            domain = self._domain()
+            started = datetime.now(timezone.utc)
+            incremental = (
+                not full
+                and self._load_since is not None
+                and self._loaded_domain == domain
+                and self._synced_wall is not None
+                and self._full_wall is not None
+                and started - self._full_wall < timedelta(seconds=self._full_ttl)
+            )
+            try:
+                changed = await self._load_since(self._synced_wall) if incremental else None
+                if changed is None:
+                    self._replace_all(await self._load_all())
+                    self._full_wall = started
+                else:
+                    for record in changed:
+                        self.upsert(record)
+            except Exception:
+                self._failed_at = time.monotonic()
+                raise
+
+            self._loaded_domain = domain
+            self._synced_at = time.monotonic()
+            self._synced_wall = started
+            self._failed_at = None
+            self._persist()
+            return len(self.records)
+
+    # -- optional on-disk copy -----------------------------------------
+
+    def _cache_path(self) -> Optional[str]:
+        cache_dir = env_str("FRESHDESK_CACHE_DIR")
+        domain = self._domain()
+        if not cache_dir or not domain:
+            return None
+        return os.path.join(cache_dir, f"{self.kind}-{domain}.json")
+
+    def _persist(self) -> None:
+        path = self._cache_path()
+        if path is None:
+            return
+        payload = {
+            "domain": self._loaded_domain,
+            "synced_at": self._synced_wall.isoformat(),
+            "full_at": self._full_wall.isoformat() if self._full_wall else None,
+            "records": list(self.records.values()),
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(payload, fh)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write {self.kind} directory cache: {e}")
+
+    def _restore(self) -> None:
+        """Load a previously persisted copy; its age decides how soon it refreshes."""
+
+        path = self._cache_path()
+        if path is None or not os.path.exists(path):
+            return
+        try:
+            with open(path, encoding="utf-8") as fh:
+                payload = json.load(fh)
+            synced_wall = datetime.fromisoformat(payload["synced_at"])
+            full_wall = datetime.fromisoformat(payload["full_at"]) if payload.get("full_at") else None
+            records = payload["records"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable {self.kind} directory cache: {e}")
+            return
+        if payload.get("domain") != self._domain():
+            return
+
+        self._replace_all(records)
+        age = max(0.0, (datetime.now(timezone.utc) - synced_wall).total_seconds())
+        self._loaded_domain = payload["domain"]
+        self._synced_at = time.monotonic() - age
+        self._synced_wall = synced_wall
+        self._full_wall = full_wall
+
+
+class CompanyDirectory(Directory):
+    """Company directory with prefix and fuzzy name lookups."""
+
+    def reset(self) -> None:
+        self._prefix = PrefixIndex()
+        super().reset()
+
+    def _index(self, record: Record) -> None:
+        super()._index(record)
+        self._prefix.add(self.name_of(record), record["id"])
+
+    def _unindex(self, record: Record) -> None:
+        super()._unindex(record)
+        self._prefix.discard(self.name_of(record), record["id"])
+
+    def _replace_all(self, records: List[Record]) -> None:
+        self._prefix.clear()
+        super()._replace_all(records)
+
+    def lookup(self, query: str, limit: int = 30) -> List[Record]:
+        """Find companies by name: exact matches, then prefix matches, then fuzzy ones."""
+
+        key = normalize_name(query)
+        if not key:
+            return []
+
+        ids: List[int] = list(self.ids_for_name(key))
+        for record_id in self._prefix.search(key, limit):
+            if record_id not in ids:
+                ids.append(record_id)
+
+        if not ids:
+            for name in difflib.get_close_matches(key, list(self._by_name), n=limit, cutoff=0.6):
+                ids.extend(sorted(self._by_name[name]))
+
+        return [self.records[record_id] for record_id in ids[:limit]]
+
+
+class AgentDirectory(Directory):
+    """Agent directory indexed by display name and email."""
+
+    def reset(self) -> None:
+        self._by_email: Dict[str, int] = {}
+        super().reset()
+
+    def name_of(self, record: Record) -> str:
+        return str((record.get("contact") or {}).get("name") or "")
+
+    def email_of(self, record: Record) -> str:
+        return normalize_name((record.get("contact") or {}).get("email"))
+
+    def _index(self, record: Record) -> None:
+        super()._index(record)
+        email = self.email_of(record)
+        if email:
+            self._by_email[email] = record["id"]
+
+    def _unindex(self, record: Record) -> None:
+        super()._unindex(record)
+        email = self.email_of(record)
+        if self._by_email.get(email) == record["id"]:
+            del self._by_email[email]
+
+    def _replace_all(self, records: List[Record]) -> None:
+        self._by_email = {}
+        super()._replace_all(records)
+
+    def ids_for_name(self, name: str) -> List[int]:
+        """Agents matching a display name or an email address."""
+
+        ids = super().ids_for_name(name)
+        by_email = self._by_email.get(normalize_name(name))
+        if by_email is not None and by_email not in ids:
+            ids.append(by_email)
+        return ids
+
+
+def _phone_key(value: Any) -> str:
+    digits = "".join(char for char in str(value or "") if char.isdigit())
+    return f"phone:{digits}" if digits else ""
+
+
+def contact_keys(record: Record) -> List[str]:
+    """Identity keys of a contact, strongest first: emails, external id, then phone numbers."""
+
+    keys = []
+    emails = [record.get("email"), *(record.get("other_emails") or [])]
+    keys.extend(f"email:{normalize_name(email)}" for email in emails if normalize_name(email))
+    if record.get("unique_external_id"):
+        keys.append(f"external:{record['unique_external_id']}")
+    keys.extend(key for key in (_phone_key(record.get("phone")), _phone_key(record.get("mobile"))) if key)
+    return keys
+
+
+class ContactDirectory(Directory):
+    """Contact directory indexed by email, external id and phone number."""
+
+    def reset(self) -> None:
+        self._by_key: Dict[str, int] = {}
+        super().reset()
+
+    def name_of(self, record: Record) -> str:
+        # Contact names are not unique enough to match on.
+        return ""
+
+    def _index(self, record: Record) -> None:
+        for key in contact_keys(record):
+            self._by_key.setdefault(key, record["id"])
+
+    def _unindex(self, record: Record) -> None:
+        for key in contact_keys(record):
+            if self._by_key.get(key) == record["id"]:
+                del self._by_key[key]
+
+    def _replace_all(self, records: List[Record]) -> None:
+        self._by_key = {}
+        super()._replace_all(records)
+
+    def match(self, contact: Record) -> Optional[int]:
+        """Id of the known contact sharing an email, external id or phone number with ``contact``."""
+
+        for key in contact_keys(contact):
+            contact_id = self._by_key.get(key)
+            if contact_id is not None:
+                return contact_id
+        return None
+
+
+class CannedResponseLibrary(Directory):
+    """Canned responses of every folder, searchable by the words of their title and content."""
+
+    # A word in the title counts as much as this many occurrences in the content.
+    TITLE_WEIGHT = 3.0
+
+    def reset(self) -> None:
+        self._words = WordIndex()
+        super().reset()
+
+    def name_of(self, record: Record) -> str:
+        return str(record.get("title") or "")
+
+    @classmethod
+    def word_weights(cls, record: Record) -> Dict[str, float]:
+        weights: Dict[str, float] = {}
+        for word in words(record.get("folder_name")):
+            weights[word] = weights.get(word, 0.0) + 1.0
+        for word in words(record.get("title")):
+            weights[word] = weights.get(word, 0.0) + cls.TITLE_WEIGHT
+        content = html_to_text(record["content_html"]) if record.get("content_html") else record.get("content")
+        for word in words(content):
+            weights[word] = weights.get(word, 0.0) + 1.0
+        return weights
+
+    def _index(self, record: Record) -> None:
+        super()._index(record)
+        self._words.add(record["id"], self.word_weights(record))
+
+    def _unindex(self, record: Record) -> None:
+        super()._unindex(record)
+        self._words.discard(record["id"])
+
+    def _replace_all(self, records: List[Record]) -> None:
+        self._words.clear()
+        super()._replace_all(records)
+
+    def search(self, query: str, limit: int = 10, folder_id: Optional[int] = None) -> List[Tuple[Record, float]]:
+        """Best matching responses with their scores, optionally within one folder."""
+
+        # Folder filtering happens after ranking, so look further down the list.
+        found = self._words.search(query, len(self.records) if folder_id is not None else limit)
+        results = [(self.records[record_id], score) for record_id, score in found]
+        if folder_id is not None:
+            results = [(record, score) for record, score in results if record.get("folder_id") == folder_id]
+        return results[:limit]
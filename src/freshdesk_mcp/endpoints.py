@@ -0,0 +1,193 @@
+"""Declarative table of the Freshdesk API endpoints the server calls.
+
+Each :class:`Endpoint` describes one route: its method, a path template
+relative to the API base URL, how it paginates, whether its responses may be
+cached and whether it is safe to retry. Requests name their endpoint and go
+through the middleware chain in ``pipeline.py``; endpoints with a ``doc`` are
+also exposed as MCP tools generated from the table (see ``server.py``).
+"""
+
+import string
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+# Pagination styles.
+NO_PAGINATION = "none"
+# ``page``/``per_page`` parameters and a Link header pointing at the next page.
+PAGE_PAGINATION = "page"
+# ``page`` only: 30 results per page, at most 10 pages, and a "total" count.
+SEARCH_PAGINATION = "search"
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE"})
+
+# Where a generated tool's argument goes in the request.
+PATH = "path"
+QUERY = "query"
+BODY = "body"  # the whole JSON body
+FIELD = "field"  # one key of the JSON body
+
+REQUIRED = object()
+
+
+@dataclass(frozen=True)
+class Arg:
+    """One argument of a generated tool, besides its path parameters."""
+
+    name: str
+    annotation: Any
+    location: str
+    default: Any = REQUIRED
+    # Name of the query parameter or body key when it differs from ``name``.
+    alias: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return self.alias or self.name
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    pagination: str = NO_PAGINATION
+    cacheable: bool = False
+    # Record kind a search endpoint returns; its responses go through the search cache.
+    search: Optional[str] = None
+    # Record kind an endpoint reads, creates, replaces or deletes as a whole;
+    # those go through the write-through entity cache.
+    entity: Optional[str] = None
+    # Defaults to True for GET, HEAD, PUT and DELETE.
+    idempotent: Optional[bool] = None
+    # Tool docstring; endpoints without one are only called from hand-written tools.
+    doc: Optional[str] = None
+    args: Tuple[Arg, ...] = ()
+    path_params: Tuple[str, ...] = field(init=False)
+
+    def __post_init__(self) -> None:
+        if self.idempotent is None:
+            object.__setattr__(self, "idempotent", self.method in IDEMPOTENT_METHODS)
+        params = tuple(name for _, name, _, _ in string.Formatter().parse(self.path) if name)
+        object.__setattr__(self, "path_params", params)
+
+    def render(self, values: Dict[str, Any]) -> str:
+        """Fill the path template; raises ValueError for a missing parameter."""
+
+        missing = [name for name in self.path_params if values.get(name) is None]
+        if missing:
+            raise ValueError(f"{self.name} needs {', '.join(missing)}")
+        return self.path.format(**{name: values[name] for name in self.path_params})
+
+
+def _query(name: str, annotation: Any = str, default: Any = REQUIRED, alias: Optional[str] = None) -> Arg:
+    return Arg(name, annotation, QUERY, default, alias)
+
+
+def _body(name: str) -> Arg:
+    return Arg(name, Dict[str, Any], BODY)
+
+
+def _field(name: str, annotation: Any = str) -> Arg:
+    return Arg(name, annotation, FIELD)
+
+
+_TABLE = (
+    # Tickets
+    Endpoint("get_ticket_fields", "GET", "/ticket_fields", cacheable=True,
+             doc="Get ticket fields from Freshdesk."),
+    Endpoint("list_tickets", "GET", "/tickets", pagination=PAGE_PAGINATION),
+    Endpoint("create_ticket", "POST", "/tickets", entity="ticket"),
+    Endpoint("get_ticket", "GET", "/tickets/{ticket_id}", entity="ticket"),
+    Endpoint("update_ticket", "PUT", "/tickets/{ticket_id}", entity="ticket"),
+    Endpoint("delete_ticket", "DELETE", "/tickets/{ticket_id}", entity="ticket",
+             doc="Delete a ticket in Freshdesk."),
+    Endpoint("search_tickets", "GET", "/search/tickets", pagination=SEARCH_PAGINATION,
+             search="ticket"),
+    Endpoint("list_conversations", "GET", "/tickets/{ticket_id}/conversations"),
+    Endpoint("create_reply", "POST", "/tickets/{ticket_id}/reply"),
+    Endpoint("create_note", "POST", "/tickets/{ticket_id}/notes"),
+    Endpoint("update_conversation", "PUT", "/conversations/{conversation_id}"),
+    # Ticket fields (admin)
+    Endpoint("create_ticket_field", "POST", "/admin/ticket_fields", entity="ticket_field",
+             doc="Create a ticket field in Freshdesk.", args=(_body("ticket_field_fields"),)),
+    Endpoint("view_ticket_field", "GET", "/admin/ticket_fields/{ticket_field_id}", entity="ticket_field",
+             doc="View a ticket field in Freshdesk."),
+    Endpoint("update_ticket_field", "PUT", "/admin/ticket_fields/{ticket_field_id}", entity="ticket_field",
+             doc="Update a ticket field in Freshdesk.", args=(_body("ticket_field_fields"),)),
+    # Contacts
+    Endpoint("list_contacts", "GET", "/contacts", pagination=PAGE_PAGINATION,
+             doc="List all contacts in Freshdesk with pagination support."),
+    Endpoint("get_contact", "GET", "/contacts/{contact_id}", entity="contact", doc="Get a contact in Freshdesk."),
+    Endpoint("create_contact", "POST", "/contacts", entity="contact"),
+    Endpoint("search_contacts", "GET", "/contacts/autocomplete", search="contact",
+             doc="Search for contacts in Freshdesk.", args=(_query("query", alias="term"),)),
+    Endpoint("update_contact", "PUT", "/contacts/{contact_id}", entity="contact",
+             doc="Update a contact in Freshdesk.", args=(_body("contact_fields"),)),
+    Endpoint("list_contact_fields", "GET", "/contact_fields", cacheable=True,
+             doc="List all contact fields in Freshdesk."),
+    Endpoint("view_contact_field", "GET", "/contact_fields/{contact_field_id}",
+             doc="View a contact field in Freshdesk."),
+    Endpoint("create_contact_field", "POST", "/contact_fields"),
+    Endpoint("update_contact_field", "PUT", "/contact_fields/{contact_field_id}",
+             doc="Update a contact field in Freshdesk.", args=(_body("contact_field_fields"),)),
+    # Canned responses
+    Endpoint("list_canned_response_folders", "GET", "/canned_response_folders", cacheable=True,
+             doc="List all canned response folders in Freshdesk."),
+    Endpoint("list_canned_responses", "GET", "/canned_response_folders/{folder_id}/responses",
+             doc="List all canned responses in Freshdesk."),
+    Endpoint("view_canned_response", "GET", "/canned_responses/{canned_response_id}", entity="canned_response",
+             doc="View a canned response in Freshdesk."),
+    Endpoint("create_canned_response", "POST", "/canned_responses", entity="canned_response"),
+    Endpoint("update_canned_response", "PUT", "/canned_responses/{canned_response_id}", entity="canned_response",
+             doc="Update a canned response in Freshdesk.", args=(_body("canned_response_fields"),)),
+    Endpoint("create_canned_response_folder", "POST", "/canned_response_folders",
+             doc="Create a canned response folder in Freshdesk.", args=(_field("name"),)),
+    Endpoint("update_canned_response_folder", "PUT", "/canned_response_folders/{folder_id}",
+             doc="Update a canned response folder in Freshdesk.", args=(_field("name"),)),
+    # Solutions
+    Endpoint("list_solution_categories", "GET", "/solutions/categories", cacheable=True,
+             doc="List all solution categories in Freshdesk."),
+    Endpoint("view_solution_category", "GET", "/solutions/categories/{category_id}", entity="solution_category",
+             doc="View a solution category in Freshdesk."),
+    Endpoint("create_solution_category", "POST", "/solutions/categories", entity="solution_category"),
+    Endpoint("update_solution_category", "PUT", "/solutions/categories/{category_id}", entity="solution_category"),
+    Endpoint("list_solution_folders", "GET", "/solutions/categories/{category_id}/folders"),
+    Endpoint("create_solution_category_folder", "POST", "/solutions/categories/{category_id}/folders"),
+    Endpoint("view_solution_category_folder", "GET", "/solutions/folders/{folder_id}", entity="solution_folder",
+             doc="View a solution category folder in Freshdesk."),
+    Endpoint("update_solution_category_folder", "PUT", "/solutions/folders/{folder_id}", entity="solution_folder"),
+    Endpoint("list_solution_articles", "GET", "/solutions/folders/{folder_id}/articles",
+             doc="List all solution articles in Freshdesk."),
+    Endpoint("create_solution_article", "POST", "/solutions/folders/{folder_id}/articles"),
+    Endpoint("view_solution_article", "GET", "/solutions/articles/{article_id}", entity="solution_article"),
+    Endpoint("update_solution_article", "PUT", "/solutions/articles/{article_id}", entity="solution_article",
+             doc="Update a solution article in Freshdesk.", args=(_body("article_fields"),)),
+    # Agents and groups
+    Endpoint("list_agents", "GET", "/agents", pagination=PAGE_PAGINATION),
+    Endpoint("view_agent", "GET", "/agents/{agent_id}", entity="agent"),
+    Endpoint("create_agent", "POST", "/agents", entity="agent"),
+    Endpoint("update_agent", "PUT", "/agents/{agent_id}", entity="agent",
+             doc="Update an agent in Freshdesk.", args=(_body("agent_fields"),)),
+    Endpoint("search_agents", "GET", "/agents/autocomplete", search="agent",
+             doc="Search for agents in Freshdesk.", args=(_query("query", alias="term"),)),
+    Endpoint("list_groups", "GET", "/groups", pagination=PAGE_PAGINATION,
+             doc="List all groups in Freshdesk."),
+    Endpoint("view_group", "GET", "/groups/{group_id}", entity="group"),
+    Endpoint("create_group", "POST", "/groups", entity="group"),
+    Endpoint("update_group", "PUT", "/groups/{group_id}", entity="group"),
+    # Companies
+    Endpoint("list_companies", "GET", "/companies", pagination=PAGE_PAGINATION),
+    Endpoint("view_company", "GET", "/companies/{company_id}", entity="company"),
+    Endpoint("search_companies", "GET", "/search/companies", pagination=SEARCH_PAGINATION,
+             search="company"),
+    Endpoint("autocomplete_companies", "GET", "/companies/autocomplete", search="company"),
+    Endpoint("list_company_fields", "GET", "/company_fields", cacheable=True),
+)
+
+ENDPOINTS: Dict[str, Endpoint] = {endpoint.name: endpoint for endpoint in _TABLE}
+
+
+def endpoint(name: str) -> Endpoint:
+    """Look up an endpoint by name; raises KeyError for an unknown one."""
+
+    return ENDPOINTS[name]
@@ -0,0 +1,76 @@
+"""Change notifications shared by every local cache.
+
+Anything that learns that a Freshdesk record changed (the webhook receiver,
+or a tool that just wrote the record) publishes a :class:`Change`; caches
+subscribe to the kinds they hold and update or drop their copy. This keeps
+caches correct with long TTLs instead of polling.
+"""
+
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+# Record kinds published today: "ticket", "conversation", "contact", "company",
+# plus every entity kind in the pipeline's EntityCache (e.g. "agent", "group").
+
+
+@dataclass(frozen=True)
+class Change:
+    """One changed record.
+
+    Args:
+        kind: Record kind, e.g. "ticket"
+        id: Record id
+        record: The new record when the publisher has it, else None
+        deleted: True when the record no longer exists
+        parent_id: Owning record id, e.g. the ticket of a conversation
+    """
+
+    kind: str
+    id: int
+    record: Optional[Dict[str, Any]] = None
+    deleted: bool = False
+    parent_id: Optional[int] = None
+
+
+Handler = Callable[[Change], Union[None, Awaitable[None]]]
+
+
+class ChangeFeed:
+    """Dispatches changes to the handlers subscribed to their kind."""
+
+    def __init__(self) -> None:
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    def subscribe(self, kind: str, handler: Handler) -> None:
+        """Call ``handler`` (sync or async) for every change of ``kind``."""
+
+        handlers = self._handlers.setdefault(kind, [])
+        if handler not in handlers:
+            handlers.append(handler)
+
+    def unsubscribe(self, kind: str, handler: Handler) -> None:
+        handlers = self._handlers.get(kind, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def subscribers(self, kind: str) -> int:
+        return len(self._handlers.get(kind, []))
+
+    async def publish(self, change: Change) -> None:
+        """Run every handler for ``change``; a failing handler is logged, not raised."""
+
+        async def run(handler: Handler) -> None:
+            try:
+                result = handler(change)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logging.warning(f"Cache update for {change.kind} {change.id} failed: {e}")
+
+        await asyncio.gather(*(run(handler) for handler in list(self._handlers.get(change.kind, []))))
+
+
+changes = ChangeFeed()
@@ -0,0 +1,321 @@
+"""Priority lanes sharing the Freshdesk connection and rate budget.
+
+Every request belongs to a lane: ``interactive`` (an agent waiting on a
+tool call), ``background`` (syncs, cache refreshes, outbox delivery) or
+``bulk`` (exports and mass downloads). One controller per process admits
+requests:
+
+* at most ``FRESHDESK_MAX_CONCURRENCY`` requests run at once, and
+  ``FRESHDESK_INTERACTIVE_SLOTS`` of them are kept for interactive calls;
+* waiting requests are admitted interactive first, then background, then bulk;
+* a token bucket tracks the per-minute API budget (``FRESHDESK_RATE_LIMIT``,
+  or the ``X-Ratelimit-Total`` header Freshdesk returns) and only interactive
+  requests may spend the last ``FRESHDESK_INTERACTIVE_RESERVE`` share of it;
+* a 429 pauses every lane for ``Retry-After`` seconds.
+
+Requests are routed through :class:`LaneTransport`, so tools only need to run
+in the right lane (see :func:`use_lane`).
+"""
+
+import asyncio
+import contextvars
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+import httpx
+
+from .config import env_float, env_int
+
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_INTERACTIVE_SLOTS = 2
+DEFAULT_INTERACTIVE_RESERVE = 0.2
+# Pause used when a 429 carries no usable Retry-After.
+DEFAULT_RATE_LIMIT_PAUSE = 60.0
+
+
+class Lane(str, Enum):
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
+    BULK = "bulk"
+
+    @property
+    def rank(self) -> int:
+        return LANE_ORDER.index(self)
+
+
+# Admission order, highest priority first.
+LANE_ORDER = (Lane.INTERACTIVE, Lane.BACKGROUND, Lane.BULK)
+
+_lane: contextvars.ContextVar[Lane] = contextvars.ContextVar("freshdesk_lane", default=Lane.INTERACTIVE)
+
+
+def current_lane() -> Lane:
+    return _lane.get()
+
+
+@contextmanager
+def use_lane(lane: Lane) -> Iterator[Lane]:
+    """Run the block in ``lane``, or in the current lane if that is lower priority.
+
+    A bulk tool calling an interactive one keeps its requests in the bulk lane.
+    """
+
+    effective = max(lane, current_lane(), key=lambda item: item.rank)
+    token = _lane.set(effective)
+    try:
+        yield effective
+    finally:
+        _lane.reset(token)
+
+
+class LaneController:
+    """Admits requests by lane against shared concurrency and rate budgets."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        timer = getattr(self, "_timer", None)
+        if timer is not None:
+            timer.cancel()
+        self._active = 0
+        self._waiters: Dict[Lane, Deque[Tuple[asyncio.Future, int]]] = {lane: deque() for lane in LANE_ORDER}
+        self._tokens: Optional[float] = None
+        self._learned_capacity: Optional[float] = None
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats: Dict[str, Dict[str, float]] = {
+            lane.value: {"requests": 0, "waited": 0, "wait_seconds": 0.0} for lane in LANE_ORDER
+        }
+
+    # -- budgets -------------------------------------------------------
+
+    def _max_concurrency(self) -> int:
+        return max(1, env_int("FRESHDESK_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+
+    def _slot_limit(self, lane: Lane) -> int:
+        limit = self._max_concurrency()
+        if lane is Lane.INTERACTIVE:
+            return limit
+        reserved = env_int("FRESHDESK_INTERACTIVE_SLOTS", DEFAULT_INTERACTIVE_SLOTS)
+        return max(1, limit - reserved)
+
+    def capacity(self) -> Optional[float]:
+        """Requests per minute, when known."""
+
+        configured = env_float("FRESHDESK_RATE_LIMIT", 0.0)
+        if configured > 0:
+            return configured
+        return self._learned_capacity
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        capacity = self.capacity()
+        if capacity is not None:
+            if self._tokens is None:
+                self._tokens = capacity
+            self._tokens = min(capacity, self._tokens + (now - self._refilled_at) * capacity / 60.0)
+        self._refilled_at = now
+
+    def _floor(self, lane: Lane) -> float:
+        """Tokens that must remain after a request in ``lane`` is admitted."""
+
+        capacity = self.capacity()
+        if lane is Lane.INTERACTIVE or capacity is None:
+            return 0.0
+        return capacity * env_float("FRESHDESK_INTERACTIVE_RESERVE", DEFAULT_INTERACTIVE_RESERVE)
+
+    def _wait_for_budget(self, lane: Lane, cost: int) -> float:
+        """Seconds until ``lane`` may spend ``cost`` tokens; 0 when it may now."""
+
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if not cost or self._tokens is None:
+            return 0.0
+        missing = cost + self._floor(lane) - self._tokens
+        if missing <= 0:
+            return 0.0
+        return missing * 60.0 / self.capacity()
+
+    def _try_admit(self, lane: Lane, cost: int) -> Optional[float]:
+        """Admit now and return None, or return the seconds to wait (0 = wait for a slot)."""
+
+        self._refill()
+        wait = self._wait_for_budget(lane, cost)
+        if wait > 0:
+            return wait
+        if self._active >= self._slot_limit(lane):
+            return 0.0
+        self._active += 1
+        if cost and self._tokens is not None:
+            self._tokens -= cost
+        return None
+
+    # -- admission -----------------------------------------------------
+
+    def _ahead_of(self, lane: Lane) -> bool:
+        return any(self._waiters[other] for other in LANE_ORDER[: lane.rank + 1])
+
+    async def acquire(self, lane: Lane, cost: int = 1) -> None:
+        """Wait until a request in ``lane`` may start; pair with :meth:`release`."""
+
+        stats = self.stats[lane.value]
+        stats["requests"] += 1
+        if not self._ahead_of(lane) and self._try_admit(lane, cost) is None:
+            return
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append((future, cost))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as the caller gave up: hand the slot back.
+                self.release()
+            else:
+                try:
+                    self._waiters[lane].remove((future, cost))
+                except ValueError:
+                    pass
+            raise
+        stats["waited"] += 1
+        stats["wait_seconds"] += time.monotonic() - started
+
+    def release(self) -> None:
+        self._active = max(0, self._active - 1)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admit waiters in priority order; schedule a retry when blocked on budget."""
+
+        retry_in: Optional[float] = None
+        for lane in LANE_ORDER:
+            queue = self._waiters[lane]
+            while queue:
+                future, cost = queue[0]
+                if future.done():
+                    queue.popleft()
+                    continue
+                wait = self._try_admit(lane, cost)
+                if wait is not None:
+                    if wait > 0:
+                        retry_in = wait if retry_in is None else min(retry_in, wait)
+                    break
+                queue.popleft()
+                future.set_result(None)
+            if queue:
+                # Lower lanes never overtake a blocked higher one.
+                break
+
+        if retry_in is None:
+            return
+        loop = asyncio.get_running_loop()
+        due = loop.time() + retry_in
+        if self._timer is not None:
+            if self._timer.when() <= due:
+                return
+            self._timer.cancel()
+
+        def fire() -> None:
+            self._timer = None
+            self._dispatch()
+
+        self._timer = loop.call_at(due, fire)
+
+    def observe(self, response: httpx.Response) -> None:
+        """Fold Freshdesk's rate-limit headers into the budget."""
+
+        headers = response.headers
+        total = _number(headers.get("x-ratelimit-total"))
+        if total:
+            self._learned_capacity = total
+        self._refill()
+        remaining = _number(headers.get("x-ratelimit-remaining"))
+        if remaining is not None and self._tokens is not None:
+            self._tokens = min(self._tokens, remaining)
+        if response.status_code == 429:
+            pause = _number(headers.get("retry-after"))
+            self._paused_until = time.monotonic() + (pause if pause is not None else DEFAULT_RATE_LIMIT_PAUSE)
+            self._tokens = 0.0 if self._tokens is not None else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "active": self._active,
+            "waiting": {lane.value: len(self._waiters[lane]) for lane in LANE_ORDER},
+            "tokens": None if self._tokens is None else round(self._tokens, 1),
+            "capacity_per_minute": self.capacity(),
+            "paused_for": max(0.0, round(self._paused_until - time.monotonic(), 1)),
+            "lanes": self.stats,
+        }
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body wrapper that frees the request's slot once the body is closed."""
+
+    def __init__(self, stream: Any, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release: Optional[Callable[[], None]] = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            if hasattr(self._stream, "aclose"):
+                await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class LaneTransport(httpx.AsyncBaseTransport):
+    """Transport admitting each request through a :class:`LaneController`.
+
+    Args:
+        controller: Shared controller
+        budgeted: Predicate telling whether a request counts against the API budget
+        transport: Transport that actually sends requests
+    """
+
+    def __init__(
+        self,
+        controller: LaneController,
+        budgeted: Callable[[httpx.Request], bool],
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self._controller = controller
+        self._budgeted = budgeted
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        cost = 1 if self._budgeted(request) else 0
+        await self._controller.acquire(current_lane(), cost)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self._controller.release()
+            raise
+        if cost:
+            self._controller.observe(response)
+        response.stream = _ReleasingStream(response.stream, self._controller.release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,653 @@
+"""Drive the MCP server with many concurrent simulated clients.
+
+:func:`run` starts a local Freshdesk stand-in, points the server at it through
+``FRESHDESK_BASE_URL`` and opens ``clients`` MCP sessions, each calling tools
+drawn from a weighted mix until the duration (or per-client request budget) is
+spent. Sessions use one of three transports:
+
+``stdio``
+    Each client spawns its own ``freshdesk-mcp`` process, as desktop hosts do.
+``http``
+    One server process speaks streamable HTTP and every client connects to it.
+``memory``
+    Clients talk to this process's server in memory; useful for profiling.
+
+The report holds throughput, latency percentiles overall and per tool, and a
+timeline of calls, errors, tail latency, server memory and event-loop lag,
+sampled from ``get_request_metrics`` every ``sample_interval`` seconds.
+
+The stand-in serves synthetic tickets, conversations, contacts, agents and
+groups with configurable latency, or replays a cassette recorded with
+``FRESHDESK_CASSETTE_MODE=record``.
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import sys
+import time
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from . import cassettes
+from .records import format_timestamp
+
+TRANSPORTS = ("stdio", "http", "memory")
+
+# How server processes are started; like the freshdesk-mcp console script.
+SERVER_ARGS = ("-c", "from freshdesk_mcp.server import main; main()")
+
+# (weight, tool, arguments(rng, ticket_count))
+Operation = Tuple[int, str, Callable[[random.Random, int], Dict[str, Any]]]
+
+SEARCH_QUERIES = ("status:2", "priority:4", "status:3 AND priority:3", "refund", "cannot log in", "outage")
+
+
+def _ticket_id(rng: random.Random, tickets: int) -> int:
+    # Recent tickets are looked at far more often than old ones.
+    return max(1, tickets - int(rng.expovariate(1 / max(1.0, tickets / 10))) % tickets)
+
+
+TRIAGE: Tuple[Operation, ...] = (
+    (5, "get_tickets", lambda rng, n: {"page": rng.randint(1, 3), "per_page": 30, "resolve_names": True}),
+    (6, "get_ticket", lambda rng, n: {"ticket_id": _ticket_id(rng, n), "compact": True}),
+    (5, "get_ticket_conversation", lambda rng, n: {"ticket_id": _ticket_id(rng, n), "compact": True}),
+    (2, "get_ticket_fields", lambda rng, n: {}),
+    (1, "update_ticket", lambda rng, n: {"ticket_id": _ticket_id(rng, n), "ticket_fields": {"priority": rng.randint(1, 4)}}),
+)
+SEARCH: Tuple[Operation, ...] = (
+    (6, "search_tickets", lambda rng, n: {"query": rng.choice(SEARCH_QUERIES), "resolve_names": True}),
+    (2, "get_ticket", lambda rng, n: {"ticket_id": _ticket_id(rng, n)}),
+    (1, "search_contacts", lambda rng, n: {"query": rng.choice(("ann", "bo", "chris"))}),
+)
+REPLIES: Tuple[Operation, ...] = (
+    (4, "get_ticket_conversation", lambda rng, n: {"ticket_id": _ticket_id(rng, n), "compact": True}),
+    (3, "create_ticket_reply", lambda rng, n: {"ticket_id": _ticket_id(rng, n), "body": "<p>Thanks, we are on it.</p>"}),
+    (1, "create_ticket_note", lambda rng, n: {"ticket_id": _ticket_id(rng, n), "body": "<p>Escalated.</p>"}),
+)
+MIXES: Dict[str, Tuple[Operation, ...]] = {
+    "triage": TRIAGE,
+    "search": SEARCH,
+    "replies": REPLIES,
+    "mixed": TRIAGE + SEARCH + REPLIES,
+}
+
+
+@dataclass
+class LoadTestConfig:
+    """Settings for one run; see the module docstring for the transports."""
+
+    clients: int = 10
+    duration: float = 30.0
+    # Stop each client after this many calls, even before the duration is up.
+    requests: Optional[int] = None
+    mix: str = "mixed"
+    transport: str = "stdio"
+    # Mean pause between a client's calls, in seconds (exponentially distributed).
+    think_time: float = 0.0
+    sample_interval: float = 1.0
+    # Synthetic stand-in: number of tickets and mean response latency in seconds.
+    tickets: int = 500
+    latency: float = 0.05
+    # Replay this cassette from the stand-in instead of synthetic data.
+    cassette: Optional[str] = None
+    seed: int = 0
+
+
+# -- Freshdesk stand-in ------------------------------------------------------
+
+
+class _Dataset:
+    """Deterministic synthetic account data, generated lazily per record."""
+
+    def __init__(self, tickets: int, seed: int) -> None:
+        self.ticket_count = tickets
+        self.seed = seed
+        self.agents = [
+            {"id": 1000 + i, "contact": {"name": f"Agent {i}", "email": f"agent{i}@example.com"}, "active": True}
+            for i in range(25)
+        ]
+        self.groups = [{"id": 2000 + i, "name": f"Group {i}"} for i in range(8)]
+        names = ("Ann", "Bob", "Chris", "Dana", "Eli", "Fay", "Gus", "Hana")
+        self.contacts = [
+            {"id": 3000 + i, "name": f"{names[i % len(names)]} {i}", "email": f"user{i}@example.com"}
+            for i in range(200)
+        ]
+        self.overrides: Dict[int, Dict[str, Any]] = {}
+        self.conversations: Dict[int, List[Dict[str, Any]]] = {}
+        self._next_conversation = 10**6
+
+    def ticket(self, ticket_id: int) -> Optional[Dict[str, Any]]:
+        if not 1 <= ticket_id <= self.ticket_count:
+            return None
+        rng = random.Random(self.seed * 1_000_003 + ticket_id)
+        created = 1_700_000_000 + ticket_id * 600
+        ticket = {
+            "id": ticket_id,
+            "subject": rng.choice(("Cannot log in", "Refund request", "Outage in EU", "Invoice question")),
+            "description": f"<div><p>Ticket {ticket_id} details.</p><blockquote>Earlier message</blockquote></div>",
+            "description_text": f"Ticket {ticket_id} details.",
+            "status": rng.choice((2, 2, 3, 4, 5)),
+            "priority": rng.choice((1, 2, 2, 3, 4)),
+            "source": rng.choice((1, 2, 3, 7)),
+            "requester_id": rng.choice(self.contacts)["id"],
+            "responder_id": rng.choice(self.agents)["id"],
+            "group_id": rng.choice(self.groups)["id"],
+            "tags": rng.sample(("billing", "vip", "bug", "outage"), rng.randrange(3)),
+            "created_at": format_timestamp(created),
+            "updated_at": format_timestamp(created + rng.randrange(86_400)),
+        }
+        ticket.update(self.overrides.get(ticket_id, {}))
+        return ticket
+
+    def thread(self, ticket_id: int) -> List[Dict[str, Any]]:
+        thread = self.conversations.get(ticket_id)
+        if thread is None:
+            rng = random.Random(self.seed * 7_000_003 + ticket_id)
+            thread = self.conversations[ticket_id] = [
+                {
+                    "id": ticket_id * 100 + i,
+                    "ticket_id": ticket_id,
+                    "body": f"<div>Update {i} on ticket {ticket_id}.<br>Regards,<br>Support</div>"
+                            f"<blockquote>{'Previous message. ' * rng.randint(1, 20)}</blockquote>",
+                    "private": i % 3 == 2,
+                    "incoming": i % 2 == 0,
+                    "created_at": format_timestamp(1_700_000_000 + ticket_id * 600 + i * 3600),
+                }
+                for i in range(rng.randint(1, 8))
+            ]
+        return thread
+
+    def add_conversation(self, ticket_id: int, body: str, private: bool) -> Dict[str, Any]:
+        self._next_conversation += 1
+        conversation = {
+            "id": self._next_conversation,
+            "ticket_id": ticket_id,
+            "body": body,
+            "private": private,
+            "incoming": False,
+            "created_at": format_timestamp(int(time.time())),
+        }
+        self.thread(ticket_id).append(conversation)
+        return conversation
+
+    def search(self, query: str) -> List[Dict[str, Any]]:
+        filters = {field: int(value) for field, value in re.findall(r"(status|priority):(\d+)", query)}
+        text = [term.lower() for term in re.findall(r"'([^']*)'", query)]
+        results = []
+        for ticket_id in range(self.ticket_count, 0, -1):
+            ticket = self.ticket(ticket_id)
+            if any(ticket[field] != value for field, value in filters.items()):
+                continue
+            if text and not any(term in ticket["subject"].lower() for term in text):
+                continue
+            results.append(ticket)
+        return results
+
+
+def _page(request, records: List[Dict[str, Any]]):
+    from starlette.responses import JSONResponse
+
+    page = max(1, int(request.query_params.get("page", 1)))
+    per_page = min(100, max(1, int(request.query_params.get("per_page", 30))))
+    start = (page - 1) * per_page
+    headers = {}
+    if start + per_page < len(records):
+        headers["Link"] = f'<{request.url.include_query_params(page=page + 1)}>; rel="next"'
+    return JSONResponse(records[start:start + per_page], headers=headers)
+
+
+def create_stand_in(tickets: int = 500, latency: float = 0.05, seed: int = 0):
+    """Starlette app imitating the Freshdesk endpoints the load mixes use.
+
+    Args:
+        tickets: Number of synthetic tickets
+        latency: Mean response latency in seconds
+        seed: Seed for the synthetic data and latency jitter
+    """
+
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    data = _Dataset(tickets, seed)
+    rng = random.Random(seed)
+    not_found = {"code": "not_found", "message": "Record not found"}
+
+    async def delay() -> None:
+        if latency > 0:
+            await asyncio.sleep(latency * rng.uniform(0.5, 1.5))
+
+    async def list_tickets(request):
+        await delay()
+        return _page(request, [data.ticket(i) for i in range(tickets, 0, -1)][:300])
+
+    async def ticket(request):
+        await delay()
+        ticket_id = int(request.path_params["ticket_id"])
+        record = data.ticket(ticket_id)
+        if record is None:
+            return JSONResponse(not_found, status_code=404)
+        if request.method == "PUT":
+            data.overrides.setdefault(ticket_id, {}).update(await request.json())
+            record = data.ticket(ticket_id)
+        return JSONResponse(record)
+
+    async def conversations(request):
+        await delay()
+        ticket_id = int(request.path_params["ticket_id"])
+        if data.ticket(ticket_id) is None:
+            return JSONResponse(not_found, status_code=404)
+        return JSONResponse(data.thread(ticket_id))
+
+    async def add_conversation(request):
+        await delay()
+        ticket_id = int(request.path_params["ticket_id"])
+        if data.ticket(ticket_id) is None:
+            return JSONResponse(not_found, status_code=404)
+        body = (await request.json()).get("body", "")
+        private = request.url.path.endswith("/notes")
+        return JSONResponse(data.add_conversation(ticket_id, body, private), status_code=201)
+
+    async def search_tickets(request):
+        await delay()
+        results = data.search(request.query_params.get("query", ""))
+        return JSONResponse({"results": results[:30], "total": len(results)})
+
+    async def ticket_fields(request):
+        await delay()
+        return JSONResponse([
+            {"id": 1, "name": "status", "label": "Status", "type": "default_status", "required_for_agents": True},
+            {"id": 2, "name": "priority", "label": "Priority", "type": "default_priority"},
+            {"id": 3, "name": "cf_region", "label": "Region", "type": "custom_dropdown", "choices": ["EU", "US"]},
+        ])
+
+    async def agents(request):
+        await delay()
+        return _page(request, data.agents)
+
+    async def groups(request):
+        await delay()
+        return _page(request, data.groups)
+
+    async def contacts(request):
+        await delay()
+        return _page(request, data.contacts)
+
+    async def contact(request):
+        await delay()
+        contact_id = int(request.path_params["contact_id"])
+        match = next((c for c in data.contacts if c["id"] == contact_id), None)
+        return JSONResponse(match) if match else JSONResponse(not_found, status_code=404)
+
+    async def autocomplete_contacts(request):
+        await delay()
+        term = request.query_params.get("term", "").lower()
+        return JSONResponse([c for c in data.contacts if c["name"].lower().startswith(term)][:20])
+
+    prefix = "/api/v2"
+    return Starlette(routes=[
+        Route(f"{prefix}/tickets", list_tickets),
+        Route(f"{prefix}/tickets/{{ticket_id:int}}", ticket, methods=["GET", "PUT"]),
+        Route(f"{prefix}/tickets/{{ticket_id:int}}/conversations", conversations),
+        Route(f"{prefix}/tickets/{{ticket_id:int}}/reply", add_conversation, methods=["POST"]),
+        Route(f"{prefix}/tickets/{{ticket_id:int}}/notes", add_conversation, methods=["POST"]),
+        Route(f"{prefix}/search/tickets", search_tickets),
+        Route(f"{prefix}/ticket_fields", ticket_fields),
+        Route(f"{prefix}/agents", agents),
+        Route(f"{prefix}/groups", groups),
+        Route(f"{prefix}/contacts", contacts),
+        Route(f"{prefix}/contacts/autocomplete", autocomplete_contacts),
+        Route(f"{prefix}/contacts/{{contact_id:int}}", contact),
+    ])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def serve_stand_in(app, host: str = "127.0.0.1", port: Optional[int] = None) -> AsyncIterator[str]:
+    """Serve ``app`` with uvicorn for the duration of the block; yields its API base URL."""
+
+    import uvicorn
+
+    port = port or _free_port()
+    config = uvicorn.Config(app, host=host, port=port, log_config=None, access_log=False, lifespan="off")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    try:
+        while not server.started:
+            if task.done():
+                task.result()
+                raise RuntimeError(f"Stand-in failed to start on {host}:{port}")
+            await asyncio.sleep(0.01)
+        yield f"http://{host}:{port}/api/v2"
+    finally:
+        server.should_exit = True
+        await task
+
+
+# -- clients -----------------------------------------------------------------
+
+
+@contextmanager
+def _environment(values: Dict[str, str]) -> Iterator[None]:
+    saved = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+async def _wait_for_port(host: str, port: int, process, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            if process.returncode is not None:
+                raise RuntimeError(f"MCP server exited with status {process.returncode}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"MCP server did not listen on {host}:{port} within {timeout:.0f}s")
+            await asyncio.sleep(0.1)
+        else:
+            writer.close()
+            return
+
+
+@asynccontextmanager
+async def _http_server(env: Dict[str, str], errlog) -> AsyncIterator[str]:
+    port = _free_port()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, *SERVER_ARGS,
+        env={**os.environ, **env, "FRESHDESK_MCP_TRANSPORT": "streamable-http", "FRESHDESK_MCP_PORT": str(port)},
+        stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.DEVNULL, stderr=errlog,
+    )
+    try:
+        await _wait_for_port("127.0.0.1", port, process)
+        yield f"http://127.0.0.1:{port}/mcp"
+    finally:
+        if process.returncode is None:
+            process.terminate()
+            await process.wait()
+
+
+async def _open_session(stack: AsyncExitStack, transport: str, env: Dict[str, str], url: Optional[str], errlog):
+    from mcp import ClientSession
+
+    if transport == "memory":
+        from mcp.shared.memory import create_connected_server_and_client_session
+
+        from .server import mcp
+
+        return await stack.enter_async_context(create_connected_server_and_client_session(mcp))
+    if transport == "stdio":
+        from mcp.client.stdio import StdioServerParameters, stdio_client
+
+        params = StdioServerParameters(
+            command=sys.executable, args=list(SERVER_ARGS), env={**os.environ, **env}
+        )
+        read, write = await stack.enter_async_context(stdio_client(params, errlog=errlog))
+    else:
+        from mcp.client.streamable_http import streamablehttp_client
+
+        read, write, _ = await stack.enter_async_context(streamablehttp_client(url))
+    session = await stack.enter_async_context(ClientSession(read, write))
+    await session.initialize()
+    return session
+
+
+def _payload(result) -> Any:
+    for item in result.content:
+        text = getattr(item, "text", None)
+        if text is not None:
+            try:
+                return json.loads(text)
+            except ValueError:
+                return text
+    return None
+
+
+def _failed(result) -> bool:
+    if result.isError:
+        return True
+    payload = _payload(result)
+    if isinstance(payload, dict):
+        return bool(payload.get("error")) or payload.get("success") is False
+    return isinstance(payload, str) and payload.startswith("Error")
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted ``values``."""
+
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))
+    return values[index]
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(latencies)
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p90_ms": ms(percentile(ordered, 0.90)),
+        "p95_ms": ms(percentile(ordered, 0.95)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1] if ordered else None),
+        "mean_ms": ms(sum(ordered) / len(ordered) if ordered else None),
+    }
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.calls: List[Tuple[float, str, float, bool]] = []
+        self._cursor = 0
+
+    def add(self, tool: str, latency: float, ok: bool) -> None:
+        self.calls.append((time.monotonic(), tool, latency, ok))
+
+    def since_last(self) -> List[Tuple[float, str, float, bool]]:
+        calls, self._cursor = self.calls[self._cursor:], len(self.calls)
+        return calls
+
+
+async def _client_loop(session, index: int, operations, config: LoadTestConfig, recorder: _Recorder,
+                       stop_at: float) -> None:
+    rng = random.Random(config.seed * 7919 + index)
+    weights = [weight for weight, _, _ in operations]
+    made = 0
+    while time.monotonic() < stop_at and (config.requests is None or made < config.requests):
+        _, tool, arguments = rng.choices(operations, weights)[0]
+        started = time.perf_counter()
+        try:
+            ok = not _failed(await session.call_tool(tool, arguments(rng, config.tickets)))
+        except Exception:
+            ok = False
+        recorder.add(tool, time.perf_counter() - started, ok)
+        made += 1
+        if config.think_time > 0:
+            await asyncio.sleep(rng.expovariate(1 / config.think_time))
+
+
+async def _probe(sessions) -> Dict[str, Any]:
+    """Server memory (summed over processes) and worst loop lag since the last probe."""
+
+    rss, lag = 0, None
+    for session in sessions:
+        try:
+            process = _payload(await session.call_tool("get_request_metrics", {})).get("process", {})
+        except Exception:
+            continue
+        rss += process.get("rss_bytes") or 0
+        window = process.get("loop_lag", {}).get("max_ms")
+        if window is not None:
+            lag = window if lag is None else max(lag, window)
+    return {"rss_bytes": rss or None, "loop_lag_max_ms": lag}
+
+
+async def _sampler(probe_sessions, recorder: _Recorder, config: LoadTestConfig, started: float,
+                   timeline: List[Dict[str, Any]], done: asyncio.Event) -> None:
+    while True:
+        try:
+            await asyncio.wait_for(done.wait(), config.sample_interval)
+        except asyncio.TimeoutError:
+            pass
+        # Checked before taking the calls: done may be set while the probe below runs.
+        last = done.is_set()
+        calls = recorder.since_last()
+        latency = _latency_summary([call[2] for call in calls])
+        timeline.append({
+            "t": round(time.monotonic() - started, 2),
+            "calls": len(calls),
+            "errors": sum(1 for call in calls if not call[3]),
+            "p50_ms": latency["p50_ms"],
+            "p95_ms": latency["p95_ms"],
+            "p99_ms": latency["p99_ms"],
+            **await _probe(probe_sessions),
+        })
+        if last:
+            return
+
+
+def _report(config: LoadTestConfig, recorder: _Recorder, elapsed: float, timeline: List[Dict[str, Any]],
+            connect_seconds: float) -> Dict[str, Any]:
+    per_tool: Dict[str, List[Tuple[float, bool]]] = {}
+    for _, tool, latency, ok in recorder.calls:
+        per_tool.setdefault(tool, []).append((latency, ok))
+    lags = [point["loop_lag_max_ms"] for point in timeline if point.get("loop_lag_max_ms") is not None]
+    rss = [point["rss_bytes"] for point in timeline if point.get("rss_bytes")]
+    return {
+        "config": asdict(config),
+        "connect_seconds": round(connect_seconds, 2),
+        "duration_seconds": round(elapsed, 2),
+        "calls": len(recorder.calls),
+        "errors": sum(1 for call in recorder.calls if not call[3]),
+        "throughput_per_second": round(len(recorder.calls) / elapsed, 2) if elapsed else None,
+        "latency": _latency_summary([call[2] for call in recorder.calls]),
+        "tools": {
+            tool: {"calls": len(calls), "errors": sum(1 for _, ok in calls if not ok),
+                   **_latency_summary([latency for latency, _ in calls])}
+            for tool, calls in sorted(per_tool.items())
+        },
+        "server": {
+            "max_loop_lag_ms": max(lags) if lags else None,
+            "max_rss_bytes": max(rss) if rss else None,
+        },
+        "timeline": timeline,
+    }
+
+
+async def run(config: LoadTestConfig, url: Optional[str] = None, errlog=None) -> Dict[str, Any]:
+    """Run one load test and return its report.
+
+    Args:
+        config: Run settings
+        url: Existing streamable-HTTP MCP endpoint to drive instead of starting
+            a server (``http`` transport only; no stand-in is started)
+        errlog: File receiving the server processes' stderr (default: discarded)
+    """
+
+    if config.transport not in TRANSPORTS:
+        raise ValueError(f"Transport must be one of {', '.join(TRANSPORTS)}, not {config.transport!r}")
+    if config.mix not in MIXES:
+        raise ValueError(f"Mix must be one of {', '.join(MIXES)}, not {config.mix!r}")
+    if config.clients < 1:
+        raise ValueError("At least one client is required")
+
+    operations = MIXES[config.mix]
+    recorder = _Recorder()
+    timeline: List[Dict[str, Any]] = []
+    async with AsyncExitStack() as stack:
+        if errlog is None:
+            errlog = stack.enter_context(open(os.devnull, "w"))
+        env: Dict[str, str] = {}
+        if url is None:
+            if config.cassette:
+                app = cassettes.create_app(cassettes.Cassette(config.cassette))
+            else:
+                app = create_stand_in(config.tickets, config.latency, config.seed)
+            env = {
+                "FRESHDESK_BASE_URL": await stack.enter_async_context(serve_stand_in(app)),
+                "FRESHDESK_DOMAIN": "127.0.0.1",
+                "FRESHDESK_API_KEY": os.environ.get("FRESHDESK_API_KEY") or "loadtest",
+                # Several loop lag samples per timeline point, however short the interval.
+                "FRESHDESK_LOOP_LAG_INTERVAL": os.environ.get("FRESHDESK_LOOP_LAG_INTERVAL")
+                or str(min(0.25, config.sample_interval / 5)),
+            }
+            if config.transport == "memory":
+                stack.enter_context(_environment(env))
+            elif config.transport == "http":
+                url = await stack.enter_async_context(_http_server(env, errlog))
+        elif config.transport != "http":
+            raise ValueError("An MCP server URL can only be driven over the http transport")
+
+        loop = asyncio.get_running_loop()
+        connected = [loop.create_future() for _ in range(config.clients)]
+        finished = [loop.create_future() for _ in range(config.clients)]
+        go, release = asyncio.Event(), asyncio.Event()
+        stop_at = [0.0]
+
+        async def client(index: int) -> None:
+            # Each client opens and closes its session in its own task, as the
+            # MCP client transports require.
+            try:
+                async with AsyncExitStack() as session_stack:
+                    session = await _open_session(session_stack, config.transport, env, url, errlog)
+                    connected[index].set_result(session)
+                    await go.wait()
+                    await _client_loop(session, index, operations, config, recorder, stop_at[0])
+                    finished[index].set_result(None)
+                    await release.wait()
+            except BaseException as e:
+                error = e if isinstance(e, Exception) else RuntimeError(f"Client {index} was cancelled")
+                for future in (connected[index], finished[index]):
+                    if not future.done():
+                        future.set_exception(error)
+                raise
+
+        connect_started = time.monotonic()
+        tasks = [asyncio.create_task(client(index)) for index in range(config.clients)]
+        try:
+            sessions = await asyncio.gather(*connected)
+            connect_seconds = time.monotonic() - connect_started
+            # Processes are separate servers over stdio; otherwise one server is shared.
+            probe_sessions = sessions if config.transport == "stdio" else sessions[:1]
+            await _probe(probe_sessions)
+
+            started = time.monotonic()
+            stop_at[0] = started + config.duration
+            done = asyncio.Event()
+            sampler = asyncio.create_task(_sampler(probe_sessions, recorder, config, started, timeline, done))
+            go.set()
+            # Calls in flight at the deadline are allowed to finish.
+            await asyncio.gather(*finished)
+            elapsed = time.monotonic() - started
+            done.set()
+            await sampler
+        finally:
+            release.set()
+            go.set()
+            for index, task in enumerate(tasks):
+                if not connected[index].done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for future in connected + finished:
+                if future.done() and not future.cancelled():
+                    future.exception()
+    return _report(config, recorder, elapsed, timeline, connect_seconds)
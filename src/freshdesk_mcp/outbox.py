@@ -0,0 +1,397 @@
+"""Durable outbox for conversation writes.
+
+When ``FRESHDESK_OUTBOX_PATH`` points at a SQLite file, replies, notes and
+conversation edits are stored there and acknowledged with a job id straight
+away. Worker tasks deliver due jobs concurrently, back off on errors and
+pause every worker while Freshdesk answers 429 so the account's rate limit
+is respected. Jobs survive restarts; delivery is at-least-once.
+
+Several processes may share one outbox file (e.g. one stdio server per MCP
+client). A job is claimed with a conditional update, so only one worker sends
+it, and the claim is a lease of ``FRESHDESK_OUTBOX_LEASE`` seconds: jobs left
+in flight by a process that died are taken over once their lease expires.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from .config import env_float, env_int, env_str
+from .deadlines import detach
+from .lanes import Lane, use_lane
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DELIVERED = "delivered"
+FAILED = "failed"
+STATUSES = (PENDING, IN_FLIGHT, DELIVERED, FAILED)
+
+# Idle workers re-check the queue at least this often (seconds).
+IDLE_POLL_SECONDS = 5.0
+
+# Seconds a claimed job is reserved for its worker before others may take it over.
+DEFAULT_LEASE_SECONDS = 300.0
+
+# Seconds during which a write without an idempotency key is deduplicated by content.
+DEFAULT_DEDUP_WINDOW = 600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    method TEXT NOT NULL,
+    -- Relative to the API base URL, e.g. /tickets/1/reply.
+    path TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    response TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    claimed_by TEXT,
+    lease_expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, next_attempt_at);
+"""
+
+Deliver = Callable[[Dict[str, Any]], Awaitable[httpx.Response]]
+
+
+def idempotency_key_for(method: str, path: str, payload: Dict[str, Any], bucket: int) -> str:
+    """Derive a key from the request and a time bucket, so a retried tool call is not posted twice.
+
+    Args:
+        method: HTTP method of the write
+        path: Path of the write, relative to the API base URL
+        payload: JSON body of the write
+        bucket: Index of the dedup window the write falls in
+    """
+
+    canonical = json.dumps([method.upper(), path, payload], sort_keys=True, separators=(",", ":"))
+    return f"{hashlib.sha256(canonical.encode()).hexdigest()}:{bucket}"
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _job_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    job["response"] = json.loads(job["response"]) if job["response"] else None
+    return job
+
+
+class Outbox:
+    """SQLite-backed job queue with concurrent delivery workers.
+
+    Args:
+        deliver: Coroutine sending one job to Freshdesk and returning the response
+        on_delivered: Optional coroutine called with each delivered job
+    """
+
+    def __init__(
+        self,
+        deliver: Deliver,
+        on_delivered: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+    ) -> None:
+        self._deliver = deliver
+        self._on_delivered = on_delivered
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._claim_lock: Optional[asyncio.Lock] = None
+        self._paused_until = 0.0
+        self._initialized_path: Optional[str] = None
+        self._init_lock = threading.Lock()
+
+    # -- configuration -------------------------------------------------
+
+    def path(self) -> Optional[str]:
+        return env_str("FRESHDESK_OUTBOX_PATH")
+
+    def enabled(self) -> bool:
+        return self.path() is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        path = self.path()
+        if path is None:
+            raise RuntimeError("The outbox is disabled; set FRESHDESK_OUTBOX_PATH")
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        with self._init_lock:
+            if self._initialized_path != path:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(SCHEMA)
+                self._initialized_path = path
+        return connection
+
+    def lease(self) -> float:
+        return env_float("FRESHDESK_OUTBOX_LEASE", DEFAULT_LEASE_SECONDS)
+
+    def dedup_window(self) -> float:
+        return env_float("FRESHDESK_OUTBOX_DEDUP_WINDOW", DEFAULT_DEDUP_WINDOW)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        connection = self._connect()
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def _update(self, sql: str, params: tuple = ()) -> int:
+        connection = self._connect()
+        try:
+            return connection.execute(sql, params).rowcount
+        finally:
+            connection.close()
+
+    async def _run(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        return await asyncio.to_thread(self._query, sql, params)
+
+    # -- queue ---------------------------------------------------------
+
+    async def enqueue(
+        self,
+        kind: str,
+        method: str,
+        path: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Store a write and wake the workers; returns the job (an existing one for a repeated write).
+
+        A caller's ``idempotency_key`` is honoured for good. Without one, the
+        same write is only deduplicated within FRESHDESK_OUTBOX_DEDUP_WINDOW
+        seconds, so a reply repeated days later is still sent.
+        """
+
+        now = time.time()
+        row = (kind, method.upper(), path, json.dumps(payload), PENDING, now, now, now)
+        insert = (
+            "INSERT INTO jobs (id, idempotency_key, kind, method, path, payload, status,"
+            " next_attempt_at, created_at, updated_at)"
+        )
+        window = self.dedup_window()
+        if idempotency_key or window <= 0:
+            key = idempotency_key or uuid.uuid4().hex
+            await self._run(
+                f"{insert} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (idempotency_key) DO NOTHING",
+                (uuid.uuid4().hex, key, *row),
+            )
+            rows = await self._run("SELECT * FROM jobs WHERE idempotency_key = ?", (key,))
+        else:
+            # A repeat may fall in the next bucket; look in the previous one too.
+            bucket = int(now // window)
+            keys = [idempotency_key_for(method, path, payload, b) for b in (bucket, bucket - 1)]
+            recent = "SELECT * FROM jobs WHERE idempotency_key IN (?, ?) AND created_at >= ?"
+            await self._run(
+                f"{insert} SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?"
+                f" WHERE NOT EXISTS ({recent}) ON CONFLICT (idempotency_key) DO NOTHING",
+                (uuid.uuid4().hex, keys[0], *row, *keys, now - window),
+            )
+            rows = await self._run(f"{recent} ORDER BY created_at LIMIT 1", (*keys, now - window))
+        self._wake()
+        return _job_dict(rows[0])
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self._run("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return _job_dict(rows[0]) if rows else None
+
+    async def jobs(self, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent jobs first, optionally filtered by status."""
+
+        if status:
+            rows = await self._run(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+            )
+        else:
+            rows = await self._run("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+        return [_job_dict(row) for row in rows]
+
+    async def counts(self) -> Dict[str, int]:
+        rows = await self._run("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status")
+        counts = {status: 0 for status in STATUSES}
+        counts.update({row["status"]: row["count"] for row in rows})
+        return counts
+
+    async def retry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Put a failed job back in the queue."""
+
+        await self._run(
+            "UPDATE jobs SET status = ?, attempts = 0, next_attempt_at = ?, updated_at = ?"
+            " WHERE id = ? AND status = ?",
+            (PENDING, time.time(), time.time(), job_id, FAILED),
+        )
+        self._wake()
+        return await self.get(job_id)
+
+    # -- delivery ------------------------------------------------------
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        """Take the next due job, or one whose worker's lease expired.
+
+        The update only succeeds if the job is still claimable, so a job
+        picked by two processes at once is sent by one of them.
+        """
+
+        if self._claim_lock is None:
+            self._claim_lock = asyncio.Lock()
+        claimable = "(status = ? AND next_attempt_at <= ?) OR (status = ? AND lease_expires_at <= ?)"
+        async with self._claim_lock:
+            while True:
+                now = time.time()
+                rows = await self._run(
+                    f"SELECT * FROM jobs WHERE {claimable} ORDER BY next_attempt_at LIMIT 1",
+                    (PENDING, now, IN_FLIGHT, now),
+                )
+                if not rows:
+                    return None
+                job = _job_dict(rows[0])
+                claim = uuid.uuid4().hex
+                claimed = await asyncio.to_thread(
+                    self._update,
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, claimed_by = ?, lease_expires_at = ?,"
+                    f" updated_at = ? WHERE id = ? AND ({claimable})",
+                    (IN_FLIGHT, claim, now + self.lease(), now, job["id"], PENDING, now, IN_FLIGHT, now),
+                )
+                if claimed:
+                    job.update(status=IN_FLIGHT, attempts=job["attempts"] + 1, claimed_by=claim)
+                    return job
+
+    async def _finish(self, job: Dict[str, Any], status: str, error: Optional[str] = None,
+                      response: Any = None, delay: float = 0.0, refund: bool = False) -> None:
+        # A worker whose lease was taken over no longer owns the job.
+        await self._run(
+            "UPDATE jobs SET status = ?, last_error = ?, response = ?, next_attempt_at = ?,"
+            " attempts = attempts - ?, claimed_by = NULL, lease_expires_at = NULL, updated_at = ?"
+            " WHERE id = ? AND claimed_by = ?",
+            (status, error, json.dumps(response) if response is not None else None,
+             time.time() + delay, 1 if refund else 0, time.time(), job["id"], job["claimed_by"]),
+        )
+
+    def _backoff(self, attempts: int) -> float:
+        base = env_float("FRESHDESK_OUTBOX_BACKOFF", 2.0)
+        return min(300.0, base * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+
+    async def process_once(self) -> bool:
+        """Deliver one due job; returns False when nothing was due."""
+
+        if time.time() < self._paused_until:
+            return False
+        job = await self._claim()
+        if job is None:
+            return False
+
+        max_attempts = env_int("FRESHDESK_OUTBOX_MAX_ATTEMPTS", 8)
+        try:
+            response = await self._deliver(job)
+        except httpx.HTTPError as e:
+            if job["attempts"] >= max_attempts:
+                await self._finish(job, FAILED, error=str(e))
+            else:
+                await self._finish(job, PENDING, error=str(e), delay=self._backoff(job["attempts"]))
+            return True
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text or None
+
+        if response.status_code == 429:
+            # The limit is per account: hold every worker, not just this job.
+            delay = retry_after_seconds(response)
+            if delay is None:
+                delay = self._backoff(job["attempts"])
+            self._paused_until = max(self._paused_until, time.time() + delay)
+            # Rate-limited attempts do not count towards max_attempts.
+            await self._finish(job, PENDING, error="Rate limited (429)", delay=delay, refund=True)
+        elif response.status_code >= 500:
+            error = f"Server error ({response.status_code})"
+            if job["attempts"] >= max_attempts:
+                await self._finish(job, FAILED, error=error, response=body)
+            else:
+                await self._finish(job, PENDING, error=error, response=body, delay=self._backoff(job["attempts"]))
+        elif response.status_code >= 400:
+            await self._finish(job, FAILED, error=f"Rejected ({response.status_code})", response=body)
+        else:
+            await self._finish(job, DELIVERED, response=body)
+            if self._on_delivered is not None:
+                try:
+                    await self._on_delivered({**job, "response": body})
+                except Exception as e:
+                    logging.warning(f"Outbox delivery hook failed for job {job['id']}: {e}")
+        return True
+
+    async def _next_due_in(self) -> float:
+        rows = await self._run("SELECT MIN(next_attempt_at) AS due FROM jobs WHERE status = ?", (PENDING,))
+        due = rows[0]["due"] if rows else None
+        wait = IDLE_POLL_SECONDS if due is None else due - time.time()
+        wait = max(wait, self._paused_until - time.time())
+        return min(max(wait, 0.05), IDLE_POLL_SECONDS)
+
+    async def _worker(self) -> None:
+        # Workers may be started from inside a tool call; they must not inherit its deadline.
+        detach()
+        with use_lane(Lane.BACKGROUND):
+            await self._work()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                if await self.process_once():
+                    continue
+                wakeup = self._wakeup
+                wakeup.clear()
+                timeout = await self._next_due_in()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Outbox worker error: {e}")
+                await asyncio.sleep(IDLE_POLL_SECONDS)
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the delivery workers if the outbox is enabled and they are not running."""
+
+        if not self.enabled() or any(not task.done() for task in self._workers):
+            return
+        self._wakeup = asyncio.Event()
+        self._claim_lock = asyncio.Lock()
+        count = max(1, env_int("FRESHDESK_OUTBOX_WORKERS", 4))
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(count)]
+
+    def stop(self) -> None:
+        for task in self._workers:
+            try:
+                task.cancel()
+            except RuntimeError:
+                # The loop that ran the worker is already closed.
+                pass
+        self._workers = []
+        self._wakeup = None
+        self._claim_lock = None
+        self._paused_until = 0.0
+        self._initialized_path = None
@@ -0,0 +1,580 @@
+"""The single request path shared by every Freshdesk API call.
+
+A :class:`Call` names an endpoint from ``endpoints.py``. :class:`Pipeline` runs
+it through a chain of middleware and then sends it. Each middleware is a
+coroutine ``(call, next) -> response``, so behaviour such as authentication,
+retries, caching and metrics is written once and applies to every endpoint.
+"""
+
+import asyncio
+import base64
+import json
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from .config import env_float, env_int, env_str
+from .deadlines import remaining
+from .endpoints import Endpoint
+from .invalidation import Change, changes
+from .queries import canonical_query, matches, parse_query
+from .tracing import tracer
+
+# Responses worth retrying for an idempotent request.
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_CACHE_TTL = 300.0
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_SEARCH_CACHE_TTL = 60.0
+DEFAULT_SEARCH_CACHE_SIZE = 128
+# Writes whose response is the ticket as stored, so searches can be invalidated selectively.
+TICKET_WRITES = frozenset({"create_ticket", "update_ticket"})
+# Entity cache TTL in seconds and size per record kind; FRESHDESK_ENTITY_TTL_<KIND>
+# and FRESHDESK_ENTITY_SIZE_<KIND> override them.
+ENTITY_DEFAULTS: Dict[str, Tuple[float, int]] = {
+    "ticket": (30.0, 1000),
+    "contact": (300.0, 1000),
+    "company": (900.0, 500),
+    "agent": (900.0, 500),
+    "group": (900.0, 200),
+    "canned_response": (900.0, 500),
+    "solution_category": (900.0, 100),
+    "solution_folder": (900.0, 200),
+    "solution_article": (900.0, 500),
+    "ticket_field": (900.0, 200),
+}
+
+
+def base_url(domain: str) -> str:
+    """API root: FRESHDESK_BASE_URL when set (e.g. a local stand-in), else the account's /api/v2."""
+
+    override = env_str("FRESHDESK_BASE_URL")
+    if override:
+        return override.rstrip("/")
+    return f"https://{domain}/api/v2"
+
+
+def basic_auth(api_key: str) -> str:
+    return f"Basic {base64.b64encode(f'{api_key}:X'.encode()).decode()}"
+
+
+@dataclass
+class Call:
+    """One request on its way through the pipeline."""
+
+    endpoint: Endpoint
+    url: str
+    params: Optional[Dict[str, Any]] = None
+    json: Any = None
+    data: Optional[Dict[str, Any]] = None
+    files: Optional[List[Any]] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    # Set by middleware for the metrics.
+    retries: int = 0
+    cached: bool = False
+
+
+Handler = Callable[[Call], Awaitable[httpx.Response]]
+Middleware = Callable[[Call, Handler], Awaitable[httpx.Response]]
+
+
+class Pipeline:
+    """Middleware chain ending in ``send``; the first middleware runs outermost.
+
+    Args:
+        send: Coroutine that sends a call and returns the response
+        middleware: Middleware, outermost first
+    """
+
+    def __init__(self, send: Handler, middleware: Sequence[Middleware] = ()) -> None:
+        self._send = send
+        self._middleware = list(middleware)
+        self._handler = self._compose()
+
+    def use(self, middleware: Middleware) -> None:
+        """Add a middleware innermost, just before the request is sent."""
+
+        self._middleware.append(middleware)
+        self._handler = self._compose()
+
+    def _compose(self) -> Handler:
+        # Composed once, so a request costs one await per middleware and nothing else.
+        handler = self._send
+        for middleware in reversed(self._middleware):
+            handler = _bind(middleware, handler)
+        return handler
+
+    async def __call__(self, call: Call) -> httpx.Response:
+        return await self._handler(call)
+
+
+def _bind(middleware: Middleware, next_handler: Handler) -> Handler:
+    async def handle(call: Call) -> httpx.Response:
+        return await middleware(call, next_handler)
+
+    return handle
+
+
+def authenticate(api_key: Callable[[], str]) -> Middleware:
+    """Middleware adding Freshdesk basic auth, reading the key at call time."""
+
+    async def middleware(call: Call, next_handler: Handler) -> httpx.Response:
+        call.headers.setdefault("Authorization", basic_auth(api_key()))
+        return await next_handler(call)
+
+    return middleware
+
+
+async def trace_call(call: Call, next_handler: Handler) -> httpx.Response:
+    """Span per API call, covering cache lookups and retries, when tracing is on."""
+
+    if not tracer.active():
+        return await next_handler(call)
+    attributes = {"freshdesk.endpoint": call.endpoint.name, "http.request.method": call.endpoint.method}
+    params = call.params or {}
+    for name in ("page", "per_page"):
+        if name in params:
+            attributes[f"freshdesk.{name}"] = params[name]
+    with tracer.span(f"freshdesk {call.endpoint.name}", attributes) as span:
+        response = await next_handler(call)
+        span.set_attribute("freshdesk.cache.hit", call.cached)
+        span.set_attribute("freshdesk.retries", call.retries)
+        span.set_attribute("http.response.status_code", response.status_code)
+        if response.status_code >= 400:
+            span.set_error(f"HTTP {response.status_code}")
+        return response
+
+
+def _header_int(response: httpx.Response, name: str) -> Optional[int]:
+    try:
+        return int(response.headers[name])
+    except (KeyError, ValueError):
+        return None
+
+
+async def trace_attempt(call: Call, next_handler: Handler) -> httpx.Response:
+    """Span per HTTP attempt with status, size and rate-limit headroom; runs innermost."""
+
+    if not tracer.active():
+        return await next_handler(call)
+    url = httpx.URL(call.url)
+    attributes = {
+        "http.request.method": call.endpoint.method,
+        "server.address": url.host,
+        "url.path": url.path,
+        "http.request.resend_count": call.retries or None,
+    }
+    with tracer.span(f"HTTP {call.endpoint.method}", {k: v for k, v in attributes.items() if v is not None}) as span:
+        response = await next_handler(call)
+        span.set_attribute("http.response.status_code", response.status_code)
+        span.set_attribute("http.response.body.size", len(response.content))
+        span.set_attribute("freshdesk.ratelimit.remaining", _header_int(response, "x-ratelimit-remaining"))
+        span.set_attribute("freshdesk.ratelimit.total", _header_int(response, "x-ratelimit-total"))
+        if response.status_code >= 400:
+            span.set_error(f"HTTP {response.status_code}")
+        return response
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def retry(call: Call, next_handler: Handler) -> httpx.Response:
+    """Retry idempotent requests on 429, 502-504 and network errors.
+
+    FRESHDESK_RETRIES (default 2) bounds the retries; delays follow
+    Retry-After or back off exponentially from FRESHDESK_RETRY_BACKOFF
+    seconds, and a retry that would outlast the call's deadline is not made.
+    """
+
+    attempts = max(0, env_int("FRESHDESK_RETRIES", DEFAULT_RETRIES)) if call.endpoint.idempotent else 0
+    while True:
+        try:
+            response = await next_handler(call)
+        except httpx.TransportError:
+            if call.retries >= attempts or not _sleep_allowed(_backoff(call.retries)):
+                raise
+            await asyncio.sleep(_backoff(call.retries))
+        else:
+            if response.status_code not in RETRY_STATUSES or call.retries >= attempts:
+                return response
+            delay = _retry_after(response) if response.status_code == 429 else None
+            if delay is None:
+                delay = _backoff(call.retries)
+            if not _sleep_allowed(delay):
+                return response
+            await response.aclose()
+            await asyncio.sleep(delay)
+        call.retries += 1
+
+
+def _backoff(retries: int) -> float:
+    base = env_float("FRESHDESK_RETRY_BACKOFF", DEFAULT_RETRY_BACKOFF)
+    return base * 2 ** retries * random.uniform(0.8, 1.2)
+
+
+def _sleep_allowed(delay: float) -> bool:
+    left = remaining()
+    return left is None or delay < left
+
+
+class ResponseCache:
+    """Short-lived cache for GET responses of endpoints marked ``cacheable``.
+
+    Entries live FRESHDESK_RESPONSE_CACHE_TTL seconds (default 300; 0
+    disables the cache) and the least recently used are evicted beyond
+    FRESHDESK_RESPONSE_CACHE_SIZE. Any successful write through the pipeline
+    clears the cache, so an edit made through a tool is seen at once.
+    """
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[Tuple[str, Tuple], Tuple[float, httpx.Response]]" = OrderedDict()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def __call__(self, call: Call, next_handler: Handler) -> httpx.Response:
+        ttl = env_float("FRESHDESK_RESPONSE_CACHE_TTL", DEFAULT_CACHE_TTL)
+        method = call.endpoint.method
+        if method != "GET":
+            response = await next_handler(call)
+            if response.is_success:
+                self.clear()
+            return response
+        if not call.endpoint.cacheable or ttl <= 0:
+            return await next_handler(call)
+
+        key = (call.url, tuple(sorted((call.params or {}).items())))
+        now = time.monotonic()
+        with tracer.span("cache lookup", {"freshdesk.cache.name": "responses"}) as span:
+            entry = self._entries.get(key)
+            hit = entry is not None and entry[0] > now
+            span.set_attribute("freshdesk.cache.hit", hit)
+        if hit:
+            self._entries.move_to_end(key)
+            call.cached = True
+            return entry[1]
+
+        response = await next_handler(call)
+        if response.status_code == 200:
+            self._entries[key] = (now + ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(1, env_int("FRESHDESK_RESPONSE_CACHE_SIZE", DEFAULT_CACHE_SIZE)):
+                self._entries.popitem(last=False)
+        return response
+
+
+class _SearchEntry:
+    __slots__ = ("expires_at", "response", "kind", "query", "ids")
+
+    def __init__(self, expires_at: float, response: httpx.Response, kind: str, query: Any, ids: frozenset) -> None:
+        self.expires_at = expires_at
+        self.response = response
+        self.kind = kind
+        self.query = query
+        self.ids = ids
+
+
+def _search_ids(response: httpx.Response) -> frozenset:
+    try:
+        body = response.json()
+    except ValueError:
+        return frozenset()
+    records = body.get("results", []) if isinstance(body, dict) else body
+    if not isinstance(records, list):
+        return frozenset()
+    return frozenset(record.get("id") for record in records if isinstance(record, dict))
+
+
+class SearchCache:
+    """Short-lived cache for responses of search endpoints, keyed by canonical query.
+
+    Queries that differ only in whitespace, quoting, operator case or the
+    order of AND/OR operands share an entry (see ``queries.py``). Entries live
+    FRESHDESK_SEARCH_CACHE_TTL seconds (default 60; 0 disables the cache) and
+    the least recently used are evicted beyond FRESHDESK_SEARCH_CACHE_SIZE.
+    A ticket created or updated through the pipeline only drops the ticket
+    searches it was in or may now match; any other write clears the cache.
+    """
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[Tuple[str, Tuple], _SearchEntry]" = OrderedDict()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(call: Call) -> Tuple[str, Tuple]:
+        params = []
+        for name, value in sorted((call.params or {}).items()):
+            if name == "query":
+                value = canonical_query(str(value))
+            elif name in ("term", "name"):
+                value = " ".join(str(value).split()).casefold()
+            params.append((name, value))
+        return call.url, tuple(params)
+
+    def _drop(self, predicate: Callable[[_SearchEntry], bool]) -> None:
+        for key in [key for key, entry in self._entries.items() if predicate(entry)]:
+            del self._entries[key]
+
+    def ticket_changed(self, ticket: Dict[str, Any]) -> None:
+        """Drop ticket searches that held ``ticket`` or that it may match now."""
+
+        ticket_id = ticket.get("id")
+        self._drop(lambda entry: entry.kind == "ticket" and (
+            ticket_id in entry.ids or matches(entry.query, ticket) is not False
+        ))
+
+    def on_change(self, change: Change) -> None:
+        """Change feed handler: drop the searches a changed record may affect."""
+
+        if change.kind != "ticket":
+            self._drop(lambda entry: entry.kind == change.kind)
+        elif change.deleted:
+            self._drop(lambda entry: entry.kind == "ticket" and change.id in entry.ids)
+        elif change.record is not None:
+            self.ticket_changed(change.record)
+        else:
+            # Without the new state any ticket search may be affected.
+            self._drop(lambda entry: entry.kind == "ticket")
+
+    def _written(self, call: Call, response: httpx.Response) -> None:
+        if call.endpoint.name in TICKET_WRITES:
+            try:
+                ticket = response.json()
+            except ValueError:
+                ticket = None
+            if isinstance(ticket, dict) and ticket.get("id") is not None:
+                self.ticket_changed(ticket)
+                return
+        self.clear()
+
+    async def __call__(self, call: Call, next_handler: Handler) -> httpx.Response:
+        if call.endpoint.method != "GET":
+            response = await next_handler(call)
+            if response.is_success:
+                self._written(call, response)
+            return response
+        ttl = env_float("FRESHDESK_SEARCH_CACHE_TTL", DEFAULT_SEARCH_CACHE_TTL)
+        kind = call.endpoint.search
+        if kind is None or ttl <= 0:
+            return await next_handler(call)
+
+        key = self.key(call)
+        now = time.monotonic()
+        with tracer.span("cache lookup", {"freshdesk.cache.name": "searches"}) as span:
+            entry = self._entries.get(key)
+            hit = entry is not None and entry.expires_at > now
+            span.set_attribute("freshdesk.cache.hit", hit)
+        if hit:
+            self._entries.move_to_end(key)
+            call.cached = True
+            return entry.response
+
+        response = await next_handler(call)
+        if response.status_code == 200:
+            query = parse_query(str(call.params.get("query", ""))) if kind == "ticket" and call.params else None
+            ids = _search_ids(response) if kind == "ticket" else frozenset()
+            self._entries[key] = _SearchEntry(now + ttl, response, kind, query, ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(1, env_int("FRESHDESK_SEARCH_CACHE_SIZE", DEFAULT_SEARCH_CACHE_SIZE)):
+                self._entries.popitem(last=False)
+        return response
+
+
+class _Entity:
+    __slots__ = ("expires_at", "response", "url")
+
+    def __init__(self, expires_at: float, response: httpx.Response, url: str) -> None:
+        self.expires_at = expires_at
+        self.response = response
+        self.url = url
+
+
+def _read_response(url: str, content: bytes) -> httpx.Response:
+    """A 200 response to GET ``url`` carrying ``content``, as a fresh read would."""
+
+    return httpx.Response(
+        200, content=content, headers={"content-type": "application/json"}, request=httpx.Request("GET", url)
+    )
+
+
+class EntityCache:
+    """Write-through cache of single records (tickets, contacts, agents, ...).
+
+    Reads of endpoints with an ``entity`` kind are cached per kind, for the
+    TTL and up to the size in ENTITY_DEFAULTS. A successful write to such an
+    endpoint stores the record it returns, so reading it back costs no
+    request, and publishes it on the change feed for the other caches; a
+    delete drops it. Any other write below a cached record's URL (a reply to
+    a ticket, say) drops that record.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, "OrderedDict[int, _Entity]"] = {}
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def snapshot(self) -> Dict[str, int]:
+        return {kind: len(entries) for kind, entries in sorted(self._entries.items()) if entries}
+
+    @staticmethod
+    def limits(kind: str) -> Tuple[float, int]:
+        ttl, size = ENTITY_DEFAULTS.get(kind, (300.0, 500))
+        suffix = kind.upper()
+        ttl = env_float(f"FRESHDESK_ENTITY_TTL_{suffix}", ttl)
+        return ttl, max(1, env_int(f"FRESHDESK_ENTITY_SIZE_{suffix}", size))
+
+    def _store(self, kind: str, record_id: int, response: httpx.Response, url: str) -> None:
+        ttl, size = self.limits(kind)
+        if ttl <= 0:
+            return
+        entries = self._entries.setdefault(kind, OrderedDict())
+        entries[record_id] = _Entity(time.monotonic() + ttl, response, url)
+        entries.move_to_end(record_id)
+        while len(entries) > size:
+            entries.popitem(last=False)
+
+    def evict(self, kind: str, record_id: int) -> None:
+        self._entries.get(kind, {}).pop(record_id, None)
+
+    def _evict_below(self, url: str) -> None:
+        for entries in self._entries.values():
+            below = [record_id for record_id, entry in entries.items() if url.startswith(entry.url + "/")]
+            for record_id in below:
+                del entries[record_id]
+
+    def on_change(self, change: Change) -> None:
+        """Change feed handler: replace a cached record with the new one, or drop it."""
+
+        entry = self._entries.get(change.kind, {}).get(change.id)
+        if entry is None:
+            return
+        if change.deleted or change.record is None:
+            self.evict(change.kind, change.id)
+        else:
+            response = _read_response(entry.url, json.dumps(change.record).encode())
+            self._store(change.kind, change.id, response, entry.url)
+
+    async def __call__(self, call: Call, next_handler: Handler) -> httpx.Response:
+        kind = call.endpoint.entity
+        method = call.endpoint.method
+        if kind is None:
+            response = await next_handler(call)
+            if method != "GET" and response.is_success:
+                self._evict_below(call.url)
+            return response
+        # Item endpoints end in the record id; the others create records.
+        record_id = int(call.url.rstrip("/").rsplit("/", 1)[-1]) if call.endpoint.path.endswith("}") else None
+
+        if method == "GET":
+            if call.params or self.limits(kind)[0] <= 0:
+                return await next_handler(call)
+            attributes = {"freshdesk.cache.name": "entities", "freshdesk.entity": kind}
+            with tracer.span("cache lookup", attributes) as span:
+                entry = self._entries.get(kind, {}).get(record_id)
+                hit = entry is not None and entry.expires_at > time.monotonic()
+                span.set_attribute("freshdesk.cache.hit", hit)
+            if hit:
+                self._entries[kind].move_to_end(record_id)
+                call.cached = True
+                return entry.response
+            response = await next_handler(call)
+            if response.status_code == 200:
+                self._store(kind, record_id, response, call.url)
+            elif response.status_code == 404:
+                self.evict(kind, record_id)
+            return response
+
+        response = await next_handler(call)
+        if not response.is_success:
+            return response
+        if method == "DELETE":
+            self.evict(kind, record_id)
+            await changes.publish(Change(kind, record_id, deleted=True))
+            return response
+        try:
+            record = response.json()
+        except ValueError:
+            record = None
+        if not isinstance(record, dict) or record.get("id") is None:
+            if record_id is not None:
+                self.evict(kind, record_id)
+            return response
+        url = call.url if record_id is not None else f"{call.url.rstrip('/')}/{record['id']}"
+        self._store(kind, record["id"], _read_response(url, response.content), url)
+        await changes.publish(Change(kind, record["id"], record=record))
+        return response
+
+
+class RequestMetrics:
+    """Per-endpoint request counts, errors, retries, latency and bytes received."""
+
+    def __init__(self) -> None:
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+    def _entry(self, name: str) -> Dict[str, float]:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = {
+                "requests": 0, "cache_hits": 0, "errors": 0, "retries": 0,
+                "seconds": 0.0, "max_seconds": 0.0, "bytes": 0,
+            }
+        return stats
+
+    async def __call__(self, call: Call, next_handler: Handler) -> httpx.Response:
+        stats = self._entry(call.endpoint.name)
+        stats["requests"] += 1
+        started = time.perf_counter()
+        try:
+            response = await next_handler(call)
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            stats["seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+            stats["retries"] += call.retries
+        if call.cached:
+            stats["cache_hits"] += 1
+        elif response.status_code >= 400:
+            stats["errors"] += 1
+        else:
+            stats["bytes"] += len(response.content)
+        return response
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for name, stats in sorted(self._stats.items()):
+            sent = stats["requests"] - stats["cache_hits"]
+            result[name] = {
+                **stats,
+                "seconds": round(stats["seconds"], 3),
+                "max_seconds": round(stats["max_seconds"], 3),
+                "mean_seconds": round(stats["seconds"] / sent, 3) if sent else None,
+            }
+        return result
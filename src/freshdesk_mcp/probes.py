@@ -0,0 +1,107 @@
+"""Process health probes: event-loop lag and resident memory.
+
+:class:`LoopLagMonitor` sleeps for a fixed interval in a background task and
+records how late the loop wakes it. Lag means some callback held the loop, so
+every other tool call and request waited that long too.
+"""
+
+import asyncio
+import os
+import sys
+from typing import Any, Dict, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size, or None where it cannot be read cheaply."""
+
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process."""
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag by timing a sleeping task.
+
+    Args:
+        interval: Seconds between samples
+    """
+
+    def __init__(self, interval: float = 0.25) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._reset_window()
+        self.max_lag = 0.0
+        self.samples = 0
+
+    def _reset_window(self) -> None:
+        self._window_samples = 0
+        self._window_total = 0.0
+        self._window_max = 0.0
+
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start sampling on the running loop; a no-op when already running."""
+
+        if self.interval > 0 and not self.running():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def record(self, lag: float) -> None:
+        lag = max(0.0, lag)
+        self.samples += 1
+        self.max_lag = max(self.max_lag, lag)
+        self._window_samples += 1
+        self._window_total += lag
+        self._window_max = max(self._window_max, lag)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - started - self.interval)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Lag since the previous snapshot, plus the worst lag seen since start."""
+
+        samples = self._window_samples
+        result = {
+            "running": self.running(),
+            "samples": samples,
+            "mean_ms": round(self._window_total / samples * 1000, 2) if samples else None,
+            "max_ms": round(self._window_max * 1000, 2) if samples else None,
+            "max_ms_since_start": round(self.max_lag * 1000, 2),
+        }
+        self._reset_window()
+        return result
+
+
+def process_snapshot(monitor: LoopLagMonitor) -> Dict[str, Any]:
+    return {"rss_bytes": rss_bytes(), "peak_rss_bytes": peak_rss_bytes(), "loop_lag": monitor.snapshot()}
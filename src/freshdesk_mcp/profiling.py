@@ -0,0 +1,299 @@
+"""Opt-in profiling of tool calls and detection of event-loop blocking.
+
+Set ``FRESHDESK_PROFILE`` to a comma-separated list of tool names (or ``*``)
+to profile those calls, from argument validation to the serialized result.
+``FRESHDESK_PROFILE_MODE`` picks the profiler:
+
+``cprofile`` (default)
+    Deterministic; each call is written as a ``.pstats`` file for
+    ``python -m pstats`` or snakeviz.
+``sample``
+    A thread samples the event loop's stack every
+    ``FRESHDESK_PROFILE_INTERVAL`` milliseconds and writes collapsed stacks
+    (``.folded``) for flamegraph.pl or speedscope. Much cheaper, and time spent
+    waiting on the network shows up as the loop's selector.
+
+Profiles are written to ``FRESHDESK_PROFILE_DIR``, keeping the newest
+``FRESHDESK_PROFILE_KEEP``; calls faster than ``FRESHDESK_PROFILE_MIN_MS`` are
+discarded. Both profilers see the whole event loop, so work from other calls
+running at the same time is included; calls that start while another is being
+profiled are not profiled.
+
+Set ``FRESHDESK_LOOP_BLOCK_MS`` to have a watchdog thread report every episode
+in which the loop did not run for longer than that, with the stack that held
+it, to the log and to ``loop_blocks.ndjson`` in the profile directory.
+
+When neither is set, a tool call costs one environment lookup extra.
+"""
+
+import asyncio
+import cProfile
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, FrozenSet, List, Optional, Tuple
+
+from .config import env_float, env_int, env_str
+from .records import format_timestamp
+
+CPROFILE = "cprofile"
+SAMPLE = "sample"
+MODES = (CPROFILE, SAMPLE)
+SUFFIXES = {CPROFILE: ".pstats", SAMPLE: ".folded"}
+BLOCKS_FILE = "loop_blocks.ndjson"
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def profile_dir() -> str:
+    default = os.path.join(tempfile.gettempdir(), "freshdesk-mcp-profiles")
+    return os.path.expanduser(env_str("FRESHDESK_PROFILE_DIR") or default)
+
+
+_parsed: Tuple[Optional[str], FrozenSet[str]] = (None, frozenset())
+
+
+def wanted(tool: str) -> bool:
+    """Whether calls to ``tool`` should be profiled under FRESHDESK_PROFILE."""
+
+    global _parsed
+    raw = os.environ.get("FRESHDESK_PROFILE")
+    if not raw:
+        return False
+    if raw != _parsed[0]:
+        _parsed = (raw, frozenset(name.strip() for name in raw.split(",") if name.strip()))
+    return "*" in _parsed[1] or tool in _parsed[1]
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def stack_of(thread_id: int) -> List[str]:
+    """Current stack of a thread, outermost frame first."""
+
+    frame = sys._current_frames().get(thread_id)
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class _StackSampler(threading.Thread):
+    def __init__(self, thread_id: int, interval: float) -> None:
+        super().__init__(name="freshdesk-profile-sampler", daemon=True)
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self.stacks: Counter = Counter()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            stack = stack_of(self._thread_id)
+            if stack:
+                self.stacks[";".join(stack)] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _rotate(directory: str, keep: int) -> None:
+    suffixes = tuple(SUFFIXES.values())
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(suffixes)]
+    if len(paths) <= keep:
+        return
+    paths.sort(key=os.path.getmtime)
+    for path in paths[:len(paths) - keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class Profiler:
+    """Profiles tool calls one at a time and writes each to the profile directory."""
+
+    def __init__(self) -> None:
+        self._active = False
+        self.written = 0
+        self.discarded = 0
+        self.skipped = 0
+        self.last_path: Optional[str] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": bool(os.environ.get("FRESHDESK_PROFILE")),
+            "directory": profile_dir(),
+            "written": self.written,
+            "discarded": self.discarded,
+            "skipped_overlapping": self.skipped,
+            "last_path": self.last_path,
+        }
+
+    @asynccontextmanager
+    async def profile(self, tool: str) -> AsyncIterator[None]:
+        """Profile the enclosed call to ``tool`` unless another call is being profiled."""
+
+        if self._active:
+            self.skipped += 1
+            yield
+            return
+        mode = (env_str("FRESHDESK_PROFILE_MODE") or CPROFILE).lower()
+        if mode not in MODES:
+            logging.warning(f"Unknown FRESHDESK_PROFILE_MODE {mode!r}; using {CPROFILE}")
+            mode = CPROFILE
+
+        profiler: Optional[cProfile.Profile] = None
+        sampler: Optional[_StackSampler] = None
+        if mode == CPROFILE:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler (e.g. a debugger or coverage) owns the hook.
+                self.skipped += 1
+                yield
+                return
+        else:
+            interval = max(0.5, env_float("FRESHDESK_PROFILE_INTERVAL", 5.0)) / 1000
+            sampler = _StackSampler(threading.get_ident(), interval)
+            sampler.start()
+
+        self._active = True
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+            if sampler is not None:
+                sampler.stop()
+            self._active = False
+            if elapsed * 1000 < env_float("FRESHDESK_PROFILE_MIN_MS", 0.0):
+                self.discarded += 1
+            else:
+                await asyncio.to_thread(self._write, tool, mode, elapsed, profiler, sampler)
+
+    def _write(self, tool: str, mode: str, elapsed: float, profiler: Optional[cProfile.Profile],
+               sampler: Optional[_StackSampler]) -> None:
+        directory = profile_dir()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            now = time.time()
+            name = (
+                f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}{int(now % 1 * 1000):03d}"
+                f"-{_UNSAFE.sub('_', tool)}-{int(elapsed * 1000)}ms{SUFFIXES[mode]}"
+            )
+            path = os.path.join(directory, name)
+            if profiler is not None:
+                profiler.dump_stats(path)
+            else:
+                with open(path, "w", encoding="utf-8") as fh:
+                    fh.write(sampler.collapsed())
+            _rotate(directory, max(1, env_int("FRESHDESK_PROFILE_KEEP", 100)))
+        except OSError as e:
+            logging.warning(f"Could not write profile for {tool}: {e}")
+            return
+        self.written += 1
+        self.last_path = path
+
+
+class LoopWatchdog:
+    """Watchdog thread reporting episodes where the event loop was blocked.
+
+    The loop bumps a heartbeat several times per threshold; when the thread
+    sees it go stale it captures the loop thread's stack, and when the
+    heartbeat resumes it records the episode.
+    """
+
+    def __init__(self, keep: int = 50) -> None:
+        self.episodes: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.count = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._beat = 0.0
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Watch the running loop when FRESHDESK_LOOP_BLOCK_MS is set."""
+
+        threshold = env_float("FRESHDESK_LOOP_BLOCK_MS", 0.0) / 1000
+        if threshold <= 0 or self.running():
+            return
+        loop = asyncio.get_running_loop()
+        period = threshold / 4
+        self._beat = time.monotonic()
+
+        def beat() -> None:
+            self._beat = time.monotonic()
+            self._handle = loop.call_later(period, beat)
+
+        beat()
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._watch, args=(threading.get_ident(), threshold, period),
+            name="freshdesk-loop-watchdog", daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self, loop_thread: int, threshold: float, period: float) -> None:
+        blocked_since: Optional[float] = None
+        stack: List[str] = []
+        while not self._stop_event.wait(period):
+            beat = self._beat
+            if blocked_since is None:
+                if time.monotonic() - beat > threshold:
+                    blocked_since = beat
+                    stack = stack_of(loop_thread)
+            elif beat > blocked_since:
+                # The first beat after the block is one period late by design.
+                self._record(max(0.0, beat - blocked_since - period), stack)
+                blocked_since = None
+
+    def _record(self, duration: float, stack: List[str]) -> None:
+        episode = {
+            "at": format_timestamp(int(time.time() - duration)),
+            "duration_ms": round(duration * 1000, 1),
+            "stack": stack,
+        }
+        self.count += 1
+        self.episodes.append(episode)
+        leaf = stack[-1] if stack else "unknown"
+        logging.warning(f"Event loop blocked for {episode['duration_ms']} ms in {leaf}")
+        try:
+            directory = profile_dir()
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, BLOCKS_FILE), "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(episode) + "\n")
+        except OSError as e:
+            logging.warning(f"Could not record loop block: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"running": self.running(), "episodes": self.count, "recent": list(self.episodes)[-5:]}
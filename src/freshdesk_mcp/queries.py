@@ -0,0 +1,266 @@
+"""Freshdesk search query building, canonicalisation and local matching.
+
+The search API takes queries such as ``(status:2 OR status:3) AND
+priority:>2``. :func:`canonical_query` parses one and renders it back with
+:func:`build_search_query` and :func:`build_complex_search_query`, so queries
+that differ only in whitespace, quoting, operator case or the order of AND/OR
+operands get the same text; the search cache uses it as its key.
+:func:`matches` evaluates a query against a ticket record to tell whether a
+changed ticket could appear in a cached result.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+Node = Tuple[Any, ...]
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<open>\() | (?P<close>\)) |
+        (?P<op>AND|OR)(?=[\s()]|$) |
+        (?P<field>[A-Za-z_][\w.]*)\s*:\s*(?P<cmp>[<>]=?)?\s*
+        (?P<value>'(?:[^'\\]|\\.)*' | "(?:[^"\\]|\\.)*" | [^\s()'"]+)
+    )""",
+    re.IGNORECASE | re.VERBOSE,
+)
+_INTEGER = re.compile(r"-?\d+")
+
+# Search fields named differently on the ticket record.
+_RECORD_FIELDS = {"agent_id": "responder_id", "tag": "tags"}
+
+
+def build_search_query(
+    field: str, value: Union[str, int, bool, None], operator: str = "="
+) -> str:
+    """Build a properly formatted Freshdesk search query part.
+
+    Freshdesk query parts are shaped like:
+    - status:2
+    - type:'Question'
+    - created_at:>'2023-01-01'
+
+    Note: string values use single quotes.
+    """
+
+    if value is None:
+        return f"{field}:null"
+
+    op_map = {
+        "=": "",
+        ">": ">",
+        "<": "<",
+        ">=": ">",
+        "<=": "<",
+        ":>": ">",
+        ":<": "<",
+    }
+    op = op_map.get(operator, "")
+
+    if isinstance(value, str):
+        rendered_value = f"'{value}'"
+    elif isinstance(value, bool):
+        rendered_value = "true" if value else "false"
+    else:
+        rendered_value = str(value)
+
+    # Single colon before operator/value.
+    return f"{field}:{op}{rendered_value}"
+
+def build_complex_search_query(*parts, operator: str = "AND") -> str:
+    """
+    Build a complex search query from multiple parts.
+
+    Args:
+        *parts: Multiple query parts
+        operator: The operator to join parts with ("AND" or "OR")
+
+    Returns:
+        A properly formatted complex query with the parts joined by the specified operator
+    """
+    if not parts:
+        return ""
+
+    # Join parts with the specified operator
+    joined_parts = f" {operator} ".join(parts)
+
+    # If there's more than one part, wrap in parentheses
+    if len(parts) > 1:
+        return f"({joined_parts})"
+
+    return joined_parts
+
+
+def _value(raw: str) -> Union[str, int, bool, None]:
+    if raw.startswith("'"):
+        return raw[1:-1]
+    if raw.startswith('"'):
+        # Double quotes would end the outer query string; render with single quotes.
+        return re.sub(r"(?<!\\)'", r"\\'", raw[1:-1].replace('\\"', '"'))
+    lowered = raw.lower()
+    if lowered == "null":
+        return None
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if _INTEGER.fullmatch(raw):
+        return int(raw)
+    return raw
+
+
+def _tokenize(query: str) -> Optional[List[Tuple[str, Any]]]:
+    tokens: List[Tuple[str, Any]] = []
+    pos = 0
+    query = query.rstrip()
+    while pos < len(query):
+        match = _TOKEN.match(query, pos)
+        if match is None:
+            return None
+        pos = match.end()
+        if match.group("open"):
+            tokens.append(("(", None))
+        elif match.group("close"):
+            tokens.append((")", None))
+        elif match.group("op"):
+            tokens.append(("op", match.group("op").upper()))
+        else:
+            cmp = match.group("cmp") or "="
+            tokens.append(("term", ("term", match.group("field"), cmp, _value(match.group("value")))))
+    return tokens
+
+
+def _parse_group(tokens: List[Tuple[str, Any]], pos: int) -> Tuple[Node, int]:
+    operands: List[Node] = []
+    operators: List[str] = []
+    while True:
+        if pos >= len(tokens):
+            raise ValueError("Query ends where a condition was expected")
+        kind, value = tokens[pos]
+        if kind == "(":
+            node, pos = _parse_group(tokens, pos + 1)
+            if pos >= len(tokens) or tokens[pos][0] != ")":
+                raise ValueError("Unbalanced parentheses")
+            pos += 1
+        elif kind == "term":
+            node, pos = value, pos + 1
+        else:
+            raise ValueError(f"Unexpected {kind} in query")
+        operands.append(node)
+        if pos < len(tokens) and tokens[pos][0] == "op":
+            operators.append(tokens[pos][1])
+            pos += 1
+            continue
+        break
+    if len(operands) == 1:
+        return operands[0], pos
+    if len(set(operators)) == 1:
+        operator = operators[0]
+        # AND and OR are associative: (a AND (b AND c)) is a AND b AND c.
+        flat: List[Node] = []
+        for node in operands:
+            flat.extend(node[1] if node[0] == operator else [node])
+        return (operator, flat), pos
+    return ("MIXED", operands, operators), pos
+
+
+def parse_query(query: str) -> Optional[Node]:
+    """Syntax tree of a search query, or None when it cannot be parsed."""
+
+    query = query.strip()
+    if len(query) > 1 and query.startswith('"') and query.endswith('"'):
+        query = query[1:-1]
+    tokens = _tokenize(query)
+    if not tokens:
+        return None
+    try:
+        node, pos = _parse_group(tokens, 0)
+    except ValueError:
+        return None
+    return node if pos == len(tokens) else None
+
+
+def _render(node: Node) -> str:
+    if node[0] == "term":
+        _, field, cmp, value = node
+        return build_search_query(field, value, cmp)
+    if node[0] == "MIXED":
+        _, operands, operators = node
+        parts = [_render(operands[0])]
+        for operator, operand in zip(operators, operands[1:]):
+            parts.append(f"{operator} {_render(operand)}")
+        return f"({' '.join(parts)})"
+    operator, operands = node
+    # Commutative, so operand order (and repeats) do not change the result.
+    return build_complex_search_query(*sorted({_render(operand) for operand in operands}), operator=operator)
+
+
+def canonical_query(query: str) -> str:
+    """One spelling for equivalent search queries, without the outer double quotes.
+
+    Queries that cannot be parsed only have their whitespace normalised.
+    """
+
+    node = parse_query(query)
+    if node is None:
+        return " ".join(query.strip().strip('"').split())
+    return _render(node)
+
+
+def _compare(actual: Any, cmp: str, expected: Any) -> Optional[bool]:
+    if isinstance(actual, list):
+        if cmp != "=" or not isinstance(expected, str):
+            return None
+        return expected.lower() in (str(item).lower() for item in actual)
+    if expected is None:
+        return actual is None if cmp == "=" else None
+    if actual is None:
+        return False
+    if isinstance(expected, bool) or isinstance(actual, bool):
+        return actual == expected if cmp == "=" and isinstance(actual, bool) else None
+    if isinstance(expected, str) and isinstance(actual, str):
+        if cmp == "=":
+            return actual.lower() == expected.lower()
+        # Dates compare by day: created_at:>'2024-01-01' includes that day.
+        day = actual[:len(expected)]
+        return day >= expected if cmp.startswith(">") else day <= expected
+    if isinstance(expected, int) and isinstance(actual, (int, float)):
+        if cmp == "=":
+            return actual == expected
+        return actual >= expected if cmp.startswith(">") else actual <= expected
+    return None
+
+
+def _evaluate(node: Node, record: Dict[str, Any]) -> Optional[bool]:
+    if node[0] == "term":
+        _, field, cmp, expected = node
+        key = _RECORD_FIELDS.get(field, field)
+        if key in record:
+            actual = record[key]
+        elif key in (record.get("custom_fields") or {}):
+            actual = record["custom_fields"][key]
+        else:
+            return None
+        return _compare(actual, cmp, expected)
+    if node[0] == "MIXED":
+        return None
+    operator, operands = node
+    results = [_evaluate(operand, record) for operand in operands]
+    if operator == "AND":
+        if False in results:
+            return False
+        return True if all(result is True for result in results) else None
+    if True in results:
+        return True
+    return False if all(result is False for result in results) else None
+
+
+def matches(query: Union[str, Node, None], record: Dict[str, Any]) -> Optional[bool]:
+    """Whether ``record`` satisfies a search query; None when that cannot be told locally.
+
+    Args:
+        query: Query text or a tree from :func:`parse_query`
+        record: A ticket as returned by the API
+    """
+
+    node = parse_query(query) if isinstance(query, str) else query
+    if node is None:
+        return None
+    return _evaluate(node, record)
@@ -0,0 +1,153 @@
+"""Compact ticket records for large in-memory working sets.
+
+A trimmed ticket held as a plain dict costs around a kilobyte, most of it the
+dict itself and seven ISO timestamp strings. :class:`TicketRecord` keeps the
+same fields in ``__slots__``, timestamps as epoch seconds, ticket types and
+tags as interned strings shared by every record, and an optional body
+compressed until it is read. Records convert back to the dict shape with
+:meth:`TicketRecord.to_dict` wherever they leave the server.
+"""
+
+import sys
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+# Ticket attributes kept in the mirror. Nested "stats" timestamps are
+# flattened onto the ticket.
+TICKET_FIELDS = (
+    "id",
+    "subject",
+    "type",
+    "status",
+    "priority",
+    "source",
+    "requester_id",
+    "responder_id",
+    "group_id",
+    "company_id",
+    "tags",
+    "created_at",
+    "updated_at",
+    "due_by",
+    "fr_due_by",
+)
+STATS_FIELDS = ("first_responded_at", "resolved_at", "closed_at")
+TIMESTAMP_FIELDS = ("created_at", "updated_at", "due_by", "fr_due_by") + STATS_FIELDS
+
+# Bodies shorter than this are kept as text; compression would not pay off.
+COMPRESS_MIN_LENGTH = 256
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[int]:
+    """Convert an ISO-8601 UTC timestamp ("2024-03-20T00:25:29Z") to epoch seconds."""
+
+    if not value:
+        return None
+    try:
+        return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def format_timestamp(value: Optional[int]) -> Optional[str]:
+    if value is None:
+        return None
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(value))
+
+
+def _epoch(value: Any) -> Optional[int]:
+    return parse_timestamp(value) if isinstance(value, str) else value
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class TicketRecord:
+    """One trimmed ticket. Timestamp attributes hold epoch seconds or None."""
+
+    __slots__ = tuple(field for field in TICKET_FIELDS if field != "tags") + STATS_FIELDS + ("tags", "_body")
+
+    def __init__(self, **fields: Any) -> None:
+        self._assign(fields, {})
+
+    @classmethod
+    def from_api(cls, ticket: Dict[str, Any]) -> "TicketRecord":
+        """Build a record from an API ticket, flattening its "stats" block."""
+
+        record = cls.__new__(cls)
+        record._assign(ticket, ticket.get("stats") or {})
+        return record
+
+    def _assign(self, ticket: Dict[str, Any], stats: Dict[str, Any]) -> None:
+        # Spelled out field by field: this runs once per ticket on every sync.
+        get = ticket.get
+        self.id = get("id")
+        self.subject = get("subject")
+        self.type = _intern(get("type"))
+        self.status = get("status")
+        self.priority = get("priority")
+        self.source = get("source")
+        self.requester_id = get("requester_id")
+        self.responder_id = get("responder_id")
+        self.group_id = get("group_id")
+        self.company_id = get("company_id")
+        self.tags: Tuple[str, ...] = tuple(sys.intern(tag) for tag in get("tags") or ())
+        self.created_at = _epoch(get("created_at"))
+        self.updated_at = _epoch(get("updated_at"))
+        self.due_by = _epoch(get("due_by"))
+        self.fr_due_by = _epoch(get("fr_due_by"))
+        self.first_responded_at = _epoch(stats.get("first_responded_at", get("first_responded_at")))
+        self.resolved_at = _epoch(stats.get("resolved_at", get("resolved_at")))
+        self.closed_at = _epoch(stats.get("closed_at", get("closed_at")))
+        self._body: Any = None
+        self.description_text = get("description_text")
+
+    @property
+    def description_text(self) -> Optional[str]:
+        """The plain-text body, decompressed on access."""
+
+        if isinstance(self._body, bytes):
+            return zlib.decompress(self._body).decode("utf-8")
+        return self._body
+
+    @description_text.setter
+    def description_text(self, value: Optional[str]) -> None:
+        if value and len(value) >= COMPRESS_MIN_LENGTH:
+            self._body = zlib.compress(value.encode("utf-8"))
+        else:
+            self._body = value or None
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """Read one field in its dict form, like ``dict.get``."""
+
+        if field == "tags":
+            return list(self.tags)
+        if field == "description_text":
+            return self.description_text
+        if field not in TICKET_FIELDS and field not in STATS_FIELDS:
+            return default
+        value = getattr(self, field)
+        if field in TIMESTAMP_FIELDS:
+            value = format_timestamp(value)
+        return default if value is None else value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The trimmed ticket as a dict, with ISO timestamps and a tag list."""
+
+        ticket = {field: self.get(field) for field in TICKET_FIELDS + STATS_FIELDS}
+        if self._body is not None:
+            ticket["description_text"] = self.description_text
+        return ticket
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TicketRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"TicketRecord(id={self.id!r}, subject={self.subject!r}, status={self.status!r})"
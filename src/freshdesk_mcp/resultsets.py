@@ -0,0 +1,135 @@
+"""Server-side result sets for results too large for one MCP response.
+
+A tool holding a large result hands it to :class:`ResultSetStore` and returns
+the first chunk with an opaque ``next_cursor``; the ``fetch_more`` tool serves
+the following chunks from memory without calling Freshdesk again. A set is
+dropped once its last chunk has been served, FRESHDESK_RESULT_SET_TTL seconds
+after it was last read (default 600), or when it is the least recently used
+beyond FRESHDESK_RESULT_SETS sets (default 32) or FRESHDESK_RESULT_SET_ITEMS
+records across all sets (default 200000). FRESHDESK_RESULT_CHUNK sets the
+chunk size (default 100).
+"""
+
+import base64
+import binascii
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import env_float, env_int
+
+DEFAULT_TTL = 600.0
+DEFAULT_MAX_SETS = 32
+DEFAULT_MAX_ITEMS = 200_000
+DEFAULT_CHUNK = 100
+MAX_CHUNK = 1000
+
+
+def chunk_size(limit: Optional[int] = None) -> int:
+    size = limit if limit is not None else env_int("FRESHDESK_RESULT_CHUNK", DEFAULT_CHUNK)
+    return min(max(1, size), MAX_CHUNK)
+
+
+def _encode(set_id: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{set_id}:{offset}".encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> Optional[Tuple[str, int]]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        set_id, offset = raw.rsplit(":", 1)
+        return set_id, int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class _ResultSet:
+    __slots__ = ("kind", "items", "expires_at")
+
+    def __init__(self, kind: str, items: List[Any], expires_at: float) -> None:
+        self.kind = kind
+        self.items = items
+        self.expires_at = expires_at
+
+
+class ResultSetStore:
+    """Holds large results in memory and serves them in chunks by cursor."""
+
+    def __init__(self) -> None:
+        self._sets: "OrderedDict[str, _ResultSet]" = OrderedDict()
+        self._items = 0
+
+    def clear(self) -> None:
+        self._sets.clear()
+        self._items = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"sets": len(self._sets), "items": self._items}
+
+    def _drop(self, set_id: str) -> None:
+        entry = self._sets.pop(set_id, None)
+        if entry is not None:
+            self._items -= len(entry.items)
+
+    def _expire(self, now: float) -> None:
+        for set_id in [set_id for set_id, entry in self._sets.items() if entry.expires_at <= now]:
+            self._drop(set_id)
+
+    def _evict(self) -> None:
+        max_sets = max(1, env_int("FRESHDESK_RESULT_SETS", DEFAULT_MAX_SETS))
+        max_items = max(1, env_int("FRESHDESK_RESULT_SET_ITEMS", DEFAULT_MAX_ITEMS))
+        # The newest set is kept even when it alone exceeds the item budget.
+        while len(self._sets) > 1 and (len(self._sets) > max_sets or self._items > max_items):
+            self._drop(next(iter(self._sets)))
+
+    def create(self, kind: str, items: List[Any], limit: Optional[int] = None) -> Dict[str, Any]:
+        """First chunk of ``items``, with a cursor for the rest when there is more.
+
+        Args:
+            kind: What the records are, e.g. "contacts"
+            items: The complete result
+            limit: Chunk size (default FRESHDESK_RESULT_CHUNK)
+        """
+
+        size = chunk_size(limit)
+        if len(items) <= size:
+            return {"kind": kind, "items": items, "offset": 0, "total": len(items), "next_cursor": None}
+        now = time.monotonic()
+        self._expire(now)
+        set_id = secrets.token_urlsafe(12)
+        entry = _ResultSet(kind, items, now + env_float("FRESHDESK_RESULT_SET_TTL", DEFAULT_TTL))
+        self._sets[set_id] = entry
+        self._items += len(items)
+        self._evict()
+        return self._chunk(set_id, entry, 0, size)
+
+    def fetch(self, cursor: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        """The chunk starting at ``cursor``, or an error when it is unknown or expired."""
+
+        decoded = _decode(cursor)
+        if decoded is None:
+            return {"error": "Invalid cursor"}
+        set_id, offset = decoded
+        now = time.monotonic()
+        self._expire(now)
+        entry = self._sets.get(set_id)
+        if entry is None or not 0 <= offset < len(entry.items):
+            return {"error": "Cursor expired or unknown; run the original query again"}
+        self._sets.move_to_end(set_id)
+        entry.expires_at = now + env_float("FRESHDESK_RESULT_SET_TTL", DEFAULT_TTL)
+        return self._chunk(set_id, entry, offset, chunk_size(limit))
+
+    def _chunk(self, set_id: str, entry: _ResultSet, offset: int, size: int) -> Dict[str, Any]:
+        items = entry.items[offset:offset + size]
+        end = offset + len(items)
+        total = len(entry.items)
+        if end >= total:
+            self._drop(set_id)
+        return {
+            "kind": entry.kind,
+            "items": items,
+            "offset": offset,
+            "total": total,
+            "next_cursor": _encode(set_id, end) if end < total else None,
+        }
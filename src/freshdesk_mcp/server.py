@@ -1,18 +1,125 @@
+import asyncio
+import anyio
+import csv
+import functools
+import inspect
 import httpx
 from mcp.server.fastmcp import FastMCP
 import logging
 import os
-import base64
-from typing import Optional, Dict, Union, Any, List
+import mimetypes
+import weakref
+from contextlib import ExitStack, asynccontextmanager
+from typing import Optional, Dict, Union, Any, List, Tuple, Callable, Awaitable
 from enum import IntEnum, Enum
 import re
-from pydantic import BaseModel, Field
+from datetime import datetime, timedelta
+from pydantic import BaseModel, Field, validate_call
+
+from . import cassettes, contactimport, profiling
+from .tracing import tracer
+from .backlog import BacklogMonitor
+from .compaction import compact_article, compact_record, compact_thread, payload_size
+from .config import env_flag, env_float, env_int, env_str
+from .deadlines import DeadlineExceeded, deadline, gather, http_timeout, timeout_for
+from .directory import AgentDirectory, CannedResponseLibrary, CompanyDirectory, ContactDirectory, Directory
+from .endpoints import BODY, FIELD, PAGE_PAGINATION, QUERY, REQUIRED, endpoint
+from .invalidation import Change, changes
+from .lanes import Lane, LaneController, LaneTransport, use_lane
+from .outbox import Outbox
+from .pipeline import (
+    Call, EntityCache, Pipeline, RequestMetrics, ResponseCache, SearchCache, authenticate, base_url, retry,
+    trace_attempt, trace_call,
+)
+from .probes import LoopLagMonitor, process_snapshot
+from .records import STATS_FIELDS, format_timestamp
+from .resultsets import ResultSetStore
+from .store import TicketStore
+from .ticketfields import ValidatorCache
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
+@asynccontextmanager
+async def _lifespan(server: FastMCP):
+    # Deliver jobs left in the outbox by a previous run.
+    outbox.start()
+    loop_lag.interval = env_float("FRESHDESK_LOOP_LAG_INTERVAL", 0.25)
+    loop_lag.start()
+    loop_watchdog.start()
+    backlog.start(_poll_backlog)
+    try:
+        yield
+    finally:
+        outbox.stop()
+        backlog.stop()
+        await loop_lag.stop()
+        loop_watchdog.stop()
+
+class FreshdeskMCP(FastMCP):
+    """FastMCP whose tool calls can be profiled end to end (see ``profiling.py``)."""
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]):
+        if not profiling.wanted(name):
+            return await super().call_tool(name, arguments)
+        # Covers argument validation and result serialization, not just the tool body.
+        async with profiler.profile(name):
+            return await super().call_tool(name, arguments)
+
+profiler = profiling.Profiler()
+loop_watchdog = profiling.LoopWatchdog()
+
 # Initialize FastMCP server
-mcp = FastMCP("freshdesk-mcp")
+mcp = FreshdeskMCP("freshdesk-mcp", lifespan=_lifespan)
+
+# Every registered tool by name, for dispatching calls made from inside the server.
+_tools: Dict[str, Callable[..., Awaitable[Any]]] = {}
+
+def tool(lane: Lane, timeout: Optional[float] = None):
+    """Register an MCP tool whose requests run in ``lane`` under a per-call deadline.
+
+    ``timeout`` is the tool's default in seconds; FRESHDESK_TOOL_TIMEOUTS and
+    FRESHDESK_TIMEOUT are applied as described in ``deadlines.py``.
+    """
+    def decorator(fn):
+        async def call(*args, **kwargs):
+            try:
+                with use_lane(lane):
+                    async with deadline(fn.__name__, timeout_for(fn.__name__, timeout)):
+                        return await fn(*args, **kwargs)
+            except DeadlineExceeded as e:
+                logging.warning(str(e))
+                return {"error": f"{e}; raise FRESHDESK_TIMEOUT or FRESHDESK_TOOL_TIMEOUTS to allow longer"}
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not tracer.active():
+                return await call(*args, **kwargs)
+            with tracer.span(f"tool {fn.__name__}", {"mcp.tool.name": fn.__name__, "freshdesk.lane": lane.value}) as span:
+                result = await call(*args, **kwargs)
+                if isinstance(result, dict) and result.get("error"):
+                    span.set_error(str(result["error"])[:200])
+                return result
+
+        mcp.tool()(wrapper)
+        _tools[fn.__name__] = wrapper
+        return wrapper
+    return decorator
+
+# Shared by every request so lanes see the whole process's traffic.
+lane_controller = LaneController()
+loop_lag = LoopLagMonitor()
+
+def _is_freshdesk_request(request: httpx.Request) -> bool:
+    return request.url.host == httpx.URL(base_url(freshdesk_domain())).host
+
+def _client(**kwargs) -> httpx.AsyncClient:
+    """HTTP client admitted through the lanes, with a timeout capped by the call's deadline."""
+    return httpx.AsyncClient(
+        timeout=http_timeout(),
+        transport=LaneTransport(lane_controller, _is_freshdesk_request, cassettes.transport_from_env()),
+        **kwargs,
+    )
 
 def freshdesk_api_key() -> str:
     """Read the Freshdesk API key from the environment at call time."""
@@ -25,6 +132,133 @@ def freshdesk_domain() -> str:
 
     return os.getenv("FRESHDESK_DOMAIN") or ""
 
+# One pooled client per event loop, so API calls reuse connections.
+_api_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+def _api_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _api_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _api_clients[loop] = _client()
+    return client
+
+async def _send(call: Call) -> httpx.Response:
+    return await _api_client().request(
+        call.endpoint.method,
+        call.url,
+        params=call.params,
+        json=call.json,
+        data=call.data,
+        files=call.files,
+        headers=call.headers,
+        timeout=http_timeout(),
+    )
+
+request_metrics = RequestMetrics()
+response_cache = ResponseCache()
+search_cache = SearchCache()
+entity_cache = EntityCache()
+result_sets = ResultSetStore()
+pipeline = Pipeline(
+    _send,
+    [
+        trace_call, request_metrics, response_cache, search_cache, entity_cache, authenticate(freshdesk_api_key),
+        retry, trace_attempt,
+    ],
+)
+for _kind in ("ticket", "contact", "company", "agent", "group"):
+    changes.subscribe(_kind, search_cache.on_change)
+    changes.subscribe(_kind, entity_cache.on_change)
+
+async def _request(
+    name: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    json: Any = None,
+    data: Optional[Dict[str, Any]] = None,
+    files: Optional[List[Any]] = None,
+    **path_values: Any,
+) -> httpx.Response:
+    """Send a request to the named endpoint through the pipeline."""
+    ep = endpoint(name)
+    url = f"{base_url(freshdesk_domain())}{ep.render(path_values)}"
+    return await pipeline(Call(ep, url, params=params, json=json, data=data, files=files))
+
+def _response_body(response: httpx.Response) -> Any:
+    """The decoded JSON body, or a status summary for an empty one (e.g. 204)."""
+    if not response.content:
+        return {"success": response.is_success, "status_code": response.status_code}
+    return response.json()
+
+FETCH_ALL_DOC = (
+    "Set fetch_all to read every page at once: the first chunk is returned with a "
+    "next_cursor to pass to fetch_more for the rest."
+)
+
+def _documents_fetch_all(fn):
+    """Append FETCH_ALL_DOC to the docstring of a tool taking fetch_all."""
+    fn.__doc__ = (inspect.cleandoc(fn.__doc__ or "") + "\n\n" + FETCH_ALL_DOC).strip()
+    return fn
+
+def _endpoint_tool(name: str, lane: Lane = Lane.INTERACTIVE):
+    """Generate and register the MCP tool for an endpoint documented in the table.
+
+    Path parameters become int arguments, paginated endpoints take page,
+    per_page and fetch_all, and the endpoint's other arguments fill the query
+    or JSON body.
+    """
+    ep = endpoint(name)
+    paged = ep.pagination == PAGE_PAGINATION
+    positional = inspect.Parameter.POSITIONAL_OR_KEYWORD
+    parameters = [inspect.Parameter(param, positional, annotation=int) for param in ep.path_params]
+    if paged:
+        parameters.append(inspect.Parameter("page", positional, default=1, annotation=Optional[int]))
+        parameters.append(inspect.Parameter("per_page", positional, default=30, annotation=Optional[int]))
+        parameters.append(inspect.Parameter("fetch_all", positional, default=False, annotation=bool))
+    for arg in ep.args:
+        default = inspect.Parameter.empty if arg.default is REQUIRED else arg.default
+        parameters.append(inspect.Parameter(arg.name, positional, default=default, annotation=arg.annotation))
+    # Any: the API's error bodies do not match the success shape.
+    signature = inspect.Signature(parameters, return_annotation=Any)
+
+    async def call_endpoint(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        values = bound.arguments
+        params: Dict[str, Any] = {}
+        body: Any = None
+        for arg in ep.args:
+            value = values[arg.name]
+            if arg.location == QUERY and value is not None:
+                params[arg.key] = value
+            elif arg.location == BODY:
+                body = value
+            elif arg.location == FIELD:
+                body = {**(body or {}), arg.key: value}
+        path_values = {param: values[param] for param in ep.path_params}
+        if paged and values["fetch_all"]:
+            async def list_page(page: int, per_page: int) -> Any:
+                response = await _request(name, params={"page": page, "per_page": per_page, **params}, **path_values)
+                return _response_body(response)
+
+            try:
+                records = await _load_all_pages(list_page, name)
+            except RuntimeError as e:
+                return {"error": str(e)}
+            return result_sets.create(name.replace("list_", "", 1), records)
+        if paged:
+            params = {"page": values["page"], "per_page": values["per_page"], **params}
+        response = await _request(name, params=params or None, json=body, **path_values)
+        return _response_body(response)
+
+    call_endpoint.__name__ = call_endpoint.__qualname__ = name
+    call_endpoint.__doc__ = ep.doc
+    if paged:
+        _documents_fetch_all(call_endpoint)
+    call_endpoint.__signature__ = signature
+    call_endpoint.__annotations__ = {**{p.name: p.annotation for p in parameters}, "return": Any}
+    return tool(lane)(call_endpoint)
+
 
 def parse_link_header(link_header: str) -> Dict[str, Optional[int]]:
     """Parse the Link header to extract pagination information.
@@ -59,6 +293,59 @@ def parse_link_header(link_header: str) -> Dict[str, Optional[int]]:
 
     return pagination
 
+# Freshdesk's search API returns 30 results per page and at most 10 pages.
+SEARCH_PAGE_SIZE = 30
+SEARCH_MAX_PAGES = 10
+
+# Bodies larger than this many characters are compacted in a worker thread.
+COMPACTION_THREAD_THRESHOLD = 100_000
+
+async def _compact(fn, payload, fields: tuple, *args):
+    """Run a compaction function, off the event loop for large payloads."""
+    if payload_size(payload, fields) > COMPACTION_THREAD_THRESHOLD:
+        return await asyncio.to_thread(fn, payload, *args)
+    return fn(payload, *args)
+
+# Attachment bodies are streamed in chunks of this many bytes.
+ATTACHMENT_CHUNK_SIZE = 64 * 1024
+
+def _form_fields(data: Dict[str, Any]) -> Dict[str, Union[str, List[str]]]:
+    """Flatten a JSON payload into multipart form fields.
+
+    Freshdesk expects nested objects as ``custom_fields[name]`` and lists as
+    repeated ``tags[]`` fields when a request carries attachments.
+    """
+    def render(value: Any) -> str:
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return str(value)
+
+    fields: Dict[str, Union[str, List[str]]] = {}
+    for key, value in data.items():
+        if value is None:
+            continue
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                if sub_value is not None:
+                    fields[f"{key}[{sub_key}]"] = render(sub_value)
+        elif isinstance(value, (list, tuple)):
+            fields[f"{key}[]"] = [render(item) for item in value]
+        else:
+            fields[key] = render(value)
+    return fields
+
+def _open_attachments(stack: ExitStack, paths: List[str]) -> List[tuple]:
+    """Open local files as streamed multipart parts; raises FileNotFoundError."""
+    files = []
+    for path in paths:
+        path = os.path.expanduser(path)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Attachment not found: {path}")
+        name = os.path.basename(path)
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        files.append(("attachments[]", (name, stack.enter_context(open(path, "rb")), content_type)))
+    return files
+
 # enums of ticket properties
 class TicketSource(IntEnum):
     EMAIL = 1
@@ -79,6 +366,34 @@ class TicketPriority(IntEnum):
     MEDIUM = 2
     HIGH = 3
     URGENT = 4
+
+# Built-in values, checked when the account's ticket field schema does not list them.
+TICKET_ENUMS = {
+    "source": frozenset(e.value for e in TicketSource),
+    "priority": frozenset(e.value for e in TicketPriority),
+    "status": frozenset(e.value for e in TicketStatus),
+}
+
+async def _load_ticket_fields() -> List[Dict[str, Any]]:
+    response = await _request("get_ticket_fields")
+    response.raise_for_status()
+    return response.json()
+
+ticket_validators = ValidatorCache(_load_ticket_fields, freshdesk_domain, TICKET_ENUMS)
+changes.subscribe("ticket_field", ticket_validators.on_change)
+
+async def _ticket_payload_errors(payload: Dict[str, Any], creating: bool) -> List[Dict[str, str]]:
+    """Errors found by checking a ticket payload against the account's ticket fields.
+
+    Set FRESHDESK_VALIDATE_TICKETS=0 to send payloads unchecked.
+    """
+    if not env_flag("FRESHDESK_VALIDATE_TICKETS", True):
+        return []
+    validator = await ticket_validators.get()
+    if validator is None:
+        return []
+    return validator.errors(payload, creating)
+
 class AgentTicketScope(IntEnum):
     GLOBAL_ACCESS = 1
     GROUP_ACCESS = 2
@@ -169,21 +484,21 @@ class CannedResponseCreate(BaseModel):
         description="Groups for which the canned response is visible. Required if visibility=2"
     )
 
-@mcp.tool()
-async def get_ticket_fields() -> Dict[str, Any]:
-    """Get ticket fields from Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/ticket_fields"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
+get_ticket_fields = _endpoint_tool("get_ticket_fields")
 
+@tool(Lane.INTERACTIVE)
+async def get_tickets(
+    page: Optional[int] = 1,
+    per_page: Optional[int] = 30,
+    resolve_names: bool = False,
+    hydrate: bool = False,
+) -> Dict[str, Any]:
+    """Get tickets from Freshdesk with pagination support.
 
-@mcp.tool()
-async def get_tickets(page: Optional[int] = 1, per_page: Optional[int] = 30) -> Dict[str, Any]:
-    """Get tickets from Freshdesk with pagination support."""
+    Set resolve_names to add responder_name and group_name to each ticket.
+    Set hydrate to embed the requester, company, responder and group records,
+    each distinct one fetched only once.
+    """
     # Validate input parameters
     if page < 1:
         return {"error": "Page number must be greater than 0"}
@@ -191,45 +506,41 @@ async def get_tickets(page: Optional[int] = 1, per_page: Optional[int] = 30) ->
     if per_page < 1 or per_page > 100:
         return {"error": "Page size must be between 1 and 100"}
 
-    url = f"https://{freshdesk_domain()}/api/v2/tickets"
-
     params = {
         "page": page,
         "per_page": per_page
     }
 
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}",
-        "Content-Type": "application/json"
-    }
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
+    try:
+        response = await _request("list_tickets", params=params)
+        response.raise_for_status()
 
-            # Parse pagination from Link header
-            link_header = response.headers.get('Link', '')
-            pagination_info = parse_link_header(link_header)
+        # Parse pagination from Link header
+        link_header = response.headers.get('Link', '')
+        pagination_info = parse_link_header(link_header)
 
-            tickets = response.json()
+        tickets = response.json()
+        if resolve_names:
+            await _annotate_names(tickets)
+        if hydrate:
+            await _hydrate_tickets(tickets)
 
-            return {
-                "tickets": tickets,
-                "pagination": {
-                    "current_page": page,
-                    "next_page": pagination_info.get("next"),
-                    "prev_page": pagination_info.get("prev"),
-                    "per_page": per_page
-                }
+        return {
+            "tickets": tickets,
+            "pagination": {
+                "current_page": page,
+                "next_page": pagination_info.get("next"),
+                "prev_page": pagination_info.get("prev"),
+                "per_page": per_page
             }
+        }
 
-        except httpx.HTTPStatusError as e:
-            return {"error": f"Failed to fetch tickets: {str(e)}"}
-        except Exception as e:
-            return {"error": f"An unexpected error occurred: {str(e)}"}
+    except httpx.HTTPStatusError as e:
+        return {"error": f"Failed to fetch tickets: {str(e)}"}
+    except Exception as e:
+        return {"error": f"An unexpected error occurred: {str(e)}"}
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def create_ticket(
     subject: str,
     description: str,
@@ -239,9 +550,13 @@ async def create_ticket(
     email: Optional[str] = None,
     requester_id: Optional[int] = None,
     custom_fields: Optional[Dict[str, Any]] = None,
-    additional_fields: Optional[Dict[str, Any]] = None  # 👈 new parameter
+    additional_fields: Optional[Dict[str, Any]] = None,  # 👈 new parameter
+    attachment_paths: Optional[List[str]] = None
 ) -> str:
-    """Create a ticket in Freshdesk"""
+    """Create a ticket in Freshdesk
+
+    attachment_paths lists local files to attach; they are streamed from disk.
+    """
     # Validate requester information
     if not email and not requester_id:
         return "Error: Either email or requester_id must be provided"
@@ -255,9 +570,9 @@ async def create_ticket(
         return "Error: Invalid value for source, priority, or status"
 
     # Validate enum values
-    if (source_val not in [e.value for e in TicketSource] or
-        priority_val not in [e.value for e in TicketPriority] or
-        status_val not in [e.value for e in TicketStatus]):
+    if (source_val not in TICKET_ENUMS["source"] or
+        priority_val not in TICKET_ENUMS["priority"] or
+        status_val not in TICKET_ENUMS["status"]):
         return "Error: Invalid value for source, priority, or status"
 
     # Prepare the request data
@@ -283,45 +598,43 @@ async def create_ticket(
     if additional_fields:
         data.update(additional_fields)
 
-    url = f"https://{freshdesk_domain()}/api/v2/tickets"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}",
-        "Content-Type": "application/json"
-    }
+    errors = await _ticket_payload_errors(data, creating=True)
+    if errors:
+        return f"Validation Error: {errors}"
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, headers=headers, json=data)
-            response.raise_for_status()
+    try:
+        with ExitStack() as stack:
+            if attachment_paths:
+                files = _open_attachments(stack, attachment_paths)
+                response = await _request("create_ticket", data=_form_fields(data), files=files)
+            else:
+                response = await _request("create_ticket", json=data)
+        response.raise_for_status()
 
-            if response.status_code == 201:
-                return "Ticket created successfully"
+        if response.status_code == 201:
+            return "Ticket created successfully"
 
-            response_data = response.json()
-            return f"Success: {response_data}"
+        response_data = response.json()
+        return f"Success: {response_data}"
 
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 400:
-                # Handle validation errors and check for mandatory custom fields
-                error_data = e.response.json()
-                if "errors" in error_data:
-                    return f"Validation Error: {error_data['errors']}"
-            return f"Error: Failed to create ticket - {str(e)}"
-        except Exception as e:
-            return f"Error: An unexpected error occurred - {str(e)}"
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 400:
+            # Handle validation errors and check for mandatory custom fields
+            error_data = e.response.json()
+            if "errors" in error_data:
+                return f"Validation Error: {error_data['errors']}"
+        return f"Error: Failed to create ticket - {str(e)}"
+    except FileNotFoundError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        return f"Error: An unexpected error occurred - {str(e)}"
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def update_ticket(ticket_id: int, ticket_fields: Dict[str, Any]) -> Dict[str, Any]:
     """Update a ticket in Freshdesk."""
     if not ticket_fields:
         return {"error": "No fields provided for update"}
 
-    url = f"https://{freshdesk_domain()}/api/v2/tickets/{ticket_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}",
-        "Content-Type": "application/json"
-    }
-
     # Separate custom fields from standard fields
     custom_fields = ticket_fields.pop('custom_fields', {})
 
@@ -336,120 +649,69 @@ async def update_ticket(ticket_id: int, ticket_fields: Dict[str, Any]) -> Dict[s
     if custom_fields:
         update_data['custom_fields'] = custom_fields
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.put(url, headers=headers, json=update_data)
-            response.raise_for_status()
-
-            return {
-                "success": True,
-                "message": "Ticket updated successfully",
-                "ticket": response.json()
-            }
-
-        except httpx.HTTPStatusError as e:
-            error_message = f"Failed to update ticket: {str(e)}"
-            try:
-                error_details = e.response.json()
-                if "errors" in error_details:
-                    error_message = f"Validation errors: {error_details['errors']}"
-            except Exception:
-                pass
-            return {
-                "success": False,
-                "error": error_message
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": f"An unexpected error occurred: {str(e)}"
-            }
-
-@mcp.tool()
-async def delete_ticket(ticket_id: int) -> str:
-    """Delete a ticket in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/tickets/{ticket_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(url, headers=headers)
-        return response.json()
-
-@mcp.tool()
-async def get_ticket(ticket_id: int):
-    """Get a ticket in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/tickets/{ticket_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
-
-def build_search_query(
-    field: str, value: Union[str, int, bool, None], operator: str = "="
-) -> str:
-    """Build a properly formatted Freshdesk search query part.
-
-    Freshdesk query parts are shaped like:
-    - status:2
-    - type:'Question'
-    - created_at:>'2023-01-01'
-
-    Note: string values use single quotes.
-    """
-
-    if value is None:
-        return f"{field}:null"
-
-    op_map = {
-        "=": "",
-        ">": ">",
-        "<": "<",
-        ">=": ">",
-        "<=": "<",
-        ":>": ">",
-        ":<": "<",
-    }
-    op = op_map.get(operator, "")
-
-    if isinstance(value, str):
-        rendered_value = f"'{value}'"
-    elif isinstance(value, bool):
-        rendered_value = "true" if value else "false"
-    else:
-        rendered_value = str(value)
+    errors = await _ticket_payload_errors(update_data, creating=False)
+    if errors:
+        return {
+            "success": False,
+            "error": f"Validation errors: {errors}"
+        }
 
-    # Single colon before operator/value.
-    return f"{field}:{op}{rendered_value}"
+    try:
+        response = await _request("update_ticket", json=update_data, ticket_id=ticket_id)
+        response.raise_for_status()
 
-def build_complex_search_query(*parts, operator: str = "AND") -> str:
-    """
-    Build a complex search query from multiple parts.
+        return {
+            "success": True,
+            "message": "Ticket updated successfully",
+            "ticket": response.json()
+        }
 
-    Args:
-        *parts: Multiple query parts
-        operator: The operator to join parts with ("AND" or "OR")
+    except httpx.HTTPStatusError as e:
+        error_message = f"Failed to update ticket: {str(e)}"
+        try:
+            error_details = e.response.json()
+            if "errors" in error_details:
+                error_message = f"Validation errors: {error_details['errors']}"
+        except Exception:
+            pass
+        return {
+            "success": False,
+            "error": error_message
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"An unexpected error occurred: {str(e)}"
+        }
 
-    Returns:
-        A properly formatted complex query with the parts joined by the specified operator
+delete_ticket = _endpoint_tool("delete_ticket")
+
+@tool(Lane.INTERACTIVE)
+async def get_ticket(
+    ticket_id: int,
+    resolve_names: bool = False,
+    compact: bool = False,
+    max_chars: Optional[int] = None,
+):
+    """Get a ticket in Freshdesk.
+
+    Set resolve_names to add responder_name and group_name from the local
+    agent and group directories. Set compact to replace the HTML description
+    with plain text stripped of quoted replies and signatures, optionally
+    truncated to max_chars.
     """
-    if not parts:
-        return ""
-
-    # Join parts with the specified operator
-    joined_parts = f" {operator} ".join(parts)
-
-    # If there's more than one part, wrap in parentheses
-    if len(parts) > 1:
-        return f"({joined_parts})"
-
-    return joined_parts
-
-@mcp.tool()
-async def search_tickets(query: str) -> Dict[str, Any]:
+    response = await _request("get_ticket", ticket_id=ticket_id)
+    ticket = response.json()
+    if resolve_names and response.status_code == 200:
+        await _annotate_names([ticket])
+    if compact and response.status_code == 200:
+        ticket = await _compact(
+            compact_record, ticket, ("description",), "description", "description_text", max_chars
+        )
+    return ticket
+
+@tool(Lane.INTERACTIVE)
+async def search_tickets(query: str, resolve_names: bool = False, hydrate: bool = False) -> Dict[str, Any]:
     """Search Freshdesk tickets.
 
     Freshdesk expects the query parameter value to be enclosed in double quotes.
@@ -457,9 +719,10 @@ async def search_tickets(query: str) -> Dict[str, Any]:
 
     If the caller provides free text (no ':' present), we convert it into:
     `(description:'text' OR subject:'text')`.
-    """
 
-    url = f"https://{freshdesk_domain()}/api/v2/search/tickets"
+    Set resolve_names to add responder_name and group_name to each result,
+    or hydrate to embed requester, company, responder and group records.
+    """
 
     # Convert free text into a valid Freshdesk query.
     if ":" not in query:
@@ -473,10 +736,14 @@ async def search_tickets(query: str) -> Dict[str, Any]:
     params = {"query": query}
 
     try:
-        async with httpx.AsyncClient(auth=(freshdesk_api_key(), "X")) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+        response = await _request("search_tickets", params=params)
+        response.raise_for_status()
+        results = response.json()
+        if resolve_names and isinstance(results, dict):
+            await _annotate_names(results.get("results", []))
+        if hydrate and isinstance(results, dict):
+            await _hydrate_tickets(results.get("results", []))
+        return results
 
     except httpx.HTTPStatusError as e:
         try:
@@ -499,171 +766,369 @@ async def search_tickets(query: str) -> Dict[str, Any]:
     except Exception as e:
         return {"error": f"Search query failed: {str(e)}", "query_sent": query}
 
-@mcp.tool()
-async def get_ticket_conversation(ticket_id: int)-> list[Dict[str, Any]]:
-    """Get a ticket conversation in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/tickets/{ticket_id}/conversations"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
-
-@mcp.tool()
-async def create_ticket_reply(ticket_id: int,body: str)-> Dict[str, Any]:
-    """Create a reply to a ticket in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/tickets/{ticket_id}/reply"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
+@tool(Lane.INTERACTIVE)
+async def get_ticket_conversation(
+    ticket_id: int,
+    compact: bool = False,
+    max_chars: Optional[int] = None,
+)-> list[Dict[str, Any]]:
+    """Get a ticket conversation in Freshdesk.
+
+    Set compact to return plain-text bodies without HTML, quoted reply
+    chains, signatures or paragraphs repeated from earlier messages;
+    max_chars then truncates each body.
+    """
+    response = await _request("list_conversations", ticket_id=ticket_id)
+    conversations = response.json()
+    if compact and isinstance(conversations, list):
+        return await _compact(compact_thread, conversations, ("body",), max_chars)
+    return conversations
+
+# Endpoint behind each kind of outbox job.
+OUTBOX_ENDPOINTS = {
+    "reply": "create_reply",
+    "note": "create_note",
+    "conversation_update": "update_conversation",
+}
+
+async def _deliver_outbox_job(job: Dict[str, Any]) -> httpx.Response:
+    url = f"{base_url(freshdesk_domain())}{job['path']}"
+    return await pipeline(Call(endpoint(OUTBOX_ENDPOINTS[job["kind"]]), url, json=job["payload"]))
+
+async def _on_outbox_delivered(job: Dict[str, Any]) -> None:
+    conversation = job.get("response")
+    if not isinstance(conversation, dict) or conversation.get("id") is None:
+        return
+    ticket_id = conversation.get("ticket_id")
+    await changes.publish(Change("conversation", conversation["id"], record=conversation, parent_id=ticket_id))
+    if ticket_id is not None:
+        await changes.publish(Change("ticket", ticket_id))
+
+outbox = Outbox(_deliver_outbox_job, _on_outbox_delivered)
+
+def _outbox_job_summary(job: Dict[str, Any]) -> Dict[str, Any]:
+    def iso(timestamp: Optional[float]) -> Optional[str]:
+        return format_timestamp(int(timestamp)) if timestamp else None
+
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "idempotency_key": job["idempotency_key"],
+        "last_error": job["last_error"],
+        "response": job["response"],
+        "created_at": iso(job["created_at"]),
+        "updated_at": iso(job["updated_at"]),
+        "next_attempt_at": iso(job["next_attempt_at"]) if job["status"] == "pending" else None,
+    }
+
+async def _enqueue_write(
+    queue: Optional[bool],
+    kind: str,
+    payload: Dict[str, Any],
+    idempotency_key: Optional[str],
+    **path_values: Any,
+) -> Optional[Dict[str, Any]]:
+    """Queue a write in the outbox if asked to (or by default when it is enabled).
+
+    Returns the acknowledgement, or None when the caller should send the write itself.
+    """
+    if queue is False or (queue is None and not outbox.enabled()):
+        return None
+    if not outbox.enabled():
+        return {"error": "The outbox is disabled; set FRESHDESK_OUTBOX_PATH to queue writes"}
+    try:
+        ep = endpoint(OUTBOX_ENDPOINTS[kind])
+        job = await outbox.enqueue(kind, ep.method, ep.render(path_values), payload, idempotency_key)
+        outbox.start()
+    except Exception as e:
+        return {"error": f"Failed to queue {kind}: {str(e)}"}
+    return {"queued": True, **_outbox_job_summary(job)}
+
+@tool(Lane.INTERACTIVE)
+async def create_ticket_reply(
+    ticket_id: int,
+    body: str,
+    attachment_paths: Optional[List[str]] = None,
+    queue: Optional[bool] = None,
+    idempotency_key: Optional[str] = None,
+)-> Dict[str, Any]:
+    """Create a reply to a ticket in Freshdesk.
+
+    attachment_paths lists local files to attach; they are streamed from disk.
+    When the outbox is enabled the reply is queued and a job id returned
+    immediately (queue=false posts it now); see get_outbox_status.
+    Repeating a call with the same idempotency_key returns the existing job
+    instead of posting twice; without a key, so does repeating the same body
+    within FRESHDESK_OUTBOX_DEDUP_WINDOW seconds (default 600).
+    """
+    if attachment_paths and queue:
+        return {"error": "Writes with attachments cannot be queued; use queue=false"}
+    if not attachment_paths:
+        queued = await _enqueue_write(queue, "reply", {"body": body}, idempotency_key, ticket_id=ticket_id)
+        if queued is not None:
+            return queued
     data = {
         "body": body
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, json=data)
-        return response.json()
-
-@mcp.tool()
-async def create_ticket_note(ticket_id: int,body: str)-> Dict[str, Any]:
-    """Create a note for a ticket in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/tickets/{ticket_id}/notes"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
+    try:
+        with ExitStack() as stack:
+            if attachment_paths:
+                files = _open_attachments(stack, attachment_paths)
+                response = await _request("create_reply", data=data, files=files, ticket_id=ticket_id)
+            else:
+                response = await _request("create_reply", json=data, ticket_id=ticket_id)
+    except FileNotFoundError as e:
+        return {"error": str(e)}
+    return response.json()
+
+@tool(Lane.INTERACTIVE)
+async def create_ticket_note(
+    ticket_id: int,
+    body: str,
+    attachment_paths: Optional[List[str]] = None,
+    queue: Optional[bool] = None,
+    idempotency_key: Optional[str] = None,
+)-> Dict[str, Any]:
+    """Create a note for a ticket in Freshdesk.
+
+    attachment_paths lists local files to attach; they are streamed from disk.
+    When the outbox is enabled the note is queued and a job id returned
+    immediately (queue=false posts it now); see get_outbox_status.
+    Repeating a call with the same idempotency_key returns the existing job
+    instead of posting twice; without a key, so does repeating the same body
+    within FRESHDESK_OUTBOX_DEDUP_WINDOW seconds (default 600).
+    """
+    if attachment_paths and queue:
+        return {"error": "Writes with attachments cannot be queued; use queue=false"}
+    if not attachment_paths:
+        queued = await _enqueue_write(queue, "note", {"body": body}, idempotency_key, ticket_id=ticket_id)
+        if queued is not None:
+            return queued
     data = {
         "body": body
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, json=data)
-        return response.json()
-
-@mcp.tool()
-async def update_ticket_conversation(conversation_id: int,body: str)-> Dict[str, Any]:
-    """Update a conversation for a ticket in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/conversations/{conversation_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
+    try:
+        with ExitStack() as stack:
+            if attachment_paths:
+                files = _open_attachments(stack, attachment_paths)
+                response = await _request("create_note", data=data, files=files, ticket_id=ticket_id)
+            else:
+                response = await _request("create_note", json=data, ticket_id=ticket_id)
+    except FileNotFoundError as e:
+        return {"error": str(e)}
+    return response.json()
+
+@tool(Lane.INTERACTIVE)
+async def update_ticket_conversation(
+    conversation_id: int,
+    body: str,
+    queue: Optional[bool] = None,
+    idempotency_key: Optional[str] = None,
+)-> Dict[str, Any]:
+    """Update a conversation for a ticket in Freshdesk.
+
+    Queued through the outbox like create_ticket_reply when it is enabled.
+    """
+    queued = await _enqueue_write(
+        queue, "conversation_update", {"body": body}, idempotency_key, conversation_id=conversation_id
+    )
+    if queued is not None:
+        return queued
     data = {
         "body": body
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.put(url, headers=headers, json=data)
-        status_code = response.status_code
-        if status_code == 200:
-            return response.json()
-        else:
-            return f"Cannot update conversation ${response.json()}"
-
-@mcp.tool()
-async def get_agents(page: Optional[int] = 1, per_page: Optional[int] = 30)-> list[Dict[str, Any]]:
+    response = await _request("update_conversation", json=data, conversation_id=conversation_id)
+    status_code = response.status_code
+    if status_code == 200:
+        return response.json()
+    else:
+        return f"Cannot update conversation ${response.json()}"
+
+@tool(Lane.INTERACTIVE)
+async def get_outbox_status(
+    job_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 20,
+) -> Dict[str, Any]:
+    """Show queued replies, notes and conversation updates.
+
+    With job_id, returns that job; otherwise job counts per status and the
+    most recent jobs, optionally filtered by status (pending, in_flight,
+    delivered or failed).
+    """
+    if not outbox.enabled():
+        return {"error": "The outbox is disabled; set FRESHDESK_OUTBOX_PATH"}
+    outbox.start()
+    if job_id:
+        job = await outbox.get(job_id)
+        if job is None:
+            return {"error": f"Unknown outbox job {job_id}"}
+        return _outbox_job_summary(job)
+    return {
+        "counts": await outbox.counts(),
+        "jobs": [_outbox_job_summary(job) for job in await outbox.jobs(status, limit)],
+    }
+
+@tool(Lane.INTERACTIVE)
+async def get_request_metrics() -> Dict[str, Any]:
+    """Show per-endpoint request counts, errors, retries, cache hits and latency,
+    the state of the priority lanes, and the process's memory and event-loop lag
+    since the previous call."""
+    return {
+        "endpoints": request_metrics.snapshot(),
+        "lanes": lane_controller.snapshot(),
+        "result_sets": result_sets.snapshot(),
+        "entities": entity_cache.snapshot(),
+        "process": {
+            **process_snapshot(loop_lag),
+            "loop_blocks": loop_watchdog.snapshot(),
+            "profiling": profiler.snapshot(),
+        },
+    }
+
+@tool(Lane.INTERACTIVE)
+async def fetch_more(cursor: str, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Return the next chunk of a large result from its next_cursor.
+
+    Chunks come from memory without calling Freshdesk again. Cursors expire
+    when unused for FRESHDESK_RESULT_SET_TTL seconds (10 minutes by default).
+    """
+    return result_sets.fetch(cursor, limit)
+
+@tool(Lane.INTERACTIVE)
+async def retry_outbox_job(job_id: str) -> Dict[str, Any]:
+    """Queue a failed outbox job for delivery again."""
+    if not outbox.enabled():
+        return {"error": "The outbox is disabled; set FRESHDESK_OUTBOX_PATH"}
+    job = await outbox.retry(job_id)
+    outbox.start()
+    if job is None:
+        return {"error": f"Unknown outbox job {job_id}"}
+    return _outbox_job_summary(job)
+
+async def _download_attachment(
+    client: httpx.AsyncClient,
+    attachment: Dict[str, Any],
+    dest_dir: str,
+) -> Dict[str, Any]:
+    """Stream one attachment to ``dest_dir`` in fixed-size chunks."""
+    name = os.path.basename(attachment.get("name") or "") or "attachment"
+    path = os.path.join(dest_dir, f"{attachment['id']}-{name}")
+    result = {"id": attachment["id"], "name": attachment.get("name"), "path": path}
+
+    size = attachment.get("size")
+    if size is not None and os.path.isfile(path) and os.path.getsize(path) == size:
+        return {**result, "size": size, "skipped": True}
+
+    tmp_path = f"{path}.part"
+    written = 0
+    try:
+        # Attachment URLs are pre-signed, so no Freshdesk credentials are sent.
+        async with client.stream("GET", attachment["attachment_url"]) as response:
+            response.raise_for_status()
+            with open(tmp_path, "wb") as fh:
+                async for chunk in response.aiter_bytes(ATTACHMENT_CHUNK_SIZE):
+                    fh.write(chunk)
+                    written += len(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Also on cancellation: a deadline or client cancel must not leave partial files behind.
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return {**result, "size": written}
+
+@tool(Lane.BULK, timeout=1800)
+async def download_ticket_attachments(
+    ticket_id: int,
+    dest_dir: str,
+    include_conversations: bool = True,
+    attachment_ids: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """Download a ticket's attachments (and its conversations') to a local directory.
+
+    Files are streamed to disk in chunks and fetched concurrently; files
+    already downloaded with the expected size are skipped.
+    """
+    ticket = await get_ticket(ticket_id)
+    if not isinstance(ticket, dict) or ticket.get("id") is None:
+        return {"error": f"Failed to fetch ticket {ticket_id}", "details": ticket}
+
+    attachments = list(ticket.get("attachments") or [])
+    if include_conversations:
+        conversations = await get_ticket_conversation(ticket_id)
+        if isinstance(conversations, list):
+            for conversation in conversations:
+                attachments.extend(conversation.get("attachments") or [])
+    if attachment_ids:
+        attachments = [a for a in attachments if isinstance(a, dict) and a.get("id") in attachment_ids]
+
+    dest_dir = os.path.expanduser(dest_dir)
+    os.makedirs(dest_dir, exist_ok=True)
+    async with _client(follow_redirects=True) as client:
+        async def download(attachment: Any) -> Dict[str, Any]:
+            details = attachment if isinstance(attachment, dict) else {}
+            if details.get("id") is None or not details.get("attachment_url"):
+                error = "Attachment has no id or attachment_url"
+                return {"id": details.get("id"), "name": details.get("name"), "error": error}
+            try:
+                return await _download_attachment(client, attachment, dest_dir)
+            except (httpx.HTTPError, OSError) as e:
+                return {"id": attachment.get("id"), "name": attachment.get("name"), "error": str(e)}
+
+        results = await gather(
+            *(download(a) for a in attachments),
+            limit=max(1, env_int("FRESHDESK_DOWNLOAD_CONCURRENCY", 4)),
+        )
+
+    return {
+        "downloaded": [r for r in results if "error" not in r],
+        "errors": [r for r in results if "error" in r],
+    }
+
+@tool(Lane.INTERACTIVE)
+@_documents_fetch_all
+async def get_agents(
+    page: Optional[int] = 1,
+    per_page: Optional[int] = 30,
+    fetch_all: bool = False,
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     """Get all agents in Freshdesk with pagination support."""
+    if fetch_all:
+        try:
+            return result_sets.create("agents", await _load_all_pages(get_agents, "agents"))
+        except RuntimeError as e:
+            return {"error": str(e)}
     # Validate input parameters
     if page < 1:
         return {"error": "Page number must be greater than 0"}
 
     if per_page < 1 or per_page > 100:
         return {"error": "Page size must be between 1 and 100"}
-    url = f"https://{freshdesk_domain()}/api/v2/agents"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
     params = {
         "page": page,
         "per_page": per_page
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
-        return response.json()
+    response = await _request("list_agents", params=params)
+    return response.json()
 
-@mcp.tool()
-async def list_contacts(page: Optional[int] = 1, per_page: Optional[int] = 30)-> list[Dict[str, Any]]:
-    """List all contacts in Freshdesk with pagination support."""
-    url = f"https://{freshdesk_domain()}/api/v2/contacts"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    params = {
-        "page": page,
-        "per_page": per_page
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
-        return response.json()
+list_contacts = _endpoint_tool("list_contacts")
 
-@mcp.tool()
-async def get_contact(contact_id: int)-> Dict[str, Any]:
-    """Get a contact in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/contacts/{contact_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
+get_contact = _endpoint_tool("get_contact")
 
-@mcp.tool()
-async def search_contacts(query: str)-> list[Dict[str, Any]]:
-    """Search for contacts in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/contacts/autocomplete"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    params = {"term": query}
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
-        return response.json()
+search_contacts = _endpoint_tool("search_contacts")
 
-@mcp.tool()
-async def update_contact(contact_id: int, contact_fields: Dict[str, Any])-> Dict[str, Any]:
-    """Update a contact in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/contacts/{contact_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    data = {}
-    for field, value in contact_fields.items():
-        data[field] = value
-    async with httpx.AsyncClient() as client:
-        response = await client.put(url, headers=headers, json=data)
-        return response.json()
-@mcp.tool()
-async def list_canned_responses(folder_id: int)-> list[Dict[str, Any]]:
-    """List all canned responses in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/canned_response_folders/{folder_id}/responses"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    canned_responses = []
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        for canned_response in response.json():
-            canned_responses.append(canned_response)
-    return canned_responses
-
-@mcp.tool()
-async def list_canned_response_folders()-> list[Dict[str, Any]]:
-    """List all canned response folders in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/canned_response_folders"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
+update_contact = _endpoint_tool("update_contact")
 
-@mcp.tool()
-async def view_canned_response(canned_response_id: int)-> Dict[str, Any]:
-    """View a canned response in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/canned_responses/{canned_response_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
-@mcp.tool()
+list_canned_responses = _endpoint_tool("list_canned_responses")
+
+list_canned_response_folders = _endpoint_tool("list_canned_response_folders")
+
+view_canned_response = _endpoint_tool("view_canned_response")
+
+@tool(Lane.INTERACTIVE)
 async def create_canned_response(canned_response_fields: Dict[str, Any])-> Dict[str, Any]:
     """Create a canned response in Freshdesk."""
     # Validate input using Pydantic model
@@ -674,213 +1139,194 @@ async def create_canned_response(canned_response_fields: Dict[str, Any])-> Dict[
     except Exception as e:
         return {"error": f"Validation error: {str(e)}"}
 
-    url = f"https://{freshdesk_domain()}/api/v2/canned_responses"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, json=canned_response_data)
-        return response.json()
+    response = await _request("create_canned_response", json=canned_response_data)
+    return response.json()
 
-@mcp.tool()
-async def update_canned_response(canned_response_id: int, canned_response_fields: Dict[str, Any])-> Dict[str, Any]:
-    """Update a canned response in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/canned_responses/{canned_response_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.put(url, headers=headers, json=canned_response_fields)
-        return response.json()
-@mcp.tool()
-async def create_canned_response_folder(name: str)-> Dict[str, Any]:
-    """Create a canned response folder in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/canned_response_folders"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    data = {
-        "name": name
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, json=data)
-        return response.json()
-@mcp.tool()
-async def update_canned_response_folder(folder_id: int, name: str)-> Dict[str, Any]:
-    """Update a canned response folder in Freshdesk."""
-    print(folder_id, name)
-    url = f"https://{freshdesk_domain()}/api/v2/canned_response_folders/{folder_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    data = {
-        "name": name
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.put(url, headers=headers, json=data)
-        return response.json()
+update_canned_response = _endpoint_tool("update_canned_response")
+
+create_canned_response_folder = _endpoint_tool("create_canned_response_folder")
+
+update_canned_response_folder = _endpoint_tool("update_canned_response_folder")
+
+async def _load_canned_library() -> List[Dict[str, Any]]:
+    """Every canned response with its content, listing all folders concurrently.
 
-@mcp.tool()
-async def list_solution_articles(folder_id: int)-> list[Dict[str, Any]]:
-    """List all solution articles in Freshdesk."""
-    solution_articles = []
-    url = f"https://{freshdesk_domain()}/api/v2/solutions/folders/{folder_id}/articles"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
+    Responses whose listing lacks the content are fetched one by one, except
+    when the library already holds them at the same updated_at.
+    """
+    response = await _request("list_canned_response_folders")
+    response.raise_for_status()
+    folders = response.json()
+    limit = max(1, env_int("FRESHDESK_FANOUT_CONCURRENCY", 8))
+
+    async def folder_responses(folder: Dict[str, Any]) -> List[Dict[str, Any]]:
+        response = await _request("list_canned_responses", folder_id=folder["id"])
+        response.raise_for_status()
+        return [
+            {**item, "folder_id": item.get("folder_id", folder["id"]), "folder_name": folder.get("name")}
+            for item in response.json()
+        ]
+
+    known = canned_library.records if canned_library.is_loaded() else {}
+
+    async def with_content(item: Dict[str, Any]) -> Dict[str, Any]:
+        if item.get("content_html") is not None:
+            return item
+        previous = known.get(item["id"])
+        if previous is not None and item.get("updated_at") and previous.get("updated_at") == item["updated_at"]:
+            return {**previous, **item, "content_html": previous.get("content_html")}
+        # New or changed since it was last read, so a cached copy would be stale.
+        entity_cache.evict("canned_response", item["id"])
+        response = await _request("view_canned_response", canned_response_id=item["id"])
+        response.raise_for_status()
+        return {**item, **response.json(), "folder_name": item["folder_name"]}
+
+    listed = await gather(*(folder_responses(folder) for folder in folders), limit=limit)
+    return await gather(*(with_content(item) for items in listed for item in items), limit=limit)
+
+canned_library = CannedResponseLibrary(
+    "canned_responses",
+    _load_canned_library,
+    freshdesk_domain,
+    ttl_env="FRESHDESK_CANNED_CACHE_TTL",
+    default_ttl=900,
+)
+
+def _on_canned_response_change(change: Change) -> None:
+    """Replace or drop a canned response in the library after a write through the server."""
+    if not canned_library.is_loaded():
+        return
+    previous = canned_library.records.get(change.id)
+    canned_library.remove(change.id)
+    if change.deleted or change.record is None:
+        return
+    record = dict(change.record)
+    folder_id = record.get("folder_id")
+    # Write responses carry the folder id only; take the name from a response in the same folder.
+    sibling = previous if previous is not None and previous.get("folder_id") == folder_id else next(
+        (other for other in canned_library.records.values() if other.get("folder_id") == folder_id), None
+    )
+    record.setdefault("folder_name", sibling.get("folder_name") if sibling else None)
+    canned_library.upsert(record)
+
+changes.subscribe("canned_response", _on_canned_response_change)
+
+@tool(Lane.INTERACTIVE)
+async def search_canned_responses(
+    query: str,
+    folder_id: Optional[int] = None,
+    limit: int = 10,
+) -> Dict[str, Any]:
+    """Search canned responses across all folders by words of their title and content.
+
+    Matching responses are returned with their content, best match first.
+    """
+    library = canned_library
+    if not await canned_library.ensure_loaded():
+        # The library is disabled or failed to load: index a one-off copy.
+        library = CannedResponseLibrary("canned_responses", _load_canned_library, freshdesk_domain,
+                                        ttl_env="FRESHDESK_CANNED_CACHE_TTL", default_ttl=900)
+        try:
+            for record in await _load_canned_library():
+                library.upsert(record)
+        except Exception as e:
+            return {"error": f"Failed to load canned responses: {str(e)}"}
+    results = library.search(query, max(1, limit), folder_id=folder_id)
+    return {
+        "query": query,
+        "results": [{**record, "score": score} for record, score in results],
+        "total": len(library.records),
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        for article in response.json():
-            solution_articles.append(article)
-    return solution_articles
 
-@mcp.tool()
+list_solution_articles = _endpoint_tool("list_solution_articles")
+
+@tool(Lane.INTERACTIVE)
 async def list_solution_folders(category_id: int)-> list[Dict[str, Any]]:
     if not category_id:
         return {"error": "Category ID is required"}
     """List all solution folders in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/solutions/categories/{category_id}/folders"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
+    response = await _request("list_solution_folders", category_id=category_id)
+    return response.json()
 
-@mcp.tool()
-async def list_solution_categories()-> list[Dict[str, Any]]:
-    """List all solution categories in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/solutions/categories"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
+list_solution_categories = _endpoint_tool("list_solution_categories")
 
-@mcp.tool()
-async def view_solution_category(category_id: int)-> Dict[str, Any]:
-    """View a solution category in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/solutions/categories/{category_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
+view_solution_category = _endpoint_tool("view_solution_category")
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def create_solution_category(category_fields: Dict[str, Any])-> Dict[str, Any]:
     """Create a solution category in Freshdesk."""
     if not category_fields.get("name"):
         return {"error": "Name is required"}
 
-    url = f"https://{freshdesk_domain()}/api/v2/solutions/categories"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, json=category_fields)
-        return response.json()
+    response = await _request("create_solution_category", json=category_fields)
+    return response.json()
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def update_solution_category(category_id: int, category_fields: Dict[str, Any])-> Dict[str, Any]:
     """Update a solution category in Freshdesk."""
     if not category_fields.get("name"):
         return {"error": "Name is required"}
 
-    url = f"https://{freshdesk_domain()}/api/v2/solutions/categories/{category_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.put(url, headers=headers, json=category_fields)
-        return response.json()
+    response = await _request("update_solution_category", json=category_fields, category_id=category_id)
+    return response.json()
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def create_solution_category_folder(category_id: int, folder_fields: Dict[str, Any])-> Dict[str, Any]:
     """Create a solution category folder in Freshdesk."""
     if not folder_fields.get("name"):
         return {"error": "Name is required"}
-    url = f"https://{freshdesk_domain()}/api/v2/solutions/categories/{category_id}/folders"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, json=folder_fields)
-        return response.json()
+    response = await _request("create_solution_category_folder", json=folder_fields, category_id=category_id)
+    return response.json()
 
-@mcp.tool()
-async def view_solution_category_folder(folder_id: int)-> Dict[str, Any]:
-    """View a solution category folder in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/solutions/folders/{folder_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
-@mcp.tool()
+view_solution_category_folder = _endpoint_tool("view_solution_category_folder")
+
+@tool(Lane.INTERACTIVE)
 async def update_solution_category_folder(folder_id: int, folder_fields: Dict[str, Any])-> Dict[str, Any]:
     """Update a solution category folder in Freshdesk."""
     if not folder_fields.get("name"):
         return {"error": "Name is required"}
-    url = f"https://{freshdesk_domain()}/api/v2/solutions/folders/{folder_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.put(url, headers=headers, json=folder_fields)
-        return response.json()
+    response = await _request("update_solution_category_folder", json=folder_fields, folder_id=folder_id)
+    return response.json()
 
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def create_solution_article(folder_id: int, article_fields: Dict[str, Any])-> Dict[str, Any]:
     """Create a solution article in Freshdesk."""
     if not article_fields.get("title") or not article_fields.get("status") or not article_fields.get("description"):
         return {"error": "Title, status and description are required"}
-    url = f"https://{freshdesk_domain()}/api/v2/solutions/folders/{folder_id}/articles"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, json=article_fields)
-        return response.json()
+    response = await _request("create_solution_article", json=article_fields, folder_id=folder_id)
+    return response.json()
+
+@tool(Lane.INTERACTIVE)
+async def view_solution_article(
+    article_id: int,
+    compact: bool = False,
+    max_chars: Optional[int] = None,
+)-> Dict[str, Any]:
+    """View a solution article in Freshdesk.
+
+    Set compact to return only a plain-text description, optionally
+    truncated to max_chars.
+    """
+    response = await _request("view_solution_article", article_id=article_id)
+    article = response.json()
+    if compact and response.status_code == 200:
+        return await _compact(compact_article, article, ("description",), max_chars)
+    return article
 
-@mcp.tool()
-async def view_solution_article(article_id: int)-> Dict[str, Any]:
-    """View a solution article in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/solutions/articles/{article_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
+update_solution_article = _endpoint_tool("update_solution_article")
 
-@mcp.tool()
-async def update_solution_article(article_id: int, article_fields: Dict[str, Any])-> Dict[str, Any]:
-    """Update a solution article in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/solutions/articles/{article_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.put(url, headers=headers, json=article_fields)
-        return response.json()
-
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def view_agent(agent_id: int)-> Dict[str, Any]:
     """View an agent in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/agents/{agent_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
+    cached = agent_directory.get(agent_id)
+    if cached is not None:
+        return cached
+
+    response = await _request("view_agent", agent_id=agent_id)
+    return response.json()
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def create_agent(agent_fields: Dict[str, Any]) -> Dict[str, Any]:
     """Create an agent in Freshdesk."""
     # Validate mandatory fields
@@ -893,59 +1339,23 @@ async def create_agent(agent_fields: Dict[str, Any]) -> Dict[str, Any]:
             "error": "Invalid value for ticket_scope. Must be one of: " + ", ".join([e.name for e in AgentTicketScope])
         }
 
-    url = f"https://{freshdesk_domain()}/api/v2/agents"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
+    try:
+        response = await _request("create_agent", json=agent_fields)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        return {
+            "error": f"Failed to create agent: {str(e)}",
+            "details": e.response.json() if e.response else None
+        }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, headers=headers, json=agent_fields)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            return {
-                "error": f"Failed to create agent: {str(e)}",
-                "details": e.response.json() if e.response else None
-            }
+update_agent = _endpoint_tool("update_agent")
 
-@mcp.tool()
-async def update_agent(agent_id: int, agent_fields: Dict[str, Any]) -> Dict[str, Any]:
-    """Update an agent in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/agents/{agent_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.put(url, headers=headers, json=agent_fields)
-        return response.json()
+search_agents = _endpoint_tool("search_agents")
 
-@mcp.tool()
-async def search_agents(query: str) -> list[Dict[str, Any]]:
-    """Search for agents in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/agents/autocomplete?term={query}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
-@mcp.tool()
-async def list_groups(page: Optional[int] = 1, per_page: Optional[int] = 30)-> list[Dict[str, Any]]:
-    """List all groups in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/groups"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    params = {
-        "page": page,
-        "per_page": per_page
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
-        return response.json()
+list_groups = _endpoint_tool("list_groups")
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def create_group(group_fields: Dict[str, Any]) -> Dict[str, Any]:
     """Create a group in Freshdesk."""
     # Validate input using Pydantic model
@@ -956,67 +1366,360 @@ async def create_group(group_fields: Dict[str, Any]) -> Dict[str, Any]:
     except Exception as e:
         return {"error": f"Validation error: {str(e)}"}
 
-    url = f"https://{freshdesk_domain()}/api/v2/groups"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}",
-        "Content-Type": "application/json"
-    }
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, headers=headers, json=group_data)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            return {
-                "error": f"Failed to create group: {str(e)}",
-                "details": e.response.json() if e.response else None
-            }
+    try:
+        response = await _request("create_group", json=group_data)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        return {
+            "error": f"Failed to create group: {str(e)}",
+            "details": e.response.json() if e.response else None
+        }
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def view_group(group_id: int) -> Dict[str, Any]:
     """View a group in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/groups/{group_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
+    cached = group_directory.get(group_id)
+    if cached is not None:
+        return cached
+
+    response = await _request("view_group", group_id=group_id)
+    return response.json()
+
+async def _load_all_pages(list_page, kind: str) -> List[Dict[str, Any]]:
+    """Page through a list tool that returns bare JSON arrays until a short page."""
+    records: List[Dict[str, Any]] = []
+    page = 1
+    while True:
+        batch = await list_page(page=page, per_page=100)
+        if not isinstance(batch, list):
+            raise RuntimeError(f"Unexpected response while listing {kind}: {batch}")
+        records.extend(batch)
+        if len(batch) < 100:
+            return records
+        page += 1
+
+async def _load_all_agents() -> List[Dict[str, Any]]:
+    return await _load_all_pages(get_agents, "agents")
+
+async def _load_all_groups() -> List[Dict[str, Any]]:
+    return await _load_all_pages(list_groups, "groups")
+
+agent_directory = AgentDirectory(
+    "agents",
+    _load_all_agents,
+    freshdesk_domain,
+    ttl_env="FRESHDESK_AGENT_CACHE_TTL",
+    default_ttl=900,
+)
+
+group_directory = Directory(
+    "groups",
+    _load_all_groups,
+    freshdesk_domain,
+    ttl_env="FRESHDESK_GROUP_CACHE_TTL",
+    default_ttl=900,
+)
+
+async def _load_all_contacts() -> List[Dict[str, Any]]:
+    return await _load_all_pages(list_contacts, "contacts")
+
+async def _load_contacts_updated_since(since: datetime) -> List[Dict[str, Any]]:
+    """Return contacts updated since ``since`` using the list filter."""
+    contacts: List[Dict[str, Any]] = []
+    page = 1
+    while True:
+        params = {"_updated_since": since.strftime("%Y-%m-%dT%H:%M:%SZ"), "page": page, "per_page": 100}
+        response = await _request("list_contacts", params=params)
+        response.raise_for_status()
+        batch = response.json()
+        contacts.extend(batch)
+        if len(batch) < 100:
+            return contacts
+        page += 1
+
+contact_directory = ContactDirectory(
+    "contacts",
+    _load_all_contacts,
+    freshdesk_domain,
+    ttl_env="FRESHDESK_CONTACT_CACHE_TTL",
+    default_ttl=900,
+    load_since=_load_contacts_updated_since,
+)
+
+def _on_directory_change(change: Change) -> None:
+    """Replace or drop an agent, group or contact after a write through the server."""
+    directory = {"agent": agent_directory, "group": group_directory, "contact": contact_directory}[change.kind]
+    if not directory.is_loaded():
+        return
+    directory.remove(change.id)
+    if not change.deleted and change.record is not None:
+        directory.upsert(change.record)
+
+changes.subscribe("agent", _on_directory_change)
+changes.subscribe("group", _on_directory_change)
+changes.subscribe("contact", _on_directory_change)
+
+# Sends per imported contact: a 409 turns a create into an update, a 429 is sent again.
+IMPORT_ATTEMPTS = 3
+
+def _conflicting_contact(response: httpx.Response) -> Optional[int]:
+    """Id of the existing contact named in a 409 "duplicate_value" response."""
+    try:
+        errors = response.json().get("errors") or []
+    except (ValueError, AttributeError):
+        return None
+    for error in errors:
+        user_id = (error.get("additional_info") or {}).get("user_id") if isinstance(error, dict) else None
+        if user_id is not None:
+            return int(user_id)
+    return None
+
+async def _find_contact(contact: Dict[str, Any]) -> Optional[int]:
+    """Look a contact up through the API when the contact directory is unavailable."""
+    for field in ("email", "mobile", "phone"):
+        if not contact.get(field):
+            continue
+        response = await _request("list_contacts", params={field: contact[field]})
+        response.raise_for_status()
+        matches = response.json()
+        if matches:
+            return matches[0]["id"]
+    return None
+
+async def _upsert_contact(contact: Dict[str, Any], indexed: bool, dry_run: bool) -> Tuple[str, Optional[str]]:
+    contact_id = contact_directory.match(contact) if indexed else await _find_contact(contact)
+    if dry_run:
+        return (contactimport.UPDATED if contact_id is not None else contactimport.CREATED), None
+    for _ in range(IMPORT_ATTEMPTS):
+        if contact_id is None:
+            response = await _request("create_contact", json=contact)
+            if response.status_code == 409:
+                contact_id = _conflicting_contact(response)
+                if contact_id is not None:
+                    continue
+        else:
+            response = await _request("update_contact", json=contact, contact_id=contact_id)
+        # After a 429 the lanes hold the next request until the pause is over.
+        if response.status_code != 429:
+            break
+    if response.is_success:
+        return (contactimport.UPDATED if contact_id is not None else contactimport.CREATED), None
+    try:
+        details = response.json()
+    except ValueError:
+        details = response.text
+    return contactimport.FAILED, f"HTTP {response.status_code}: {details}"
+
+async def run_contact_import(
+    path: str,
+    max_rows: Optional[int] = None,
+    dry_run: bool = False,
+    restart: bool = False,
+    progress_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run a contact import, saving progress to progress_path.
 
-@mcp.tool()
-async def create_ticket_field(ticket_field_fields: Dict[str, Any]) -> Dict[str, Any]:
-    """Create a ticket field in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/admin/ticket_fields"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, json=ticket_field_fields)
-        return response.json()
-@mcp.tool()
-async def view_ticket_field(ticket_field_id: int) -> Dict[str, Any]:
-    """View a ticket field in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/admin/ticket_fields/{ticket_field_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
+    Args:
+        path: CSV or NDJSON file to import.
+        max_rows: Rows to handle in this call, or None for the rest of the file.
+            Ignored for dry runs, which keep no progress and so read the whole file.
+        dry_run: Count creates and updates without sending them.
+        restart: Ignore saved progress and start from the first row.
+        progress_path: Progress file; defaults to one next to path.
+    """
+    if not os.path.isfile(path):
+        return {"error": f"File not found: {path}"}
+    if dry_run:
+        max_rows = None
+    if max_rows is not None and max_rows < 1:
+        return {"error": "max_rows must be greater than 0"}
+    indexed = await contact_directory.ensure_loaded()
+    upsert = functools.partial(_upsert_contact, indexed=indexed, dry_run=dry_run)
+    try:
+        return await contactimport.import_contacts(
+            path, upsert, progress_path=progress_path, max_rows=max_rows, restart=restart, dry_run=dry_run
+        )
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        return {"error": f"Could not read {path}: {e}"}
+
+@tool(Lane.BULK, timeout=1800)
+async def import_contacts(
+    path: str,
+    max_rows: Optional[int] = 1000,
+    dry_run: bool = False,
+    restart: bool = False,
+) -> Dict[str, Any]:
+    """Create or update contacts from a CSV or NDJSON file.
+
+    Rows are matched to existing contacts by email, external id or phone
+    number. At most max_rows rows are handled per call and progress is saved
+    next to the file after every batch, so call again while "complete" is
+    false. Set dry_run to count what would be created and updated across the
+    whole file without writing anything, and restart to ignore saved progress.
+    """
+    return await run_contact_import(path, max_rows=max_rows, dry_run=dry_run, restart=restart)
+
+async def _annotate_names(tickets: List[Dict[str, Any]]) -> None:
+    """Add responder_name and group_name to tickets from the local directories."""
+    agents_ready, groups_ready = await gather(
+        agent_directory.ensure_loaded(), group_directory.ensure_loaded()
+    )
+    for ticket in tickets:
+        if not isinstance(ticket, dict):
+            continue
+        if agents_ready and ticket.get("responder_id") is not None:
+            agent = agent_directory.get(ticket["responder_id"], fresh_only=False)
+            ticket["responder_name"] = agent_directory.name_of(agent) if agent else None
+        if groups_ready and ticket.get("group_id") is not None:
+            group = group_directory.get(ticket["group_id"], fresh_only=False)
+            ticket["group_name"] = group_directory.name_of(group) if group else None
+
+@tool(Lane.INTERACTIVE)
+async def resolve_agents_and_groups(
+    agent_ids: Optional[List[int]] = None,
+    group_ids: Optional[List[int]] = None,
+    names: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Resolve agent/group ids to names and names (or agent emails) to ids.
+
+    Lookups are answered from local agent and group directories that are
+    loaded once and refreshed in the background.
+    """
+    agents_ready, groups_ready = await gather(
+        agent_directory.ensure_loaded(), group_directory.ensure_loaded()
+    )
+    if not (agents_ready or groups_ready):
+        return {"error": "Agent and group directories are unavailable"}
+
+    def name_for(directory: Directory, record_id: int) -> Optional[str]:
+        record = directory.get(record_id, fresh_only=False)
+        return directory.name_of(record) if record else None
+
+    result: Dict[str, Any] = {}
+    if agent_ids:
+        result["agents"] = {str(i): name_for(agent_directory, i) for i in agent_ids}
+    if group_ids:
+        result["groups"] = {str(i): name_for(group_directory, i) for i in group_ids}
+    if names:
+        result["names"] = {
+            name: {
+                "agent_ids": agent_directory.ids_for_name(name) if agents_ready else [],
+                "group_ids": group_directory.ids_for_name(name) if groups_ready else [],
+            }
+            for name in names
+        }
+    return result
+
+async def _fetch_distinct(fetch, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Fetch each id once, concurrently, keeping only well-formed records."""
+    async def fetch_one(record_id: int):
+        try:
+            record = await fetch(record_id)
+        except Exception as e:
+            logging.warning(f"Failed to fetch {fetch.__name__}({record_id}): {e}")
+            return record_id, None
+        if isinstance(record, dict) and record.get("id") is not None:
+            return record_id, record
+        return record_id, None
+
+    pairs = await gather(
+        *(fetch_one(record_id) for record_id in ids),
+        limit=max(1, env_int("FRESHDESK_FANOUT_CONCURRENCY", 8)),
+    )
+    return {record_id: record for record_id, record in pairs if record is not None}
+
+def _contact_summary(contact: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: contact.get(key) for key in ("id", "name", "email", "phone", "mobile", "company_id")}
+
+def _company_summary(company: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: company.get(key) for key in ("id", "name", "domains")}
+
+def _agent_summary(agent: Dict[str, Any]) -> Dict[str, Any]:
+    contact = agent.get("contact") or {}
+    return {"id": agent.get("id"), "name": contact.get("name"), "email": contact.get("email")}
+
+def _group_summary(group: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": group.get("id"), "name": group.get("name")}
+
+async def _hydrate_tickets(tickets: List[Dict[str, Any]]) -> None:
+    """Embed requester, company, responder and group records into tickets.
+
+    Distinct ids are collected across the whole batch; agents and groups come
+    from the local directories where possible, as do companies once their
+    directory is loaded, and everything else is fetched once per id,
+    concurrently.
+    """
+    tickets = [ticket for ticket in tickets if isinstance(ticket, dict)]
+    if not tickets:
+        return
+
+    def distinct(key: str) -> List[int]:
+        return sorted({ticket[key] for ticket in tickets if ticket.get(key) is not None})
+
+    def split(directory: Directory, ready: bool, ids: List[int]):
+        found = {}
+        if ready:
+            for record_id in ids:
+                record = directory.get(record_id, fresh_only=False)
+                if record is not None:
+                    found[record_id] = record
+        return found, [record_id for record_id in ids if record_id not in found]
+
+    agents_ready, groups_ready = await gather(agent_directory.ensure_loaded(), group_directory.ensure_loaded())
+    # Paging through every company is far more than a batch needs, so a cold
+    # company directory is left alone and the distinct ids are fetched.
+    companies_ready = company_directory.is_loaded() and await company_directory.ensure_loaded()
+    agents, missing_agents = split(agent_directory, agents_ready, distinct("responder_id"))
+    groups, missing_groups = split(group_directory, groups_ready, distinct("group_id"))
+    companies, missing_companies = split(company_directory, companies_ready, distinct("company_id"))
+
+    contacts, fetched_agents, fetched_groups, fetched_companies = await gather(
+        _fetch_distinct(get_contact, distinct("requester_id")),
+        _fetch_distinct(view_agent, missing_agents),
+        _fetch_distinct(view_group, missing_groups),
+        _fetch_distinct(view_company, missing_companies),
+    )
+    agents.update(fetched_agents)
+    groups.update(fetched_groups)
+    companies.update(fetched_companies)
+
+    for ticket in tickets:
+        contact = contacts.get(ticket.get("requester_id"))
+        company = companies.get(ticket.get("company_id"))
+        agent = agents.get(ticket.get("responder_id"))
+        group = groups.get(ticket.get("group_id"))
+        ticket["requester"] = _contact_summary(contact) if contact else None
+        ticket["company"] = _company_summary(company) if company else None
+        ticket["responder"] = _agent_summary(agent) if agent else None
+        ticket["group"] = _group_summary(group) if group else None
+
+@tool(Lane.INTERACTIVE)
+async def get_tickets_by_ids(ticket_ids: List[int], hydrate: bool = False) -> Dict[str, Any]:
+    """Fetch several tickets concurrently by id.
+
+    Set hydrate to embed requester, company, responder and group records,
+    each distinct one fetched only once across the batch.
+    """
+    if not ticket_ids:
+        return {"error": "No ticket ids provided"}
 
-@mcp.tool()
-async def update_ticket_field(ticket_field_id: int, ticket_field_fields: Dict[str, Any]) -> Dict[str, Any]:
-    """Update a ticket field in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/admin/ticket_fields/{ticket_field_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
+    found = await _fetch_distinct(get_ticket, list(dict.fromkeys(ticket_ids)))
+    tickets = [found[ticket_id] for ticket_id in ticket_ids if ticket_id in found]
+    if hydrate:
+        await _hydrate_tickets(tickets)
+    return {
+        "tickets": tickets,
+        "missing_ids": [ticket_id for ticket_id in ticket_ids if ticket_id not in found],
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.put(url, headers=headers, json=ticket_field_fields)
-        return response.json()
 
-@mcp.tool()
+create_ticket_field = _endpoint_tool("create_ticket_field")
+
+view_ticket_field = _endpoint_tool("view_ticket_field")
+
+update_ticket_field = _endpoint_tool("update_ticket_field")
+
+@tool(Lane.INTERACTIVE)
 async def update_group(group_id: int, group_fields: Dict[str, Any]) -> Dict[str, Any]:
     """Update a group in Freshdesk."""
     try:
@@ -1025,44 +1728,21 @@ async def update_group(group_id: int, group_fields: Dict[str, Any]) -> Dict[str,
         group_data = validated_fields.model_dump(exclude_none=True)
     except Exception as e:
         return {"error": f"Validation error: {str(e)}"}
-    url = f"https://{freshdesk_domain()}/api/v2/groups/{group_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.put(url, headers=headers, json=group_data)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            return {
-                "error": f"Failed to update group: {str(e)}",
-                "details": e.response.json() if e.response else None
-            }
-
-@mcp.tool()
-async def list_contact_fields()-> list[Dict[str, Any]]:
-    """List all contact fields in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/contact_fields"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
+    try:
+        response = await _request("update_group", json=group_data, group_id=group_id)
+        response.raise_for_status()
         return response.json()
+    except httpx.HTTPStatusError as e:
+        return {
+            "error": f"Failed to update group: {str(e)}",
+            "details": e.response.json() if e.response else None
+        }
 
-@mcp.tool()
-async def view_contact_field(contact_field_id: int) -> Dict[str, Any]:
-    """View a contact field in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/contact_fields/{contact_field_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        return response.json()
+list_contact_fields = _endpoint_tool("list_contact_fields")
+
+view_contact_field = _endpoint_tool("view_contact_field")
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def create_contact_field(contact_field_fields: Dict[str, Any]) -> Dict[str, Any]:
     """Create a contact field in Freshdesk."""
     # Validate input using Pydantic model
@@ -1072,45 +1752,341 @@ async def create_contact_field(contact_field_fields: Dict[str, Any]) -> Dict[str
         contact_field_data = validated_fields.model_dump(exclude_none=True)
     except Exception as e:
         return {"error": f"Validation error: {str(e)}"}
-    url = f"https://{freshdesk_domain()}/api/v2/contact_fields"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, json=contact_field_data)
-        return response.json()
+    response = await _request("create_contact_field", json=contact_field_data)
+    return response.json()
 
-@mcp.tool()
-async def update_contact_field(contact_field_id: int, contact_field_fields: Dict[str, Any]) -> Dict[str, Any]:
-    """Update a contact field in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/contact_fields/{contact_field_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.put(url, headers=headers, json=contact_field_fields)
-        return response.json()
-@mcp.tool()
+update_contact_field = _endpoint_tool("update_contact_field")
+
+@tool(Lane.INTERACTIVE)
 async def get_field_properties(field_name: str):
     """Get properties of a specific field by name."""
-    url = f"https://{freshdesk_domain()}/api/v2/ticket_fields"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}"
-    }
     actual_field_name=field_name
     if field_name == "type":
         actual_field_name="ticket_type"
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        response.raise_for_status()  # Raise error for bad status codes
-        fields = response.json()
+    response = await _request("get_ticket_fields")
+    response.raise_for_status()  # Raise error for bad status codes
+    fields = response.json()
     # Filter the field by name
     matched_field = next((field for field in fields if field["name"] == actual_field_name), None)
 
     return matched_field
 
-@mcp.prompt()
-def create_ticket(
+# The ticket list endpoint stops at page 300; longer syncs restart from the cursor.
+LIST_MAX_PAGES = 300
+TICKET_SYNC_EPOCH = "2000-01-01T00:00:00Z"
+
+ticket_store = TicketStore(freshdesk_domain)
+
+async def _sync_ticket_store(max_pages: int, full: bool = False) -> Dict[str, Any]:
+    """Pull tickets updated since the store's cursor into the local ticket store."""
+    if full:
+        ticket_store.reset()
+    elif not ticket_store.is_synced():
+        ticket_store.restore()
+
+    since = ticket_store.cursor or TICKET_SYNC_EPOCH
+    page = 1
+    pages = 0
+    fetched = 0
+    complete = False
+
+    while pages < max_pages:
+        params = {
+            "updated_since": since,
+            "order_by": "updated_at",
+            "order_type": "asc",
+            # Descriptions cost extra credits per page; find_similar_tickets compares them.
+            "include": "stats,description" if env_flag("FRESHDESK_SYNC_DESCRIPTIONS") else "stats",
+            "per_page": 100,
+            "page": page,
+        }
+        response = await _request("list_tickets", params=params)
+        response.raise_for_status()
+        batch = response.json()
+        if not isinstance(batch, list):
+            raise RuntimeError(f"Unexpected response while listing tickets: {batch}")
+        pages += 1
+        fetched += len(batch)
+        for ticket in batch:
+            ticket_store.upsert(ticket)
+            ticket_store.advance(ticket.get("updated_at"))
+        if len(batch) < 100:
+            complete = True
+            break
+        if page >= LIST_MAX_PAGES:
+            since, page = ticket_store.cursor, 1
+        else:
+            page += 1
+
+    ticket_store.mark_synced()
+    ticket_store.persist()
+    return {
+        "tickets": len(ticket_store),
+        "fetched": fetched,
+        "pages": pages,
+        "complete": complete,
+        "synced_until": ticket_store.cursor,
+    }
+
+async def _on_ticket_change(change: Change) -> None:
+    """Refresh one mirrored ticket after a change notification."""
+    with use_lane(Lane.BACKGROUND):
+        await _refresh_mirrored_ticket(change)
+
+async def _refresh_mirrored_ticket(change: Change) -> None:
+    if not ticket_store.is_synced():
+        return
+    if change.deleted:
+        ticket_store.remove(change.id)
+        return
+    ticket = change.record
+    if ticket is None:
+        response = await _request("get_ticket", params={"include": "stats"}, ticket_id=change.id)
+        if response.status_code == 404:
+            ticket_store.remove(change.id)
+            return
+        response.raise_for_status()
+        ticket = response.json()
+    elif "stats" not in ticket:
+        # Write responses carry no "stats". This runs before the write returns, so keep the
+        # mirrored ones instead of refetching; the write moved updated_at past the sync cursor,
+        # so the next sync brings in fresh stats.
+        previous = ticket_store.get(change.id)
+        if previous is not None:
+            ticket = {**ticket, "stats": {field: previous.get(field) for field in STATS_FIELDS}}
+            if "description_text" not in ticket and previous.description_text is not None:
+                ticket["description_text"] = previous.description_text
+    # The sync cursor is left alone: other tickets may have changed in between.
+    ticket_store.upsert(ticket)
+
+changes.subscribe("ticket", _on_ticket_change)
+
+backlog = BacklogMonitor(ticket_store)
+
+async def _poll_backlog() -> Dict[str, Any]:
+    return await _sync_ticket_store(env_int("FRESHDESK_BACKLOG_POLL_PAGES", 10))
+
+async def _current_backlog() -> Optional[Dict[str, Any]]:
+    """Bring the backlog monitor up to date, or return an error when there are no tickets to report on."""
+    if not ticket_store.is_synced() and not ticket_store.restore():
+        return {
+            "error": "The local ticket store is empty; run sync_ticket_store first "
+                     "or set FRESHDESK_BACKLOG_POLL_INTERVAL"
+        }
+    if not backlog.running():
+        # Without the background poller, pull in recent changes first.
+        try:
+            await _sync_ticket_store(env_int("FRESHDESK_ANALYTICS_REFRESH_PAGES", 10))
+        except Exception as e:
+            logging.warning(f"Ticket store refresh failed, reporting on cached data: {e}")
+    backlog.ensure_current()
+    return None
+
+@tool(Lane.INTERACTIVE)
+async def get_sla_risk(
+    within_hours: float = 4,
+    group_id: Optional[int] = None,
+    agent_id: Optional[int] = None,
+    include_pending: bool = False,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """List unresolved tickets whose first response or resolution is overdue or due within within_hours.
+
+    Tickets come from the local ticket store, most urgent first. "breach" names
+    the SLA target and "minutes_left" turns negative once it is overdue.
+    Pending tickets are left out unless include_pending is set, as their SLA
+    clock is stopped.
+    """
+    error = await _current_backlog()
+    if error:
+        return error
+    tickets = backlog.sla_risk(
+        within_hours * 3600,
+        max(1, limit),
+        group_id=group_id,
+        agent_id=agent_id,
+        include_paused=include_pending,
+    )
+    return {"tickets": tickets, "synced_until": ticket_store.cursor}
+
+@tool(Lane.INTERACTIVE)
+async def get_backlog_summary() -> Dict[str, Any]:
+    """Summarize unresolved tickets from the local ticket store.
+
+    Returns counts by status, priority and group, overdue first responses and
+    resolutions, resolutions due within 1, 4 and 24 hours, and the oldest
+    unassigned tickets.
+    """
+    error = await _current_backlog()
+    if error:
+        return error
+    summary = backlog.summary()
+    statuses = {e.value: e.name.title() for e in TicketStatus}
+    priorities = {e.value: e.name.title() for e in TicketPriority}
+    summary["by_status"] = {statuses.get(k, str(k)): v for k, v in summary["by_status"].items()}
+    summary["by_priority"] = {priorities.get(k, str(k)): v for k, v in summary["by_priority"].items()}
+    summary["synced_until"] = ticket_store.cursor
+    summary["background_poll"] = backlog.running()
+    return summary
+
+@tool(Lane.BACKGROUND, timeout=600)
+async def sync_ticket_store(full: bool = False, max_pages: int = 100) -> Dict[str, Any]:
+    """Sync the local ticket store used by ticket_analytics.
+
+    Fetches tickets updated since the previous sync, 100 per page and at most
+    max_pages pages per call. Call again while "complete" is false.
+    """
+    if max_pages < 1:
+        return {"error": "max_pages must be greater than 0"}
+    try:
+        return await _sync_ticket_store(max_pages, full=full)
+    except httpx.HTTPStatusError as e:
+        return {"error": f"Failed to sync tickets: {str(e)}"}
+    except Exception as e:
+        return {"error": f"An unexpected error occurred: {str(e)}"}
+
+@tool(Lane.BACKGROUND, timeout=300)
+async def ticket_analytics(
+    report: str,
+    dimension: Optional[str] = None,
+    days: Optional[int] = 30,
+    statuses: Optional[List[int]] = None,
+    group_ids: Optional[List[int]] = None,
+    agent_ids: Optional[List[int]] = None,
+    company_ids: Optional[List[int]] = None,
+    limit: Optional[int] = 50,
+    refresh: bool = True,
+) -> Dict[str, Any]:
+    """Compute ticket aggregates from the local ticket store without paging the API.
+
+    Reports:
+    - counts: tickets per dimension (status, priority, source, group, agent,
+      company, requester, type or tag)
+    - created_vs_resolved: tickets created and resolved per day
+    - age: age percentiles in hours of unresolved tickets
+    - first_response_time, resolution_time: percentiles and histogram in hours
+
+    days limits counts and time distributions to tickets created in the last
+    days days (null for all time) and sets the created_vs_resolved window.
+    Run sync_ticket_store once first; refresh then pulls in recent changes.
+    """
+    try:
+        from . import analytics
+    except ImportError:
+        return {"error": "ticket_analytics requires NumPy: pip install 'freshdesk-mcp[analytics]'"}
+
+    if not ticket_store.is_synced() and not ticket_store.restore():
+        return {"error": "The local ticket store is empty; run sync_ticket_store first"}
+    if refresh:
+        try:
+            await _sync_ticket_store(env_int("FRESHDESK_ANALYTICS_REFRESH_PAGES", 10))
+        except Exception as e:
+            logging.warning(f"Ticket store refresh failed, reporting on cached data: {e}")
+
+    columns = ticket_store.cached_columns()
+    if columns is None:
+        version = ticket_store.version
+        columns = await asyncio.to_thread(analytics.TicketColumns.from_tickets, list(ticket_store))
+        ticket_store.cache_columns(columns, version)
+
+    labels = {
+        "status": {e.value: e.name.title() for e in TicketStatus},
+        "priority": {e.value: e.name.title() for e in TicketPriority},
+        "source": {e.value: e.name.title() for e in TicketSource},
+    }
+    try:
+        result = await asyncio.to_thread(
+            analytics.run_report,
+            columns,
+            report,
+            dimension=dimension,
+            days=days,
+            statuses=statuses,
+            group_ids=group_ids,
+            agent_ids=agent_ids,
+            company_ids=company_ids,
+            labels=labels,
+            limit=limit,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+    result["synced_until"] = ticket_store.cursor
+    return result
+
+# One similarity index per domain, built on first use (it needs NumPy).
+similarity_indexes: Dict[str, Any] = {}
+
+async def _first_conversation_text(ticket_id: int) -> str:
+    response = await _request("list_conversations", params={"per_page": 1}, ticket_id=ticket_id)
+    response.raise_for_status()
+    conversations = response.json()
+    return conversations[0].get("body_text") or "" if conversations else ""
+
+@tool(Lane.INTERACTIVE, timeout=120)
+async def find_similar_tickets(
+    ticket_id: Optional[int] = None,
+    text: Optional[str] = None,
+    limit: int = 10,
+    refresh: bool = True,
+) -> Dict[str, Any]:
+    """Find tickets in the local ticket store similar to a ticket or to a piece of text.
+
+    Tickets are ranked by the cosine similarity of the words in their subject
+    and description. Pass ticket_id to compare with that ticket's subject,
+    description and first conversation, or text to describe the problem.
+    Run sync_ticket_store once first; refresh then pulls in recent changes.
+    """
+    try:
+        from . import similarity
+    except ImportError:
+        return {"error": "find_similar_tickets requires NumPy: pip install 'freshdesk-mcp[analytics]'"}
+
+    if (ticket_id is None) == (not text):
+        return {"error": "Pass either ticket_id or text"}
+    if not ticket_store.is_synced() and not ticket_store.restore():
+        return {"error": "The local ticket store is empty; run sync_ticket_store first"}
+    if refresh:
+        try:
+            await _sync_ticket_store(env_int("FRESHDESK_ANALYTICS_REFRESH_PAGES", 10))
+        except Exception as e:
+            logging.warning(f"Ticket store refresh failed, searching cached data: {e}")
+
+    subject, body = None, text
+    if ticket_id is not None:
+        try:
+            response, first_conversation = await gather(
+                _request("get_ticket", ticket_id=ticket_id), _first_conversation_text(ticket_id)
+            )
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            return {"error": f"Failed to fetch ticket: {str(e)}"}
+        ticket = response.json()
+        subject = ticket.get("subject")
+        body = f"{ticket.get('description_text') or ''}\n{first_conversation}"
+
+    index = similarity_indexes.get(freshdesk_domain())
+    if index is None:
+        index = similarity_indexes[freshdesk_domain()] = similarity.SimilarityIndex()
+    async with index.lock:
+        if index.source_version != ticket_store.version:
+            # Hashing runs in a thread on a snapshot; the store keeps changing meanwhile.
+            await asyncio.to_thread(index.sync, list(ticket_store), ticket_store.version)
+        matches = await asyncio.to_thread(index.search, subject, body, max(1, limit), ticket_id)
+
+    results = []
+    for match_id, score in matches:
+        record = ticket_store.get(match_id)
+        if record is None:
+            continue
+        results.append({
+            "id": match_id,
+            "score": score,
+            **{field: record.get(field) for field in ("subject", "status", "priority", "group_id", "created_at")},
+        })
+    return {"results": results, "indexed": len(index), "synced_until": ticket_store.cursor}
+
+@mcp.prompt(name="create_ticket")
+def create_ticket_prompt(
     subject: str,
     description: str,
     source: str,
@@ -1160,9 +2136,19 @@ Notes:
 - Ensure the tone and style **match the prior replies**, and that the message provides **full context** so the recipient can understand the issue without needing to re-read earlier messages.
 """
 
-@mcp.tool()
-async def list_companies(page: Optional[int] = 1, per_page: Optional[int] = 30) -> Dict[str, Any]:
+@tool(Lane.INTERACTIVE)
+@_documents_fetch_all
+async def list_companies(
+    page: Optional[int] = 1,
+    per_page: Optional[int] = 30,
+    fetch_all: bool = False,
+) -> Dict[str, Any]:
     """List all companies in Freshdesk with pagination support."""
+    if fetch_all:
+        try:
+            return result_sets.create("companies", await _load_all_companies())
+        except RuntimeError as e:
+            return {"error": str(e)}
     # Validate input parameters
     if page < 1:
         return {"error": "Page number must be greater than 0"}
@@ -1170,122 +2156,220 @@ async def list_companies(page: Optional[int] = 1, per_page: Optional[int] = 30)
     if per_page < 1 or per_page > 100:
         return {"error": "Page size must be between 1 and 100"}
 
-    url = f"https://{freshdesk_domain()}/api/v2/companies"
-
     params = {
         "page": page,
         "per_page": per_page
     }
 
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}",
-        "Content-Type": "application/json"
-    }
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
+    try:
+        response = await _request("list_companies", params=params)
+        response.raise_for_status()
 
-            # Parse pagination from Link header
-            link_header = response.headers.get('Link', '')
-            pagination_info = parse_link_header(link_header)
+        # Parse pagination from Link header
+        link_header = response.headers.get('Link', '')
+        pagination_info = parse_link_header(link_header)
 
-            companies = response.json()
+        companies = response.json()
 
-            return {
-                "companies": companies,
-                "pagination": {
-                    "current_page": page,
-                    "next_page": pagination_info.get("next"),
-                    "prev_page": pagination_info.get("prev"),
-                    "per_page": per_page
-                }
+        return {
+            "companies": companies,
+            "pagination": {
+                "current_page": page,
+                "next_page": pagination_info.get("next"),
+                "prev_page": pagination_info.get("prev"),
+                "per_page": per_page
             }
+        }
 
-        except httpx.HTTPStatusError as e:
-            return {"error": f"Failed to fetch companies: {str(e)}"}
-        except Exception as e:
-            return {"error": f"An unexpected error occurred: {str(e)}"}
+    except httpx.HTTPStatusError as e:
+        return {"error": f"Failed to fetch companies: {str(e)}"}
+    except Exception as e:
+        return {"error": f"An unexpected error occurred: {str(e)}"}
+
+async def _load_all_companies() -> List[Dict[str, Any]]:
+    """Page through list_companies and return every company."""
+    companies: List[Dict[str, Any]] = []
+    page = 1
+    while page:
+        result = await list_companies(page=page, per_page=100)
+        if "error" in result or not isinstance(result.get("companies"), list):
+            raise RuntimeError(result.get("error") or "Unexpected response from list_companies")
+        companies.extend(result["companies"])
+        next_page = result["pagination"]["next_page"]
+        page = next_page if next_page and next_page > page else None
+    return companies
+
+async def _load_companies_updated_since(since: datetime) -> Optional[List[Dict[str, Any]]]:
+    """Return companies updated since ``since`` using the company search API.
+
+    Returns None when there are more changes than the search API can page
+    through, in which case the directory falls back to a full reload.
+    """
+    # Search filters by day only, so look one extra day back.
+    day = (since - timedelta(days=1)).strftime("%Y-%m-%d")
+    params = {"query": f"\"updated_at:>'{day}'\""}
+
+    companies: List[Dict[str, Any]] = []
+    for page in range(1, SEARCH_MAX_PAGES + 1):
+        response = await _request("search_companies", params={**params, "page": page})
+        response.raise_for_status()
+        data = response.json()
+        total = data.get("total", 0)
+        if total > SEARCH_PAGE_SIZE * SEARCH_MAX_PAGES:
+            return None
+        results = data.get("results", [])
+        companies.extend(results)
+        if not results or len(companies) >= total:
+            break
+    return companies
+
+company_directory = CompanyDirectory(
+    "companies",
+    _load_all_companies,
+    freshdesk_domain,
+    ttl_env="FRESHDESK_COMPANY_CACHE_TTL",
+    default_ttl=900,
+    load_since=_load_companies_updated_since,
+)
+
+async def _lookup_companies(name: str, action: str) -> Dict[str, Any]:
+    """Resolve company names from the local directory, falling back to autocomplete."""
+    if await company_directory.ensure_loaded():
+        return {
+            "companies": [
+                {"id": company["id"], "name": company.get("name")}
+                for company in company_directory.lookup(name)
+            ]
+        }
 
-@mcp.tool()
+    # Use the name parameter as specified in the API
+    params = {"name": name}
+
+    try:
+        response = await _request("autocomplete_companies", params=params)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        return {"error": f"Failed to {action}: {str(e)}"}
+    except Exception as e:
+        return {"error": f"An unexpected error occurred: {str(e)}"}
+
+@tool(Lane.INTERACTIVE)
 async def view_company(company_id: int) -> Dict[str, Any]:
     """Get a company in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/companies/{company_id}"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}",
-        "Content-Type": "application/json"
-    }
+    cached = company_directory.get(company_id)
+    if cached is not None:
+        return cached
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            return {"error": f"Failed to fetch company: {str(e)}"}
-        except Exception as e:
-            return {"error": f"An unexpected error occurred: {str(e)}"}
+    try:
+        response = await _request("view_company", company_id=company_id)
+        response.raise_for_status()
+        company = response.json()
+        if company_directory.is_loaded():
+            company_directory.upsert(company)
+        return company
+    except httpx.HTTPStatusError as e:
+        return {"error": f"Failed to fetch company: {str(e)}"}
+    except Exception as e:
+        return {"error": f"An unexpected error occurred: {str(e)}"}
+
+async def _on_company_change(change: Change) -> None:
+    """Replace or drop a company in the directory after a change notification."""
+    if not company_directory.is_loaded():
+        return
+    company_directory.remove(change.id)
+    if change.deleted:
+        return
+    if change.record is not None:
+        company_directory.upsert(change.record)
+    else:
+        # view_company refetches and re-indexes the company.
+        with use_lane(Lane.BACKGROUND):
+            await view_company(change.id)
+
+changes.subscribe("company", _on_company_change)
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def search_companies(query: str) -> Dict[str, Any]:
     """Search for companies in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/companies/autocomplete"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}",
-        "Content-Type": "application/json"
-    }
-    # Use the name parameter as specified in the API
-    params = {"name": query}
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            return {"error": f"Failed to search companies: {str(e)}"}
-        except Exception as e:
-            return {"error": f"An unexpected error occurred: {str(e)}"}
+    return await _lookup_companies(query, "search companies")
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def find_company_by_name(name: str) -> Dict[str, Any]:
     """Find a company by name in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/companies/autocomplete"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}",
-        "Content-Type": "application/json"
-    }
-    params = {"name": name}
+    return await _lookup_companies(name, "find company")
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            return {"error": f"Failed to find company: {str(e)}"}
-        except Exception as e:
-            return {"error": f"An unexpected error occurred: {str(e)}"}
+@tool(Lane.BACKGROUND, timeout=300)
+async def refresh_company_directory(full: bool = False) -> Dict[str, Any]:
+    """Refresh the local company directory used for company name lookups."""
+    try:
+        count = await company_directory.refresh(full=full)
+    except Exception as e:
+        return {"error": f"Failed to refresh company directory: {str(e)}"}
+    return {"success": True, "companies": count}
 
-@mcp.tool()
+@tool(Lane.INTERACTIVE)
 async def list_company_fields() -> List[Dict[str, Any]]:
     """List all company fields in Freshdesk."""
-    url = f"https://{freshdesk_domain()}/api/v2/company_fields"
-    headers = {
-        "Authorization": f"Basic {base64.b64encode(f'{freshdesk_api_key()}:X'.encode()).decode()}",
-        "Content-Type": "application/json"
-    }
+    try:
+        response = await _request("list_company_fields")
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        return {"error": f"Failed to fetch company fields: {str(e)}"}
+    except Exception as e:
+        return {"error": f"An unexpected error occurred: {str(e)}"}
+
+DEFAULT_BATCH_CALLS = 20
+
+async def _batch_entry(entry: Any) -> Dict[str, Any]:
+    """Run one batch entry, turning every failure into an error result."""
+    if not isinstance(entry, dict) or not isinstance(entry.get("tool"), str):
+        return {"tool": None, "ok": False, "error": "Each call needs a tool name and an arguments object"}
+    name = entry["tool"]
+    arguments = entry.get("arguments") or {}
+    if name == "batch":
+        return {"tool": name, "ok": False, "error": "batch cannot be called from a batch"}
+    if not isinstance(arguments, dict):
+        return {"tool": name, "ok": False, "error": "arguments must be an object"}
+    if name not in _tools:
+        return {"tool": name, "ok": False, "error": f"Unknown tool: {name}"}
+    try:
+        # Arguments are checked against the tool's signature, as for a direct call,
+        # and each tool still runs in its own lane and under its own deadline.
+        result = await validate_call(_tools[name])(**arguments)
+    except Exception as e:
+        return {"tool": name, "ok": False, "error": str(e)}
+    # Tools report failures as {"error": ...} or an "Error..." string; endpoint tools
+    # as an unsuccessful status summary.
+    if isinstance(result, str):
+        failed = result.startswith(("Error", "Validation Error"))
+    else:
+        failed = isinstance(result, dict) and (bool(result.get("error")) or result.get("success") is False)
+    return {"tool": name, "ok": not failed, "result": result}
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            return {"error": f"Failed to fetch company fields: {str(e)}"}
-        except Exception as e:
-            return {"error": f"An unexpected error occurred: {str(e)}"}
+@tool(Lane.INTERACTIVE, timeout=300)
+async def batch(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run several independent tool calls concurrently in one round trip.
+
+    Each call is {"tool": name, "arguments": {...}}. Calls cannot use each
+    other's results. Results come back in call order, each with ok and either
+    result or error; one failing call does not affect the others.
+    """
+    if not calls:
+        return {"error": "No calls provided"}
+    most = max(1, env_int("FRESHDESK_BATCH_MAX_CALLS", DEFAULT_BATCH_CALLS))
+    if len(calls) > most:
+        return {"error": f"At most {most} calls per batch (FRESHDESK_BATCH_MAX_CALLS)"}
+
+    results = await gather(
+        *(_batch_entry(entry) for entry in calls),
+        limit=max(1, env_int("FRESHDESK_FANOUT_CONCURRENCY", 8)),
+    )
+    return {
+        "results": [{"index": index, **result} for index, result in enumerate(results)],
+        "failed": sum(1 for result in results if not result["ok"]),
+    }
 
 @mcp.prompt()
 async def search_tickets_help() -> str:
@@ -1343,9 +2427,71 @@ async def search_tickets_help() -> str:
     - 'Refund'
     """
 
+def reset_caches() -> None:
+    """Drop every in-process cache, e.g. between tests or after switching accounts."""
+    company_directory.reset()
+    agent_directory.reset()
+    group_directory.reset()
+    contact_directory.reset()
+    canned_library.reset()
+    ticket_store.reset()
+    backlog.stop()
+    backlog.reset()
+    similarity_indexes.clear()
+    outbox.stop()
+    lane_controller.reset()
+    response_cache.clear()
+    search_cache.clear()
+    entity_cache.clear()
+    ticket_validators.clear()
+    request_metrics.reset()
+    result_sets.clear()
+    # Pooled clients belong to their event loop; tests run each on a new loop.
+    _api_clients.clear()
+    cassettes.reset()
+    tracer.reset()
+
+MCP_TRANSPORTS = ("stdio", "sse", "streamable-http")
+
+def _mcp_transport() -> str:
+    """MCP transport from FRESHDESK_MCP_TRANSPORT, configuring host and port for network ones."""
+    transport = (env_str("FRESHDESK_MCP_TRANSPORT") or "stdio").lower()
+    if transport not in MCP_TRANSPORTS:
+        logging.error(f"Unknown FRESHDESK_MCP_TRANSPORT {transport!r}; using stdio")
+        return "stdio"
+    if transport != "stdio":
+        mcp.settings.host = env_str("FRESHDESK_MCP_HOST", "127.0.0.1")
+        mcp.settings.port = env_int("FRESHDESK_MCP_PORT", 8000)
+    return transport
+
+async def _run_with_webhooks(transport: str, host: str, port: int, secret: str) -> None:
+    """Serve MCP alongside the webhook receiver; stop both when the MCP transport closes."""
+    from . import webhook
+
+    run = {
+        "stdio": mcp.run_stdio_async,
+        "sse": mcp.run_sse_async,
+        "streamable-http": mcp.run_streamable_http_async,
+    }[transport]
+    app = webhook.create_app(changes, secret)
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(webhook.serve, app, host, port)
+        logging.info(f"Listening for Freshdesk webhooks on http://{host}:{port}{webhook.WEBHOOK_PATH}")
+        await run()
+        tg.cancel_scope.cancel()
+
 def main():
     logging.info("Starting Freshdesk MCP server")
-    mcp.run(transport='stdio')
+    transport = _mcp_transport()
+    port = env_int("FRESHDESK_WEBHOOK_PORT", 0)
+    if port:
+        secret = env_str("FRESHDESK_WEBHOOK_SECRET")
+        if secret:
+            host = env_str("FRESHDESK_WEBHOOK_HOST", "127.0.0.1")
+            anyio.run(_run_with_webhooks, transport, host, port, secret)
+            return
+        logging.error("FRESHDESK_WEBHOOK_PORT is set without FRESHDESK_WEBHOOK_SECRET; webhooks are disabled")
+    mcp.run(transport=transport)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,202 @@
+"""Similar-ticket lookup with a hashed TF-IDF index over the local ticket store.
+
+Each ticket's subject and plain-text description are split into words and
+adjacent word pairs, which are hashed into FRESHDESK_SIMILAR_FEATURES buckets
+(default 2**18), so there is no vocabulary to grow or rebuild. Term weights
+are kept per ticket: a changed ticket is re-hashed on its own and document
+frequencies are adjusted in place. For queries the index is packed into flat
+NumPy arrays sorted by bucket, so a query only reads the postings of its own
+terms. Tickets changed since the last packing are scored one by one until
+they make up a tenth of the index, which is then packed again. Requires the
+``analytics`` extra (``pip install 'freshdesk-mcp[analytics]'``).
+"""
+
+import asyncio
+import re
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .config import env_int
+
+DEFAULT_FEATURES = 1 << 18
+
+# Changed tickets scored one by one before the index is packed again.
+MIN_REPACK = 1000
+REPACK_FRACTION = 0.1
+
+# A subject word counts as much as this many occurrences in the description.
+SUBJECT_WEIGHT = 2.0
+
+# Words too common in support mail to say anything about a ticket.
+STOP_WORDS = frozenset("""
+    a an and are as at be been but by can could do for from has have hello hi how i if in is it its me my no
+    not of on or our please regards so thank thanks that the their there this to was we were what when will
+    with would you your
+""".split())
+
+_WORD = re.compile(r"[^\W_]{2,}")
+
+Vector = Tuple[np.ndarray, np.ndarray]
+
+
+def terms(text: Optional[str]) -> List[str]:
+    """Words and adjacent word pairs of ``text``, lower-cased and without stop words."""
+
+    words = [word for word in _WORD.findall((text or "").casefold()) if word not in STOP_WORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+class SimilarityIndex:
+    """TF-IDF vectors of tickets in hashed feature space, searched by cosine similarity.
+
+    Args:
+        features: Number of hash buckets (default FRESHDESK_SIMILAR_FEATURES)
+    """
+
+    def __init__(self, features: Optional[int] = None) -> None:
+        self.features = features or max(1024, env_int("FRESHDESK_SIMILAR_FEATURES", DEFAULT_FEATURES))
+        self.lock = asyncio.Lock()
+        self._vectors: Dict[int, Vector] = {}
+        self._stamps: Dict[int, Any] = {}
+        self._df = np.zeros(self.features, dtype=np.int32)
+        self._packed: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+        # Tickets added, changed or removed since the index was packed.
+        self._pending: Set[int] = set()
+        # TicketStore.version the index was last synced with.
+        self.source_version: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def vectorize(self, subject: Optional[str], body: Optional[str]) -> Vector:
+        """Hashed term frequencies of a text, as sorted bucket ids and sublinear weights."""
+
+        counts: Dict[int, float] = {}
+        for weight, text in ((SUBJECT_WEIGHT, subject), (1.0, body)):
+            for term in terms(text):
+                bucket = zlib.crc32(term.encode("utf-8")) % self.features
+                counts[bucket] = counts.get(bucket, 0.0) + weight
+        ordered = sorted(counts)
+        weights = 1.0 + np.log(np.array([counts[bucket] for bucket in ordered], dtype=np.float32))
+        return np.array(ordered, dtype=np.int32), weights.astype(np.float32)
+
+    def add(self, ticket_id: int, subject: Optional[str], body: Optional[str], stamp: Any = None) -> None:
+        self.remove(ticket_id)
+        vector = self.vectorize(subject, body)
+        if not len(vector[0]):
+            return
+        self._vectors[ticket_id] = vector
+        self._stamps[ticket_id] = stamp
+        self._df[vector[0]] += 1
+        self._pending.add(ticket_id)
+
+    def remove(self, ticket_id: int) -> None:
+        vector = self._vectors.pop(ticket_id, None)
+        self._stamps.pop(ticket_id, None)
+        if vector is not None:
+            self._df[vector[0]] -= 1
+            self._pending.add(ticket_id)
+
+    def sync(self, records: Iterable[Any], version: Optional[int] = None) -> int:
+        """Bring the index in line with ``records``, re-hashing only changed tickets.
+
+        Args:
+            records: Every ticket, as :class:`~.records.TicketRecord` objects
+            version: The ticket store version the records were taken at
+
+        Returns:
+            The number of tickets added, changed or removed
+        """
+
+        changed = 0
+        seen = set()
+        for record in records:
+            seen.add(record.id)
+            if record.id in self._stamps and self._stamps[record.id] == record.updated_at:
+                continue
+            self.add(record.id, record.subject, record.description_text, record.updated_at)
+            changed += 1
+        for ticket_id in [ticket_id for ticket_id in self._stamps if ticket_id not in seen]:
+            self.remove(ticket_id)
+            changed += 1
+        self.source_version = version
+        return changed
+
+    def _idf(self) -> np.ndarray:
+        total = len(self._vectors)
+        return (np.log((1.0 + total) / (1.0 + self._df)) + 1.0).astype(np.float32)
+
+    def _pack(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """The index as arrays sorted by bucket, so a query reads only its own buckets' postings.
+
+        Returns ticket ids, the row of each posting, its TF-IDF weight, where
+        each bucket's postings start and the norm of each row.
+        """
+
+        if self._packed is None or len(self._pending) > max(MIN_REPACK, REPACK_FRACTION * len(self._vectors)):
+            self._pending = set()
+            ids = np.fromiter(self._vectors, dtype=np.int64, count=len(self._vectors))
+            vectors = list(self._vectors.values())
+            lengths = np.fromiter((len(buckets) for buckets, _ in vectors), dtype=np.int64, count=len(vectors))
+            rows = np.repeat(np.arange(len(vectors)), lengths)
+            if vectors:
+                buckets = np.concatenate([buckets for buckets, _ in vectors])
+                weights = np.concatenate([weights for _, weights in vectors]) * self._idf()[buckets]
+            else:
+                buckets = np.zeros(0, dtype=np.int32)
+                weights = np.zeros(0, dtype=np.float32)
+            norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=len(vectors)))
+            order = np.argsort(buckets, kind="stable")
+            starts = np.searchsorted(buckets[order], np.arange(self.features + 1))
+            self._packed = (ids, rows[order], weights[order], starts, norms)
+        return self._packed
+
+    def search(
+        self, subject: Optional[str], body: Optional[str], limit: int = 10, exclude: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Up to ``limit`` ``(ticket id, cosine similarity)`` pairs, most similar first."""
+
+        query_buckets, query_weights = self.vectorize(subject, body)
+        if not len(query_buckets) or not self._vectors:
+            return []
+        ids, rows, weights, starts, norms = self._pack()
+        idf = self._idf()
+        query_weights = query_weights * idf[query_buckets]
+        query_norm = float(np.linalg.norm(query_weights))
+
+        begin, end = starts[query_buckets], starts[query_buckets + 1]
+        postings = np.concatenate([np.arange(b, e) for b, e in zip(begin.tolist(), end.tolist())])
+        # Each posting is multiplied by the query weight of its bucket.
+        factors = np.repeat(query_weights, end - begin)
+        dots = np.bincount(rows[postings], weights=weights[postings] * factors, minlength=len(ids))
+        scores = np.divide(dots, norms * query_norm, out=np.zeros(len(ids)), where=norms > 0)
+        # Packed rows of pending tickets are out of date; those still indexed are scored below.
+        stale = set(self._pending)
+        if exclude is not None:
+            stale.add(exclude)
+        if stale:
+            scores[np.isin(ids, np.fromiter(stale, dtype=np.int64, count=len(stale)))] = 0.0
+
+        found = [(int(ids[i]), float(scores[i])) for i in self._top(scores, limit)]
+        for ticket_id in self._pending:
+            vector = self._vectors.get(ticket_id)
+            if vector is None or ticket_id == exclude:
+                continue
+            buckets, tf = vector
+            doc_weights = tf * idf[buckets]
+            _, in_doc, in_query = np.intersect1d(buckets, query_buckets, assume_unique=True, return_indices=True)
+            dot = float(np.dot(doc_weights[in_doc], query_weights[in_query]))
+            if dot > 0:
+                found.append((ticket_id, dot / (float(np.linalg.norm(doc_weights)) * query_norm)))
+        found.sort(key=lambda match: -match[1])
+        return [(ticket_id, round(score, 4)) for ticket_id, score in found[:limit]]
+
+    @staticmethod
+    def _top(scores: np.ndarray, limit: int) -> np.ndarray:
+        count = min(limit, int(np.count_nonzero(scores > 0)))
+        if count <= 0:
+            return np.zeros(0, dtype=np.int64)
+        top = np.argpartition(-scores, count - 1)[:count]
+        return top[np.argsort(-scores[top], kind="stable")]
@@ -0,0 +1,163 @@
+"""Local mirror of Freshdesk tickets.
+
+The store keeps a trimmed copy of every ticket seen by an incremental
+``updated_since`` sync, so reports and triage views can run over the whole
+helpdesk without paging through the API on every question.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .config import env_str
+from .records import TicketRecord
+
+
+class TicketStore:
+    """In-memory ticket mirror with an ``updated_at`` sync cursor.
+
+    Tickets are held as compact :class:`~.records.TicketRecord` objects.
+
+    Args:
+        domain: Callable returning the Freshdesk domain the tickets belong to
+    """
+
+    def __init__(self, domain: Callable[[], str]) -> None:
+        self._domain = domain
+        self._listeners: List[Callable[[int, Optional[TicketRecord]], None]] = []
+        self.reset()
+
+    def subscribe(self, listener: Callable[[int, Optional[TicketRecord]], None]) -> None:
+        """Call ``listener(ticket_id, record)`` after every upsert, with None after a removal.
+
+        Resets and restores are not reported; they bump :attr:`generation` instead.
+        """
+
+        self._listeners.append(listener)
+
+    def reset(self) -> None:
+        """Forget every ticket and the sync cursor."""
+
+        self._tickets: Dict[int, TicketRecord] = {}
+        self._loaded_domain: Optional[str] = None
+        self._synced = False
+        self.cursor: Optional[str] = None
+        # Keeps counting across resets, so caches derived from an old version never look current.
+        self.version = getattr(self, "version", -1) + 1
+        self.generation = getattr(self, "generation", -1) + 1
+        self._columns: Any = None
+        self._columns_version = -1
+
+    def is_synced(self) -> bool:
+        """True once a sync has completed for the current domain."""
+
+        return self._synced and self._loaded_domain == self._domain()
+
+    def mark_synced(self) -> None:
+        self._loaded_domain = self._domain()
+        self._synced = True
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+    def __iter__(self) -> Iterator[TicketRecord]:
+        return iter(self._tickets.values())
+
+    def get(self, ticket_id: int) -> Optional[TicketRecord]:
+        return self._tickets.get(ticket_id)
+
+    def upsert(self, ticket: Dict[str, Any]) -> None:
+        """Insert or replace a ticket from an API payload."""
+
+        if not isinstance(ticket, dict) or ticket.get("id") is None:
+            return
+        if self._loaded_domain != self._domain():
+            self.reset()
+            self._loaded_domain = self._domain()
+        record = self._tickets[ticket["id"]] = TicketRecord.from_api(ticket)
+        self.version += 1
+        for listener in self._listeners:
+            listener(record.id, record)
+
+    def upsert_many(self, tickets: Iterable[Dict[str, Any]]) -> None:
+        for ticket in tickets:
+            self.upsert(ticket)
+
+    def remove(self, ticket_id: int) -> None:
+        if self._tickets.pop(ticket_id, None) is not None:
+            self.version += 1
+            for listener in self._listeners:
+                listener(ticket_id, None)
+
+    def advance(self, updated_at: Optional[str]) -> None:
+        """Move the sync cursor forward to ``updated_at`` (ISO-8601, UTC)."""
+
+        if updated_at and (self.cursor is None or updated_at > self.cursor):
+            self.cursor = updated_at
+
+    def cached_columns(self) -> Any:
+        """Return the columnar snapshot built for the current version, if any."""
+
+        if self._columns_version == self.version:
+            return self._columns
+        return None
+
+    def cache_columns(self, columns: Any, version: int) -> None:
+        """Remember a columnar snapshot built from the store at ``version``."""
+
+        self._columns = columns
+        self._columns_version = version
+
+    # -- optional on-disk copy -----------------------------------------
+
+    def _cache_path(self) -> Optional[str]:
+        cache_dir = env_str("FRESHDESK_CACHE_DIR")
+        domain = self._domain()
+        if not cache_dir or not domain:
+            return None
+        return os.path.join(cache_dir, f"tickets-{domain}.jsonl")
+
+    def persist(self) -> None:
+        """Write the mirror as JSON lines: a header with the cursor, then tickets."""
+
+        path = self._cache_path()
+        if path is None or not self.is_synced():
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                fh.write(json.dumps({"domain": self._loaded_domain, "cursor": self.cursor}) + "\n")
+                for ticket in self._tickets.values():
+                    fh.write(json.dumps(ticket.to_dict()) + "\n")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write ticket store: {e}")
+
+    def restore(self) -> bool:
+        """Load a persisted mirror for the current domain, if there is one."""
+
+        path = self._cache_path()
+        if path is None or not os.path.exists(path):
+            return False
+        try:
+            with open(path, encoding="utf-8") as fh:
+                header = json.loads(fh.readline())
+                if header.get("domain") != self._domain():
+                    return False
+                tickets = {}
+                for line in fh:
+                    ticket = TicketRecord(**json.loads(line))
+                    tickets[ticket.id] = ticket
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable ticket store: {e}")
+            return False
+
+        self.reset()
+        self._tickets = tickets
+        self._loaded_domain = header["domain"]
+        self._synced = True
+        self.cursor = header.get("cursor")
+        self.version += 1
+        return True
@@ -0,0 +1,287 @@
+"""Local validation of ticket payloads against the account's ``/ticket_fields``.
+
+Freshdesk rejects a ticket write with a 400 when a required field is missing,
+a dropdown value is not one of its choices, a nested field's levels do not
+belong together or a custom field has the wrong type. :func:`compile_ticket_fields`
+turns the ticket field schema into a :class:`TicketValidator` of per-field
+checks with frozenset choices, so ``create_ticket`` and ``update_ticket``
+report those errors, in the shape Freshdesk uses, before any request is sent.
+
+:class:`ValidatorCache` keeps the compiled validator for
+FRESHDESK_TICKET_FIELDS_TTL seconds (default 3600). When the schema cannot be
+loaded the write goes ahead unvalidated and Freshdesk has the last word.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from .config import env_float
+
+DEFAULT_TTL = 3600.0
+
+# Payload key of each default ticket field; "requester" is checked by create_ticket itself.
+DEFAULT_FIELD_KEYS = {
+    "requester": None,
+    "subject": "subject",
+    "description": "description",
+    "ticket_type": "type",
+    "source": "source",
+    "status": "status",
+    "priority": "priority",
+    "group": "group_id",
+    "agent": "responder_id",
+    "product": "product_id",
+    "company": "company_id",
+}
+# Statuses that need the fields marked required_for_closure.
+CLOSING_STATUSES = frozenset({4, 5})
+
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+Check = Callable[[Any], Optional[str]]
+Error = Dict[str, str]
+
+
+def _error(field: str, message: str, code: str = "invalid_value") -> Error:
+    return {"field": field, "message": message, "code": code}
+
+
+def _choice_values(choices: Any) -> FrozenSet[Any]:
+    """Accepted values of a field's ``choices`` in any of the shapes Freshdesk uses."""
+
+    if isinstance(choices, list):
+        return frozenset(choices)
+    if not isinstance(choices, dict):
+        return frozenset()
+    values = list(choices.values())
+    # priority/source/agent/group: {"Low": 1}; status: {"2": ["Open", "Open"]}.
+    if values and all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+        return frozenset(values)
+    return frozenset(int(key) if key.isdigit() else key for key in choices)
+
+
+def _choice_check(allowed: FrozenSet[Any]) -> Check:
+    shown = ", ".join(sorted(map(str, allowed)))
+
+    def check(value: Any) -> Optional[str]:
+        if value in allowed:
+            return None
+        return f"It should be one of these values: {shown}"
+
+    return check
+
+
+def _type_check(field_type: str) -> Optional[Check]:
+    if field_type == "custom_checkbox":
+        return lambda value: None if isinstance(value, bool) else "Value must be true or false"
+    if field_type == "custom_number":
+        return lambda value: (
+            None if isinstance(value, int) and not isinstance(value, bool) else "Value must be an integer"
+        )
+    if field_type == "custom_decimal":
+        def decimal(value: Any) -> Optional[str]:
+            if isinstance(value, bool):
+                return "Value must be a number"
+            if isinstance(value, (int, float)):
+                return None
+            try:
+                float(value)
+            except (TypeError, ValueError):
+                return "Value must be a number"
+            return None
+
+        return decimal
+    if field_type == "custom_date":
+        return lambda value: (
+            None if isinstance(value, str) and _DATE.fullmatch(value) else "Value must be a date (YYYY-MM-DD)"
+        )
+    if field_type in ("custom_text", "custom_paragraph"):
+        return lambda value: None if isinstance(value, str) else "Value must be a string"
+    return None
+
+
+class _Nested:
+    """A nested (dependent) dropdown: the levels' names and the choice tree."""
+
+    __slots__ = ("names", "tree")
+
+    def __init__(self, names: Tuple[str, ...], tree: Dict[str, Any]) -> None:
+        self.names = names
+        self.tree = tree
+
+    def errors(self, values: Dict[str, Any]) -> List[Error]:
+        options: Any = self.tree
+        for depth, name in enumerate(self.names):
+            value = values.get(name)
+            if value is None:
+                # A lower level is meaningless without the level above it.
+                deeper = [lower for lower in self.names[depth + 1:] if values.get(lower) is not None]
+                if deeper:
+                    return [_error(deeper[0], f"{name} must be set before {deeper[0]}", "missing_field")]
+                return []
+            allowed = options if isinstance(options, (list, tuple)) else list(options or {})
+            if value not in allowed:
+                parent = f" for {self.names[depth - 1]} {values[self.names[depth - 1]]!r}" if depth else ""
+                return [_error(name, f"It should be one of these values{parent}: {', '.join(map(str, allowed))}")]
+            options = options.get(value) if isinstance(options, dict) else None
+        return []
+
+
+class TicketValidator:
+    """Checks compiled from one ticket field schema; see :func:`compile_ticket_fields`."""
+
+    def __init__(self) -> None:
+        self.checks: Dict[str, Check] = {}
+        self.custom_checks: Dict[str, Check] = {}
+        self.custom_names: FrozenSet[str] = frozenset()
+        self.required: List[Tuple[str, bool]] = []
+        self.required_for_closure: List[Tuple[str, bool]] = []
+        self.nested: List[_Nested] = []
+
+    def errors(self, payload: Dict[str, Any], creating: bool) -> List[Error]:
+        """Errors Freshdesk would report for ``payload``, as ``{field, message, code}`` dicts.
+
+        Args:
+            payload: The JSON body of the create or update request
+            creating: True for a new ticket, where required fields must be present
+        """
+
+        errors: List[Error] = []
+        custom = payload.get("custom_fields") or {}
+        if not isinstance(custom, dict):
+            return [_error("custom_fields", "Value must be an object", "datatype_mismatch")]
+
+        for key, value in payload.items():
+            check = self.checks.get(key)
+            if check is not None and value is not None:
+                message = check(value)
+                if message:
+                    errors.append(_error(key, message))
+        for name, value in custom.items():
+            if name not in self.custom_names:
+                errors.append(_error(name, "Unexpected/invalid field in request", "invalid_field"))
+                continue
+            check = self.custom_checks.get(name)
+            if check is not None and value is not None:
+                message = check(value)
+                if message:
+                    errors.append(_error(name, message))
+        for nested in self.nested:
+            errors.extend(nested.errors(custom))
+
+        required = list(self.required) if creating else []
+        if creating and payload.get("status") in CLOSING_STATUSES:
+            required.extend(self.required_for_closure)
+        for key, is_custom in required:
+            value = (custom if is_custom else payload).get(key)
+            if value is None or value == "":
+                errors.append(_error(key, "It should not be blank as this is a mandatory field", "missing_field"))
+        return errors
+
+
+def compile_ticket_fields(
+    fields: List[Dict[str, Any]], defaults: Optional[Dict[str, FrozenSet[Any]]] = None
+) -> TicketValidator:
+    """Build a validator from the ``/ticket_fields`` response.
+
+    Args:
+        fields: Ticket fields as returned by the API
+        defaults: Accepted values for payload keys the schema does not describe,
+            e.g. the built-in statuses
+    """
+
+    validator = TicketValidator()
+    for key, allowed in (defaults or {}).items():
+        validator.checks[key] = _choice_check(allowed)
+    custom_names = set()
+
+    for field in fields:
+        name = field.get("name")
+        if not name:
+            continue
+        field_type = field.get("type") or ""
+        is_default = field.get("default", field_type.startswith("default_") or name in DEFAULT_FIELD_KEYS)
+        # Default fields without a known payload key (e.g. internal_agent) are left to Freshdesk.
+        key = DEFAULT_FIELD_KEYS.get(name) if is_default else name
+        if key is None:
+            continue
+        if not is_default:
+            custom_names.add(name)
+
+        checks = validator.checks if is_default else validator.custom_checks
+        if field_type == "nested_field" and isinstance(field.get("choices"), dict):
+            levels = sorted(field.get("nested_ticket_fields") or [], key=lambda level: level.get("level", 0))
+            names = (name, *(level["name"] for level in levels if level.get("name")))
+            custom_names.update(names)
+            validator.nested.append(_Nested(names, field["choices"]))
+        elif field.get("choices"):
+            checks[key] = _choice_check(_choice_values(field["choices"]))
+        else:
+            check = _type_check(field_type)
+            if check is not None:
+                checks[key] = check
+
+        if field.get("required_for_agents"):
+            validator.required.append((key, not is_default))
+        elif field.get("required_for_closure"):
+            validator.required_for_closure.append((key, not is_default))
+
+    validator.custom_names = frozenset(custom_names)
+    return validator
+
+
+class ValidatorCache:
+    """The compiled validator for the current domain, reloaded after a TTL.
+
+    Args:
+        load: Coroutine returning the ``/ticket_fields`` response
+        domain: Callable returning the Freshdesk domain
+        defaults: Passed to :func:`compile_ticket_fields`
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], Awaitable[List[Dict[str, Any]]]],
+        domain: Callable[[], str],
+        defaults: Optional[Dict[str, FrozenSet[Any]]] = None,
+    ) -> None:
+        self._load = load
+        self._domain = domain
+        self._defaults = defaults
+        self._lock = asyncio.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        self._validator: Optional[TicketValidator] = None
+        self._domain_loaded: Optional[str] = None
+        self._expires_at = 0.0
+
+    def on_change(self, change: Any) -> None:
+        """Change feed handler: a ticket field changed, so recompile on next use."""
+
+        self.clear()
+
+    async def get(self) -> Optional[TicketValidator]:
+        """The validator, or None when the schema cannot be loaded."""
+
+        domain = self._domain()
+        if self._validator is not None and self._domain_loaded == domain and time.monotonic() < self._expires_at:
+            return self._validator
+        async with self._lock:
+            if self._validator is not None and self._domain_loaded == domain and time.monotonic() < self._expires_at:
+                return self._validator
+            try:
+                fields = await self._load()
+            except Exception as e:
+                logging.warning(f"Could not load ticket fields; sending ticket unvalidated: {e}")
+                return None
+            if not isinstance(fields, list):
+                logging.warning("Unexpected /ticket_fields response; sending ticket unvalidated")
+                return None
+            self._validator = compile_ticket_fields(fields, self._defaults)
+            self._domain_loaded = domain
+            self._expires_at = time.monotonic() + env_float("FRESHDESK_TICKET_FIELDS_TTL", DEFAULT_TTL)
+            return self._validator
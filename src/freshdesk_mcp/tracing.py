@@ -0,0 +1,280 @@
+"""Tracing spans for tool calls, Freshdesk requests, cache lookups and fan-outs.
+
+Set ``FRESHDESK_TRACING`` to ``console``, ``file`` or ``console,file``. Every
+tool call then starts a trace; the requests it makes (one span per call and
+one per HTTP attempt, so retries are visible), the cache lookups in front of
+them and each :func:`~.deadlines.gather` fan-out become child spans. The
+current span lives in a context variable, so tasks started by a fan-out
+inherit it.
+
+``console`` prints each finished trace as an indented tree to stderr (stdout
+carries the MCP protocol). ``file`` appends each finished trace to
+``FRESHDESK_TRACE_FILE`` as one line of OTLP/JSON, the format of the
+OpenTelemetry Collector's ``otlpjsonfile`` receiver, so traces can be
+forwarded to Jaeger, Tempo or any other OpenTelemetry backend. Ids, span
+fields and attribute names follow OpenTelemetry conventions.
+
+A trace holds at most ``FRESHDESK_TRACE_MAX_SPANS`` spans (default 2000);
+further spans are counted on the root span and dropped.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import env_int, env_str
+
+CONSOLE = "console"
+FILE = "file"
+EXPORTERS = (CONSOLE, FILE)
+DEFAULT_MAX_SPANS = 2000
+
+# OTLP status codes.
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+SERVICE_NAME = "freshdesk-mcp"
+
+
+class Span:
+    """One timed operation; attributes are plain strings, numbers and booleans."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes",
+                 "status", "status_message", "root")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.root: "Span" = parent.root if parent is not None else self
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = {k: v for k, v in (attributes or {}).items() if v is not None}
+        self.status = STATUS_UNSET
+        self.status_message = ""
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.attributes["exception.type"] = type(exc).__name__
+        self.attributes["exception.message"] = str(exc)
+        self.set_error(f"{type(exc).__name__}: {exc}")
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is off."""
+
+    __slots__ = ()
+    trace_id = span_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, message: str) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("freshdesk_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def detach() -> None:
+    """Start new traces in a task that outlives the call that started it."""
+
+    _current.set(None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # OTLP/JSON encodes 64-bit integers as strings.
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def _otlp_status(span: Span) -> Dict[str, Any]:
+    status: Dict[str, Any] = {"code": span.status}
+    if span.status_message:
+        status["message"] = span.status_message
+    return status
+
+
+def to_otlp(spans: List[Span]) -> Dict[str, Any]:
+    """An OTLP/JSON ExportTraceServiceRequest holding ``spans``."""
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{
+                "scope": {"name": "freshdesk_mcp"},
+                "spans": [
+                    {
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                        "name": span.name,
+                        "kind": 3 if span.name.startswith("HTTP ") else 1,  # CLIENT or INTERNAL
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.end_ns),
+                        "attributes": _otlp_attributes(span.attributes),
+                        "status": _otlp_status(span),
+                    }
+                    for span in spans
+                ],
+            }],
+        }],
+    }
+
+
+def format_tree(spans: List[Span]) -> str:
+    """Indented text rendering of a trace, children under their parents by start time."""
+
+    children: Dict[Optional[str], List[Span]] = {}
+    ids = {span.span_id for span in spans}
+    for span in sorted(spans, key=lambda s: s.start_ns):
+        parent = span.parent_id if span.parent_id in ids else None
+        children.setdefault(parent, []).append(span)
+
+    lines: List[str] = []
+
+    def walk(parent: Optional[str], depth: int) -> None:
+        for span in children.get(parent, ()):
+            attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+            marker = " ERROR" if span.status == STATUS_ERROR else ""
+            lines.append(f"{'  ' * depth}{span.name} {span.duration_ms:.1f}ms{marker} {attributes}".rstrip())
+            walk(span.span_id, depth + 1)
+
+    walk(None, 0)
+    return f"trace {spans[0].trace_id}\n" + "\n".join(lines)
+
+
+def trace_file() -> str:
+    default = os.path.join(tempfile.gettempdir(), "freshdesk-mcp-traces.ndjson")
+    return os.path.expanduser(env_str("FRESHDESK_TRACE_FILE") or default)
+
+
+class Tracer:
+    """Creates spans and exports each trace once its root span ends."""
+
+    def __init__(self) -> None:
+        self._pending: Dict[str, List[Span]] = {}
+        self._dropped: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.exported = 0
+
+    def exporters(self) -> List[str]:
+        raw = os.environ.get("FRESHDESK_TRACING")
+        if not raw:
+            return []
+        return [name for name in (part.strip().lower() for part in raw.split(",")) if name in EXPORTERS]
+
+    def active(self) -> bool:
+        """Cheap check for call sites that would otherwise build attributes for nothing."""
+
+        return bool(os.environ.get("FRESHDESK_TRACING"))
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+        """Run the block in a child of the current span (or a new trace).
+
+        Yields a no-op span when tracing is off. Exceptions mark the span as
+        failed and propagate.
+        """
+
+        if not os.environ.get("FRESHDESK_TRACING"):
+            yield NOOP_SPAN
+            return
+        span = Span(name, _current.get(), attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current.reset(token)
+            span.end_ns = time.time_ns()
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            if span.root is not span:
+                pending = self._pending.setdefault(span.trace_id, [])
+                if len(pending) < max(1, env_int("FRESHDESK_TRACE_MAX_SPANS", DEFAULT_MAX_SPANS)):
+                    pending.append(span)
+                else:
+                    self._dropped[span.trace_id] = self._dropped.get(span.trace_id, 0) + 1
+                if span.root.end_ns is None:
+                    return
+                # The root already ended (e.g. a task outlived its call): export the straggler alone.
+                spans = self._pending.pop(span.trace_id)
+            else:
+                spans = self._pending.pop(span.trace_id, [])
+                spans.append(span)
+                dropped = self._dropped.pop(span.trace_id, 0)
+                if dropped:
+                    span.attributes["freshdesk.dropped_spans"] = dropped
+        self.export(spans)
+
+    def export(self, spans: List[Span]) -> None:
+        exporters = self.exporters()
+        try:
+            if CONSOLE in exporters:
+                sys.stderr.write(format_tree(spans) + "\n")
+            if FILE in exporters:
+                path = trace_file()
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(path, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(to_otlp(spans), separators=(",", ":")) + "\n")
+        except OSError as e:
+            logging.warning(f"Could not export trace: {e}")
+            return
+        self.exported += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            self._dropped.clear()
+
+
+# Shared by every module so spans nest across the pipeline, caches and fan-outs.
+tracer = Tracer()
@@ -0,0 +1,181 @@
+"""Embedded receiver for Freshdesk automation webhooks.
+
+Point a Freshdesk automation rule ("Trigger webhook", POST, JSON) at
+``http://<host>:<port>/freshdesk/webhook`` and send the shared secret either
+in an ``X-Freshdesk-Webhook-Secret`` header or as the basic-auth password.
+Any of these payload shapes are understood::
+
+    {"event": "ticket_updated", "ticket_id": {{ticket.id}}}
+    {"event": "conversation_added", "ticket_id": {{ticket.id}}}
+    {"event": "contact_updated", "contact_id": {{ticket.contact.id}}}
+    {"freshdesk_webhook": {"ticket_id": ...}}
+
+Each notification is turned into :class:`~.invalidation.Change` events that
+caches act on after the response has been sent.
+"""
+
+import base64
+import binascii
+import hmac
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from .invalidation import Change, ChangeFeed
+
+WEBHOOK_PATH = "/freshdesk/webhook"
+SECRET_HEADER = "x-freshdesk-webhook-secret"
+MAX_BODY_BYTES = 1024 * 1024
+
+# Event names that mean a conversation (reply or note) was added to a ticket.
+CONVERSATION_EVENTS = ("conversation", "reply", "note")
+
+
+def _record_id(value: Any) -> Optional[int]:
+    """Parse ids sent as numbers or placeholder strings such as "123" or "#123"."""
+
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, dict):
+        return _record_id(value.get("id"))
+    if isinstance(value, str):
+        match = re.fullmatch(r"\s*#?(\d+)\s*", value)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def parse_changes(payload: Dict[str, Any]) -> List[Change]:
+    """Translate one webhook payload into change events.
+
+    Webhooks only identify records; payload fields are filled from
+    admin-defined placeholders and are never treated as complete records.
+    """
+
+    if not isinstance(payload, dict):
+        return []
+    body = payload.get("freshdesk_webhook", payload)
+    if not isinstance(body, dict):
+        return []
+
+    event = str(body.get("event") or body.get("triggered_event") or "").strip().lower()
+    deleted = event.endswith("deleted")
+    ticket_id = _record_id(body.get("ticket_id", body.get("ticket")))
+    contact_id = _record_id(body.get("contact_id", body.get("contact")))
+    company_id = _record_id(body.get("company_id", body.get("company")))
+
+    changes: List[Change] = []
+    if event.startswith("contact"):
+        if contact_id is not None:
+            changes.append(Change("contact", contact_id, deleted=deleted))
+    elif event.startswith("company"):
+        if company_id is not None:
+            changes.append(Change("company", company_id, deleted=deleted))
+    elif ticket_id is not None:
+        if any(name in event for name in CONVERSATION_EVENTS):
+            conversation_id = _record_id(body.get("conversation_id", body.get("conversation")))
+            changes.append(Change("conversation", conversation_id or ticket_id, parent_id=ticket_id))
+            # A new conversation also moves the ticket's updated_at and status.
+            changes.append(Change("ticket", ticket_id))
+        else:
+            changes.append(Change("ticket", ticket_id, deleted=deleted))
+    elif contact_id is not None:
+        changes.append(Change("contact", contact_id, deleted=deleted))
+    elif company_id is not None:
+        changes.append(Change("company", company_id, deleted=deleted))
+    return changes
+
+
+def _authorized(request: Request, secret: str) -> bool:
+    supplied = request.headers.get(SECRET_HEADER)
+    if supplied is None:
+        scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "basic":
+            try:
+                decoded = base64.b64decode(credentials, validate=True).decode()
+            except (binascii.Error, UnicodeDecodeError):
+                return False
+            supplied = decoded.partition(":")[2]
+    if supplied is None:
+        return False
+    return hmac.compare_digest(supplied.encode(), secret.encode())
+
+
+async def _read_body(request: Request) -> Optional[bytes]:
+    """Read the request body, or return None once it exceeds MAX_BODY_BYTES."""
+
+    try:
+        declared = int(request.headers.get("content-length", ""))
+    except ValueError:
+        declared = None
+    if declared is not None and declared > MAX_BODY_BYTES:
+        return None
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def create_app(feed: ChangeFeed, secret: str) -> Starlette:
+    """Build the receiver app publishing verified notifications to ``feed``."""
+
+    if not secret:
+        raise ValueError("A webhook secret is required")
+
+    async def receive(request: Request) -> JSONResponse:
+        if not _authorized(request, secret):
+            return JSONResponse({"error": "Invalid webhook secret"}, status_code=401)
+        raw = await _read_body(request)
+        if raw is None:
+            return JSONResponse({"error": "Payload too large"}, status_code=413)
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            return JSONResponse({"error": "Payload is not valid JSON"}, status_code=400)
+
+        changes = parse_changes(payload)
+        if not changes:
+            logging.info(f"Ignoring webhook without a recognised record: {payload}")
+            return JSONResponse({"accepted": 0}, status_code=202)
+
+        async def publish() -> None:
+            for change in changes:
+                await feed.publish(change)
+
+        # Acknowledge first: Freshdesk retries webhooks that respond slowly.
+        return JSONResponse(
+            {"accepted": len(changes)},
+            status_code=202,
+            background=BackgroundTask(publish),
+        )
+
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({"status": "ok"})
+
+    return Starlette(routes=[
+        Route(WEBHOOK_PATH, receive, methods=["POST"]),
+        Route("/healthz", health, methods=["GET"]),
+    ])
+
+
+async def serve(app: Starlette, host: str, port: int) -> None:
+    """Run ``app`` with uvicorn until cancelled."""
+
+    import uvicorn
+
+    # stdout carries the MCP stdio protocol, so uvicorn must not log to it.
+    config = uvicorn.Config(app, host=host, port=port, log_config=None, access_log=False, lifespan="off")
+    await uvicorn.Server(config).serve()
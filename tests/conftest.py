@@ -0,0 +1,20 @@
+import pytest
+
+from freshdesk_mcp import server
+
+BASE = "https://test-domain.freshdesk.com/api/v2"
+
+
+@pytest.fixture(autouse=True)
+def _reset_server_caches():
+    # Module-level caches would otherwise leak mocked data between tests.
+    server.reset_caches()
+    yield
+    server.reset_caches()
+
+
+@pytest.fixture
+def env(monkeypatch):
+    # Modules needing more settings override this as env(env, monkeypatch).
+    monkeypatch.setenv("FRESHDESK_API_KEY", "test_key")
+    monkeypatch.setenv("FRESHDESK_DOMAIN", "test-domain.freshdesk.com")
@@ -5,7 +5,8 @@ import pytest
 pytest.skip("manual Freshdesk integration script", allow_module_level=True)
 
 import asyncio
-from freshdesk_mcp.server import get_ticket, update_ticket, get_ticket_conversation, update_ticket_conversation,get_agents, list_canned_responses, list_solution_articles, list_solution_categories,list_solution_folders,list_groups,create_group,create_contact_field,create_canned_response_folder,update_canned_response_folder,create_canned_response,update_canned_response,view_canned_response, search_tickets, build_search_query, build_complex_search_query
+from freshdesk_mcp.server import get_ticket, update_ticket, get_ticket_conversation, update_ticket_conversation,get_agents, list_canned_responses, list_solution_articles, list_solution_categories,list_solution_folders,list_groups,create_group,create_contact_field,create_canned_response_folder,update_canned_response_folder,create_canned_response,update_canned_response,view_canned_response, search_tickets
+from freshdesk_mcp.queries import build_search_query, build_complex_search_query
 
 async def test_get_ticket():
     ticket_id = "1289" #Replace with a test ticket Id
@@ -0,0 +1,77 @@
+import pytest
+
+from freshdesk_mcp import server
+
+from conftest import BASE
+
+
+def _mock_directories(httpx_mock):
+    httpx_mock.add_response(
+        url=f"{BASE}/agents?page=1&per_page=100",
+        json=[
+            {"id": 11, "contact": {"name": "Ada Lovelace", "email": "ada@example.com"}},
+            {"id": 12, "contact": {"name": "Alan Turing", "email": "alan@example.com"}},
+        ],
+    )
+    httpx_mock.add_response(
+        url=f"{BASE}/groups?page=1&per_page=100",
+        json=[{"id": 21, "name": "Billing"}],
+    )
+
+
+@pytest.mark.asyncio
+async def test_resolver_maps_ids_and_names_from_one_load(httpx_mock, env):
+    _mock_directories(httpx_mock)
+
+    result = await server.resolve_agents_and_groups(
+        agent_ids=[11, 99], group_ids=[21], names=["alan turing", "ADA@example.com", "Billing"]
+    )
+
+    assert result["agents"] == {"11": "Ada Lovelace", "99": None}
+    assert result["groups"] == {"21": "Billing"}
+    assert result["names"]["alan turing"] == {"agent_ids": [12], "group_ids": []}
+    assert result["names"]["ADA@example.com"] == {"agent_ids": [11], "group_ids": []}
+    assert result["names"]["Billing"] == {"agent_ids": [], "group_ids": [21]}
+
+    await server.resolve_agents_and_groups(agent_ids=[12])
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_tickets_resolves_names_without_per_ticket_lookups(httpx_mock, env):
+    _mock_directories(httpx_mock)
+    httpx_mock.add_response(
+        url=f"{BASE}/tickets?page=1&per_page=30",
+        json=[
+            {"id": n, "responder_id": 11 if n % 2 else 12, "group_id": 21}
+            for n in range(1, 51)
+        ],
+    )
+
+    result = await server.get_tickets(resolve_names=True)
+
+    names = {t["responder_name"] for t in result["tickets"]}
+    assert names == {"Ada Lovelace", "Alan Turing"}
+    assert all(t["group_name"] == "Billing" for t in result["tickets"])
+    assert len(httpx_mock.get_requests()) == 3
+
+
+@pytest.mark.asyncio
+async def test_view_agent_and_group_use_fresh_directories(httpx_mock, env):
+    _mock_directories(httpx_mock)
+    await server.resolve_agents_and_groups(agent_ids=[11])
+
+    assert (await server.view_agent(12))["contact"]["name"] == "Alan Turing"
+    assert (await server.view_group(21))["name"] == "Billing"
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.asyncio
+async def test_search_agents_escapes_term(httpx_mock, env):
+    httpx_mock.add_response(json=[])
+
+    await server.search_agents("a&b c")
+
+    request = httpx_mock.get_request()
+    assert request.url.path == "/api/v2/agents/autocomplete"
+    assert request.url.params["term"] == "a&b c"
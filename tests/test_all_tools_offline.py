@@ -22,16 +22,27 @@ def _sample_args():
         "update_ticket": (123, {"subject": "Updated"}),
         "delete_ticket": (123,),
         "get_ticket": (123,),
+        "get_tickets_by_ids": ([123, 456], True),
         "search_tickets": ("status:2",),
         "get_ticket_conversation": (123,),
         "create_ticket_reply": (123, "Reply body"),
         "create_ticket_note": (123, "Note body"),
         "update_ticket_conversation": (456, "Updated body"),
+        "download_ticket_attachments": (123, "attachments"),
+        "get_outbox_status": (),
+        "retry_outbox_job": ("job",),
+        "get_request_metrics": (),
+        "fetch_more": ("cursor",),
         "get_agents": (1, 2),
         "list_contacts": (1, 2),
         "get_contact": (123,),
         "search_contacts": ("email:'user@example.com'",),
         "update_contact": (123, {"name": "User"}),
+        "import_contacts": ("contacts.csv",),
+        "search_canned_responses": ("refund",),
+        "find_similar_tickets": (),
+        "get_sla_risk": (),
+        "get_backlog_summary": (),
         "list_canned_responses": (123,),
         "list_canned_response_folders": (),
         "view_canned_response": (123,),
@@ -58,6 +69,7 @@ def _sample_args():
         "list_groups": (1, 2),
         "create_group": ({"name": "Group"},),
         "view_group": (123,),
+        "resolve_agents_and_groups": ([123], [456], ["Agent"]),
         "create_ticket_field": ({"label": "X"},),
         "view_ticket_field": (123,),
         "update_ticket_field": (123, {"label": "Y"}),
@@ -71,7 +83,11 @@ def _sample_args():
         "view_company": (123,),
         "search_companies": ("Acme",),
         "find_company_by_name": ("Acme",),
+        "refresh_company_directory": (),
         "list_company_fields": (),
+        "sync_ticket_store": (),
+        "ticket_analytics": ("counts", "status"),
+        "batch": ([{"tool": "view_company", "arguments": {"company_id": 123}}],),
     }
 
 
@@ -0,0 +1,128 @@
+import re
+
+import httpx
+import pytest
+
+from freshdesk_mcp import server
+
+from conftest import BASE
+
+CDN = "https://attachments.example.com"
+
+
+def test_form_fields_flattens_nested_values():
+    fields = server._form_fields({
+        "subject": "Logs",
+        "status": 2,
+        "tags": ["a", "b"],
+        "custom_fields": {"cf_env": "prod", "cf_urgent": True, "cf_empty": None},
+        "cc_emails": None,
+    })
+
+    assert fields == {
+        "subject": "Logs",
+        "status": "2",
+        "tags[]": ["a", "b"],
+        "custom_fields[cf_env]": "prod",
+        "custom_fields[cf_urgent]": "true",
+    }
+
+
+@pytest.mark.asyncio
+async def test_reply_with_attachments_is_multipart(httpx_mock, env, tmp_path):
+    log = tmp_path / "bundle.log"
+    log.write_bytes(b"line\n" * 1000)
+    httpx_mock.add_response(url=f"{BASE}/tickets/7/reply", method="POST", json={"id": 1})
+
+    result = await server.create_ticket_reply(7, "See attached", attachment_paths=[str(log)])
+
+    assert result == {"id": 1}
+    request = httpx_mock.get_requests()[0]
+    assert request.headers["content-type"].startswith("multipart/form-data")
+    body = request.read()
+    assert b'name="body"' in body
+    assert b'name="attachments[]"; filename="bundle.log"' in body
+    assert b"line\n" * 1000 in body
+
+
+@pytest.mark.asyncio
+async def test_reply_with_missing_attachment_makes_no_request(httpx_mock, env, tmp_path):
+    result = await server.create_ticket_note(7, "Note", attachment_paths=[str(tmp_path / "nope.txt")])
+
+    assert "nope.txt" in result["error"]
+    assert httpx_mock.get_requests() == []
+
+
+@pytest.mark.asyncio
+async def test_download_streams_ticket_and_conversation_attachments(httpx_mock, env, tmp_path, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_DOWNLOAD_CONCURRENCY", "2")
+    httpx_mock.add_response(
+        url=f"{BASE}/tickets/7",
+        json={"id": 7, "attachments": [
+            {"id": 1, "name": "a.txt", "size": 3, "attachment_url": f"{CDN}/1"},
+        ]},
+    )
+    httpx_mock.add_response(
+        url=f"{BASE}/tickets/7/conversations",
+        json=[{"id": 70, "attachments": [
+            {"id": 2, "name": "../b.bin", "size": 5, "attachment_url": f"{CDN}/2"},
+            {"id": 3, "name": "gone.txt", "size": 1, "attachment_url": f"{CDN}/3"},
+        ]}],
+    )
+    httpx_mock.add_response(url=f"{CDN}/1", content=b"abc")
+    httpx_mock.add_response(url=f"{CDN}/2", content=b"hello")
+    httpx_mock.add_response(url=f"{CDN}/3", status_code=404)
+
+    result = await server.download_ticket_attachments(7, str(tmp_path))
+
+    assert sorted(r["id"] for r in result["downloaded"]) == [1, 2]
+    assert [r["id"] for r in result["errors"]] == [3]
+    assert (tmp_path / "1-a.txt").read_bytes() == b"abc"
+    assert (tmp_path / "2-b.bin").read_bytes() == b"hello"
+    assert not list(tmp_path.glob("*.part"))
+    # Streamed bodies hand their lane slot back once closed.
+    assert server.lane_controller.snapshot()["active"] == 0
+    # Attachment URLs are pre-signed; credentials must not leak to them.
+    for request in httpx_mock.get_requests(url=re.compile(f"{CDN}/.*")):
+        assert "authorization" not in request.headers
+
+
+@pytest.mark.asyncio
+async def test_download_skips_files_already_on_disk(httpx_mock, env, tmp_path):
+    (tmp_path / "1-a.txt").write_bytes(b"abc")
+    httpx_mock.add_response(
+        url=f"{BASE}/tickets/7",
+        json={"id": 7, "attachments": [
+            {"id": 1, "name": "a.txt", "size": 3, "attachment_url": f"{CDN}/1"},
+        ]},
+    )
+
+    result = await server.download_ticket_attachments(7, str(tmp_path), include_conversations=False)
+
+    assert result["downloaded"][0]["skipped"] is True
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_downloads_leave_no_partial_files(httpx_mock, env, tmp_path):
+    httpx_mock.add_response(
+        url=f"{BASE}/tickets/7",
+        json={"id": 7, "attachments": [
+            {"id": 1, "name": "a.bin", "size": 8, "attachment_url": f"{CDN}/1"},
+            {"id": 2, "name": "no-url.txt"},
+            "not an attachment",
+        ]},
+    )
+
+    async def dropped():
+        yield b"half"
+        raise httpx.ReadError("connection reset")
+
+    httpx_mock.add_callback(lambda request: httpx.Response(200, content=dropped()), url=f"{CDN}/1")
+
+    result = await server.download_ticket_attachments(7, str(tmp_path), include_conversations=False)
+
+    assert result["downloaded"] == []
+    assert [r["id"] for r in result["errors"]] == [1, 2, None]
+    assert "connection reset" in result["errors"][0]["error"]
+    assert list(tmp_path.iterdir()) == []
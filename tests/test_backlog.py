@@ -0,0 +1,113 @@
+import asyncio
+import re
+
+import httpx
+import pytest
+
+from freshdesk_mcp import server
+from freshdesk_mcp.backlog import FIRST_RESPONSE, RESOLUTION, BacklogMonitor
+from freshdesk_mcp.records import format_timestamp
+from freshdesk_mcp.store import TicketStore
+
+from conftest import BASE
+
+NOW = 1_714_521_600  # 2024-05-01T00:00:00Z
+
+
+def _ticket(ticket_id, status=2, due_in=None, fr_due_in=None, responded=False, responder_id=7, age=3600, **extra):
+    return {
+        "id": ticket_id,
+        "subject": f"Ticket {ticket_id}",
+        "status": status,
+        "priority": 2,
+        "group_id": 1,
+        "responder_id": responder_id,
+        "created_at": format_timestamp(NOW - age),
+        "updated_at": format_timestamp(NOW - 60),
+        "due_by": format_timestamp(NOW + due_in) if due_in is not None else None,
+        "fr_due_by": format_timestamp(NOW + fr_due_in) if fr_due_in is not None else None,
+        "stats": {"first_responded_at": format_timestamp(NOW - 1800) if responded else None},
+        **extra,
+    }
+
+
+def _monitor(*tickets):
+    store = TicketStore(lambda: "test-domain.freshdesk.com")
+    monitor = BacklogMonitor(store)
+    store.upsert_many(tickets)
+    monitor.ensure_current()
+    return store, monitor
+
+
+def test_risk_lists_overdue_and_due_soon_tickets_in_order():
+    store, monitor = _monitor(
+        _ticket(1, due_in=-600, responded=True),
+        _ticket(2, due_in=7200, fr_due_in=1200),
+        _ticket(3, due_in=86_400, responded=True),
+        _ticket(4, status=3, due_in=-60, responded=True),
+        _ticket(5, status=5, due_in=-60),
+    )
+
+    risk = monitor.sla_risk(within=4 * 3600, limit=10, now=NOW)
+    assert [(i["id"], i["breach"]) for i in risk] == [(1, RESOLUTION), (2, FIRST_RESPONSE), (2, RESOLUTION)]
+    assert risk[0]["overdue"] and risk[0]["minutes_left"] == -10
+    assert 4 in [item["id"] for item in monitor.sla_risk(4 * 3600, 10, now=NOW, include_paused=True)]
+
+    # Changes reach the queues through the store; stale heap entries are skipped.
+    store.upsert(_ticket(1, status=4, due_in=-600, responded=True))
+    store.upsert(_ticket(2, due_in=7200, fr_due_in=1200, responded=True))
+    store.upsert(_ticket(3, due_in=600, responded=True))
+    assert [(i["id"], i["breach"]) for i in monitor.sla_risk(3600, 10, now=NOW)] == [(3, RESOLUTION)]
+
+
+def test_summary_counts_open_unassigned_and_breached_tickets():
+    store, monitor = _monitor(
+        _ticket(1, due_in=-600, fr_due_in=-300, responder_id=None, age=7200),
+        _ticket(2, status=3, due_in=1800, responder_id=None, age=3600),
+        _ticket(3, status=4),
+    )
+
+    summary = monitor.summary(now=NOW)
+    assert summary["open"] == 2
+    assert summary["by_status"] == {2: 1, 3: 1}
+    assert summary["unassigned"]["count"] == 2
+    assert [(t["id"], t["age_hours"]) for t in summary["unassigned"]["oldest"]] == [(1, 2.0), (2, 1.0)]
+    assert summary["overdue"] == {RESOLUTION: 1, FIRST_RESPONSE: 1}
+    # Ticket 2 is Pending, so its SLA clock is stopped.
+    assert summary["due_within"]["1h"] == 0
+
+    store.remove(1)
+    assert monitor.summary(now=NOW)["open"] == 1
+
+
+@pytest.mark.asyncio
+async def test_tools_report_from_the_store_and_poll_in_the_background(env, monkeypatch, httpx_mock):
+    monkeypatch.setenv("FRESHDESK_BACKLOG_POLL_INTERVAL", "0.01")
+    polls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        polls.append(request.url.params["updated_since"])
+        if request.url.params["updated_since"] == server.TICKET_SYNC_EPOCH:
+            first = _ticket(1, due_in=-600, responded=True, updated_at="2024-05-01T00:00:00Z")
+            return httpx.Response(200, json=[first])
+        return httpx.Response(200, json=[_ticket(2, responder_id=None, updated_at="2024-05-01T00:01:00Z")])
+
+    httpx_mock.add_callback(handler, url=re.compile(rf"{re.escape(BASE)}/tickets\?.*"), is_reusable=True)
+
+    assert "error" in await server.get_backlog_summary()
+
+    server.backlog.start(server._poll_backlog)
+    try:
+        for _ in range(100):
+            if len(polls) >= 2:
+                break
+            await asyncio.sleep(0.01)
+        risk = await server.get_sla_risk()
+        summary = await server.get_backlog_summary()
+    finally:
+        server.backlog.stop()
+
+    assert [item["id"] for item in risk["tickets"]] == [1]
+    assert summary["open"] == 2 and summary["by_status"] == {"Open": 2}
+    assert summary["unassigned"]["count"] == 1
+    assert summary["background_poll"] is True
@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+import pytest
+
+from freshdesk_mcp import server
+
+from conftest import BASE
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_calls_concurrently_and_reports_each_result(env, httpx_mock):
+    in_flight = []
+    peak = []
+
+    async def slow(request: httpx.Request, body) -> httpx.Response:
+        in_flight.append(request)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.05)
+        in_flight.remove(request)
+        return httpx.Response(200, json=body)
+
+    httpx_mock.add_callback(lambda r: slow(r, {"id": 1, "subject": "Hi"}), url=f"{BASE}/tickets/1")
+    httpx_mock.add_callback(
+        lambda r: slow(r, [{"id": 9, "body_text": "Hello"}]), url=f"{BASE}/tickets/1/conversations"
+    )
+    httpx_mock.add_response(url=f"{BASE}/contacts/5", status_code=404)
+
+    result = await server.batch([
+        {"tool": "get_ticket", "arguments": {"ticket_id": 1}},
+        {"tool": "get_ticket_conversation", "arguments": {"ticket_id": 1}},
+        {"tool": "get_contact", "arguments": {"contact_id": 5}},
+        {"tool": "no_such_tool"},
+        {"tool": "get_ticket", "arguments": {"ticket_id": "not a number"}},
+        {"tool": "create_ticket", "arguments": {"subject": "Hi", "description": "Hello", "source": 2,
+                                                "priority": 1, "status": 2}},
+    ])
+
+    results = result["results"]
+    assert [item["index"] for item in results] == [0, 1, 2, 3, 4, 5]
+    assert results[0]["ok"] and results[0]["result"]["subject"] == "Hi"
+    assert results[1]["ok"] and results[1]["result"][0]["id"] == 9
+    # Tool errors and call errors are reported per entry.
+    assert not results[2]["ok"] and results[2]["result"]["status_code"] == 404
+    assert not results[3]["ok"] and "Unknown tool" in results[3]["error"]
+    assert not results[4]["ok"] and "ticket_id" in results[4]["error"]
+    # Tools that report errors as strings fail too.
+    assert not results[5]["ok"] and results[5]["result"].startswith("Error")
+    assert result["failed"] == 4
+    assert max(peak) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_nested_and_oversized_batches(env, monkeypatch):
+    nested = await server.batch([{"tool": "batch", "arguments": {"calls": []}}, "get_ticket"])
+    assert [item["ok"] for item in nested["results"]] == [False, False]
+
+    monkeypatch.setenv("FRESHDESK_BATCH_MAX_CALLS", "2")
+    assert "error" in await server.batch([{"tool": "list_company_fields"}] * 3)
+    assert "error" in await server.batch([])
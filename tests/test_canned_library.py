@@ -0,0 +1,77 @@
+import pytest
+
+from freshdesk_mcp import server
+
+from conftest import BASE
+
+
+def _mock_library(httpx_mock, refund_updated_at="2024-01-01T00:00:00Z"):
+    httpx_mock.add_response(
+        url=f"{BASE}/canned_response_folders",
+        json=[{"id": 1, "name": "Billing"}, {"id": 2, "name": "Access"}],
+    )
+    httpx_mock.add_response(
+        url=f"{BASE}/canned_response_folders/1/responses",
+        json=[
+            {"id": 10, "title": "Refund approved", "updated_at": refund_updated_at},
+            {"id": 11, "title": "Invoice copy", "content_html": "<p>Your invoice is attached.</p>"},
+        ],
+    )
+    httpx_mock.add_response(
+        url=f"{BASE}/canned_response_folders/2/responses",
+        json=[{"id": 20, "title": "Password reset", "content_html": "<p>Use the reset link; no refund needed.</p>"}],
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_title_matches_first_and_returns_content(env, httpx_mock):
+    _mock_library(httpx_mock)
+    httpx_mock.add_response(
+        url=f"{BASE}/canned_responses/10",
+        json={"id": 10, "title": "Refund approved", "content_html": "<p>We have refunded your order.</p>"},
+    )
+
+    result = await server.search_canned_responses("refund")
+
+    assert [item["id"] for item in result["results"]] == [10, 20]
+    assert result["results"][0]["content_html"] == "<p>We have refunded your order.</p>"
+    assert result["results"][0]["folder_name"] == "Billing"
+    assert result["total"] == 3
+    # The last word matches as a prefix; folder names are searchable too.
+    assert [item["id"] for item in (await server.search_canned_responses("invoice att"))["results"]] == [11]
+    assert [item["id"] for item in (await server.search_canned_responses("access"))["results"]] == [20]
+    assert (await server.search_canned_responses("refund", folder_id=2))["results"][0]["id"] == 20
+
+
+@pytest.mark.asyncio
+async def test_refresh_only_fetches_changed_content(env, monkeypatch, httpx_mock):
+    _mock_library(httpx_mock)
+    httpx_mock.add_response(url=f"{BASE}/canned_responses/10", json={"id": 10, "content_html": "<p>Old</p>"})
+    monkeypatch.setenv("FRESHDESK_RESPONSE_CACHE_TTL", "0")
+    await server.search_canned_responses("refund")
+
+    _mock_library(httpx_mock)
+    await server.canned_library.refresh()
+    assert len(httpx_mock.get_requests(url=f"{BASE}/canned_responses/10")) == 1
+
+    _mock_library(httpx_mock, refund_updated_at="2024-02-01T00:00:00Z")
+    httpx_mock.add_response(url=f"{BASE}/canned_responses/10", json={"id": 10, "content_html": "<p>Credited</p>"})
+    await server.canned_library.refresh()
+    assert (await server.search_canned_responses("credited"))["results"][0]["id"] == 10
+
+
+@pytest.mark.asyncio
+async def test_writes_update_the_library(env, httpx_mock):
+    _mock_library(httpx_mock)
+    httpx_mock.add_response(url=f"{BASE}/canned_responses/10", json={"id": 10, "content_html": "<p>Refunded</p>"})
+    httpx_mock.add_response(
+        url=f"{BASE}/canned_responses/20", method="PUT",
+        json={"id": 20, "title": "Two-factor reset", "folder_id": 2, "content_html": "<p>Scan the code.</p>"},
+    )
+    await server.search_canned_responses("refund")
+
+    await server.update_canned_response(20, {"title": "Two-factor reset"})
+
+    result = await server.search_canned_responses("two factor")
+    assert result["results"][0]["id"] == 20
+    assert result["results"][0]["folder_name"] == "Access"
@@ -0,0 +1,127 @@
+import gzip
+
+import httpx
+import pytest
+
+from freshdesk_mcp import cassettes, server
+
+from conftest import BASE
+
+
+@pytest.fixture
+def env(env, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_API_KEY", "secret_key")
+
+
+def _use_cassette(monkeypatch, path, mode):
+    server.reset_caches()
+    monkeypatch.setenv("FRESHDESK_CASSETTE", str(path))
+    monkeypatch.setenv("FRESHDESK_CASSETTE_MODE", mode)
+    monkeypatch.setenv("FRESHDESK_CASSETTE_LATENCY_SCALE", "0")
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay(env, monkeypatch, tmp_path, httpx_mock):
+    path = tmp_path / "run.ndjson.gz"
+    body = {"id": 5, "avatar": "https://s3.example.com/a.png?X-Amz-Signature=abc123", "note": "key secret_key"}
+    httpx_mock.add_response(url=f"{BASE}/contacts/5", json=body, headers={"Set-Cookie": "session=1"})
+
+    _use_cassette(monkeypatch, path, "record")
+    assert await server.get_contact(5) == body
+    cassettes.reset()
+
+    raw = gzip.open(path, "rt").read()
+    assert "secret_key" not in raw
+    assert "abc123" not in raw
+    assert "test-domain" not in raw
+    assert "session" not in raw.lower()
+
+    _use_cassette(monkeypatch, path, "replay")
+    replayed = await server.get_contact(5)
+    assert replayed["id"] == 5
+    assert replayed["avatar"].endswith(f"X-Amz-Signature={cassettes.SCRUBBED}")
+    # Only the recording touched the network.
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_replay_serves_entries_in_order_and_reports_misses(env, monkeypatch, tmp_path, httpx_mock):
+    # Repeated reads must reach the transport rather than the entity cache.
+    monkeypatch.setenv("FRESHDESK_ENTITY_TTL_CONTACT", "0")
+    path = tmp_path / "run.ndjson"
+    httpx_mock.add_response(url=f"{BASE}/contacts/5", json={"id": 5, "name": "A"})
+    httpx_mock.add_response(url=f"{BASE}/contacts/5", json={"id": 5, "name": "B"})
+
+    _use_cassette(monkeypatch, path, "record")
+    await server.get_contact(5)
+    await server.get_contact(5)
+
+    _use_cassette(monkeypatch, path, "replay")
+    assert (await server.get_contact(5))["name"] == "A"
+    assert (await server.get_contact(5))["name"] == "B"
+    assert (await server.get_contact(5))["name"] == "B"
+    assert (await server.get_contact(6))["code"] == "cassette_miss"
+    assert cassettes.cassette_for(str(path)).misses == 1
+
+
+@pytest.mark.asyncio
+async def test_binary_and_large_bodies_stream_through_and_are_recorded_by_size(monkeypatch, tmp_path):
+    monkeypatch.setenv("FRESHDESK_CASSETTE_LATENCY_SCALE", "0")
+    monkeypatch.setenv("FRESHDESK_CASSETTE_MAX_BODY", "20")
+    path = tmp_path / "run.ndjson"
+    pulled = []
+
+    async def chunks():
+        for _ in range(3):
+            pulled.append(1)
+            yield b"\x89PNG" * 1000
+
+    def handler(request):
+        if request.url.path == "/file.png":
+            return httpx.Response(200, headers={"Content-Type": "image/png"}, content=chunks())
+        return httpx.Response(200, json={"text": "x" * 50})
+
+    recording = cassettes.Cassette(str(path))
+    transport = cassettes.CassetteTransport(recording, "record", httpx.MockTransport(handler))
+    async with httpx.AsyncClient(transport=transport, base_url="https://files.example.com") as client:
+        async with client.stream("GET", "/file.png") as response:
+            # The body is not read ahead of the caller.
+            read_ahead = [len(pulled) async for _ in response.aiter_raw()]
+        assert read_ahead == [1, 2, 3]
+        assert (await client.get("/big.json")).json()["text"] == "x" * 50
+    recording.close()
+
+    cassette = cassettes.Cassette(str(path))
+    entries = list(cassette.entries())
+    assert [entry.get("body_size") for entry in entries] == [12000, 61]
+    assert not any("body" in entry or "body_b64" in entry for entry in entries)
+
+    replay = cassettes.CassetteTransport(cassette, "replay")
+    async with httpx.AsyncClient(transport=replay, base_url="https://files.example.com") as client:
+        assert (await client.get("/file.png")).content == bytes(12000)
+
+
+@pytest.mark.asyncio
+async def test_stand_in_app_and_summary(tmp_path, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_CASSETTE_LATENCY_SCALE", "0")
+    path = tmp_path / "run.ndjson"
+    path.write_text(
+        '{"method":"GET","url":"/api/v2/tickets/1","status":200,"headers":{"content-type":"application/json"},'
+        '"elapsed":0.2,"body":"{\\"id\\": 1}","t":0}\n'
+        '{"method":"GET","url":"/api/v2/tickets/2","status":404,"headers":{},"elapsed":0.4,"body":"","t":1.5}\n'
+    )
+    cassette = cassettes.Cassette(str(path))
+
+    transport = httpx.ASGITransport(app=cassettes.create_app(cassette))
+    async with httpx.AsyncClient(transport=transport, base_url="http://stand-in") as client:
+        assert (await client.get("/api/v2/tickets/1")).json() == {"id": 1}
+        missing = await client.get("/api/v2/tickets/3")
+    assert missing.status_code == 404
+    assert missing.json()["code"] == "cassette_miss"
+
+    summary = cassettes.summarize(cassette)
+    assert summary["exchanges"] == 2
+    assert summary["duration_seconds"] == 1.5
+    assert summary["endpoints"]["GET /api/v2/tickets/{id}"] == {
+        "requests": 2, "statuses": {"200": 1, "404": 1}, "mean_seconds": 0.3,
+    }
@@ -0,0 +1,78 @@
+import pytest
+
+from freshdesk_mcp import server
+from freshdesk_mcp.compaction import (
+    compact_article,
+    compact_text,
+    compact_thread,
+    html_to_text,
+    strip_quoted,
+    truncate,
+)
+
+from conftest import BASE
+
+
+def test_html_to_text_drops_boilerplate_and_quote_containers():
+    html = (
+        "<html><head><style>p {color: red}</style></head><body>"
+        "<div>Hi&nbsp;team,</div><p>The export <b>fails</b> again.</p>"
+        "<ul><li>step one</li><li>step two</li></ul>"
+        '<div class="gmail_quote">On Mon, someone wrote:<blockquote>old text</blockquote></div>'
+        "</body></html>"
+    )
+
+    assert html_to_text(html) == "Hi team,\n\nThe export fails again.\n\n- step one\n- step two"
+
+
+def test_plain_text_reply_headers_and_signatures_are_stripped():
+    text = "Thanks, that worked.\n\n-- \nJane Doe\nACME\n\nOn Tue, 2 Apr 2024 at 10:00, Support <s@x.com>\nwrote:\n> earlier"
+    assert compact_text(None, text) == "Thanks, that worked."
+
+    outlook = "Fixed now.\n\nFrom: Support\nSent: Tuesday\nSubject: Re: issue\n\nprevious body"
+    assert strip_quoted(outlook) == "Fixed now."
+
+    assert compact_text("<p>Ok</p><p>Sent from my iPhone</p>") == "Ok"
+
+
+def test_thread_dedupes_repeated_paragraphs_and_truncates():
+    repeated = "Our nightly export job fails with a timeout after ten minutes."
+    thread = [
+        {"id": 1, "body": f"<p>{repeated}</p>", "body_text": repeated},
+        {"id": 2, "body": f"<p>Any update?</p><p>{repeated}</p>", "body_text": "..."},
+    ]
+
+    compacted = compact_thread(thread)
+
+    assert [c["body_text"] for c in compacted] == [repeated, "Any update?"]
+    assert all("body" not in c for c in compacted)
+    assert thread[0]["body"]  # input is not mutated
+
+    assert truncate("abcdef", 3) == "abc\n[truncated 3 characters]"
+
+
+def test_articles_keep_quotes_rules_and_dashes():
+    article = {
+        "id": 3,
+        "description": "<p>Go to settings.</p><blockquote>Note: admins must approve.</blockquote>"
+                       "<p>-- </p><p>Step 3: confirm</p><p>__________</p>",
+    }
+
+    compacted = compact_article(article, max_chars=200)
+
+    assert compacted["description_text"] == (
+        "Go to settings.\n\nNote: admins must approve.\n\n--\n\nStep 3: confirm\n\n__________"
+    )
+    assert "description" not in compacted
+
+
+@pytest.mark.asyncio
+async def test_get_ticket_conversation_compact(env, httpx_mock):
+    httpx_mock.add_response(
+        url=f"{BASE}/tickets/5/conversations",
+        json=[{"id": 9, "body": "<div>New info</div><blockquote>quoted</blockquote>", "body_text": "New info quoted"}],
+    )
+
+    result = await server.get_ticket_conversation(5, compact=True, max_chars=100)
+
+    assert result == [{"id": 9, "body_text": "New info"}]
@@ -0,0 +1,105 @@
+import re
+
+import pytest
+
+from freshdesk_mcp import server
+from freshdesk_mcp.directory import PrefixIndex
+
+from conftest import BASE
+
+COMPANIES_URL = f"{BASE}/companies"
+
+
+def _mock_two_pages(httpx_mock):
+    httpx_mock.add_response(
+        url=f"{COMPANIES_URL}?page=1&per_page=100",
+        json=[
+            {"id": 1, "name": "Herbert Smith Freehills"},
+            {"id": 2, "name": "Acme Corporation"},
+        ],
+        headers={"Link": f'<{COMPANIES_URL}?page=2&per_page=100>; rel="next"'},
+    )
+    httpx_mock.add_response(
+        url=f"{COMPANIES_URL}?page=2&per_page=100",
+        json=[{"id": 3, "name": "Smithers Ltd"}],
+    )
+
+
+def test_prefix_index_matches_word_starts_and_prunes():
+    index = PrefixIndex()
+    index.add("Herbert Smith Freehills", 1)
+    index.add("Smithers", 2)
+
+    assert index.search("smith", 10) == [2, 1]
+    assert index.search("HERB", 10) == [1]
+
+    index.discard("Smithers", 2)
+    assert index.search("smith", 10) == [1]
+    assert index.search("smithe", 10) == []
+
+
+@pytest.mark.asyncio
+async def test_name_lookups_are_served_from_one_directory_load(httpx_mock, env):
+    _mock_two_pages(httpx_mock)
+
+    found = await server.find_company_by_name("smith")
+    assert found == {
+        "companies": [
+            {"id": 3, "name": "Smithers Ltd"},
+            {"id": 1, "name": "Herbert Smith Freehills"},
+        ]
+    }
+
+    searched = await server.search_companies("acme")
+    assert searched == {"companies": [{"id": 2, "name": "Acme Corporation"}]}
+
+    # Two list pages and nothing else: no autocomplete calls.
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_lookup_tolerates_typos(httpx_mock, env):
+    _mock_two_pages(httpx_mock)
+
+    found = await server.find_company_by_name("acme corproation")
+    assert found["companies"][0]["id"] == 2
+
+
+@pytest.mark.asyncio
+async def test_view_company_uses_fresh_directory(httpx_mock, env):
+    _mock_two_pages(httpx_mock)
+    await server.refresh_company_directory()
+
+    assert await server.view_company(3) == {"id": 3, "name": "Smithers Ltd"}
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.asyncio
+async def test_disabled_directory_falls_back_to_autocomplete(httpx_mock, env, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_COMPANY_CACHE_TTL", "0")
+    httpx_mock.add_response(
+        url=f"{COMPANIES_URL}/autocomplete?name=Acme",
+        json={"companies": [{"id": 2, "name": "Acme Corporation"}]},
+    )
+
+    result = await server.find_company_by_name("Acme")
+    assert result == {"companies": [{"id": 2, "name": "Acme Corporation"}]}
+
+
+@pytest.mark.asyncio
+async def test_incremental_refresh_uses_company_search(httpx_mock, env):
+    _mock_two_pages(httpx_mock)
+    await server.refresh_company_directory()
+
+    httpx_mock.add_response(
+        url=re.compile(r".*/api/v2/search/companies\?.*"),
+        json={"results": [{"id": 2, "name": "Acme Holdings"}], "total": 1},
+    )
+    await server.refresh_company_directory()
+
+    request = httpx_mock.get_requests()[-1]
+    assert request.url.path == "/api/v2/search/companies"
+    assert "updated_at:>" in request.url.params["query"]
+    assert (await server.search_companies("acme holdings"))["companies"] == [
+        {"id": 2, "name": "Acme Holdings"}
+    ]
@@ -0,0 +1,122 @@
+import json
+
+import pytest
+
+from freshdesk_mcp import server
+from freshdesk_mcp.contactimport import _chains, contact_from_csv
+
+from conftest import BASE
+
+
+@pytest.fixture
+def env(env, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_RETRY_BACKOFF", "0")
+
+
+def _mock_contacts(httpx_mock, contacts):
+    httpx_mock.add_response(url=f"{BASE}/contacts?page=1&per_page=100", json=contacts)
+
+
+def test_csv_rows_become_contact_payloads():
+    row = {"name": "Ann", "email": " ann@example.com ", "phone": "", "tags": "vip; beta", "company_id": "4",
+           "cf_plan": "gold", "custom_fields.region": "EU"}
+
+    assert contact_from_csv(row) == {
+        "name": "Ann",
+        "email": "ann@example.com",
+        "tags": ["vip", "beta"],
+        "company_id": 4,
+        "custom_fields": {"cf_plan": "gold", "region": "EU"},
+    }
+
+
+def test_a_row_sharing_keys_with_two_chains_joins_them():
+    rows = list(enumerate([
+        {"email": "a@example.com"},
+        {"phone": "5550100"},
+        {"email": "b@example.com"},
+        {"email": "a@example.com", "phone": "5550100"},
+    ]))
+
+    assert [[index for index, _ in chain] for chain in _chains(rows)] == [[0, 1, 3], [2]]
+
+
+@pytest.mark.asyncio
+async def test_rows_matching_by_email_or_phone_update_and_others_create(env, tmp_path, httpx_mock):
+    path = tmp_path / "contacts.csv"
+    path.write_text(
+        "name,email,phone\n"
+        "Ann,ANN@example.com,\n"
+        "Bob,,+1 (555) 010-0000\n"
+        "Cy,cy@example.com,\n"
+        "Cy Young,cy@example.com,\n"
+        "Nobody,,\n"
+    )
+    _mock_contacts(httpx_mock, [
+        {"id": 1, "name": "Ann", "email": "ann@example.com"},
+        {"id": 2, "name": "Bob", "phone": "15550100000"},
+    ])
+    httpx_mock.add_response(url=f"{BASE}/contacts/1", method="PUT", json={"id": 1, "email": "ann@example.com"})
+    httpx_mock.add_response(url=f"{BASE}/contacts/2", method="PUT", json={"id": 2, "phone": "15550100000"})
+    httpx_mock.add_response(url=f"{BASE}/contacts", method="POST", status_code=201,
+                            json={"id": 3, "name": "Cy", "email": "cy@example.com"})
+    httpx_mock.add_response(url=f"{BASE}/contacts/3", method="PUT", json={"id": 3, "email": "cy@example.com"})
+
+    result = await server.import_contacts(str(path))
+
+    assert result["created"] == 1 and result["updated"] == 3 and result["failed"] == 1
+    assert result["complete"] is True and result["next_row"] == 5
+    # The second Cy row updates the contact the first one created.
+    assert json.loads(httpx_mock.get_requests(url=f"{BASE}/contacts/3")[0].content) == {
+        "name": "Cy Young", "email": "cy@example.com"
+    }
+    with open(result["errors_path"]) as fh:
+        errors = [json.loads(line) for line in fh]
+    assert [error["row"] for error in errors] == [4]
+
+
+@pytest.mark.asyncio
+async def test_duplicate_on_create_falls_back_to_updating_the_existing_contact(env, tmp_path, httpx_mock):
+    path = tmp_path / "contacts.ndjson"
+    path.write_text(json.dumps({"name": "Dee", "email": "dee@example.com"}) + "\n")
+    _mock_contacts(httpx_mock, [])
+    httpx_mock.add_response(url=f"{BASE}/contacts", method="POST", status_code=409, json={
+        "errors": [{"field": "email", "code": "duplicate_value", "additional_info": {"user_id": 9}}]
+    })
+    httpx_mock.add_response(url=f"{BASE}/contacts/9", method="PUT", json={"id": 9, "email": "dee@example.com"})
+
+    result = await server.import_contacts(str(path))
+
+    assert (result["created"], result["updated"], result["failed"]) == (0, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_import_resumes_from_saved_progress(env, tmp_path, httpx_mock):
+    path = tmp_path / "contacts.ndjson"
+    path.write_text("".join(json.dumps({"name": f"C{i}", "email": f"c{i}@example.com"}) + "\n" for i in range(3)))
+    _mock_contacts(httpx_mock, [])
+    for i in range(3):
+        httpx_mock.add_response(url=f"{BASE}/contacts", method="POST", status_code=201,
+                                match_json={"name": f"C{i}", "email": f"c{i}@example.com"}, json={"id": 100 + i})
+
+    first = await server.import_contacts(str(path), max_rows=2)
+    second = await server.import_contacts(str(path), max_rows=2)
+
+    assert (first["next_row"], first["complete"]) == (2, False)
+    assert (second["next_row"], second["created"], second["processed"], second["complete"]) == (3, 3, 1, True)
+    assert len(httpx_mock.get_requests(method="POST")) == 3
+
+    path.write_text(path.read_text() + json.dumps({"email": "late@example.com"}) + "\n")
+    assert "error" in await server.import_contacts(str(path))
+
+
+@pytest.mark.asyncio
+async def test_a_dry_run_counts_the_whole_file_in_one_call(env, tmp_path, httpx_mock):
+    path = tmp_path / "contacts.ndjson"
+    path.write_text("".join(json.dumps({"email": f"c{i}@example.com"}) + "\n" for i in range(3)))
+    _mock_contacts(httpx_mock, [{"id": 1, "email": "c0@example.com"}])
+
+    result = await server.import_contacts(str(path), max_rows=2, dry_run=True)
+
+    assert (result["created"], result["updated"], result["next_row"], result["complete"]) == (2, 1, 3, True)
+    assert not (tmp_path / "contacts.ndjson.progress.json").exists()
@@ -0,0 +1,101 @@
+import asyncio
+import re
+import time
+
+import httpx
+import pytest
+
+from freshdesk_mcp import server
+from freshdesk_mcp.deadlines import DeadlineExceeded, deadline, gather, http_timeout, remaining, timeout_for
+
+from conftest import BASE
+
+
+def test_timeout_precedence(monkeypatch):
+    assert timeout_for("get_ticket") == 60.0
+    assert timeout_for("sync_ticket_store", 600) == 600
+    monkeypatch.setenv("FRESHDESK_TIMEOUT", "15")
+    monkeypatch.setenv("FRESHDESK_TOOL_TIMEOUTS", "sync_ticket_store=900, get_ticket=0, bogus")
+    assert timeout_for("search_tickets") == 15
+    assert timeout_for("sync_ticket_store", 600) == 900
+    assert timeout_for("get_ticket") is None
+
+
+@pytest.mark.asyncio
+async def test_http_timeout_is_capped_by_the_deadline(monkeypatch):
+    monkeypatch.setenv("FRESHDESK_HTTP_TIMEOUT", "30")
+    assert http_timeout().read == 30
+    async with deadline("call", 2):
+        assert http_timeout().read <= 2
+        # A nested, longer deadline never extends the outer one.
+        async with deadline("inner", 10):
+            assert remaining() <= 2
+    assert remaining() is None
+
+
+@pytest.mark.asyncio
+async def test_slow_tool_returns_a_timeout_error(httpx_mock, env, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_TOOL_TIMEOUTS", "get_ticket=0.2")
+
+    async def slow(request):
+        await asyncio.sleep(5)
+        return httpx.Response(200, json={"id": 1})
+
+    httpx_mock.add_callback(slow, url=f"{BASE}/tickets/1")
+
+    started = time.monotonic()
+    result = await server.get_ticket(1)
+
+    assert time.monotonic() - started < 1
+    assert result["error"].startswith("get_ticket timed out after 0.2s")
+
+
+@pytest.mark.asyncio
+async def test_cancelling_a_call_cancels_its_fan_out(httpx_mock, env):
+    started, finished = [], []
+
+    async def slow(request):
+        started.append(request.url.path)
+        await asyncio.sleep(5)
+        finished.append(request.url.path)
+        return httpx.Response(200, json={"id": 1})
+
+    httpx_mock.add_callback(slow, url=re.compile(rf"{BASE}/tickets/\d+"), is_reusable=True)
+
+    call = asyncio.create_task(server.get_tickets_by_ids([1, 2, 3]))
+    while len(started) < 3:
+        await asyncio.sleep(0.01)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    await asyncio.sleep(0.05)
+
+    assert finished == []
+
+
+@pytest.mark.asyncio
+async def test_gather_cancels_siblings_when_one_fails():
+    cancelled = []
+
+    async def sleeper():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await gather(sleeper(), boom(), sleeper())
+    assert cancelled == [True, True]
+    assert await gather(*(asyncio.sleep(0, i) for i in range(5)), limit=2) == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_deadline_raises_only_for_its_own_scope():
+    with pytest.raises(DeadlineExceeded):
+        async with deadline("call", 0.05):
+            await asyncio.sleep(1)
@@ -0,0 +1,107 @@
+import inspect
+import json
+
+import pytest
+
+from freshdesk_mcp import server
+from freshdesk_mcp.endpoints import ENDPOINTS, Endpoint
+
+from conftest import BASE
+
+
+@pytest.fixture
+def env(env, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_RETRY_BACKOFF", "0")
+
+
+def test_endpoint_table_defaults():
+    assert ENDPOINTS["get_ticket"].path_params == ("ticket_id",)
+    assert ENDPOINTS["get_ticket"].idempotent
+    assert ENDPOINTS["update_ticket"].idempotent
+    assert not ENDPOINTS["create_reply"].idempotent
+    assert Endpoint("x", "GET", "/a/{a_id}/b/{b_id}").render({"a_id": 1, "b_id": 2}) == "/a/1/b/2"
+    with pytest.raises(ValueError):
+        ENDPOINTS["get_ticket"].render({})
+
+
+def test_generated_tools_keep_their_signatures():
+    assert list(inspect.signature(server.list_contacts).parameters) == ["page", "per_page", "fetch_all"]
+    assert list(inspect.signature(server.update_canned_response_folder).parameters) == ["folder_id", "name"]
+    schema = server.mcp._tool_manager.get_tool("search_contacts").parameters
+    assert schema["required"] == ["query"]
+    assert server.get_contact.__doc__ == "Get a contact in Freshdesk."
+
+
+@pytest.mark.asyncio
+async def test_generated_tools_fill_path_query_and_body(env, httpx_mock):
+    httpx_mock.add_response(url=f"{BASE}/contacts/autocomplete?term=ann", json=[{"id": 1}])
+    httpx_mock.add_response(url=f"{BASE}/canned_response_folders/7", method="PUT", json={"id": 7})
+    httpx_mock.add_response(url=f"{BASE}/tickets/9", method="DELETE", status_code=204)
+
+    assert await server.search_contacts("ann") == [{"id": 1}]
+    assert await server.update_canned_response_folder(7, "Billing") == {"id": 7}
+    assert await server.delete_ticket(9) == {"success": True, "status_code": 204}
+
+    put = httpx_mock.get_requests(method="PUT")[0]
+    assert json.loads(put.content) == {"name": "Billing"}
+    assert put.headers["authorization"].startswith("Basic ")
+
+
+@pytest.mark.asyncio
+async def test_base_url_override(env, monkeypatch, httpx_mock):
+    monkeypatch.setenv("FRESHDESK_BASE_URL", "http://127.0.0.1:8900/api/v2/")
+    httpx_mock.add_response(url="http://127.0.0.1:8900/api/v2/contacts/5", json={"id": 5})
+
+    assert await server.get_contact(5) == {"id": 5}
+    assert server.lane_controller.stats["interactive"]["requests"] == 1
+
+
+@pytest.mark.asyncio
+async def test_idempotent_requests_are_retried(env, httpx_mock):
+    httpx_mock.add_response(url=f"{BASE}/contacts/5", status_code=503)
+    httpx_mock.add_response(url=f"{BASE}/contacts/5", status_code=429, headers={"Retry-After": "0"})
+    httpx_mock.add_response(url=f"{BASE}/contacts/5", json={"id": 5})
+    httpx_mock.add_response(url=f"{BASE}/canned_response_folders", method="POST", status_code=503, json={})
+
+    assert await server.get_contact(5) == {"id": 5}
+    assert await server.create_canned_response_folder("Billing") == {}
+
+    metrics = (await server.get_request_metrics())["endpoints"]
+    assert metrics["get_contact"]["retries"] == 2
+    assert metrics["create_canned_response_folder"]["retries"] == 0
+    assert metrics["create_canned_response_folder"]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_at_the_limit(env, monkeypatch, httpx_mock):
+    monkeypatch.setenv("FRESHDESK_RETRIES", "1")
+    httpx_mock.add_response(url=f"{BASE}/contacts/5", status_code=502, json={"code": "bad_gateway"}, is_reusable=True)
+
+    assert await server.get_contact(5) == {"code": "bad_gateway"}
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.asyncio
+async def test_cacheable_responses_are_reused_until_a_write(env, httpx_mock):
+    httpx_mock.add_response(url=f"{BASE}/contact_fields", json=[{"id": 1}], is_reusable=True)
+    httpx_mock.add_response(url=f"{BASE}/contact_fields/1", method="PUT", json={"id": 1})
+
+    assert await server.list_contact_fields() == [{"id": 1}]
+    assert await server.list_contact_fields() == [{"id": 1}]
+    assert len(httpx_mock.get_requests(method="GET")) == 1
+
+    await server.update_contact_field(1, {"label": "Phone"})
+    await server.list_contact_fields()
+    assert len(httpx_mock.get_requests(method="GET")) == 2
+    assert server.request_metrics.snapshot()["list_contact_fields"]["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_outbox_jobs_are_delivered_relative_to_the_base_url(env, httpx_mock):
+    httpx_mock.add_response(url=f"{BASE}/tickets/1/reply", method="POST", status_code=201, json={"id": 3})
+    job = {"kind": "reply", "path": "/tickets/1/reply", "payload": {"body": "x"}}
+
+    response = await server._deliver_outbox_job(job)
+
+    assert response.status_code == 201
+    assert httpx_mock.get_requests()[0].url == f"{BASE}/tickets/1/reply"
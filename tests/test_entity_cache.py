@@ -0,0 +1,90 @@
+import pytest
+
+from freshdesk_mcp import server
+from freshdesk_mcp.invalidation import Change, changes
+
+from conftest import BASE
+
+
+@pytest.fixture
+def env(env, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_RETRY_BACKOFF", "0")
+
+
+@pytest.mark.asyncio
+async def test_reads_after_writes_are_served_from_the_write_response(env, monkeypatch, httpx_mock):
+    monkeypatch.setenv("FRESHDESK_VALIDATE_TICKETS", "0")
+    httpx_mock.add_response(url=f"{BASE}/tickets/7", json={"id": 7, "status": 2})
+    httpx_mock.add_response(url=f"{BASE}/tickets/7", method="PUT", json={"id": 7, "status": 4})
+    httpx_mock.add_response(url=f"{BASE}/tickets", method="POST", status_code=201, json={"id": 8, "status": 2})
+
+    assert (await server.get_ticket(7))["status"] == 2
+    assert (await server.get_ticket(7))["status"] == 2
+    await server.update_ticket(7, {"status": 4})
+    assert (await server.get_ticket(7))["status"] == 4
+    await server.create_ticket("Hi", "Body", 2, 1, 2, email="a@example.com")
+    assert (await server.get_ticket(8))["id"] == 8
+
+    assert len(httpx_mock.get_requests(method="GET")) == 1
+    assert server.request_metrics.snapshot()["get_ticket"]["cache_hits"] == 3
+    assert server.entity_cache.snapshot() == {"ticket": 2}
+
+
+@pytest.mark.asyncio
+async def test_writes_update_the_ticket_mirror_without_a_refetch(env, monkeypatch, httpx_mock):
+    monkeypatch.setenv("FRESHDESK_VALIDATE_TICKETS", "0")
+    server.ticket_store.upsert(
+        {"id": 7, "status": 2, "stats": {"first_responded_at": "2024-01-01T00:00:00Z"}, "description_text": "Help"}
+    )
+    server.ticket_store.mark_synced()
+    httpx_mock.add_response(
+        url=f"{BASE}/tickets/7", method="PUT", json={"id": 7, "status": 4, "updated_at": "2024-01-02T00:00:00Z"}
+    )
+
+    await server.update_ticket(7, {"status": 4})
+
+    assert len(httpx_mock.get_requests()) == 1
+    mirrored = server.ticket_store.get(7)
+    assert mirrored.status == 4
+    assert mirrored.get("first_responded_at") == "2024-01-01T00:00:00Z"
+    assert mirrored.description_text == "Help"
+
+
+@pytest.mark.asyncio
+async def test_replies_deletes_and_change_notifications_drop_records(env, httpx_mock):
+    httpx_mock.add_response(url=f"{BASE}/tickets/7", json={"id": 7, "status": 2}, is_reusable=True)
+    httpx_mock.add_response(url=f"{BASE}/tickets/7/reply", method="POST", status_code=201, json={"id": 70})
+    httpx_mock.add_response(url=f"{BASE}/tickets/7", method="DELETE", status_code=204)
+    httpx_mock.add_response(url=f"{BASE}/contacts/5", json={"id": 5, "name": "Ann"}, is_reusable=True)
+
+    await server.get_ticket(7)
+    await server.create_ticket_reply(7, "Thanks")
+    await server.get_ticket(7)
+    await server.delete_ticket(7)
+    await server.get_ticket(7)
+    assert len(httpx_mock.get_requests(url=f"{BASE}/tickets/7", method="GET")) == 3
+
+    await server.get_contact(5)
+    await changes.publish(Change("contact", 5, record={"id": 5, "name": "Ann B"}))
+    assert (await server.get_contact(5))["name"] == "Ann B"
+    await changes.publish(Change("contact", 5))
+    await server.get_contact(5)
+    assert len(httpx_mock.get_requests(url=f"{BASE}/contacts/5")) == 2
+
+
+@pytest.mark.asyncio
+async def test_limits_are_per_kind(env, monkeypatch, httpx_mock):
+    monkeypatch.setenv("FRESHDESK_ENTITY_SIZE_CONTACT", "1")
+    monkeypatch.setenv("FRESHDESK_ENTITY_TTL_GROUP", "0")
+    for contact_id in (1, 2):
+        httpx_mock.add_response(url=f"{BASE}/contacts/{contact_id}", json={"id": contact_id}, is_reusable=True)
+    httpx_mock.add_response(url=f"{BASE}/groups/3", json={"id": 3}, is_reusable=True)
+
+    for contact_id in (1, 2, 2, 1):
+        await server.get_contact(contact_id)
+    await server.view_group(3)
+    await server.view_group(3)
+
+    assert len(httpx_mock.get_requests(url=f"{BASE}/contacts/1")) == 2
+    assert len(httpx_mock.get_requests(url=f"{BASE}/contacts/2")) == 1
+    assert len(httpx_mock.get_requests(url=f"{BASE}/groups/3")) == 2
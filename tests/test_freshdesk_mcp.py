@@ -1,18 +1,16 @@
+import re
 import unittest
-import asyncio
-import os
-from unittest.mock import patch, MagicMock
-import httpx
+
+import pytest
 
 from freshdesk_mcp.server import (
     create_ticket,
     get_ticket,
     update_ticket,
     delete_ticket,
-    build_search_query,
-    build_complex_search_query,
     search_tickets
 )
+from freshdesk_mcp.queries import build_complex_search_query, build_search_query
 
 class TestFreshdeskMCP(unittest.TestCase):
     # ... existing test methods ...
@@ -56,46 +54,33 @@ class TestFreshdeskMCP(unittest.TestCase):
             "(status:2 OR priority:3)"
         )
 
-    @patch("httpx.AsyncClient")
-    def test_search_tickets(self, mock_client):
-        """Test search_tickets functionality"""
-        # Mock the response
-        mock_response = MagicMock()
-        mock_response.json.return_value = {"results": []}
-        mock_response.raise_for_status.return_value = None
-
-        mock_client_instance = MagicMock()
-        mock_client_instance.get.return_value = mock_response
-        mock_client.return_value.__aenter__.return_value = mock_client_instance
-
-        os.environ["FRESHDESK_DOMAIN"] = "test-domain.freshdesk.com"
-        os.environ["FRESHDESK_API_KEY"] = "test_key"
-
-        # Run the async test
-        loop = asyncio.get_event_loop()
-        loop.run_until_complete(self._test_search_tickets(mock_client_instance))
-
-    async def _test_search_tickets(self, mock_client):
-        """Async helper for search_tickets test"""
-        # Test basic search
-        await search_tickets("status:2")
-
-        # Verify the query was properly formatted
-        mock_client.get.assert_called_with(
-            'https://test-domain.freshdesk.com/api/v2/search/tickets',
-            params={'query': '"status:2"'}
-        )
 
-        # Test free text search
-        mock_client.reset_mock()
-        await search_tickets("search term")
+@pytest.mark.asyncio
+async def test_search_tickets(httpx_mock, monkeypatch):
+    """Test search_tickets functionality"""
+    monkeypatch.setenv("FRESHDESK_DOMAIN", "test-domain.freshdesk.com")
+    monkeypatch.setenv("FRESHDESK_API_KEY", "test_key")
+    httpx_mock.add_response(
+        url=re.compile(r"https://test-domain\.freshdesk\.com/api/v2/search/tickets\?.*"),
+        json={"results": []},
+        is_reusable=True,
+    )
+
+    # Test basic search
+    await search_tickets("status:2")
+
+    # Verify the query was properly formatted
+    request = httpx_mock.get_requests()[-1]
+    assert request.url.copy_with(query=None) == "https://test-domain.freshdesk.com/api/v2/search/tickets"
+    assert request.url.params["query"] == '"status:2"'
+
+    # Test free text search
+    await search_tickets("search term")
+
+    # Verify it searches in description and subject (single-quoted values, outer double quotes)
+    request = httpx_mock.get_requests()[-1]
+    assert request.url.params["query"] == '"(description:\'search term\' OR subject:\'search term\')"'
 
-        # Verify it searches in description and subject (single-quoted values, outer double quotes)
-        _, kwargs = mock_client.get.call_args
-        self.assertEqual(
-            kwargs["params"]["query"],
-            '"(description:\'search term\' OR subject:\'search term\')"',
-        )
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+
+import httpx
+import pytest
+
+from freshdesk_mcp import server
+from freshdesk_mcp.lanes import Lane, LaneController, current_lane, use_lane
+
+from conftest import BASE
+
+
+def test_nested_lanes_never_raise_priority():
+    with use_lane(Lane.BULK):
+        with use_lane(Lane.INTERACTIVE) as lane:
+            assert lane is Lane.BULK
+    with use_lane(Lane.BACKGROUND):
+        assert current_lane() is Lane.BACKGROUND
+    assert current_lane() is Lane.INTERACTIVE
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_admitted_by_priority(monkeypatch):
+    monkeypatch.setenv("FRESHDESK_MAX_CONCURRENCY", "1")
+    monkeypatch.setenv("FRESHDESK_INTERACTIVE_SLOTS", "0")
+    controller = LaneController()
+    admitted = []
+
+    async def request(lane):
+        await controller.acquire(lane)
+        admitted.append(lane)
+
+    await controller.acquire(Lane.BULK)
+    waiting = [asyncio.create_task(request(lane)) for lane in (Lane.BULK, Lane.BACKGROUND, Lane.INTERACTIVE)]
+    await asyncio.sleep(0)
+    assert admitted == []
+
+    for _ in waiting:
+        controller.release()
+        await asyncio.sleep(0)
+    assert admitted == [Lane.INTERACTIVE, Lane.BACKGROUND, Lane.BULK]
+
+
+@pytest.mark.asyncio
+async def test_slots_are_reserved_for_interactive_calls(monkeypatch):
+    monkeypatch.setenv("FRESHDESK_MAX_CONCURRENCY", "3")
+    monkeypatch.setenv("FRESHDESK_INTERACTIVE_SLOTS", "1")
+    controller = LaneController()
+
+    await controller.acquire(Lane.BULK)
+    await controller.acquire(Lane.BACKGROUND)
+    blocked = asyncio.create_task(controller.acquire(Lane.BULK))
+    await asyncio.sleep(0)
+    assert not blocked.done()
+
+    await asyncio.wait_for(controller.acquire(Lane.INTERACTIVE), 0.1)
+    blocked.cancel()
+
+
+@pytest.mark.asyncio
+async def test_rate_budget_keeps_a_reserve_for_interactive_calls(monkeypatch):
+    monkeypatch.setenv("FRESHDESK_RATE_LIMIT", "10")
+    monkeypatch.setenv("FRESHDESK_INTERACTIVE_RESERVE", "0.5")
+    controller = LaneController()
+
+    for _ in range(5):
+        await asyncio.wait_for(controller.acquire(Lane.BULK), 0.1)
+        controller.release()
+    blocked = asyncio.create_task(controller.acquire(Lane.BULK))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    for _ in range(4):
+        await asyncio.wait_for(controller.acquire(Lane.INTERACTIVE), 0.1)
+        controller.release()
+    blocked.cancel()
+    assert controller.snapshot()["lanes"]["interactive"]["waited"] == 0
+
+
+@pytest.mark.asyncio
+async def test_429_pauses_every_lane(monkeypatch):
+    controller = LaneController()
+    controller.observe(httpx.Response(429, headers={"Retry-After": "0.05"}))
+
+    started = asyncio.get_running_loop().time()
+    await asyncio.wait_for(controller.acquire(Lane.INTERACTIVE), 1)
+    assert asyncio.get_running_loop().time() - started >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_tool_requests_flow_through_the_controller(httpx_mock, env):
+    httpx_mock.add_response(
+        url=f"{BASE}/tickets/1",
+        json={"id": 1},
+        headers={"X-Ratelimit-Total": "400", "X-Ratelimit-Remaining": "150"},
+    )
+
+    assert (await server.get_ticket(1))["id"] == 1
+
+    snapshot = server.lane_controller.snapshot()
+    assert snapshot["active"] == 0
+    assert snapshot["capacity_per_minute"] == 400
+    assert snapshot["tokens"] <= 151
+    assert snapshot["lanes"]["interactive"]["requests"] == 1
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from freshdesk_mcp import loadtest
+from freshdesk_mcp.probes import LoopLagMonitor
+
+
+@pytest.mark.asyncio
+async def test_stand_in_serves_paged_tickets_search_and_replies():
+    app = loadtest.create_stand_in(tickets=50, latency=0)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://stand-in/api/v2") as client:
+        page = await client.get("/tickets", params={"page": 1, "per_page": 20})
+        assert [t["id"] for t in page.json()][:2] == [50, 49]
+        assert 'rel="next"' in page.headers["link"]
+
+        results = (await client.get("/search/tickets", params={"query": '"status:2"'})).json()
+        assert results["total"] > 0
+        assert all(t["status"] == 2 for t in results["results"])
+
+        before = len((await client.get("/tickets/7/conversations")).json())
+        reply = await client.post("/tickets/7/reply", json={"body": "hi"})
+        assert reply.status_code == 201
+        assert len((await client.get("/tickets/7/conversations")).json()) == before + 1
+
+        assert (await client.get("/tickets/51")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_memory_run_reports_calls_latency_and_timeline():
+    config = loadtest.LoadTestConfig(
+        clients=3, requests=4, duration=30, transport="memory", latency=0, sample_interval=0.05, mix="triage"
+    )
+
+    report = await loadtest.run(config)
+
+    assert report["calls"] == 12
+    assert report["errors"] == 0
+    assert set(report["tools"]) <= {name for _, name, _ in loadtest.TRIAGE}
+    assert report["latency"]["p99_ms"] >= report["latency"]["p50_ms"]
+    assert report["timeline"] and sum(point["calls"] for point in report["timeline"]) == 12
+    assert report["server"]["max_loop_lag_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_run_rejects_unknown_settings():
+    with pytest.raises(ValueError):
+        await loadtest.run(loadtest.LoadTestConfig(transport="carrier-pigeon"))
+    with pytest.raises(ValueError):
+        await loadtest.run(loadtest.LoadTestConfig(mix="everything"))
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert loadtest.percentile(values, 0.5) == 50
+    assert loadtest.percentile(values, 0.99) == 99
+    assert loadtest.percentile([], 0.5) is None
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_sees_a_blocked_loop():
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.02)
+    time.sleep(0.1)
+    await asyncio.sleep(0.02)
+    await monitor.stop()
+
+    snapshot = monitor.snapshot()
+    assert snapshot["max_ms"] >= 80
+    assert monitor.snapshot()["samples"] == 0
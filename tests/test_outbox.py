@@ -0,0 +1,158 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from freshdesk_mcp import server
+from freshdesk_mcp.outbox import Outbox
+
+from conftest import BASE
+
+
+@pytest.fixture
+def outbox_path(tmp_path, monkeypatch):
+    path = tmp_path / "outbox.sqlite3"
+    monkeypatch.setenv("FRESHDESK_OUTBOX_PATH", str(path))
+    return path
+
+
+async def _wait_for(job_id, status, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = await server.get_outbox_status(job_id)
+        if job["status"] == status or time.monotonic() > deadline:
+            return job
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_reply_is_queued_and_delivered_once(httpx_mock, env, outbox_path):
+    httpx_mock.add_response(
+        url=f"{BASE}/tickets/7/reply", method="POST", json={"id": 70, "ticket_id": 7, "body": "Hi"}
+    )
+
+    ack = await server.create_ticket_reply(7, "Hi")
+    again = await server.create_ticket_reply(7, "Hi")
+
+    assert ack["queued"] is True
+    assert again["job_id"] == ack["job_id"]
+    job = await _wait_for(ack["job_id"], "delivered")
+    assert job["status"] == "delivered"
+    assert job["response"]["id"] == 70
+    assert len(httpx_mock.get_requests()) == 1
+    assert (await server.get_outbox_status())["counts"]["delivered"] == 1
+    # Let the workers see their cancellation before the event loop closes.
+    server.outbox.stop()
+    await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_queue_false_and_disabled_outbox_post_directly(httpx_mock, env, monkeypatch):
+    httpx_mock.add_response(url=f"{BASE}/tickets/7/notes", method="POST", json={"id": 71})
+
+    assert await server.create_ticket_note(7, "Internal") == {"id": 71}
+    assert "disabled" in (await server.create_ticket_note(7, "Internal", queue=True))["error"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_pauses_workers_and_does_not_use_attempts(outbox_path):
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(503),
+        httpx.Response(200, json={"id": 1}),
+    ]
+    outbox = Outbox(lambda job: _respond(responses))
+
+    job = await outbox.enqueue("note", "POST", "/tickets/1/notes", {"body": "x"})
+    assert await outbox.process_once()
+    job = await outbox.get(job["id"])
+    assert (job["status"], job["attempts"], job["last_error"]) == ("pending", 0, "Rate limited (429)")
+
+    assert await outbox.process_once()
+    job = await outbox.get(job["id"])
+    assert (job["status"], job["attempts"]) == ("pending", 1)
+    assert job["next_attempt_at"] > time.time()
+
+    assert not await outbox.process_once()  # backing off
+
+
+async def _respond(responses):
+    return responses.pop(0)
+
+
+@pytest.mark.asyncio
+async def test_rejected_jobs_fail_and_can_be_retried(outbox_path):
+    responses = [httpx.Response(400, json={"description": "Validation failed"}), httpx.Response(201, json={"id": 9})]
+    delivered = []
+
+    async def on_delivered(job):
+        delivered.append(job["response"])
+
+    outbox = Outbox(lambda job: _respond(responses), on_delivered)
+    job = await outbox.enqueue("reply", "POST", "/tickets/1/reply", {"body": "x"}, idempotency_key="k1")
+
+    await outbox.process_once()
+    failed = await outbox.get(job["id"])
+    assert failed["status"] == "failed"
+    assert failed["response"] == {"description": "Validation failed"}
+
+    await outbox.retry(job["id"])
+    await outbox.process_once()
+    assert (await outbox.get(job["id"]))["status"] == "delivered"
+    assert delivered == [{"id": 9}]
+
+
+@pytest.mark.asyncio
+async def test_jobs_in_flight_are_taken_over_only_after_their_lease(outbox_path, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_OUTBOX_LEASE", "0.1")
+    first = Outbox(lambda job: _respond([]))
+    job = await first.enqueue("note", "POST", "/tickets/1/notes", {"body": "x"})
+    await first._claim()
+
+    # Another process sharing the file must not send a job that is still being sent.
+    other = Outbox(lambda job: _respond([httpx.Response(201, json={"id": 5})]))
+    assert (await other.get(job["id"]))["status"] == "in_flight"
+    assert not await other.process_once()
+
+    await asyncio.sleep(0.15)
+    assert await other.process_once()
+    assert (await other.get(job["id"]))["status"] == "delivered"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_claims_send_each_job_once(outbox_path):
+    sent = []
+
+    async def deliver(job):
+        sent.append(job["id"])
+        return httpx.Response(201, json={"id": 1})
+
+    processes = [Outbox(deliver) for _ in range(4)]
+    for index in range(10):
+        await processes[0].enqueue("note", "POST", "/tickets/1/notes", {"body": str(index)})
+
+    async def drain(outbox):
+        while await outbox.process_once():
+            pass
+
+    await asyncio.gather(*(drain(outbox) for outbox in processes))
+    assert len(sent) == len(set(sent)) == 10
+
+
+@pytest.mark.asyncio
+async def test_writes_without_a_key_are_only_deduplicated_within_the_window(outbox_path, monkeypatch):
+    outbox = Outbox(lambda job: _respond([]))
+    first = await outbox.enqueue("reply", "POST", "/tickets/1/reply", {"body": "Thanks"})
+    repeat = await outbox.enqueue("reply", "POST", "/tickets/1/reply", {"body": "Thanks"})
+    assert repeat["id"] == first["id"]
+
+    later = time.time() + 3600
+    monkeypatch.setattr(time, "time", lambda: later)
+    repeat = await outbox.enqueue("reply", "POST", "/tickets/1/reply", {"body": "Thanks"})
+    assert repeat["id"] != first["id"]
+    # A caller's key never expires.
+    keyed = await outbox.enqueue("reply", "POST", "/tickets/1/reply", {"body": "Hi"}, idempotency_key="k")
+    monkeypatch.setattr(time, "time", lambda: later + 86_400)
+    again = await outbox.enqueue("reply", "POST", "/tickets/1/reply", {"body": "Hi"}, idempotency_key="k")
+    assert again["id"] == keyed["id"]
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import os
+import pstats
+import time
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from freshdesk_mcp import profiling, server
+
+from conftest import BASE
+
+
+@pytest.fixture
+def env(env, monkeypatch, tmp_path):
+    monkeypatch.setenv("FRESHDESK_PROFILE_DIR", str(tmp_path))
+
+
+def test_wanted_follows_the_environment(monkeypatch):
+    monkeypatch.delenv("FRESHDESK_PROFILE", raising=False)
+    assert not profiling.wanted("get_ticket")
+    monkeypatch.setenv("FRESHDESK_PROFILE", "get_ticket, search_tickets")
+    assert profiling.wanted("search_tickets")
+    assert not profiling.wanted("get_contact")
+    monkeypatch.setenv("FRESHDESK_PROFILE", "*")
+    assert profiling.wanted("get_contact")
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_are_profiled_end_to_end(env, monkeypatch, tmp_path, httpx_mock):
+    monkeypatch.setenv("FRESHDESK_PROFILE", "get_contact")
+    httpx_mock.add_response(url=f"{BASE}/contacts/5", json={"id": 5})
+
+    async with create_connected_server_and_client_session(server.mcp) as session:
+        await session.call_tool("get_contact", {"contact_id": 5})
+
+    files = [name for name in os.listdir(tmp_path) if name.endswith(".pstats")]
+    assert len(files) == 1 and "-get_contact-" in files[0]
+    functions = {name for _, _, name in pstats.Stats(str(tmp_path / files[0])).stats}
+    # Argument validation happens outside the tool function and is included.
+    assert "call_fn_with_arg_validation" in functions
+    assert server.profiler.snapshot()["written"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sampling_profiles_are_collapsed_stacks_and_rotated(env, monkeypatch, tmp_path):
+    monkeypatch.setenv("FRESHDESK_PROFILE_MODE", "sample")
+    monkeypatch.setenv("FRESHDESK_PROFILE_INTERVAL", "1")
+    monkeypatch.setenv("FRESHDESK_PROFILE_KEEP", "2")
+    profiler = profiling.Profiler()
+
+    for _ in range(3):
+        async with profiler.profile("slow_tool"):
+            time.sleep(0.03)
+        # Distinct modification times for rotation.
+        await asyncio.sleep(0.01)
+
+    files = sorted(name for name in os.listdir(tmp_path) if name.endswith(".folded"))
+    assert len(files) == 2
+    lines = (tmp_path / files[-1]).read_text().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert "test_sampling_profiles_are_collapsed_stacks_and_rotated" in stack
+    assert int(count) > 0
+
+
+@pytest.mark.asyncio
+async def test_overlapping_and_fast_calls_are_not_written(env, monkeypatch, tmp_path):
+    monkeypatch.setenv("FRESHDESK_PROFILE_MIN_MS", "1000")
+    profiler = profiling.Profiler()
+
+    async with profiler.profile("outer"):
+        async with profiler.profile("inner"):
+            pass
+
+    assert profiler.snapshot()["skipped_overlapping"] == 1
+    assert profiler.snapshot()["discarded"] == 1
+    assert not os.listdir(tmp_path)
+
+
+def _block_the_loop():
+    time.sleep(0.2)
+
+
+@pytest.mark.asyncio
+async def test_watchdog_reports_loop_blocks_with_their_stack(env, monkeypatch, tmp_path):
+    monkeypatch.setenv("FRESHDESK_LOOP_BLOCK_MS", "40")
+    watchdog = profiling.LoopWatchdog()
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.05)
+        _block_the_loop()
+        await asyncio.sleep(0.1)
+    finally:
+        watchdog.stop()
+
+    snapshot = watchdog.snapshot()
+    assert snapshot["episodes"] == 1
+    episode = snapshot["recent"][0]
+    assert episode["duration_ms"] >= 100
+    assert episode["stack"][-1].startswith("_block_the_loop")
+    recorded = json.loads((tmp_path / profiling.BLOCKS_FILE).read_text())
+    assert recorded["duration_ms"] == episode["duration_ms"]
+
+
+@pytest.mark.asyncio
+async def test_watchdog_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("FRESHDESK_LOOP_BLOCK_MS", raising=False)
+    watchdog = profiling.LoopWatchdog()
+    watchdog.start()
+    assert not watchdog.running()
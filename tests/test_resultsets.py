@@ -0,0 +1,73 @@
+import pytest
+
+from freshdesk_mcp import resultsets, server
+from freshdesk_mcp.resultsets import ResultSetStore
+
+from conftest import BASE
+
+
+@pytest.fixture
+def env(env, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_RETRY_BACKOFF", "0")
+
+
+def test_chunks_follow_cursors_until_the_set_is_drained():
+    store = ResultSetStore()
+    first = store.create("numbers", list(range(25)), limit=10)
+    assert first["items"] == list(range(10)) and first["total"] == 25
+    assert store.snapshot() == {"sets": 1, "items": 25}
+
+    second = store.fetch(first["next_cursor"], limit=10)
+    assert second["items"] == list(range(10, 20)) and second["offset"] == 10
+    last = store.fetch(second["next_cursor"], limit=10)
+    assert last["items"] == list(range(20, 25)) and last["next_cursor"] is None
+    assert store.snapshot() == {"sets": 0, "items": 0}
+    assert "error" in store.fetch(second["next_cursor"])
+
+
+def test_small_results_are_not_stored():
+    store = ResultSetStore()
+    result = store.create("numbers", [1, 2, 3], limit=10)
+    assert result["next_cursor"] is None
+    assert store.snapshot()["sets"] == 0
+
+
+def test_sets_expire_and_the_least_recently_used_is_evicted(monkeypatch):
+    store = ResultSetStore()
+    monkeypatch.setenv("FRESHDESK_RESULT_SETS", "2")
+    a = store.create("a", list(range(5)), limit=1)
+    b = store.create("b", list(range(5)), limit=1)
+    store.fetch(a["next_cursor"], limit=1)
+    store.create("c", list(range(5)), limit=1)
+    assert "error" in store.fetch(b["next_cursor"])
+    assert store.snapshot()["sets"] == 2
+
+    clock = [1000.0]
+    monkeypatch.setattr(resultsets.time, "monotonic", lambda: clock[0])
+    monkeypatch.setenv("FRESHDESK_RESULT_SET_TTL", "60")
+    d = store.create("d", list(range(5)), limit=1)
+    clock[0] += 61
+    assert "expired" in store.fetch(d["next_cursor"])["error"]
+    assert store.fetch("not a cursor!")["error"] == "Invalid cursor"
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_pages_once_and_fetch_more_serves_from_memory(env, httpx_mock):
+    contacts = [{"id": i} for i in range(250)]
+    for page in (1, 2, 3):
+        httpx_mock.add_response(
+            url=f"{BASE}/contacts?page={page}&per_page=100", json=contacts[(page - 1) * 100:page * 100]
+        )
+
+    first = await server.list_contacts(fetch_all=True)
+    assert first["kind"] == "contacts" and first["total"] == 250
+    assert len(first["items"]) == resultsets.DEFAULT_CHUNK
+
+    seen = list(first["items"])
+    cursor = first["next_cursor"]
+    while cursor:
+        chunk = await server.fetch_more(cursor)
+        seen.extend(chunk["items"])
+        cursor = chunk["next_cursor"]
+    assert seen == contacts
+    assert len(httpx_mock.get_requests()) == 3
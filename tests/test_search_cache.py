@@ -0,0 +1,72 @@
+import pytest
+
+from freshdesk_mcp import server
+from freshdesk_mcp.invalidation import Change, changes
+from freshdesk_mcp.queries import canonical_query, matches
+
+from conftest import BASE
+
+SEARCH = f"{BASE}/search/tickets"
+
+
+@pytest.fixture
+def env(env, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_RETRY_BACKOFF", "0")
+
+
+def test_equivalent_queries_share_a_canonical_form():
+    canonical = canonical_query('"(status:2 OR status:3) AND priority:>3"')
+    assert canonical == "((status:2 OR status:3) AND priority:>3)"
+    assert canonical_query("priority :>= 3   and (status:3 or status:2)") == canonical
+    assert canonical_query("type:Question") == canonical_query("type:\"Question\"") == "type:'Question'"
+    # Mixed operators keep their order; unparseable queries are only trimmed.
+    assert canonical_query("a:1 AND b:2 OR c:3") != canonical_query("c:3 OR a:1 AND b:2")
+    assert canonical_query("  not   a query ((") == "not a query (("
+
+
+def test_matches_uses_three_valued_logic():
+    ticket = {"id": 1, "status": 2, "priority": 3, "tags": ["VIP"], "created_at": "2024-02-01T10:00:00Z",
+              "custom_fields": {"cf_region": "EU"}}
+    assert matches("status:2 AND priority:>3", ticket) is True
+    assert matches("tag:'vip' AND cf_region:'eu'", ticket) is True
+    assert matches("created_at:<'2024-01-31'", ticket) is False
+    assert matches("status:3 OR unknown_field:1", ticket) is None
+    assert matches("status:3 AND unknown_field:1", ticket) is False
+
+
+@pytest.mark.asyncio
+async def test_equivalent_searches_are_served_from_the_cache(env, httpx_mock):
+    httpx_mock.add_response(url=f"{SEARCH}?query=%22status%3A2+AND+priority%3A3%22", json={"results": [], "total": 0})
+    httpx_mock.add_response(url=f"{BASE}/contacts/autocomplete?term=Ann", json=[{"id": 5}])
+
+    first = await server.search_tickets("status:2 AND priority:3")
+    assert await server.search_tickets('"(priority:3  and status:2)"') == first
+    assert await server.search_contacts("Ann") == await server.search_contacts("  ann ")
+
+    assert len(httpx_mock.get_requests()) == 2
+    assert server.request_metrics.snapshot()["search_tickets"]["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ticket_writes_only_drop_searches_they_affect(env, httpx_mock, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_RESPONSE_CACHE_TTL", "0")
+    monkeypatch.setenv("FRESHDESK_VALIDATE_TICKETS", "0")
+    httpx_mock.add_response(url=f"{SEARCH}?query=%22status%3A2%22", json={"results": [{"id": 1}], "total": 1},
+                            is_reusable=True)
+    httpx_mock.add_response(url=f"{SEARCH}?query=%22priority%3A4%22", json={"results": [], "total": 0},
+                            is_reusable=True)
+    httpx_mock.add_response(url=f"{BASE}/tickets/7", method="PUT", json={"id": 7, "status": 5, "priority": 4})
+
+    await server.search_tickets("status:2")
+    await server.search_tickets("priority:4")
+    # Ticket 7 was in neither result; it now matches priority:4 but not status:2.
+    await server.update_ticket(7, {"status": 5, "priority": 4})
+    await server.search_tickets("status:2")
+    await server.search_tickets("priority:4")
+
+    searches = [request.url.params["query"] for request in httpx_mock.get_requests(method="GET")]
+    assert searches == ['"status:2"', '"priority:4"', '"priority:4"']
+
+    await changes.publish(Change("ticket", 1))
+    await server.search_tickets("status:2")
+    assert len(httpx_mock.get_requests(method="GET")) == 4
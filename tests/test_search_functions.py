@@ -1,6 +1,7 @@
 import pytest
 
-from freshdesk_mcp.server import build_complex_search_query, build_search_query, search_tickets
+from freshdesk_mcp.queries import build_complex_search_query, build_search_query
+from freshdesk_mcp.server import search_tickets
 
 
 def test_build_search_query_string():
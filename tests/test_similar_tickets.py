@@ -0,0 +1,60 @@
+import re
+
+import httpx
+import pytest
+
+pytest.importorskip("numpy")
+
+from freshdesk_mcp import server
+from freshdesk_mcp.similarity import SimilarityIndex
+
+from conftest import BASE
+
+
+TICKETS = [
+    {"id": 1, "subject": "VPN disconnects every hour", "description_text": "The VPN client drops the connection.",
+     "status": 2, "updated_at": "2024-05-01T00:00:00Z"},
+    {"id": 2, "subject": "Refund for duplicate charge", "description_text": "I was charged twice for my order.",
+     "status": 2, "updated_at": "2024-05-01T01:00:00Z"},
+    {"id": 3, "subject": "VPN connection keeps dropping", "description_text": "VPN disconnects after an hour.",
+     "status": 3, "updated_at": "2024-05-01T02:00:00Z"},
+]
+
+
+def test_index_ranks_by_cosine_similarity_and_updates_in_place():
+    index = SimilarityIndex(features=4096)
+    for ticket in TICKETS:
+        index.add(ticket["id"], ticket["subject"], ticket["description_text"])
+
+    matches = index.search("VPN keeps disconnecting", None, limit=5)
+    assert [ticket_id for ticket_id, _ in matches] == [3, 1]
+    assert 0 < matches[1][1] <= matches[0][1] <= 1
+
+    index.add(1, "Printer is jammed", None)
+    index.remove(3)
+    assert index.search("VPN", None) == []
+    assert [ticket_id for ticket_id, _ in index.search("printer", None)] == [1]
+
+
+@pytest.mark.asyncio
+async def test_find_similar_tickets_compares_a_ticket_with_the_store(env, httpx_mock):
+    def handler(request: httpx.Request) -> httpx.Response:
+        since = request.url.params["updated_since"]
+        return httpx.Response(200, json=TICKETS if since == server.TICKET_SYNC_EPOCH else [])
+
+    httpx_mock.add_callback(handler, url=re.compile(rf"{re.escape(BASE)}/tickets\?.*"), is_reusable=True)
+    httpx_mock.add_response(url=f"{BASE}/tickets/1", json=TICKETS[0])
+    httpx_mock.add_response(url=f"{BASE}/tickets/1/conversations?per_page=1",
+                            json=[{"body_text": "Still losing the VPN connection."}])
+
+    assert "error" in await server.find_similar_tickets(text="vpn")
+    await server.sync_ticket_store()
+
+    result = await server.find_similar_tickets(ticket_id=1)
+    assert [match["id"] for match in result["results"]] == [3]
+    assert result["results"][0]["subject"] == "VPN connection keeps dropping"
+    assert result["indexed"] == 3
+
+    result = await server.find_similar_tickets(text="charged twice", refresh=False)
+    assert result["results"][0]["id"] == 2
+    assert "error" in await server.find_similar_tickets(ticket_id=1, text="vpn")
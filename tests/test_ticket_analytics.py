@@ -0,0 +1,93 @@
+import re
+
+import httpx
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from freshdesk_mcp import server
+from freshdesk_mcp.analytics import TicketColumns, run_report
+
+NOW = np.datetime64("2024-05-10T12:00:00")
+
+
+def _tickets():
+    return [
+        {"id": 1, "status": 2, "priority": 1, "group_id": 7, "tags": ["vip", "billing"], "type": "Question",
+         "created_at": "2024-05-09T12:00:00Z", "first_responded_at": "2024-05-09T13:00:00Z"},
+        {"id": 2, "status": 2, "priority": 3, "group_id": 7, "tags": ["billing"], "type": "Incident",
+         "created_at": "2024-05-08T12:00:00Z", "first_responded_at": "2024-05-08T22:00:00Z"},
+        {"id": 3, "status": 4, "priority": 1, "group_id": None, "tags": [], "type": "Question",
+         "created_at": "2024-05-08T00:00:00Z", "resolved_at": "2024-05-10T00:00:00Z"},
+    ]
+
+
+def test_counts_by_status_with_labels_and_tags():
+    cols = TicketColumns.from_tickets(_tickets())
+
+    counts = run_report(cols, "counts", dimension="status", labels={"status": {2: "Open", 4: "Resolved"}}, now=NOW)
+    assert counts["rows"] == [[2, "Open", 2], [4, "Resolved", 1]]
+
+    tags = run_report(cols, "counts", dimension="tag", now=NOW)
+    assert tags["rows"] == [["billing", 2], ["vip", 1]]
+
+    groups = run_report(cols, "counts", dimension="group", statuses=[2], now=NOW)
+    assert groups["rows"] == [[7, 2]]
+
+
+def test_created_vs_resolved_per_day():
+    cols = TicketColumns.from_tickets(_tickets())
+
+    result = run_report(cols, "created_vs_resolved", days=2, now=NOW)
+
+    assert result["rows"] == [
+        ["2024-05-08", 2, 0],
+        ["2024-05-09", 1, 0],
+        ["2024-05-10", 0, 1],
+    ]
+
+
+def test_age_and_duration_distributions():
+    cols = TicketColumns.from_tickets(_tickets())
+
+    age = run_report(cols, "age", now=NOW)
+    assert age["count"] == 2
+    assert age["percentiles"]["rows"][0] == [50, 36.0]
+
+    first_response = run_report(cols, "first_response_time", days=None, now=NOW)
+    assert first_response["count"] == 2
+    assert first_response["histogram"]["rows"][0] == ["0-1h", 0]
+    assert first_response["histogram"]["rows"][1] == ["1-4h", 1]
+
+    with pytest.raises(ValueError):
+        run_report(cols, "counts", now=NOW)
+
+
+@pytest.mark.asyncio
+async def test_sync_then_report_without_further_listing(env, httpx_mock, monkeypatch):
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        assert params["order_by"] == "updated_at"
+        assert params["include"] == "stats"
+        if params["updated_since"] == server.TICKET_SYNC_EPOCH:
+            return httpx.Response(200, json=[
+                {"id": 1, "status": 2, "updated_at": "2024-05-01T00:00:00Z", "stats": {"resolved_at": None}},
+                {"id": 2, "status": 5, "updated_at": "2024-05-02T00:00:00Z"},
+            ])
+        assert params["updated_since"] == "2024-05-02T00:00:00Z"
+        return httpx.Response(200, json=[{"id": 2, "status": 2, "updated_at": "2024-05-03T00:00:00Z"}])
+
+    httpx_mock.add_callback(
+        handler, url=re.compile(r"https://test-domain\.freshdesk\.com/api/v2/tickets\?.*"), is_reusable=True
+    )
+
+    assert (await server.ticket_analytics("counts", dimension="status"))["error"].startswith("The local ticket store")
+
+    synced = await server.sync_ticket_store()
+    assert synced["complete"] and synced["tickets"] == 2
+
+    report = await server.ticket_analytics("counts", dimension="status", days=None)
+    assert report["rows"] == [[2, "Open", 2]]
+    assert report["synced_until"] == "2024-05-03T00:00:00Z"
+    assert len(httpx_mock.get_requests()) == 2
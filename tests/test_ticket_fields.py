@@ -0,0 +1,88 @@
+import pytest
+
+from freshdesk_mcp import server
+from freshdesk_mcp.ticketfields import compile_ticket_fields
+
+from conftest import BASE
+
+
+FIELDS = [
+    {"name": "requester", "type": "default_requester", "default": True, "required_for_agents": True},
+    {"name": "status", "type": "default_status", "default": True,
+     "choices": {"2": ["Open", "Being Processed"], "4": ["Resolved", "This ticket has been Resolved"]}},
+    {"name": "priority", "type": "default_priority", "default": True, "choices": {"Low": 1, "High": 3}},
+    {"name": "ticket_type", "type": "default_ticket_type", "default": True, "choices": ["Question", "Problem"]},
+    {"name": "group", "type": "default_group", "default": True, "required_for_agents": True,
+     "choices": {"Billing": 11}},
+    {"name": "cf_region", "type": "custom_dropdown", "default": False, "required_for_agents": True,
+     "choices": ["EU", "US"]},
+    {"name": "cf_seats", "type": "custom_number", "default": False},
+    {"name": "cf_root_cause", "type": "custom_text", "default": False, "required_for_closure": True},
+    {"name": "cf_product", "type": "nested_field", "default": False,
+     "choices": {"Phone": {"Model A": ["Screen", "Battery"], "Model B": []}, "Laptop": {}},
+     "nested_ticket_fields": [{"name": "cf_item", "level": 3}, {"name": "cf_model", "level": 2}]},
+]
+
+
+@pytest.fixture
+def env(env, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_RETRY_BACKOFF", "0")
+
+
+def _fields(errors):
+    return sorted((error["field"], error["code"]) for error in errors)
+
+
+def test_compiled_validator_checks_choices_types_and_required_fields():
+    validator = compile_ticket_fields(FIELDS)
+    valid = {"status": 2, "priority": 3, "group_id": 11, "type": "Question",
+             "custom_fields": {"cf_region": "EU", "cf_seats": 4,
+                               "cf_product": "Phone", "cf_model": "Model A", "cf_item": "Battery"}}
+    assert validator.errors(valid, creating=True) == []
+
+    invalid = {"status": 3, "priority": 3, "type": "Bug",
+               "custom_fields": {"cf_region": "APAC", "cf_seats": "4", "cf_colour": "red",
+                                 "cf_product": "Phone", "cf_model": "Model C"}}
+    assert _fields(validator.errors(invalid, creating=True)) == [
+        ("cf_colour", "invalid_field"), ("cf_model", "invalid_value"), ("cf_region", "invalid_value"),
+        ("cf_seats", "invalid_value"), ("group_id", "missing_field"), ("status", "invalid_value"),
+        ("type", "invalid_value"),
+    ]
+    # Updates only check what they send, and a lower nested level needs the one above.
+    assert _fields(validator.errors({"custom_fields": {"cf_item": "Screen"}}, creating=False)) == [
+        ("cf_item", "missing_field"),
+    ]
+    closing = {**valid, "status": 4}
+    assert _fields(validator.errors(closing, creating=True)) == [("cf_root_cause", "missing_field")]
+
+
+def test_built_in_values_apply_when_the_schema_omits_a_field():
+    validator = compile_ticket_fields([], defaults=server.TICKET_ENUMS)
+    assert _fields(validator.errors({"source": 99, "status": 2}, creating=False)) == [("source", "invalid_value")]
+
+
+@pytest.mark.asyncio
+async def test_invalid_tickets_are_rejected_before_any_write(env, httpx_mock):
+    httpx_mock.add_response(url=f"{BASE}/ticket_fields", json=FIELDS)
+
+    result = await server.create_ticket("Hi", "Body", 2, 1, 2, email="a@example.com",
+                                        custom_fields={"cf_region": "Mars"})
+    assert result.startswith("Validation Error:") and "cf_region" in result and "group_id" in result
+
+    update = await server.update_ticket(7, {"custom_fields": {"cf_seats": "many"}})
+    assert update["success"] is False and "cf_seats" in update["error"]
+
+    assert [request.method for request in httpx_mock.get_requests()] == ["GET"]
+
+
+@pytest.mark.asyncio
+async def test_ticket_field_writes_recompile_the_validator(env, httpx_mock):
+    colour = {"name": "cf_colour", "type": "custom_text", "default": False}
+    httpx_mock.add_response(url=f"{BASE}/ticket_fields", json=FIELDS)
+    httpx_mock.add_response(url=f"{BASE}/admin/ticket_fields", method="POST", json={"id": 9, **colour})
+    httpx_mock.add_response(url=f"{BASE}/ticket_fields", json=FIELDS + [colour])
+    httpx_mock.add_response(url=f"{BASE}/tickets/7", method="PUT", json={"id": 7})
+
+    assert (await server.update_ticket(7, {"custom_fields": {"cf_colour": "red"}}))["success"] is False
+    await server.create_ticket_field({"label": "Colour", "type": "custom_text"})
+    assert (await server.update_ticket(7, {"custom_fields": {"cf_colour": "red"}}))["success"] is True
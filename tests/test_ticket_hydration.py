@@ -0,0 +1,64 @@
+import re
+
+import httpx
+import pytest
+
+from freshdesk_mcp import server
+
+from conftest import BASE
+
+
+def _ticket(ticket_id, requester_id):
+    return {
+        "id": ticket_id,
+        "requester_id": requester_id,
+        "company_id": 31,
+        "responder_id": 11,
+        "group_id": 21,
+    }
+
+
+@pytest.mark.asyncio
+async def test_hydration_fetches_each_distinct_entity_once(httpx_mock, env):
+    # The company directory is cold, so companies go through view_company
+    # rather than a full listing.
+    httpx_mock.add_response(
+        url=f"{BASE}/tickets?page=1&per_page=30",
+        json=[_ticket(n, 41 if n % 2 else 42) for n in range(1, 9)],
+    )
+    httpx_mock.add_response(
+        url=f"{BASE}/agents?page=1&per_page=100",
+        json=[{"id": 11, "contact": {"name": "Ada", "email": "ada@example.com"}}],
+    )
+    httpx_mock.add_response(url=f"{BASE}/groups?page=1&per_page=100", json=[{"id": 21, "name": "Billing"}])
+    httpx_mock.add_response(url=f"{BASE}/companies/31", json={"id": 31, "name": "Acme", "domains": []})
+    httpx_mock.add_response(url=f"{BASE}/contacts/41", json={"id": 41, "name": "Grace", "email": "g@example.com"})
+    httpx_mock.add_response(url=f"{BASE}/contacts/42", json={"id": 42, "name": "Linus", "email": "l@example.com"})
+
+    result = await server.get_tickets(hydrate=True)
+
+    first = result["tickets"][0]
+    assert first["requester"]["name"] == "Grace"
+    assert first["company"] == {"id": 31, "name": "Acme", "domains": []}
+    assert first["responder"] == {"id": 11, "name": "Ada", "email": "ada@example.com"}
+    assert first["group"] == {"id": 21, "name": "Billing"}
+    assert result["tickets"][1]["requester"]["name"] == "Linus"
+    # 1 ticket page + agents + groups + 1 company + 2 contacts, not 4 per ticket.
+    assert len(httpx_mock.get_requests()) == 6
+
+
+@pytest.mark.asyncio
+async def test_get_tickets_by_ids_reports_missing(httpx_mock, env):
+    def handler(request: httpx.Request) -> httpx.Response:
+        ticket_id = int(request.url.path.rsplit("/", 1)[-1])
+        if ticket_id == 3:
+            return httpx.Response(404, json={"code": "not_found"})
+        return httpx.Response(200, json={"id": ticket_id})
+
+    httpx_mock.add_callback(handler, url=re.compile(rf"{BASE}/tickets/\d+"), is_reusable=True)
+
+    result = await server.get_tickets_by_ids([1, 2, 3, 2])
+
+    assert [t["id"] for t in result["tickets"]] == [1, 2, 2]
+    assert result["missing_ids"] == [3]
+    assert len(httpx_mock.get_requests()) == 3
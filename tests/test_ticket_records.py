@@ -0,0 +1,104 @@
+import pytest
+
+from freshdesk_mcp.records import COMPRESS_MIN_LENGTH, TicketRecord, format_timestamp, parse_timestamp
+from freshdesk_mcp.store import TicketStore
+
+
+def _api_ticket(ticket_id=1, **overrides):
+    ticket = {
+        "id": ticket_id,
+        "subject": "Printer on fire",
+        "type": "Incident",
+        "status": 2,
+        "priority": 3,
+        "source": 1,
+        "requester_id": 10,
+        "responder_id": None,
+        "group_id": 7,
+        "company_id": None,
+        "tags": ["hardware", "urgent"],
+        "created_at": "2024-05-01T08:30:00Z",
+        "updated_at": "2024-05-02T09:00:00Z",
+        "due_by": "2024-05-04T08:30:00Z",
+        "fr_due_by": "2024-05-01T16:30:00Z",
+        "custom_fields": {"cf_serial": "X1"},
+        "stats": {"first_responded_at": "2024-05-01T09:00:00Z", "resolved_at": None, "closed_at": None},
+    }
+    ticket.update(overrides)
+    return ticket
+
+
+def test_record_round_trips_to_the_trimmed_dict():
+    record = TicketRecord.from_api(_api_ticket())
+
+    assert record.to_dict() == {
+        "id": 1,
+        "subject": "Printer on fire",
+        "type": "Incident",
+        "status": 2,
+        "priority": 3,
+        "source": 1,
+        "requester_id": 10,
+        "responder_id": None,
+        "group_id": 7,
+        "company_id": None,
+        "tags": ["hardware", "urgent"],
+        "created_at": "2024-05-01T08:30:00Z",
+        "updated_at": "2024-05-02T09:00:00Z",
+        "due_by": "2024-05-04T08:30:00Z",
+        "fr_due_by": "2024-05-01T16:30:00Z",
+        "first_responded_at": "2024-05-01T09:00:00Z",
+        "resolved_at": None,
+        "closed_at": None,
+    }
+    assert TicketRecord(**record.to_dict()) == record
+    assert not hasattr(record, "__dict__")
+
+
+def test_records_share_interned_strings_and_store_epoch_seconds():
+    first = TicketRecord.from_api(_api_ticket(1))
+    second = TicketRecord.from_api(_api_ticket(2, tags=["hard" + "ware"], type="Inci" + "dent"))
+
+    assert first.tags[0] is second.tags[0]
+    assert first.type is second.type
+    assert first.created_at == parse_timestamp("2024-05-01T08:30:00Z") == 1714552200
+    assert format_timestamp(first.created_at) == "2024-05-01T08:30:00Z"
+
+
+def test_long_bodies_are_compressed_until_read():
+    body = "The printer caught fire again. " * 50
+    record = TicketRecord.from_api(_api_ticket(description_text=body))
+
+    assert len(body) >= COMPRESS_MIN_LENGTH
+    assert isinstance(record._body, bytes) and len(record._body) < len(body)
+    assert record.description_text == body
+    assert TicketRecord.from_api(_api_ticket(description_text="short")).description_text == "short"
+
+
+def test_store_persists_records(tmp_path, monkeypatch):
+    monkeypatch.setenv("FRESHDESK_CACHE_DIR", str(tmp_path))
+    store = TicketStore(lambda: "acme.freshdesk.com")
+    store.upsert(_api_ticket(1))
+    store.upsert(_api_ticket(2, tags=[]))
+    store.mark_synced()
+    store.advance("2024-05-02T09:00:00Z")
+    store.persist()
+
+    restored = TicketStore(lambda: "acme.freshdesk.com")
+    assert restored.restore()
+    assert [t.to_dict() for t in restored] == [t.to_dict() for t in store]
+    assert restored.cursor == "2024-05-02T09:00:00Z"
+
+
+def test_analytics_columns_match_for_records_and_dicts():
+    np = pytest.importorskip("numpy")
+    from freshdesk_mcp.analytics import TicketColumns
+
+    tickets = [_api_ticket(1), _api_ticket(2, created_at=None, tags=["urgent"], type=None)]
+    records = TicketColumns([TicketRecord.from_api(t) for t in tickets])
+    dicts = TicketColumns([TicketRecord.from_api(t).to_dict() for t in tickets])
+
+    for column in ("id", "status", "group_id", "created_at", "first_responded_at", "resolved_at", "tag_rows"):
+        np.testing.assert_array_equal(getattr(records, column), getattr(dicts, column))
+    assert records.tag_names == dicts.tag_names
+    assert records.type_names == dicts.type_names
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import pytest
+
+from freshdesk_mcp import server
+from freshdesk_mcp.deadlines import gather
+from freshdesk_mcp.tracing import NOOP_SPAN, STATUS_ERROR, tracer
+
+from conftest import BASE
+
+
+@pytest.fixture
+def trace_file(env, monkeypatch, tmp_path):
+    monkeypatch.setenv("FRESHDESK_RETRY_BACKOFF", "0")
+    monkeypatch.setenv("FRESHDESK_TRACING", "file")
+    path = tmp_path / "traces.ndjson"
+    monkeypatch.setenv("FRESHDESK_TRACE_FILE", str(path))
+    return path
+
+
+def _traces(path):
+    """Each exported trace as a list of (name, span) with attributes flattened."""
+
+    traces = []
+    for line in path.read_text().splitlines():
+        spans = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        for span in spans:
+            span["attrs"] = {a["key"]: next(iter(a["value"].values())) for a in span["attributes"]}
+        traces.append(spans)
+    return traces
+
+
+def _by_name(spans, name):
+    return [span for span in spans if span["name"] == name]
+
+
+@pytest.mark.asyncio
+async def test_tool_trace_shows_call_retries_and_attempts(trace_file, httpx_mock):
+    httpx_mock.add_response(url=f"{BASE}/contacts/5", status_code=503)
+    httpx_mock.add_response(url=f"{BASE}/contacts/5", json={"id": 5}, headers={"X-Ratelimit-Remaining": "42"})
+
+    await server.get_contact(5)
+
+    [spans] = _traces(trace_file)
+    [root] = _by_name(spans, "tool get_contact")
+    [call] = _by_name(spans, "freshdesk get_contact")
+    attempts = _by_name(spans, "HTTP GET")
+    assert "parentSpanId" not in root
+    assert call["parentSpanId"] == root["spanId"]
+    assert {span["traceId"] for span in spans} == {root["traceId"]}
+    assert [a["parentSpanId"] for a in attempts] == [call["spanId"]] * 2
+    assert [a["attrs"]["http.response.status_code"] for a in attempts] == ["503", "200"]
+    assert attempts[0]["status"]["code"] == STATUS_ERROR
+    assert attempts[1]["attrs"]["freshdesk.ratelimit.remaining"] == "42"
+    assert attempts[1]["attrs"]["http.request.resend_count"] == "1"
+    assert call["attrs"]["freshdesk.retries"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_cache_lookups_and_fanouts_are_spans(trace_file, httpx_mock):
+    httpx_mock.add_response(url=f"{BASE}/contact_fields", json=[{"id": 1}])
+
+    await server.list_contact_fields()
+    await server.list_contact_fields()
+
+    first, second = _traces(trace_file)
+    assert _by_name(first, "cache lookup")[0]["attrs"]["freshdesk.cache.hit"] is False
+    assert _by_name(second, "cache lookup")[0]["attrs"]["freshdesk.cache.hit"] is True
+    assert not _by_name(second, "HTTP GET")
+
+    async def child(n):
+        with tracer.span("child", {"n": n}):
+            await asyncio.sleep(0)
+
+    with tracer.span("parent"):
+        await gather(child(1), child(2))
+
+    spans = _traces(trace_file)[-1]
+    [fanout] = _by_name(spans, "fanout")
+    assert fanout["attrs"]["freshdesk.fanout.size"] == "2"
+    assert [span["parentSpanId"] for span in _by_name(spans, "child")] == [fanout["spanId"]] * 2
+
+
+@pytest.mark.asyncio
+async def test_console_exporter_prints_a_tree(monkeypatch, capsys):
+    monkeypatch.setenv("FRESHDESK_TRACING", "console")
+
+    with pytest.raises(ValueError):
+        with tracer.span("outer"):
+            with tracer.span("inner", {"k": "v"}):
+                raise ValueError("boom")
+
+    err = capsys.readouterr().err.splitlines()
+    assert err[0].startswith("trace ")
+    assert err[1].startswith("outer ") and "ERROR" in err[1]
+    assert err[2].startswith("  inner ") and "k=v" in err[2]
+
+
+def test_tracing_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("FRESHDESK_TRACING", raising=False)
+    with tracer.span("anything") as span:
+        assert span is NOOP_SPAN
@@ -0,0 +1,111 @@
+import base64
+
+import httpx
+import pytest
+
+from freshdesk_mcp import server, webhook
+from freshdesk_mcp.invalidation import Change, ChangeFeed
+from freshdesk_mcp.webhook import WEBHOOK_PATH, create_app, parse_changes
+
+from conftest import BASE
+
+
+def test_parse_changes_payload_shapes():
+    assert parse_changes({"event": "ticket_updated", "ticket_id": "#42"}) == [Change("ticket", 42)]
+    assert parse_changes({"freshdesk_webhook": {"ticket_id": 42}}) == [Change("ticket", 42)]
+    assert parse_changes({"event": "ticket_deleted", "ticket_id": 42}) == [Change("ticket", 42, deleted=True)]
+    assert parse_changes({"event": "conversation_added", "ticket_id": 42, "conversation_id": 7}) == [
+        Change("conversation", 7, parent_id=42),
+        Change("ticket", 42),
+    ]
+    assert parse_changes({"event": "contact_updated", "contact_id": 5, "ticket_id": 42}) == [Change("contact", 5)]
+    assert parse_changes({"event": "company_deleted", "company_id": 9}) == [Change("company", 9, deleted=True)]
+    assert parse_changes({"event": "ticket_updated", "ticket_id": "{{ticket.id}}"}) == []
+
+
+async def _post(app, **kwargs):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://webhook") as client:
+        return await client.post(WEBHOOK_PATH, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_receiver_verifies_secret_and_publishes():
+    feed = ChangeFeed()
+    received = []
+    feed.subscribe("ticket", received.append)
+    app = create_app(feed, "s3cret")
+
+    denied = await _post(app, json={"ticket_id": 1}, headers={"X-Freshdesk-Webhook-Secret": "wrong"})
+    assert denied.status_code == 401
+    missing = await _post(app, json={"ticket_id": 1})
+    assert missing.status_code == 401
+
+    accepted = await _post(app, json={"ticket_id": 1}, headers={"X-Freshdesk-Webhook-Secret": "s3cret"})
+    assert accepted.status_code == 202
+    basic = base64.b64encode(b"freshdesk:s3cret").decode()
+    accepted = await _post(app, json={"ticket_id": 2}, headers={"Authorization": f"Basic {basic}"})
+    assert accepted.json() == {"accepted": 1}
+    assert [change.id for change in received] == [1, 2]
+
+    invalid = await _post(app, content=b"not json", headers={"X-Freshdesk-Webhook-Secret": "s3cret"})
+    assert invalid.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_receiver_stops_reading_oversized_payloads(monkeypatch):
+    monkeypatch.setattr(webhook, "MAX_BODY_BYTES", 10)
+    app = create_app(ChangeFeed(), "s3cret")
+    headers = {"X-Freshdesk-Webhook-Secret": "s3cret"}
+
+    declared = await _post(app, content=b"x" * 11, headers=headers)
+    assert declared.status_code == 413
+
+    sent = []
+
+    async def chunks():
+        for _ in range(5):
+            sent.append(8)
+            yield b"x" * 8
+
+    # Chunked, so only the running count can catch it.
+    streamed = await _post(app, content=chunks(), headers=headers)
+    assert streamed.status_code == 413
+    assert len(sent) == 2
+
+
+@pytest.mark.asyncio
+async def test_ticket_change_refreshes_mirrored_ticket(httpx_mock, env):
+    server.ticket_store.upsert({"id": 42, "status": 2, "updated_at": "2024-01-01T00:00:00Z"})
+    server.ticket_store.upsert({"id": 43, "status": 2})
+    server.ticket_store.mark_synced()
+    server.ticket_store.advance("2024-01-01T00:00:00Z")
+    httpx_mock.add_response(
+        url=f"{BASE}/tickets/42?include=stats",
+        json={"id": 42, "status": 4, "updated_at": "2024-01-02T00:00:00Z", "stats": {"resolved_at": "2024-01-02T00:00:00Z"}},
+    )
+
+    await server.changes.publish(Change("ticket", 42))
+    await server.changes.publish(Change("ticket", 43, deleted=True))
+
+    assert server.ticket_store.get(42).status == 4
+    assert server.ticket_store.get(42).get("resolved_at") == "2024-01-02T00:00:00Z"
+    assert server.ticket_store.get(43) is None
+    assert server.ticket_store.cursor == "2024-01-01T00:00:00Z"
+
+
+@pytest.mark.asyncio
+async def test_company_change_replaces_directory_entry(httpx_mock, env):
+    httpx_mock.add_response(
+        url=f"{BASE}/companies?page=1&per_page=100",
+        json=[{"id": 9, "name": "Acme"}, {"id": 10, "name": "Globex"}],
+    )
+    await server.company_directory.ensure_loaded()
+    httpx_mock.add_response(url=f"{BASE}/companies/9", json={"id": 9, "name": "Acme Holdings"})
+
+    await server.changes.publish(Change("company", 9))
+    await server.changes.publish(Change("company", 10, deleted=True))
+
+    assert server.company_directory.get(9)["name"] == "Acme Holdings"
+    assert server.company_directory.get(10) is None
+    assert server.company_directory.ids_for_name("Acme Holdings") == [9]